@@ -1,13 +1,21 @@
-from flask import Flask, jsonify
+import logging
+import time
+from flask import Flask, g, jsonify, request
 from flask_cors import CORS
 import os
-from app.utils.json_encoder import MongoJSONEncoder
+from app.utils.json_provider import FastJSONProvider
+from app.utils import metrics, result_store, structured_logging, timing, tracing
+from app.utils.profiler import profiler
+from config import Config
+
+logger = logging.getLogger(__name__)
 
 def create_app():
     app = Flask(__name__)
+    structured_logging.configure_logging()
     
-    # Configure custom JSON encoder for MongoDB serialization
-    app.json_encoder = MongoJSONEncoder
+    # Serialize Mongo/BSON results in one pass (app.json_encoder is ignored by Flask >= 2.3)
+    app.json = FastJSONProvider(app)
     
     # Configure CORS to allow frontend requests (dev + production)
     frontend_origin = os.getenv("FRONTEND_ORIGIN")
@@ -22,6 +30,71 @@ def create_app():
     # restrict origins to the known frontend origins above.
     CORS(app)
 
+    # Connect to MongoDB off the request path; requests fail fast while it is down
+    from app.db_mongo import start_mongo_bootstrap
+    start_mongo_bootstrap()
+
+    # Look up existing text indexes for partial-name lookups in the background
+    # (read-only; creating them is an admin step, see tools/text_indexes.py)
+    from app.db import engines
+    from app.utils.text_search import text_search
+    for db_name, engine in engines.items():
+        text_search.discover_engine(db_name, engine)
+
+    # Per-request stage timings, reported in `performance` and Server-Timing,
+    # plus the request metrics served on /metrics, the request ID on every log
+    # line and the root span of sampled traces
+    @app.before_request
+    def start_timing():
+        g.request_id = structured_logging.start_request(request.headers.get("X-Request-ID"))
+        result_store.set_session(request.headers.get("X-Session-Id") or request.remote_addr)
+        timing.start_request()
+        g.metrics_route = request.url_rule.rule if request.url_rule else "unmatched"
+        g.trace = tracing.start_trace(f"{request.method} {g.metrics_route}", request.headers.get("traceparent"), {
+            "http.method": request.method,
+            "http.route": g.metrics_route,
+            "http.request_id": g.request_id,
+        })
+        g.metrics_started = time.perf_counter()
+        metrics.REQUESTS_IN_FLIGHT.inc(g.metrics_route)
+        from app.routes import is_admin_request
+        requested = request.headers.get("X-Profile") == "1" and is_admin_request()
+        trigger = profiler.trigger_for(request.path, requested)
+        if trigger:
+            g.profile = profiler.begin(request.method, request.path, trigger)
+
+    @app.after_request
+    def add_server_timing(response):
+        if "request_id" in g:
+            response.headers["X-Request-ID"] = g.request_id
+        if g.get("trace") is not None:
+            g.trace.set_attribute("http.status_code", response.status_code)
+            response.headers["X-Trace-Id"] = g.trace.trace_id
+        session = g.pop("profile", None)
+        if session is not None:
+            response.headers["X-Profile-Id"] = session.finish({"performance": timing.performance()})
+        request_timing = timing.current()
+        if request_timing is not None:
+            response.headers["Server-Timing"] = request_timing.server_timing()
+            # Lets the frontend origin read the breakdown via the Resource Timing API
+            response.headers["Timing-Allow-Origin"] = "*"
+        if "metrics_started" in g:
+            metrics.REQUEST_SECONDS.observe(
+                time.perf_counter() - g.metrics_started, g.metrics_route, request.method, str(response.status_code)
+            )
+        return response
+
+    @app.teardown_request
+    def end_timing(exc):
+        session = g.pop("profile", None)
+        if session is not None:
+            session.finish({"performance": timing.performance(), "error": str(exc) if exc else None})
+        tracing.end_trace(g.pop("trace", None), exc)
+        timing.end_request()
+        structured_logging.end_request()
+        if "metrics_route" in g:
+            metrics.REQUESTS_IN_FLIGHT.dec(g.metrics_route)
+
     # Register blueprints
     from .routes import main
     app.register_blueprint(main)
@@ -33,3 +106,76 @@ def create_app():
         return jsonify({"id": ObjectId()})
 
     return app
+
+
+def create_asgi_app():
+    """
+    ASGI entry point: /api/nl-to-sql and /api/nl-to-mongodb run on the asyncio
+    pipeline, every other route is the regular Flask app.
+    """
+    from app.asgi import AsyncRouter
+    from app.async_routes import ASYNC_ROUTES
+    from app.db_async import dispose_async_engines
+    from app.db_mongo_async import close_motor_clients
+
+    async def close_clients():
+        close_motor_clients()
+
+    return AsyncRouter(create_app(), ASYNC_ROUTES, on_shutdown=[dispose_async_engines, close_clients])
+
+
+def warm_up():
+    """
+    Load the SQL and Mongo schema catalogs and finish text index lookups once,
+    in the gunicorn master before workers fork, so every worker starts warm.
+    """
+    from app.db import engines
+    from app.db_mongo import get_mongo_collections_schema
+    from app.schema_inspector import get_all_db_schemas
+    from app.utils.text_search import text_search
+    try:
+        schemas = get_all_db_schemas(engines)
+        logger.info("Warmed SQL schemas: %s", ", ".join(schemas) or "none")
+    except Exception as e:
+        logger.warning("Could not warm SQL schemas: %s", e)
+    try:
+        schema = get_mongo_collections_schema()
+        logger.info("Warmed Mongo catalog: %d database(s)", len(schema))
+    except Exception as e:
+        logger.warning("Could not warm Mongo catalog: %s", e)
+    try:
+        text_search.wait(timeout=Config.REQUEST_TIMEOUT)
+    except Exception as e:
+        logger.warning("Text index lookups still running at fork: %s", e)
+
+
+def reinit_after_fork():
+    """
+    Re-create per-process resources in a freshly forked worker. Pooled SQL
+    connections belong to the parent, so engines drop them without closing
+    (close=False keeps the parent's sockets intact); Mongo clients,
+    background thread pools, the log listener and the trace exporter are rebuilt,
+    and the worker starts sharing its metrics through METRICS_MULTIPROC_DIR.
+    """
+    from app import db, sql_executor, db_mongo
+    from app.utils.index_advisor import index_advisor
+    from app.utils.job_queue import job_queue
+    from app.utils.process_pool import process_pool
+    from app.utils.text_search import text_search
+    from app.utils.thumbnail_cache import thumbnail_cache
+    engines = list(db.engines.values())
+    if sql_executor.engine not in engines:
+        engines.append(sql_executor.engine)
+    for engine in engines:
+        engine.dispose(close=False)
+    db_mongo.reset_after_fork()
+    index_advisor.reset_after_fork()
+    text_search.reset_after_fork()
+    thumbnail_cache.reset_after_fork()
+    job_queue.reset_after_fork()
+    process_pool.reset_after_fork()
+    structured_logging.reset_after_fork()
+    if Config.METRICS_MULTIPROC_DIR:
+        from app.utils.metrics import registry
+        registry.enable_multiprocess(Config.METRICS_MULTIPROC_DIR, Config.METRICS_FLUSH_INTERVAL)
+    tracing.exporter.reset_after_fork()
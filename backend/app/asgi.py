@@ -0,0 +1,131 @@
+import logging
+import json
+import time
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app.utils import metrics, result_store, structured_logging, timing, tracing
+from app.utils.profiler import profiler
+from app.utils.json_provider import dumps_bytes
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRouter:
+    """
+    ASGI app that serves the async routes natively on the event loop and hands
+    every other request (including CORS preflights) to the Flask app, which
+    asgiref runs on its thread pool. A handler that raises is answered
+    with a JSON 500. A profiled async request samples the event-loop
+    thread, so its stacks show the loop's own work and where handlers
+    await; work a handler hands to asyncio.to_thread or an executor runs
+    on shared pool threads and is not in the profile.
+    """
+
+    def __init__(self, flask_app, routes, on_shutdown=()):
+        self.flask_app = flask_app
+        self.routes = routes
+        self.on_shutdown = list(on_shutdown)
+        self._wsgi = WsgiToAsgi(flask_app)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        handler = self.routes.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+        if handler is None:
+            return await self._wsgi(scope, receive, send)
+        route = scope["path"]
+        started = time.perf_counter()
+        metrics.REQUESTS_IN_FLIGHT.inc(route)
+        request_headers = dict(scope.get("headers") or [])
+        request_id = structured_logging.start_request((request_headers.get(b"x-request-id") or b"").decode("latin-1"))
+        client = scope.get("client") or (None, None)
+        result_store.set_session((request_headers.get(b"x-session-id") or b"").decode("latin-1") or client[0])
+        request_timing = timing.start_request()
+        trace = tracing.start_trace(
+            f"{scope['method']} {route}", (request_headers.get(b"traceparent") or b"").decode("latin-1"),
+            {"http.method": scope["method"], "http.route": route, "http.request_id": request_id},
+        )
+        profile = self._begin_profile(scope)
+        profile_id = None
+        error = None
+        try:
+            try:
+                data = json.loads(await self._read_body(receive) or b"null")
+            except ValueError:
+                data = None
+            payload, status = await handler(data if isinstance(data, dict) else {})
+            with timing.stage("serialize"):
+                body = dumps_bytes(payload) + b"\n"
+        except Exception as e:
+            # Same shape as the sync routes' server_error responses, with the CORS header and request id below
+            logger.exception("Uncaught error in async route %s", route)
+            error = e
+            status = 500
+            body = dumps_bytes({"success": False, "error": "Internal server error.",
+                                "type": "server_error", "request_id": request_id}) + b"\n"
+        try:
+            server_timing = request_timing.server_timing()
+            if trace is not None:
+                trace.set_attribute("http.status_code", status)
+        finally:
+            if profile is not None:
+                profile_id = profile.finish({"performance": request_timing.performance(),
+                                             "error": str(error) if error else None,
+                                             "sampled_thread": "event loop"})
+            tracing.end_trace(trace, error)
+            timing.end_request()
+            structured_logging.end_request()
+            metrics.REQUESTS_IN_FLIGHT.dec(route)
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, route, scope["method"], str(status))
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            # Same policy as CORS(app) on the Flask side
+            (b"access-control-allow-origin", b"*"),
+            (b"server-timing", server_timing.encode()),
+            (b"timing-allow-origin", b"*"),
+            (b"x-request-id", request_id.encode()),
+        ]
+        if trace is not None:
+            headers.append((b"x-trace-id", trace.trace_id.encode()))
+        if profile_id:
+            headers.append((b"x-profile-id", profile_id.encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    def _begin_profile(scope):
+        from app.routes import is_admin_caller
+        headers = dict(scope.get("headers") or [])
+        requested = headers.get(b"x-profile") == b"1" and is_admin_caller(
+            (headers.get(b"x-admin-token") or b"").decode("latin-1") or None
+        )
+        trigger = profiler.trigger_for(scope["path"], requested)
+        return profiler.begin(scope["method"], scope["path"], trigger) if trigger else None
+
+    @staticmethod
+    async def _read_body(receive):
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        return b"".join(chunks)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                for callback in self.on_shutdown:
+                    try:
+                        await callback()
+                    except Exception as e:
+                        logger.warning("ASGI shutdown hook failed: %s", e)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
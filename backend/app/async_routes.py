@@ -0,0 +1,297 @@
+"""
+Async versions of the NL query routes, served by the ASGI app (see asgi.py).
+Gemini, SQL and Mongo waits are awaited on the event loop, so idle requests
+hold no OS thread. Handlers take the decoded JSON body and return
+(payload, status); the sync Flask routes in routes.py are unchanged.
+"""
+import asyncio
+import concurrent.futures
+import logging
+
+from app.db_async import execute_sql_on_all_databases_async
+from app.db_mongo_async import (
+    execute_mongo_query_async,
+    execute_mongo_query_across_dbs_async,
+    find_db_for_collection_async,
+)
+from app.llm.gemini_sql_generator import generate_sql_from_nl_async
+from app.llm.gemini_mongo_generator import generate_mongo_query_from_nl
+from app.utils import timing
+from app.utils.job_queue import JobCancelled, job_queue
+from app.utils.json_provider import dumps_bytes
+from app.utils.llm_handler import convert_result_to_natural_language, summarize_async
+from app.utils.result_store import result_store
+from app.utils.chart_pushdown import mongo_source, sql_source
+from app.routes import (
+    detect_chart_intent,
+    detect_existence_question,
+    generate_query_suggestions,
+    greeting_payload,
+    is_greeting_or_general,
+    job_accepted,
+    wants_job,
+)
+from app.utils.structured_logging import payload
+
+logger = logging.getLogger(__name__)
+
+
+async def _execute_mongo_plan(mongo_query_dict):
+    """
+    Run a generated Mongo query, probing other databases when the suggested one
+    has no matching documents. Returns (rows, db_name_used, source_db); source_db
+    is None when the rows were gathered across databases and cannot be re-run as one find.
+    """
+    collection = mongo_query_dict.get("collection")
+    filter_query = mongo_query_dict.get("filter", {})
+    projection = mongo_query_dict.get("projection")
+    limit = mongo_query_dict.get("limit", 50)
+    db_name = mongo_query_dict.get("db_name")
+
+    if db_name:
+        rows = await execute_mongo_query_async(db_name, collection, filter_query, projection, limit)
+        if rows:
+            return rows, db_name, db_name
+    resolved_db = await find_db_for_collection_async(collection, filter_query)
+    if resolved_db and resolved_db != db_name:
+        rows = await execute_mongo_query_async(resolved_db, collection, filter_query, projection, limit)
+        return rows, resolved_db, resolved_db
+    # As a last resort scan all DBs and take the first non-empty result
+    aggregated = await execute_mongo_query_across_dbs_async(
+        collection=collection, filter_query=filter_query, projection=projection, limit=limit
+    )
+    for dbn, res in aggregated.items():
+        if dbn != db_name and isinstance(res, list) and res:
+            return res, dbn, None
+    return [], None, None
+
+
+async def _success_payload(question, rows, db_type_used, source=None, body=None, **extra):
+    body = body or {}
+    summary = await summarize_async(question, rows, body.get("summary"), body.get("defer_summary"))
+    # May spill older results to disk, so off the loop
+    result_id = await asyncio.to_thread(result_store.put, rows, question=question, db_type_used=db_type_used, source=source)
+    return {
+        "success": True,
+        "answer": convert_result_to_natural_language(question, rows),
+        **summary,
+        "data": rows,
+        "result_id": result_id,
+        "db_type_used": db_type_used,
+        **extra,
+        "chart_request": detect_chart_intent(question),
+        "performance": timing.performance()
+    }
+
+
+def _existence_payload(existence, db_type_used):
+    return {
+        "success": True,
+        "answer": existence["answer"],
+        "summary": existence.get("summary"),
+        "data": [],
+        "db_type_used": db_type_used,
+        "performance": timing.performance()
+    }
+
+
+async def nl_to_mongodb_async(data):
+    """Async /api/nl-to-mongodb"""
+    question = ""
+    try:
+        question = data.get("question", "")
+        # Schema-backed helpers may introspect the databases; keep them off the loop
+        if is_greeting_or_general(question):
+            return await asyncio.to_thread(greeting_payload, question, "mongo"), 200
+        existence = await asyncio.to_thread(detect_existence_question, question, "mongo")
+        if existence is not None:
+            return _existence_payload(existence, "mongo"), 200
+
+        with timing.stage("mongo_generate"):
+            mongo_query_dict = await asyncio.to_thread(generate_mongo_query_from_nl, question)
+        logger.debug("Attempting Mongo", extra={"mongo_query": payload(mongo_query_dict)})
+        if isinstance(mongo_query_dict, dict) and "error" in mongo_query_dict:
+            return {
+                "success": False,
+                "error": f"Failed to generate MongoDB query: {mongo_query_dict['error']}",
+                "suggestions": await asyncio.to_thread(generate_query_suggestions, question, "mongo"),
+                "type": "query_failure"
+            }, 500
+        if not isinstance(mongo_query_dict, dict) or "collection" not in mongo_query_dict:
+            return {
+                "success": False,
+                "error": "Could not understand the MongoDB query request",
+                "suggestions": await asyncio.to_thread(generate_query_suggestions, question, "mongo"),
+                "type": "parsing_failure"
+            }, 500
+
+        mongo_error = None
+        try:
+            rows, db_name_used, source_db = await _execute_mongo_plan(mongo_query_dict)
+            if rows:
+                logger.info("MongoDB execution successful and data found")
+                return await _success_payload(
+                    question, rows, "mongo", mongo_source(mongo_query_dict, source_db),
+                    body=data, db_name_used=db_name_used
+                ), 200
+        except Exception as e:
+            mongo_error = str(e)
+            logger.warning("MongoDB execution failed: %s", mongo_error)
+        return {
+            "success": False,
+            "error": f"MongoDB execution failed: {mongo_error}",
+            "suggestions": await asyncio.to_thread(generate_query_suggestions, question, "mongo"),
+            "type": "execution_failure"
+        }, 500
+    except Exception as e:
+        logger.exception("Uncaught error in nl_to_mongodb_async")
+        return {
+            "success": False,
+            "error": f"An unexpected server error occurred: {str(e)}",
+            "suggestions": await asyncio.to_thread(generate_query_suggestions, question, "mongo"),
+            "type": "server_error"
+        }, 500
+
+
+async def nl_to_sql_async(data):
+    """Async /api/nl-to-sql: SQL first, MongoDB as the fallback"""
+    question = ""
+    sql_error = None
+    mongo_error = None
+    try:
+        question = data.get("question", "")
+        db_type_hint = data.get("db_type", "sql").lower()
+        if db_type_hint not in ["sql", "mongo"]:
+            return {"error": "Invalid db_type. Must be 'sql' or 'mongo'."}, 400
+        if is_greeting_or_general(question):
+            return await asyncio.to_thread(greeting_payload, question, db_type_hint), 200
+
+        # --- 1. SQL (primary) ---
+        existence = await asyncio.to_thread(detect_existence_question, question, "sql")
+        if existence is not None:
+            return _existence_payload(existence, "sql"), 200
+
+        try:
+            sql_dict = await generate_sql_from_nl_async(question)
+            logger.debug("Attempting SQL", extra={"sql_query": payload(sql_dict)})
+            if isinstance(sql_dict, dict) and "error" in sql_dict:
+                sql_error = sql_dict["error"]
+                logger.warning("SQL generation failed: %s. Proceeding to Mongo fallback", sql_error)
+            else:
+                query_results = await execute_sql_on_all_databases_async(sql_dict)
+                merged_rows = []
+                separate_results = {}
+                for db_name, rows_or_error in query_results.items():
+                    if isinstance(rows_or_error, list):
+                        merged_rows.extend(rows_or_error)
+                        separate_results[db_name] = rows_or_error
+                    else:
+                        sql_error = rows_or_error
+                        separate_results[db_name] = {"error": rows_or_error}
+                if merged_rows:
+                    logger.info("SQL execution successful and data found; returning SQL results")
+                    return await _success_payload(
+                        question, merged_rows, "sql", sql_source(sql_dict, separate_results),
+                        body=data, separate_results=separate_results
+                    ), 200
+                logger.info("SQL executed but returned 0 rows; attempting Mongo fallback")
+        except Exception as e:
+            sql_error = str(e)
+            logger.warning("SQL execution failed: %s. Attempting Mongo fallback", sql_error)
+
+        # --- 2. MongoDB (fallback) ---
+        logger.info("Falling back to MongoDB")
+        existence = await asyncio.to_thread(detect_existence_question, question, "mongo")
+        if existence is not None:
+            return _existence_payload(existence, "mongo"), 200
+
+        with timing.stage("mongo_generate"):
+            mongo_query_dict = await asyncio.to_thread(generate_mongo_query_from_nl, question)
+        logger.debug("Attempting Mongo", extra={"mongo_query": payload(mongo_query_dict)})
+        if mongo_query_dict is None:
+            mongo_error = "MongoDB query generation failed (LLM returned None)."
+        elif isinstance(mongo_query_dict, dict) and "collection" in mongo_query_dict:
+            try:
+                rows, db_name_used, source_db = await _execute_mongo_plan(mongo_query_dict)
+                if rows:
+                    logger.info("MongoDB execution successful and data found; returning Mongo results")
+                    return await _success_payload(
+                        question, rows, "mongo", mongo_source(mongo_query_dict, source_db),
+                        body=data, db_name_used=db_name_used
+                    ), 200
+                logger.info("MongoDB query executed successfully but returned no data")
+            except Exception as e:
+                mongo_error = str(e)
+                logger.warning("MongoDB execution failed: %s", mongo_error)
+        else:
+            mongo_error = mongo_query_dict.get("error", "MongoDB query generation failed with unexpected dictionary structure.")
+            logger.warning("MongoDB generation failed: %s", mongo_error)
+
+        # --- 3. Both failed ---
+        logger.warning("Both SQL and Mongo attempts failed or returned no data")
+        final_error = "Failed to get data from both databases."
+        if sql_error and mongo_error:
+            final_error += f" (SQL failure: {sql_error}. Mongo failure: {mongo_error})"
+        elif sql_error:
+            final_error += f" (SQL failure: {sql_error})"
+        elif mongo_error:
+            final_error += f" (Mongo failure: {mongo_error})"
+        else:
+            final_error += " (Queries executed but returned 0 results from both sources.)"
+        return {
+            "success": False,
+            "error": final_error,
+            "suggestions": await asyncio.to_thread(generate_query_suggestions, question, "sql"),
+            "original_question": question,
+            "type": "query_failure_dual"
+        }, 500
+    except Exception as e:
+        logger.exception("Uncaught error in nl_to_sql_async")
+        return {
+            "success": False,
+            "error": f"An unexpected server error occurred: {str(e)}",
+            "suggestions": await asyncio.to_thread(generate_query_suggestions, question, "sql"),
+            "type": "server_error"
+        }, 500
+
+
+def _as_job(kind, handler):
+    """
+    With `async: true` the handler runs as a background job: the coroutine
+    still runs on this event loop while a job worker waits for it and stores
+    its payload; cancelling the job cancels the coroutine.
+    """
+    async def route(data):
+        if not wants_job(data):
+            return await handler(data)
+        loop = asyncio.get_running_loop()
+        body = {key: value for key, value in data.items() if key != "async"}
+
+        async def run_handler():
+            timing.start_request()
+            try:
+                return await handler(body)
+            finally:
+                timing.end_request()
+
+        def run(job):
+            future = asyncio.run_coroutine_threadsafe(run_handler(), loop)
+            while True:
+                try:
+                    payload, status = future.result(timeout=0.5)
+                    break
+                except concurrent.futures.TimeoutError:
+                    if job.cancel_requested():
+                        future.cancel()
+                        raise JobCancelled()
+            job.write_result([dumps_bytes(payload)], "application/json", status_code=status)
+
+        return job_accepted(await asyncio.to_thread(job_queue.submit, kind, run))
+    return route
+
+
+# (method, path) -> handler, mounted by app.create_asgi_app
+ASYNC_ROUTES = {
+    ("POST", "/api/nl-to-sql"): _as_job("nl-to-sql", nl_to_sql_async),
+    ("POST", "/api/nl-to-mongodb"): _as_job("nl-to-mongodb", nl_to_mongodb_async),
+}
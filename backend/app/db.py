@@ -1,7 +1,12 @@
 import os
+import time
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, inspect, text
 from config import Config
+from app.utils.sql_rows import result_to_dicts
+from app.utils.index_advisor import index_advisor
+from app.utils import metrics, timing, tracing
+from app.utils.text_search import is_shadow_table, text_search
 
 load_dotenv()
 
@@ -15,18 +20,24 @@ for i in range(1, 6):  # We have DATABASE_URL_1 through DATABASE_URL_5
 # Create SQLAlchemy engines with pooling configuration
 engines = {}
 for name, uri in DATABASES.items():
-    engines[name] = create_engine(
-        uri,
-        pool_size=Config.DB_POOL_SIZE,
-        max_overflow=Config.DB_MAX_OVERFLOW,
-        pool_timeout=Config.DB_POOL_TIMEOUT
-    )
+    options = {}
+    if not uri.startswith("sqlite"):
+        # SQLite engines use a single-connection/null pool that takes no sizing options
+        options = dict(
+            pool_size=Config.DB_POOL_SIZE,
+            max_overflow=Config.DB_MAX_OVERFLOW,
+            pool_timeout=Config.DB_POOL_TIMEOUT
+        )
+    engines[name] = create_engine(uri, **options)
+    tracing.instrument_engine(engines[name], name)
 engine = engines.get("db2", next(iter(engines.values())))  # Use books_db (db2) as default, or first available database
 
 def get_schema(db_name="db1"):
     inspector = inspect(engines[db_name])
     schema = {}
     for table_name in inspector.get_table_names():
+        if is_shadow_table(table_name):
+            continue
         columns = inspector.get_columns(table_name)
         schema[table_name] = [col["name"] for col in columns]
     return schema
@@ -50,15 +61,26 @@ def execute_sql_on_all_databases(sql_dict):
         try:
             if db_name not in engines:
                 continue  # Skip if database is not configured
+            checkout_started = time.perf_counter()
             with engines[db_name].connect() as conn:
+                metrics.POOL_WAIT_SECONDS.observe(time.perf_counter() - checkout_started, db_name)
                 # Ensure we pass an executable SQL object to SQLAlchemy
                 if isinstance(sql_query, str):
+                    # Partial-name LIKE predicates go through the text indexes
+                    sql_query = text_search.rewrite_sql(db_name, engines[db_name], sql_query)
                     stmt = text(sql_query)
                 else:
                     stmt = sql_query
-                result = conn.execute(stmt)
-                # Use row._mapping for robust conversion across SQLAlchemy versions
-                results[db_name] = [dict(row._mapping) for row in result]
+                started = time.perf_counter()
+                with tracing.span("sql.query", {"db.name": db_name}) as trace_span:
+                    result = conn.execute(stmt)
+                    # Column converters are derived once per result from cursor.description
+                    results[db_name] = result_to_dicts(result)
+                    trace_span.set_attribute("db.rows", len(results[db_name]))
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                index_advisor.record_sql(db_name, engines[db_name], str(sql_query), elapsed_ms)
+                timing.record(f"sql_exec_{db_name}", elapsed_ms)
+                metrics.SQL_SECONDS.observe(elapsed_ms / 1000, db_name)
         except Exception as e:
             results[db_name] = {"error": str(e)}
     return results
@@ -0,0 +1,119 @@
+"""
+asyncio counterparts of app.db for the ASGI pipeline. Each configured engine
+gets an async twin on an asyncio driver (asyncpg, aiosqlite); engines whose
+dialect has no async driver fall back to the sync engine on a worker thread.
+"""
+import asyncio
+import logging
+import time
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from config import Config
+from app.db import engines
+from app.utils.sql_rows import result_to_dicts
+from app.utils.index_advisor import index_advisor
+from app.utils import metrics, timing, tracing
+from app.utils.text_search import text_search
+
+logger = logging.getLogger(__name__)
+
+# Sync dialect -> driver used for its async twin
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+# Created lazily: async pools belong to the event loop (and process) that opened them
+_async_engines = {}
+
+
+def _async_url(url):
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        return None
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}")
+
+
+def get_async_engine(db_name):
+    """Return the async engine for ``db_name``, or None when its dialect has no async driver"""
+    if db_name in _async_engines:
+        return _async_engines[db_name]
+    sync_engine = engines[db_name]
+    url = _async_url(sync_engine.url)
+    async_engine = None
+    if url is not None:
+        options = {}
+        if url.get_backend_name() != "sqlite":
+            options = dict(
+                pool_size=Config.DB_POOL_SIZE,
+                max_overflow=Config.DB_MAX_OVERFLOW,
+                pool_timeout=Config.DB_POOL_TIMEOUT
+            )
+        try:
+            async_engine = create_async_engine(url, **options)
+            tracing.instrument_engine(async_engine.sync_engine, db_name)
+        except Exception as e:
+            # e.g. the async driver is not installed; keep serving through the sync engine
+            logger.warning("No async engine for %s (%s): %s", db_name, url.drivername, e)
+    _async_engines[db_name] = async_engine
+    return async_engine
+
+
+async def dispose_async_engines():
+    for async_engine in list(_async_engines.values()):
+        if async_engine is not None:
+            await async_engine.dispose()
+    _async_engines.clear()
+
+
+def _execute_sync(db_name, stmt):
+    checkout_started = time.perf_counter()
+    with engines[db_name].connect() as conn:
+        started = time.perf_counter()
+        metrics.POOL_WAIT_SECONDS.observe(started - checkout_started, db_name)
+        return result_to_dicts(conn.execute(stmt)), started
+
+
+async def _execute_on(db_name, sql_query):
+    sync_engine = engines[db_name]
+    if isinstance(sql_query, str):
+        # Partial-name LIKE predicates go through the text indexes
+        sql_query = text_search.rewrite_sql(db_name, sync_engine, sql_query)
+        stmt = text(sql_query)
+    else:
+        stmt = sql_query
+    async_engine = get_async_engine(db_name)
+    with tracing.span("sql.query", {"db.name": db_name}) as trace_span:
+        if async_engine is None:
+            rows, started = await asyncio.to_thread(_execute_sync, db_name, stmt)
+        else:
+            checkout_started = time.perf_counter()
+            async with async_engine.connect() as conn:
+                started = time.perf_counter()
+                metrics.POOL_WAIT_SECONDS.observe(started - checkout_started, db_name)
+                # Async results are buffered, so rows are materialized like the sync path
+                rows = result_to_dicts(await conn.execute(stmt))
+        trace_span.set_attribute("db.rows", len(rows))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    index_advisor.record_sql(db_name, sync_engine, str(sql_query), elapsed_ms)
+    timing.record(f"sql_exec_{db_name}", elapsed_ms)
+    metrics.SQL_SECONDS.observe(elapsed_ms / 1000, db_name)
+    return rows
+
+
+async def execute_sql_on_all_databases_async(sql_dict):
+    """
+    Async execute_sql_on_all_databases: every database is queried concurrently.
+    Returns: {db_name: [rows]} or {db_name: {"error": ...}}
+    """
+    if isinstance(sql_dict, str):
+        sql_dict = {"db2": sql_dict}  # Use books_db by default
+    targets = [(db_name, sql_query) for db_name, sql_query in sql_dict.items() if db_name in engines]
+    outcomes = await asyncio.gather(
+        *(_execute_on(db_name, sql_query) for db_name, sql_query in targets),
+        return_exceptions=True
+    )
+    results = {}
+    for (db_name, _), outcome in zip(targets, outcomes):
+        results[db_name] = {"error": str(outcome)} if isinstance(outcome, Exception) else outcome
+    return results
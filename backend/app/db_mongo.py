@@ -1,181 +1,549 @@
 
+import logging
 import os
+import time
+import hashlib
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
 import pymongo
+import gridfs
+from pymongo import monitoring
 from bson import ObjectId
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
 from config import Config
+from app.utils.cache_handler import cache_handler
+from app.utils import timing, tracing
+from app.utils.metrics import MONGO_SECONDS
+from app.utils.index_advisor import index_advisor
+from app.utils.structured_logging import payload
 
-_mongo_client = None
+logger = logging.getLogger(__name__)
+
+# Decode documents as raw BSON when we only need byte offsets into them
+_RAW_CODEC_OPTIONS = CodecOptions(document_class=RawBSONDocument)
+
+_mongo_client = None  # primary client: the first server that answered
 _last_mongo_uri = None
 
-def _initialize_mongo_client():
-    global _mongo_client
-    if _mongo_client:
-        return
-    # Build list of candidate URIs to try.
-    global _last_mongo_uri
+# Federation registry: one client (with its own pool) per reachable server,
+# keyed by the server's host list, plus a catalog of which server hosts what.
+_mongo_clients = {}
+_server_uris = {}
+_registry_lock = threading.Lock()
+_catalog = {"built_at": 0.0, "databases": {}}
+_catalog_lock = threading.Lock()
+_fanout_executor = ThreadPoolExecutor(max_workers=Config.MONGO_FANOUT_WORKERS, thread_name_prefix="mongo-fanout")
+
+SYSTEM_DATABASES = ("admin", "local", "config")
+
+
+class _CommandMetrics(monitoring.CommandListener):
+    """
+    Feeds chatbot_mongo_command_duration_seconds for every client (pymongo and
+    Motor) and opens a client span per command in traced requests.
+    """
+
+    def __init__(self):
+        self._spans = {}
+
+    def started(self, event):
+        span = tracing.start_span(f"mongo.{event.command_name}", {
+            "db.system": "mongodb",
+            "db.name": event.database_name,
+            "db.operation": event.command_name,
+        })
+        if span is not tracing.NOOP_SPAN:
+            collection = event.command.get(event.command_name)
+            if isinstance(collection, str):
+                span.set_attribute("db.mongodb.collection", collection)
+            self._spans[(event.connection_id, event.request_id)] = span
+
+    def succeeded(self, event):
+        MONGO_SECONDS.observe(event.duration_micros / 1e6, event.command_name, "ok")
+        span = self._spans.pop((event.connection_id, event.request_id), None)
+        if span is not None:
+            cursor = event.reply.get("cursor") if hasattr(event.reply, "get") else None
+            if cursor is not None:
+                batch = cursor.get("firstBatch", cursor.get("nextBatch"))
+                span.set_attribute("db.rows", len(batch) if batch is not None else None)
+            span.end()
+
+    def failed(self, event):
+        MONGO_SECONDS.observe(event.duration_micros / 1e6, event.command_name, "error")
+        span = self._spans.pop((event.connection_id, event.request_id), None)
+        if span is not None:
+            span.error = str(event.failure)
+            span.end()
+
+
+# Global listeners only apply to clients created afterwards, so register at import
+monitoring.register(_CommandMetrics())
+
+# Bootstrap state: a single background thread probes candidates and keeps
+# reconnecting with exponential backoff while servers are down.
+_bootstrap_lock = threading.Lock()
+_bootstrap_thread = None
+_first_attempt_done = threading.Event()
+_fallback_retry_at = 0.0  # the unconfigured local fallback is re-probed on demand, not in a loop
+
+
+def _candidate_uris():
+    """Collect the configured MongoDB URIs in preference order, without duplicates."""
     candidates = []
     # 1) explicit MONGODB_URI
     if os.environ.get('MONGODB_URI'):
         candidates.append(os.environ.get('MONGODB_URI'))
-    # 2) numbered MONGODB_URI_6..MONGODB_URI_20
+    # 2) numbered MONGODB_URI_1..MONGODB_URI_20
     for i in range(1, 21):
         key = f'MONGODB_URI_{i}'
         if os.environ.get(key):
             candidates.append(os.environ.get(key))
-    # 3) Config fallback
-    cfg_uri = getattr(Config, 'MONGODB_URI', None)
-    if cfg_uri and cfg_uri not in candidates:
-        candidates.append(cfg_uri)
-    # 4) final local fallback
-    candidates.append('mongodb://localhost:27017/')
-
-    # Try each candidate until one succeeds
-    for uri in candidates:
-        if not uri:
-            continue
-        _last_mongo_uri = uri
-        try:
-            client = pymongo.MongoClient(uri, serverSelectionTimeoutMS=5000)
-            client.admin.command('ping')
-            _mongo_client = client
-            print(f"✅ Connected to MongoDB server at {uri}")
+    return list(dict.fromkeys(uri for uri in candidates if uri))
+
+
+def _fallback_uri():
+    """The local server tried when no MONGODB_URI* is set (Config.MONGODB_URI defaults to it)."""
+    return getattr(Config, 'MONGODB_URI', None) or 'mongodb://localhost:27017/'
+
+
+def _server_key(uri):
+    """Identify a server by its host list so URIs that differ only by path/options share a client."""
+    hosts = uri.split('://', 1)[-1].split('/', 1)[0].split('?', 1)[0].rsplit('@', 1)[-1]
+    return ",".join(sorted(hosts.lower().split(',')))
+
+
+def _probe_uri(uri):
+    client = pymongo.MongoClient(uri, serverSelectionTimeoutMS=Config.MONGO_PROBE_TIMEOUT_MS)
+    try:
+        client.admin.command('ping')
+        return client
+    except Exception:
+        client.close()
+        raise
+
+
+def _register_client(key, uri, client):
+    global _mongo_client, _last_mongo_uri
+    with _registry_lock:
+        if key in _mongo_clients:
+            client.close()
             return
+        _mongo_clients[key] = client
+        _server_uris[key] = uri
+        if _mongo_client is None:
+            _mongo_client = client
+            _last_mongo_uri = uri
+    _catalog["built_at"] = 0.0  # force a catalog rebuild with the new server
+    logger.info("Connected to MongoDB server at %s", uri)
+
+
+def _connect_pending(pending):
+    """
+    Probe every pending server concurrently and register each one that answers
+    a ping as soon as it does, so the first healthy server is usable right away.
+    """
+    results = queue.Queue()
+
+    def probe(key, uri):
+        try:
+            results.put((key, uri, _probe_uri(uri), None))
         except Exception as e:
-            print(f"⚠️ Could not connect to MongoDB at {uri}: {e}")
-            # try next candidate
-    # If we reach here, no candidate succeeded
+            results.put((key, uri, None, e))
+
+    for key, uri in pending.items():
+        # Daemon threads: a probe waiting on an unreachable server must not hold up
+        # interpreter exit (e.g. a gunicorn worker being recycled)
+        threading.Thread(target=probe, args=(key, uri), name="mongo-probe", daemon=True).start()
+    for _ in pending:
+        key, uri, client, error = results.get()
+        if error is None:
+            _register_client(key, uri, client)
+            _first_attempt_done.set()
+        else:
+            logger.warning("Could not connect to MongoDB at %s: %s", uri, error)
+
+
+def _bootstrap_loop():
+    """Connect to every configured server, backing off exponentially for unreachable ones."""
+    global _last_mongo_uri
+    if not _candidate_uris():
+        _connect_fallback()
+        return
+    delay = Config.MONGO_RECONNECT_BACKOFF_INITIAL
+    while True:
+        pending = {}
+        for uri in _candidate_uris():
+            key = _server_key(uri)
+            if key not in _mongo_clients:
+                pending.setdefault(key, uri)
+        if not pending:
+            break
+        _connect_pending(pending)
+        if _mongo_client is None:
+            _last_mongo_uri = list(pending.values())[-1]
+        _first_attempt_done.set()
+        unreachable = [key for key in pending if key not in _mongo_clients]
+        if not unreachable:
+            break
+        logger.warning("%d MongoDB server(s) unreachable; retrying in %ss", len(unreachable), delay)
+        time.sleep(delay)
+        delay = min(delay * 2, Config.MONGO_RECONNECT_BACKOFF_MAX)
+
+
+def _connect_fallback():
+    """
+    Nothing is configured: probe the local fallback once. It is never joined to
+    configured servers, and while it is down it is only retried when a caller
+    needs Mongo, at most every MONGO_RECONNECT_BACKOFF_MAX seconds.
+    """
+    global _last_mongo_uri, _fallback_retry_at
+    uri = _fallback_uri()
+    _connect_pending({_server_key(uri): uri})
+    if _mongo_client is None:
+        _last_mongo_uri = uri
+        _fallback_retry_at = time.time() + Config.MONGO_RECONNECT_BACKOFF_MAX
+    _first_attempt_done.set()
+
+
+def start_mongo_bootstrap():
+    """Start the background connect/reconnect loop unless it is already running."""
+    global _bootstrap_thread
+    with _bootstrap_lock:
+        if _bootstrap_thread and _bootstrap_thread.is_alive():
+            return
+        if _mongo_clients and _bootstrap_thread is not None:
+            return  # a previous loop finished with every server connected
+        if _bootstrap_thread is not None and not _candidate_uris() and time.time() < _fallback_retry_at:
+            return  # the fallback was just probed
+        _bootstrap_thread = threading.Thread(target=_bootstrap_loop, name="mongo-bootstrap", daemon=True)
+        _bootstrap_thread.start()
+
+
+def reset_after_fork():
+    """
+    Drop the clients, thread pool and bootstrap state inherited from a forking
+    parent (e.g. the gunicorn master) and reconnect from this process.
+    MongoClient is not fork-safe; the catalog is plain data and is kept.
+    """
+    global _mongo_client, _registry_lock, _catalog_lock, _fanout_executor
+    global _bootstrap_lock, _bootstrap_thread, _first_attempt_done, _fallback_retry_at
     _mongo_client = None
+    _mongo_clients.clear()
+    _server_uris.clear()
+    _registry_lock = threading.Lock()
+    _catalog_lock = threading.Lock()
+    _fanout_executor = ThreadPoolExecutor(max_workers=Config.MONGO_FANOUT_WORKERS, thread_name_prefix="mongo-fanout")
+    _bootstrap_lock = threading.Lock()
+    _bootstrap_thread = None
+    _first_attempt_done = threading.Event()
+    _fallback_retry_at = 0.0
+    start_mongo_bootstrap()
+
+
+def _initialize_mongo_client():
+    """
+    Make sure a connection attempt is underway. Only the very first attempt is
+    waited for; while Mongo is down later callers return immediately and the
+    background loop keeps reconnecting.
+    """
+    if _mongo_client is not None:
+        return
+    start_mongo_bootstrap()
+    _first_attempt_done.wait(timeout=Config.MONGO_PROBE_TIMEOUT_MS / 1000 + 1)
+
+
+def _list_server_databases(key, client):
+    databases = {}
+    for db_name in client.list_database_names():
+        if db_name in SYSTEM_DATABASES:
+            continue
+        try:
+            databases[db_name] = client[db_name].list_collection_names()
+        except Exception:
+            # ignore databases we can't list
+            continue
+    return key, databases
+
+
+def get_catalog(refresh=False):
+    """
+    Return {db_name: {server_key: [collections]}} across every connected
+    server. Servers are listed in parallel and the result is cached briefly.
+    """
+    if not refresh and time.time() - _catalog["built_at"] < Config.MONGO_CATALOG_TTL:
+        return _catalog["databases"]
+    with _catalog_lock:
+        if not refresh and time.time() - _catalog["built_at"] < Config.MONGO_CATALOG_TTL:
+            return _catalog["databases"]
+        databases = {}
+        futures = [_fanout_executor.submit(_list_server_databases, key, client) for key, client in list(_mongo_clients.items())]
+        for future in futures:
+            try:
+                key, server_dbs = future.result()
+            except Exception as e:
+                logger.warning("Could not list MongoDB server databases: %s", e)
+                continue
+            for db_name, collections in server_dbs.items():
+                databases.setdefault(db_name, {})[key] = collections
+        _catalog["databases"] = databases
+        _catalog["built_at"] = time.time()
+        return databases
+
+
+def _client_for_db(db_name):
+    """Pick the client of the server hosting ``db_name`` (primary server if unknown)."""
+    if len(_mongo_clients) > 1:
+        servers = get_catalog().get(db_name)
+        if servers:
+            return _mongo_clients.get(next(iter(servers)), _mongo_client)
+    return _mongo_client
+
+
+def _require_client(db_name):
+    _initialize_mongo_client()
+    if _mongo_client is None:
+        raise ConnectionError(f"MongoDB client not available (tried {_last_mongo_uri}).")
+    return _client_for_db(db_name)
+
+
+def _collection_schema(db, coll_name):
+    try:
+        count = db[coll_name].count_documents({})
+        sample_doc = db[coll_name].find_one(projection={"_id": 0})
+        if sample_doc:
+            fields = {k: type(v).__name__ for k, v in sample_doc.items()}
+            return {
+                "fields": fields,
+                "count": count
+            }
+        return {
+            "fields": {},
+            "count": count
+        }
+    except Exception as e:
+        logger.warning("Error getting schema for %s.%s: %s", db.name, coll_name, e)
+        return {
+            "fields": {},
+            "count": 0,
+            "error": str(e)
+        }
+
 
 def get_mongo_collections_schema():
     """
     Returns a dict of all databases and their collections' sample schema.
     Also returns collection counts for better error messages.
+    Cached for Config.CACHE_TIMEOUT; sampling every collection is expensive.
     """
+    cached = cache_handler.get("schema:mongo")
+    timing.cache_result("mongo_schema", cached is not None)
+    if cached is not None:
+        return cached
     _initialize_mongo_client()
     if _mongo_client is None:
         raise ConnectionError(f"MongoDB client not available (tried {_last_mongo_uri}).")
+    jobs = []
+    for db_name, servers in get_catalog().items():
+        for key, collections in servers.items():
+            db = _mongo_clients[key][db_name]
+            for coll_name in collections:
+                jobs.append((db_name, coll_name, _fanout_executor.submit(_collection_schema, db, coll_name)))
     schema = {}
-    for db_name in _mongo_client.list_database_names():
-        if db_name in ("admin", "local", "config"):
-            continue
-        db = _mongo_client[db_name]
-        db_schema = {}
-        for coll_name in db.list_collection_names():
-            try:
-                count = db[coll_name].count_documents({})
-                sample_doc = db[coll_name].find_one(projection={"_id": 0})
-                if sample_doc:
-                    fields = {k: type(v).__name__ for k, v in sample_doc.items()}
-                    db_schema[coll_name] = {
-                        "fields": fields,
-                        "count": count
-                    }
-                else:
-                    db_schema[coll_name] = {
-                        "fields": {},
-                        "count": count
-                    }
-            except Exception as e:
-                print(f"Error getting schema for {db_name}.{coll_name}: {e}")
-                db_schema[coll_name] = {
-                    "fields": {},
-                    "count": 0,
-                    "error": str(e)
-                }
-        if db_schema:  # Only include databases with collections
-            schema[db_name] = db_schema
+    for db_name, coll_name, future in jobs:
+        # Only include databases with collections
+        db_schema = schema.setdefault(db_name, {})
+        coll_schema = future.result()
+        if coll_name in db_schema:
+            # Same db/collection on several servers: merge fields and counts
+            db_schema[coll_name]["fields"].update(coll_schema["fields"])
+            db_schema[coll_name]["count"] += coll_schema["count"]
+        else:
+            db_schema[coll_name] = coll_schema
+    cache_handler.set("schema:mongo", schema)
     return schema
 
-def execute_mongo_query(db_name, collection, filter_query=None, projection=None, limit=50):
+def _binary_url(db_name, collection, doc_id, field):
+    """Build the streaming URL for a binary field of a single document."""
+    return "/api/mongo/binary/{}/{}/{}/{}".format(
+        quote(db_name, safe=''), quote(collection, safe=''), quote(str(doc_id), safe=''), quote(field, safe='.')
+    )
+
+
+def _externalize_binaries(doc, db_name, collection):
+    """
+    Replace top-level binary values with a reference to the streaming endpoint
+    so result rows never carry image blobs through the JSON response.
+    """
+    from app.utils.thumbnail_cache import thumbnail_cache
+    doc_id = doc.get('_id')
+    for field, value in doc.items():
+        if isinstance(value, bytes):
+            source_url = _binary_url(db_name, collection, doc_id, field) if doc_id is not None else None
+            ref = {"$binary_ref": source_url, "size": len(value)}
+            # Gallery-style results get a small cached variant instead of the original
+            if doc_id is not None and _sniff_content_type(value).startswith('image/'):
+                ref.update(thumbnail_cache.thumbnail_ref(doc_id, value, source_url) or {})
+            doc[field] = ref
+    return doc
+
+
+def execute_mongo_query(db_name, collection, filter_query=None, projection=None, limit=50, client=None):
     """
     Executes a query on the specified database and collection.
     """
-    _initialize_mongo_client()
-    if _mongo_client is None:
-        raise ConnectionError(f"MongoDB client not available (tried {_last_mongo_uri}).")
-    db = _mongo_client[db_name]
+    db = (client or _require_client(db_name))[db_name]
     default_projection = {}  # Include _id by default now that we can serialize it
     if isinstance(projection, dict):
         final_projection = {**projection, **default_projection}
     else:
         final_projection = default_projection
-    cursor = db[collection].find(filter_query or {}, final_projection).limit(limit)
-    # Convert ObjectId to string in the results
+    started = time.perf_counter()
+    with tracing.span("mongo.query", {"db.name": db_name, "db.mongodb.collection": collection}) as trace_span:
+        cursor = db[collection].find(filter_query or {}, final_projection).limit(limit)
+        # ObjectId/Decimal128/datetime are left native; FastJSONProvider serializes them
+        results = [_externalize_binaries(doc, db_name, collection) for doc in cursor]
+        trace_span.set_attribute("db.rows", len(results))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    index_advisor.record_mongo(db_name, collection, filter_query, elapsed_ms)
+    timing.record("mongo_exec", elapsed_ms)
+    logger.debug(
+        "Executed Mongo query",
+        extra={"db": db_name, "collection": collection, "filter": payload(filter_query),
+               "projection": payload(final_projection), "limit": limit, "rows": len(results)},
+    )
+    return results
+
+
+def iter_mongo_query(db_name, collection, filter_query=None, projection=None, limit=50, batch_size=1000, client=None):
+    """
+    Runs a query like execute_mongo_query, yielding the documents in lists of
+    at most `batch_size` as the cursor fetches them.
+    """
+    db = (client or _require_client(db_name))[db_name]
+    cursor = db[collection].find(filter_query or {}, projection if isinstance(projection, dict) else {})
+    cursor = cursor.limit(limit).batch_size(batch_size)
+    started = time.perf_counter()
+    count = 0
+    try:
+        batch = []
+        for doc in cursor:
+            batch.append(_externalize_binaries(doc, db_name, collection))
+            if len(batch) >= batch_size:
+                count += len(batch)
+                yield batch
+                batch = []
+        if batch:
+            count += len(batch)
+            yield batch
+    finally:
+        cursor.close()
+        logger.debug(
+            "Streamed Mongo query",
+            extra={"db": db_name, "collection": collection, "filter": payload(filter_query), "limit": limit,
+                   "rows": count, "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)},
+        )
+
+
+def aggregate_mongo(db_name, collection, pipeline, client=None):
+    """
+    Runs an aggregation pipeline on the specified database and collection.
+    """
+    db = (client or _require_client(db_name))[db_name]
+    started = time.perf_counter()
+    with tracing.span("mongo.aggregate", {"db.name": db_name, "db.mongodb.collection": collection}) as trace_span:
+        results = list(db[collection].aggregate(pipeline))
+        trace_span.set_attribute("db.rows", len(results))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    timing.record("mongo_aggregate", elapsed_ms)
+    logger.debug(
+        "Executed Mongo aggregation",
+        extra={"db": db_name, "collection": collection, "pipeline": payload(pipeline), "rows": len(results)},
+    )
+    return results
+
+
+def _query_database(key, db_name, collections, filter_query, projection, limit):
+    db = _mongo_clients[key][db_name]
+    # Build safe projection
+    default_projection = {"_id": 0}
+    final_projection = projection if isinstance(projection, dict) else default_projection
     results = []
-    for doc in cursor:
-        # Create a new dict with ObjectId converted to string
-        if isinstance(doc.get('_id'), ObjectId):
-            doc['_id'] = str(doc['_id'])
-        results.append(doc)
-    print(f"Executed Mongo Query: {db_name}.{collection}.find({filter_query}, {final_projection}).limit({limit}) -> {len(results)} results")
+    for coll in collections:
+        started = time.perf_counter()
+        with tracing.span("mongo.query", {"db.name": db_name, "db.mongodb.collection": coll}) as trace_span:
+            cur = db[coll].find(filter_query or {}, final_projection).limit(limit)
+            before = len(results)
+            for doc in cur:
+                _externalize_binaries(doc, db_name, coll)
+                # Add DB and collection info
+                doc['_db'] = db_name
+                doc['_collection'] = coll
+                if len(_mongo_clients) > 1:
+                    doc['_server'] = key
+                results.append(doc)
+            trace_span.set_attribute("db.rows", len(results) - before)
+        index_advisor.record_mongo(db_name, coll, filter_query, (time.perf_counter() - started) * 1000)
     return results
 
 
+@timing.timed("mongo_fanout")
 def execute_mongo_query_across_dbs(collection=None, filter_query=None, projection=None, limit=50):
     """
-    Execute the same query across all non-system databases on the connected server.
-    Returns a dict mapping db_name -> list of documents (may be empty lists).
+    Execute the same query across all non-system databases on every connected server.
+    Databases are queried in parallel. Returns a dict mapping db_name -> list of
+    documents (may be empty lists); same-named databases on different servers are merged.
     """
     _initialize_mongo_client()
     if _mongo_client is None:
         return {"error": f"MongoDB client not available (tried {_last_mongo_uri})."}
+    jobs = []
+    for db_name, servers in get_catalog().items():
+        for key, server_collections in servers.items():
+            # If a specific collection requested, only query that collection if present
+            collections = [collection] if collection and collection in server_collections else server_collections
+            jobs.append((db_name, _fanout_executor.submit(
+                tracing.wrap(_query_database), key, db_name, collections, filter_query, projection, limit
+            )))
     aggregated = {}
-    for db_name in _mongo_client.list_database_names():
-        if db_name in ("admin", "local", "config"):
-            continue
+    for db_name, future in jobs:
         try:
-            db = _mongo_client[db_name]
-            # If a specific collection requested, only query that collection if present
-            collections = [collection] if collection and collection in db.list_collection_names() else db.list_collection_names()
-            results = []
-            for coll in collections:
-                # Build safe projection
-                default_projection = {"_id": 0}
-                final_projection = projection if isinstance(projection, dict) else default_projection
-                cur = db[coll].find(filter_query or {}, final_projection).limit(limit)
-                docs = []
-                for doc in cur:
-                    # Convert ObjectId to string
-                    if isinstance(doc.get('_id'), ObjectId):
-                        doc['_id'] = str(doc['_id'])
-                    # Add DB and collection info
-                    doc['_db'] = db_name
-                    doc['_collection'] = coll
-                    docs.append(doc)
-                if docs:
-                    results.extend(docs)
-            aggregated[db_name] = results
+            docs = future.result()
         except Exception as e:
-            aggregated[db_name] = {"error": str(e)}
+            aggregated.setdefault(db_name, {"error": str(e)})
+            continue
+        if isinstance(aggregated.get(db_name), list):
+            aggregated[db_name].extend(docs)
+        else:
+            aggregated[db_name] = docs
     return aggregated
 
 
+@timing.timed("mongo_resolve")
 def find_db_for_collection(collection, filter_query=None, probe_limit=1):
     """
     Heuristic: find the most appropriate database name that contains the given collection
     and (optionally) matches the provided filter_query. Returns the db_name string or None.
     Steps:
-      - List DBs that contain the collection.
+      - List DBs (on every connected server) that contain the collection.
       - If only one, return it.
-      - If multiple and filter_query provided, probe each DB using execute_mongo_query with limit=probe_limit.
-      - Return the first DB that yields results.
+      - If multiple and filter_query provided, probe all of them in parallel with limit=probe_limit.
+      - Return the first DB (in catalog order) that yields results.
       - If none matched, return None.
     """
     _initialize_mongo_client()
     if _mongo_client is None:
         return None
     try:
-        candidate_dbs = []
-        for db_name in _mongo_client.list_database_names():
-            if db_name in ("admin", "local", "config"):
-                continue
-            db = _mongo_client[db_name]
-            try:
-                if collection in db.list_collection_names():
-                    candidate_dbs.append(db_name)
-            except Exception:
-                # ignore databases we can't list
-                continue
+        candidates = [
+            (db_name, key)
+            for db_name, servers in get_catalog().items()
+            for key, collections in servers.items()
+            if collection in collections
+        ]
+        candidate_dbs = list(dict.fromkeys(db_name for db_name, _ in candidates))
 
         if not candidate_dbs:
             return None
@@ -184,9 +552,15 @@ def find_db_for_collection(collection, filter_query=None, probe_limit=1):
 
         # Multiple candidates: probe if filter provided
         if filter_query:
-            for db_name in candidate_dbs:
+            probes = [
+                (db_name, _fanout_executor.submit(
+                    tracing.wrap(execute_mongo_query), db_name, collection, filter_query, {}, probe_limit, _mongo_clients[key]
+                ))
+                for db_name, key in candidates
+            ]
+            for db_name, future in probes:
                 try:
-                    res = execute_mongo_query(db_name, collection, filter_query, {}, probe_limit)
+                    res = future.result()
                     if isinstance(res, list) and len(res) > 0:
                         return db_name
                 except Exception:
@@ -205,11 +579,11 @@ def execute_nl_query(question):
     """
     from app.llm.gemini_mongo_generator import generate_mongo_query_from_nl
 
-    print("🔎 Attempting Mongo NL-to-Query conversion...")
+    logger.debug("Attempting Mongo NL-to-Query conversion")
     llm_query_dict = generate_mongo_query_from_nl(question)
     
     if 'error' in llm_query_dict:
-        print(f"❌ LLM Query Generation failed: {llm_query_dict['error']}")
+        logger.warning("LLM query generation failed: %s", llm_query_dict["error"])
         return {"error": llm_query_dict['error']}
 
     target_db_name = llm_query_dict.get('db_name')
@@ -223,7 +597,7 @@ def execute_nl_query(question):
 
     # If we have both db and collection, execute directly
     if target_db_name and target_collection:
-        print(f"🔎 Attempting Mongo Execution. DB: {target_db_name}, Collection: {target_collection}")
+        logger.debug("Attempting Mongo execution", extra={"db": target_db_name, "collection": target_collection})
         try:
             results = execute_mongo_query(
                 db_name=target_db_name,
@@ -234,20 +608,19 @@ def execute_nl_query(question):
             )
             return results
         except Exception as e:
-            print(f"❌ MongoDB Execution failed: {str(e)}")
+            logger.warning("MongoDB execution failed: %s", e)
             return {"error": f"MongoDB Execution failed: {str(e)}"}
 
     # If collection present but db missing, try to resolve the DB using heuristics/probing
     if target_collection and not target_db_name:
-        print(f"🔎 LLM omitted db_name; attempting to resolve DB for collection '{target_collection}'")
+        logger.debug("LLM omitted db_name; resolving DB for collection %r", target_collection)
         try:
             # First, try to get all DBs with this collection
-            all_dbs = []
-            for db_name in _mongo_client.list_database_names():
-                if db_name not in ("admin", "local", "config"):
-                    if target_collection in _mongo_client[db_name].list_collection_names():
-                        all_dbs.append(db_name)
-            print(f"Found collection '{target_collection}' in databases: {all_dbs}")
+            all_dbs = [
+                db_name for db_name, servers in get_catalog().items()
+                if any(target_collection in collections for collections in servers.values())
+            ]
+            logger.debug("Found collection %r in databases: %s", target_collection, all_dbs)
             
             # Try each database
             all_results = []
@@ -266,7 +639,7 @@ def execute_nl_query(question):
                             doc['_db'] = db_name
                         all_results.extend(results)
                 except Exception as e:
-                    print(f"Error querying {db_name}: {e}")
+                    logger.warning("Error querying %s: %s", db_name, e)
                     continue
             
             if all_results:
@@ -295,7 +668,7 @@ def execute_nl_query(question):
                 return {"db_name_used": "multiple", "rows": all_results}
 
             # Nothing found across DBs
-            print(f"No results found. Database summary: {summary}")
+            logger.info("No results found", extra={"summary": payload(summary)})
             return {"error": "No matching documents found across databases.", "db_probe_summary": summary}
         except Exception as e:
             return {"error": f"DB resolution failed: {str(e)}"}
@@ -304,6 +677,175 @@ def execute_nl_query(question):
     return {"error": "LLM did not specify db_name or collection, and collection could not be inferred. Please ask specifically (e.g., 'Find images where name = \"nano\" in db cardb')."}
 
 
+def _candidate_ids(doc_id):
+    """Path segments are strings; try the ObjectId / int forms an _id may really have."""
+    candidates = []
+    if isinstance(doc_id, str):
+        if ObjectId.is_valid(doc_id):
+            candidates.append(ObjectId(doc_id))
+        if doc_id.lstrip('-').isdigit():
+            candidates.append(int(doc_id))
+    candidates.append(doc_id)
+    return candidates
+
+
+def _locate_binary(raw, path):
+    """
+    Return (offset, length) of the binary value at dotted ``path`` inside a raw
+    BSON document that was projected down to that single path, or None.
+    """
+    start = 4  # skip the int32 document length
+    parts = path.split('.')
+    for depth, part in enumerate(parts):
+        if start >= len(raw) or raw[start] == 0x00:
+            return None
+        elem_type = raw[start]
+        name_end = raw.index(b'\x00', start + 1)
+        if raw[start + 1:name_end].decode('utf-8') != part:
+            return None
+        value = name_end + 1
+        if depth < len(parts) - 1:
+            # Intermediate path segments must be embedded documents
+            if elem_type != 0x03:
+                return None
+            start = value + 4
+            continue
+        if elem_type != 0x05:
+            return None
+        length = int.from_bytes(raw[value:value + 4], 'little')
+        subtype = raw[value + 4]
+        offset = value + 5
+        if subtype == 0x02:
+            # Legacy binary subtype repeats the length inside the payload
+            offset += 4
+            length -= 4
+        return offset, length
+    return None
+
+
+def _sniff_content_type(head):
+    """Guess an image mimetype from the leading bytes of a payload."""
+    head = bytes(head[:12])
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    if head.startswith(b'%PDF'):
+        return 'application/pdf'
+    return 'application/octet-stream'
+
+
+# Bytes from each end of an inline payload that go into its ETag
+_ETAG_SAMPLE_BYTES = 4096
+
+
+class InlineBinary:
+    """
+    A binary field stored inside a Mongo document. The raw BSON buffer is
+    sliced through a memoryview so the payload is never copied as a whole.
+    """
+
+    def __init__(self, raw, offset, length, doc_id, field):
+        self._view = memoryview(raw)[offset:offset + length]
+        self.size = length
+        self.content_type = _sniff_content_type(self._view)
+        # Built from the document, field and length plus the payload's ends, so
+        # Range and conditional requests don't pay for a pass over the whole blob
+        digest = hashlib.blake2b(f"{doc_id}:{field}:{length}".encode(), digest_size=16)
+        digest.update(self._view[:_ETAG_SAMPLE_BYTES])
+        digest.update(self._view[-_ETAG_SAMPLE_BYTES:])
+        self.etag = digest.hexdigest()
+
+    def iter_range(self, start, end, chunk_size):
+        # WSGI servers want bytes, so only one chunk is copied at a time
+        try:
+            for pos in range(start, end, chunk_size):
+                yield bytes(self._view[pos:min(pos + chunk_size, end)])
+        finally:
+            self.close()
+
+    def close(self):
+        self._view.release()
+
+
+class GridFSBinary:
+    """A GridFS file streamed chunk by chunk from the server."""
+
+    def __init__(self, grid_out):
+        self._grid_out = grid_out
+        self.size = grid_out.length
+        metadata = grid_out.metadata or {}
+        self.content_type = (
+            metadata.get('contentType')
+            or getattr(grid_out, '_file', {}).get('contentType')
+            or 'application/octet-stream'
+        )
+        uploaded = grid_out.upload_date.timestamp() if grid_out.upload_date else 0
+        self.etag = hashlib.blake2b(
+            f"{grid_out._id}:{grid_out.length}:{uploaded}".encode(), digest_size=16
+        ).hexdigest()
+
+    def iter_range(self, start, end, chunk_size):
+        try:
+            self._grid_out.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                chunk = self._grid_out.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self):
+        self._grid_out.close()
+
+
+def open_document_binary(db_name, collection, doc_id, field):
+    """
+    Locate a binary field of a single document for streaming.
+    Returns an InlineBinary or None when the document/field does not exist.
+    """
+    coll = _require_client(db_name)[db_name][collection].with_options(codec_options=_RAW_CODEC_OPTIONS)
+    doc = coll.find_one({"_id": {"$in": _candidate_ids(doc_id)}}, {field: 1, "_id": 0})
+    if doc is None:
+        return None
+    location = _locate_binary(doc.raw, field)
+    if location is None:
+        return None
+    return InlineBinary(doc.raw, *location, doc_id, field)
+
+
+def open_gridfs_file(db_name, file_id, bucket_name='fs'):
+    """Open a GridFS file for streaming. Returns a GridFSBinary or None if missing."""
+    bucket = gridfs.GridFSBucket(_require_client(db_name)[db_name], bucket_name=bucket_name)
+    for candidate in _candidate_ids(file_id):
+        try:
+            return GridFSBinary(bucket.open_download_stream(candidate))
+        except gridfs.errors.NoFile:
+            continue
+    return None
+
+
+def iter_image_payloads(db_name, collection, field=None, limit=0):
+    """
+    Yield (doc_id, field, payload, source_url) for every image-looking binary
+    field in a collection, one document at a time.
+    """
+    projection = {field: 1} if field else None
+    cursor = _require_client(db_name)[db_name][collection].find({}, projection, batch_size=16).limit(limit)
+    for doc in cursor:
+        doc_id = doc.get('_id')
+        for name, value in doc.items():
+            if isinstance(value, bytes) and _sniff_content_type(value).startswith('image/'):
+                yield doc_id, name, value, _binary_url(db_name, collection, doc_id, name)
+
+
 def is_mongo_available():
     """Return True if a Mongo client is available and reachable."""
     try:
@@ -313,6 +855,11 @@ def is_mongo_available():
         return False
 
 
+def connected_mongo_servers():
+    """Return the URIs of every MongoDB server currently in the federation registry."""
+    return list(_server_uris.values())
+
+
 def last_mongo_uri_tried():
     """Return the last MongoDB URI that was attempted (or None)."""
     try:
@@ -0,0 +1,155 @@
+"""
+asyncio counterparts of the app.db_mongo query helpers, backed by Motor.
+Server discovery, the catalog and reconnects stay with the sync bootstrap in
+app.db_mongo; this module keeps one Motor client per connected server.
+"""
+import asyncio
+import logging
+import time
+from motor.motor_asyncio import AsyncIOMotorClient
+from config import Config
+from app import db_mongo
+from app.db_mongo import _externalize_binaries
+from app.utils.index_advisor import index_advisor
+from app.utils import timing, tracing
+from app.utils.structured_logging import payload
+
+logger = logging.getLogger(__name__)
+
+# server key -> Motor client, created lazily inside the running event loop
+_motor_clients = {}
+
+
+def _motor_client(key):
+    client = _motor_clients.get(key)
+    if client is None:
+        client = AsyncIOMotorClient(db_mongo._server_uris[key], serverSelectionTimeoutMS=Config.MONGO_PROBE_TIMEOUT_MS)
+        _motor_clients[key] = client
+    return client
+
+
+def close_motor_clients():
+    for client in _motor_clients.values():
+        client.close()
+    _motor_clients.clear()
+
+
+async def _ensure_connected():
+    if db_mongo._mongo_client is None:
+        # The first attempt is waited for once; afterwards this returns immediately
+        await asyncio.to_thread(db_mongo._initialize_mongo_client)
+    if db_mongo._mongo_client is None:
+        raise ConnectionError(f"MongoDB client not available (tried {db_mongo._last_mongo_uri}).")
+
+
+async def _catalog():
+    # Served from memory within Config.MONGO_CATALOG_TTL; a rebuild lists every server
+    return await asyncio.to_thread(db_mongo.get_catalog)
+
+
+async def _key_for_db(db_name):
+    """Server key hosting ``db_name`` (primary server if unknown)"""
+    with db_mongo._registry_lock:
+        primary = next((key for key, client in db_mongo._mongo_clients.items() if client is db_mongo._mongo_client), None)
+    if len(db_mongo._mongo_clients) > 1:
+        servers = (await _catalog()).get(db_name)
+        if servers:
+            key = next(iter(servers))
+            if key in db_mongo._mongo_clients:
+                return key
+    return primary
+
+
+async def execute_mongo_query_async(db_name, collection, filter_query=None, projection=None, limit=50, key=None):
+    """Async execute_mongo_query"""
+    if key is None:
+        await _ensure_connected()
+        key = await _key_for_db(db_name)
+    final_projection = {**projection} if isinstance(projection, dict) else {}
+    started = time.perf_counter()
+    # Motor runs commands on its own threads, so this span stands in for the command spans
+    with tracing.span("mongo.query", {"db.name": db_name, "db.mongodb.collection": collection}) as trace_span:
+        cursor = _motor_client(key)[db_name][collection].find(filter_query or {}, final_projection).limit(limit)
+        results = [_externalize_binaries(doc, db_name, collection) async for doc in cursor]
+        trace_span.set_attribute("db.rows", len(results))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    index_advisor.record_mongo(db_name, collection, filter_query, elapsed_ms)
+    timing.record("mongo_exec", elapsed_ms)
+    logger.debug(
+        "Executed Mongo query",
+        extra={"db": db_name, "collection": collection, "filter": payload(filter_query),
+               "projection": payload(final_projection), "limit": limit, "rows": len(results)},
+    )
+    return results
+
+
+async def _query_database_async(key, db_name, collections, filter_query, projection, limit):
+    db = _motor_client(key)[db_name]
+    final_projection = projection if isinstance(projection, dict) else {"_id": 0}
+    results = []
+    for coll in collections:
+        started = time.perf_counter()
+        async for doc in db[coll].find(filter_query or {}, final_projection).limit(limit):
+            _externalize_binaries(doc, db_name, coll)
+            doc['_db'] = db_name
+            doc['_collection'] = coll
+            if len(db_mongo._mongo_clients) > 1:
+                doc['_server'] = key
+            results.append(doc)
+        index_advisor.record_mongo(db_name, coll, filter_query, (time.perf_counter() - started) * 1000)
+    return results
+
+
+@timing.timed("mongo_fanout")
+async def execute_mongo_query_across_dbs_async(collection=None, filter_query=None, projection=None, limit=50):
+    """Async execute_mongo_query_across_dbs; every database on every server is queried concurrently"""
+    try:
+        await _ensure_connected()
+    except ConnectionError as e:
+        return {"error": str(e)}
+    jobs = []
+    for db_name, servers in (await _catalog()).items():
+        for key, server_collections in servers.items():
+            collections = [collection] if collection and collection in server_collections else server_collections
+            jobs.append((db_name, _query_database_async(key, db_name, collections, filter_query, projection, limit)))
+    outcomes = await asyncio.gather(*(job for _, job in jobs), return_exceptions=True)
+    aggregated = {}
+    for (db_name, _), docs in zip(jobs, outcomes):
+        if isinstance(docs, Exception):
+            aggregated.setdefault(db_name, {"error": str(docs)})
+        elif isinstance(aggregated.get(db_name), list):
+            aggregated[db_name].extend(docs)
+        else:
+            aggregated[db_name] = docs
+    return aggregated
+
+
+@timing.timed("mongo_resolve")
+async def find_db_for_collection_async(collection, filter_query=None, probe_limit=1):
+    """Async find_db_for_collection; candidate databases are probed concurrently"""
+    try:
+        await _ensure_connected()
+        candidates = [
+            (db_name, key)
+            for db_name, servers in (await _catalog()).items()
+            for key, collections in servers.items()
+            if collection in collections
+        ]
+        candidate_dbs = list(dict.fromkeys(db_name for db_name, _ in candidates))
+        if not candidate_dbs:
+            return None
+        if len(candidate_dbs) == 1:
+            return candidate_dbs[0]
+        if filter_query:
+            probes = await asyncio.gather(
+                *(execute_mongo_query_async(db_name, collection, filter_query, {}, probe_limit, key=key) for db_name, key in candidates),
+                return_exceptions=True
+            )
+            for (db_name, _), res in zip(candidates, probes):
+                if isinstance(res, list) and res:
+                    return db_name
+        if 'cardb' in candidate_dbs:
+            return 'cardb'
+        return candidate_dbs[0]
+    except Exception:
+        return None
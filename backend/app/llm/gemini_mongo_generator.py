@@ -2,6 +2,7 @@ import os
 import re
 from urllib.parse import urlparse
 from typing import Any
+from app.utils.text_search import text_search
 
 
 def _default_db_from_env():
@@ -134,6 +135,13 @@ def generate_mongo_query_from_nl(question: str) -> dict:
         except Exception:
             pass
 
+    def _lookup_filter(db_name):
+        # Name-like lookups match partial names (word-prefix regex on the field)
+        if len(filter_q) != 1:
+            return filter_q
+        field, value = next(iter(filter_q.items()))
+        return text_search.mongo_filter(db_name, coll, field, value)
+
     # Final fallbacks and smarter db resolution using server schema
     if not db:
         # Consult server to see which DBs contain this collection
@@ -150,7 +158,7 @@ def generate_mongo_query_from_nl(question: str) -> dict:
                 if filter_q:
                     for d in candidate_dbs:
                         try:
-                            res = execute_mongo_query(db_name=d, collection=coll, filter_query=filter_q, projection={}, limit=1)
+                            res = execute_mongo_query(db_name=d, collection=coll, filter_query=_lookup_filter(d), projection={}, limit=1)
                             if isinstance(res, list) and len(res) > 0:
                                 probed_db = d
                                 break
@@ -174,7 +182,7 @@ def generate_mongo_query_from_nl(question: str) -> dict:
     return {
         "db_name": db,
         "collection": coll,
-        "filter": filter_q or {},
+        "filter": _lookup_filter(db) if filter_q else {},
         "projection": {},
         "limit": 50
     }
\ No newline at end of file
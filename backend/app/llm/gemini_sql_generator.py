@@ -4,27 +4,20 @@ import asyncio
 from dotenv import load_dotenv
 from app.schema_inspector import get_all_db_schemas
 from app.utils.cache_handler import cache_handler
+from app.utils import metrics, timing, tracing
 from config import Config
 import time
 from app.db import engines
 import json
 import logging
+from app.utils.structured_logging import payload
+
+logger = logging.getLogger(__name__)
 
 load_dotenv()
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
-def generate_sql_from_nl(nl_query: str) -> dict:
-    """
-    Generate SQL for all databases and return a dict:
-    {db_name: sql_query}
-    """
-    # Check cache first for performance
-    cache_key = f"sql_generation:{nl_query.lower().strip()}"
-    cached_result = cache_handler.get(cache_key)
-    if cached_result:
-        print(f"🚀 Cache hit for SQL generation: {nl_query[:50]}...")
-        return cached_result
-    
+def _build_prompt(nl_query: str) -> str:
     # Get schemas for all databases
     all_schemas = get_all_db_schemas(engines)
     schema_prompt = "\n\n".join([
@@ -34,7 +27,7 @@ def generate_sql_from_nl(nl_query: str) -> dict:
     ])
 
     # Construct the prompt with clear instructions for faster generation
-    prompt = f"""
+    return f"""
 You are an expert SQL generator. Given these database schemas and user question, generate a safe SQL SELECT query for each relevant database.
 
 Database Schemas:
@@ -46,67 +39,128 @@ Instructions:
 - For each database, generate ONLY a SELECT statement (no INSERT, UPDATE, DELETE, DROP, etc.)
 - Use exact table and column names from the schema above
 - Avoid SELECT * - specify needed columns
+- For partial name/title matches use `column LIKE '%value%'` (ILIKE on PostgreSQL) on the bare column, not LOWER(column); these are served by text indexes
 - Make the query safe and efficient
 - If the question is unclear, ask for clarification
 - Output as a JSON object: {{'db1': 'SQL for db1', 'db2': 'SQL for db2', ...}}
 
 SQL Queries (JSON):"""
 
+
+def _generation_config():
+    # Set generation config for speed
+    return genai.types.GenerationConfig(
+        temperature=Config.TEMPERATURE,
+        max_output_tokens=Config.MAX_TOKENS,
+        top_p=0.8,
+        top_k=40
+    )
+
+
+def _parse_sql_response(nl_query: str, response_text: str, start_time: float, cache_key: str) -> dict:
+    sql_result = response_text.strip()
+    # Remove triple backticks and language tag if present
+    if sql_result.startswith('```'):
+        # Remove leading/trailing backticks and language tag
+        sql_result = sql_result.lstrip('`').lstrip('json').strip()
+        # Remove trailing backticks
+        if sql_result.endswith('```'):
+            sql_result = sql_result[:-3].strip()
+    # Also handle case where Gemini returns with newlines after backticks
+    if sql_result.startswith('json'):
+        sql_result = sql_result[4:].strip()
+    if not sql_result:
+        logger.error("Gemini output was empty", extra={"question": payload(nl_query)})
+        return {"error": "Gemini output was empty.", "raw_output": sql_result}
+    try:
+        sql_dict = json.loads(sql_result)
+
+        # Validate that all values are actual SQL queries
+        for db, query in sql_dict.items():
+            if isinstance(query, str) and not query.strip().lower().startswith('select'):
+                return {"error": f"Invalid SQL query for database '{db}'. Only SELECT queries are allowed."}
+
+        generation_time = time.time() - start_time
+        logger.info("SQL generated in %.2fs", generation_time, extra={"question": payload(nl_query)})
+        cache_handler.set(cache_key, sql_dict)
+        return sql_dict
+    except json.JSONDecodeError as jde:
+        logger.error("Gemini output JSON decode error: %s", jde, extra={"raw_output": payload(sql_result)})
+        return {"error": "The model did not generate a valid SQL query. Please try rephrasing your question."}
+
+
+def generate_sql_from_nl(nl_query: str) -> dict:
+    """
+    Generate SQL for all databases and return a dict:
+    {db_name: sql_query}
+    """
+    # Check cache first for performance
+    cache_key = f"sql_generation:{nl_query.lower().strip()}"
+    cached_result = cache_handler.get(cache_key)
+    timing.cache_result("sql_generation", bool(cached_result))
+    if cached_result:
+        logger.debug("Cache hit for SQL generation", extra={"question": payload(nl_query)})
+        return cached_result
+
+    with timing.stage("schema"):
+        prompt = _build_prompt(nl_query)
+
     try:
         start_time = time.time()
         
         # Use faster model for better performance
         model = genai.GenerativeModel(Config.GEMINI_MODEL)
         
-        # Set generation config for speed
-        generation_config = genai.types.GenerationConfig(
-            temperature=Config.TEMPERATURE,
-            max_output_tokens=Config.MAX_TOKENS,
-            top_p=0.8,
-            top_k=40
-        )
-        
         # Generate SQL query with timeout
-        response = model.generate_content(
-            prompt,
-            generation_config=generation_config
-        )
-        
-        sql_result = response.text.strip()
-        # Remove triple backticks and language tag if present
-        if sql_result.startswith('```'):
-            # Remove leading/trailing backticks and language tag
-            sql_result = sql_result.lstrip('`').lstrip('json').strip()
-            # Remove trailing backticks
-            if sql_result.endswith('```'):
-                sql_result = sql_result[:-3].strip()
-        # Also handle case where Gemini returns with newlines after backticks
-        if sql_result.startswith('json'):
-            sql_result = sql_result[4:].strip()
-        if not sql_result:
-            logging.error(f"Gemini output was empty for question: {nl_query}")
-            return {"error": "Gemini output was empty.", "raw_output": sql_result}
+        llm_started = time.perf_counter()
+        response = None
         try:
-            sql_dict = json.loads(sql_result)
-            
-            # Validate that all values are actual SQL queries
-            for db, query in sql_dict.items():
-                if isinstance(query, str) and not query.strip().lower().startswith('select'):
-                    return {"error": f"Invalid SQL query for database '{db}'. Only SELECT queries are allowed."}
-            
-            generation_time = time.time() - start_time
-            print(f"⚡ SQL generated in {generation_time:.2f}s: {nl_query[:50]}...")
-            cache_handler.set(cache_key, sql_dict)
-            return sql_dict
-        except json.JSONDecodeError as jde:
-            logging.error(f"Gemini output JSON decode error: {jde}\nRaw output: {sql_result}")
-            return {"error": "The model did not generate a valid SQL query. Please try rephrasing your question."}
+            with timing.stage("llm_sql") as trace_span:
+                response = model.generate_content(
+                    prompt,
+                    generation_config=_generation_config()
+                )
+                trace_span.set_attributes({"llm.model": Config.GEMINI_MODEL, **tracing.llm_attributes(response)})
+        finally:
+            metrics.observe_llm("sql", time.perf_counter() - llm_started, response)
+        return _parse_sql_response(nl_query, response.text, start_time, cache_key)
     except Exception as e:
         error_msg = f"ERROR: {str(e)}"
-        print(f"❌ SQL generation failed: {error_msg}")
+        logger.error("SQL generation failed: %s", error_msg)
         return {"error": error_msg}
 
 async def generate_sql_from_nl_async(nl_query: str) -> dict:
-    """Async version for better performance in concurrent scenarios"""
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, generate_sql_from_nl, nl_query)
+    """
+    Async version: the Gemini call goes through the SDK's asyncio transport, so
+    a pending generation holds no thread. Only schema introspection, which is
+    cached after the first call, is pushed to a worker thread.
+    """
+    cache_key = f"sql_generation:{nl_query.lower().strip()}"
+    cached_result = cache_handler.get(cache_key)
+    timing.cache_result("sql_generation", bool(cached_result))
+    if cached_result:
+        logger.debug("Cache hit for SQL generation", extra={"question": payload(nl_query)})
+        return cached_result
+
+    with timing.stage("schema"):
+        prompt = await asyncio.to_thread(_build_prompt, nl_query)
+
+    try:
+        start_time = time.time()
+        model = genai.GenerativeModel(Config.GEMINI_MODEL)
+        llm_started = time.perf_counter()
+        response = None
+        try:
+            with timing.stage("llm_sql") as trace_span:
+                response = await asyncio.wait_for(
+                    model.generate_content_async(prompt, generation_config=_generation_config()),
+                    timeout=Config.LLM_TIMEOUT
+                )
+                trace_span.set_attributes({"llm.model": Config.GEMINI_MODEL, **tracing.llm_attributes(response)})
+        finally:
+            metrics.observe_llm("sql", time.perf_counter() - llm_started, response)
+        return _parse_sql_response(nl_query, response.text, start_time, cache_key)
+    except Exception as e:
+        error_msg = f"ERROR: {str(e) or type(e).__name__}"
+        logger.error("SQL generation failed: %s", error_msg)
+        return {"error": error_msg}
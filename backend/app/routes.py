@@ -1,8 +1,10 @@
-from flask import Blueprint, jsonify, request
+import hmac
+import logging
+from flask import Blueprint, Response, current_app, g, jsonify, redirect, request, send_file, stream_with_context
+from werkzeug.exceptions import HTTPException
 import time
 import re
 import json
-from app.utils.json_encoder import MongoJSONEncoder
 from sqlalchemy import text
 
 # --- Database & LLM Imports ---
@@ -14,18 +16,34 @@ from .sql_executor import execute_safe_sql # Used by /api/query (single SQL exec
 # MongoDB Components
 from app.db_mongo import get_mongo_collections_schema # Gets MongoDB collection schema
 from app.db_mongo import execute_mongo_query # Executes MongoDB query
-from app.db_mongo import is_mongo_available, last_mongo_uri_tried
+from app.db_mongo import is_mongo_available, last_mongo_uri_tried, connected_mongo_servers
+from app.db_mongo import open_document_binary, open_gridfs_file # Streams binary fields / GridFS files
 import os
-from urllib.parse import urlparse
+from urllib.parse import urlencode, urlparse
 
 # LLM & Utility Components
 from app.llm.gemini_sql_generator import generate_sql_from_nl
 from app.llm.gemini_mongo_generator import generate_mongo_query_from_nl 
-from app.utils.llm_handler import convert_result_to_natural_language, generate_summary
+from app.utils.llm_handler import convert_result_to_natural_language, read_deferred_summary, summarize
+from app.utils.thumbnail_cache import thumbnail_cache
+from app.utils.index_advisor import index_advisor
+from app.utils.text_search import text_search
+from app.utils import metrics, structured_logging, timing, tracing
+from app.utils.metrics import registry as metrics_registry
+from app.utils.profiler import profiler
+from app.utils.result_store import StoredResult, current_session, result_store, to_columns
+from app.utils.analytics_handler import analytics_handler
+from app.utils.chart_engine import CHART_TYPES
+from app.utils.chart_pushdown import PushdownFrame, chart_frame, mongo_source, sql_source
+from app.utils.exports import EXPORT_FORMATS, export_available, export_filename, stream_export
+from app.utils.job_queue import SUCCEEDED, job_queue
+from app.utils.process_pool import OFFLOADED_EXPORT_FORMATS, process_pool
 # NOTE: Assuming these are implemented elsewhere, used for analysis/caching
 # from app.utils.cache_handler import cache_handler 
-# from app.utils.analytics_handler import analytics_handler
-# from config import Config 
+from config import Config
+from app.utils.structured_logging import payload
+
+logger = logging.getLogger(__name__)
 
 main = Blueprint('main', __name__)
 
@@ -69,7 +87,8 @@ def get_schema_by_type(db_type):
     """
     if db_type == "mongo":
         # Returns dict of collection names to a sample structure
-        raw_schema = get_mongo_collections_schema() 
+        with timing.stage("schema"):
+            raw_schema = get_mongo_collections_schema()
         # Sanitize schema by removing fields that typically hold large binary data
         sanitized_schema = {}
         for collection_name, fields in raw_schema.items():
@@ -82,7 +101,8 @@ def get_schema_by_type(db_type):
         return sanitized_schema
     else:
         # Returns dict of table names to columns
-        return get_schema()
+        with timing.stage("schema"):
+            return get_schema()
 
 def detect_chart_intent(question):
     """Simple intent detection for chart/graph requests."""
@@ -121,8 +141,8 @@ def analyze_schema_for_greetings(schema, db_type):
         "features": features[:6]
     }
 
-def handle_greeting_or_general(question, db_type):
-    """Handle greetings and general questions dynamically based on schema and db_type"""
+def greeting_payload(question, db_type):
+    """Response body for greetings and general questions, based on schema and db_type"""
     question_lower = question.lower().strip()
     
     try:
@@ -130,7 +150,7 @@ def handle_greeting_or_general(question, db_type):
         schema = get_schema_by_type(db_type)
         schema_analysis = analyze_schema_for_greetings(schema, db_type)
     except Exception as e:
-        print(f"Error during schema analysis for greeting: {e}")
+        logger.warning("Error during schema analysis for greeting: %s", e)
         # Default analysis if schema retrieval fails
         schema_analysis = {
             "database_type": "your database",
@@ -163,7 +183,12 @@ def handle_greeting_or_general(question, db_type):
             "features": schema_analysis["features"]
         }
     }
-    return jsonify(response)
+    return response
+
+
+def handle_greeting_or_general(question, db_type):
+    """Handle greetings and general questions dynamically based on schema and db_type"""
+    return jsonify(greeting_payload(question, db_type))
 
 
 def detect_existence_question(question, db_type):
@@ -230,6 +255,15 @@ def generate_query_suggestions(question, db_type):
     
     return suggestions[:5]
 
+def is_admin_caller(token):
+    """Admin access needs X-Admin-Token matching ADMIN_TOKEN; with no token configured it is denied."""
+    if not Config.ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), Config.ADMIN_TOKEN.encode("utf-8"))
+
+def is_admin_request():
+    return is_admin_caller(request.headers.get("X-Admin-Token"))
+
 # --- Route Definitions ---
 
 @main.route("/api/schema", methods=["GET"])
@@ -281,20 +315,97 @@ def health_details():
     try:
         mongo_ok = is_mongo_available()
         mongo_uri = last_mongo_uri_tried()
-        mongo_status = {'ok': bool(mongo_ok), 'uri_tried': mongo_uri}
+        mongo_status = {'ok': bool(mongo_ok), 'uri_tried': mongo_uri, 'servers': len(connected_mongo_servers())}
     except Exception as e:
         mongo_status = {'ok': False, 'error': str(e)}
 
     return jsonify({'success': True, 'sql': sql_status, 'mongo': mongo_status})
 
+@main.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Prometheus scrape endpoint (text exposition format); summed over all worker processes when METRICS_MULTIPROC_DIR is set."""
+    if not Config.METRICS_ENABLED:
+        return jsonify({"success": False, "error": "Metrics are disabled."}), 404
+    return Response(metrics_registry.expose(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+
+@main.route("/api/admin/index-advice", methods=["GET"])
+def get_index_advice():
+    """Ranked index recommendations from the observed query log."""
+    if not is_admin_request():
+        return jsonify({"success": False, "error": "Admin access required."}), 403
+    limit = request.args.get("limit", 20, type=int)
+    return jsonify({"success": True, "recommendations": index_advisor.recommendations(limit)})
+
+
+@main.route("/api/admin/index-advice/apply", methods=["POST"])
+def apply_index_advice():
+    """Creates recommended indexes; dry_run (default true) only returns the statements."""
+    if not is_admin_request():
+        return jsonify({"success": False, "error": "Admin access required."}), 403
+    data = request.get_json() or {}
+    ids = data.get("ids") or []
+    if not ids:
+        return jsonify({"success": False, "error": "Provide the recommendation ids to apply."}), 400
+    dry_run = data.get("dry_run", True) is not False
+    return jsonify({"success": True, "dry_run": dry_run, "results": index_advisor.apply(ids, dry_run)})
+
+
+@main.route("/api/admin/text-indexes", methods=["GET"])
+def get_text_indexes():
+    """Text indexes for partial-name lookups that are missing, with the statements that would create them."""
+    if not is_admin_request():
+        return jsonify({"success": False, "error": "Admin access required."}), 403
+    from app.db import engines
+    return jsonify({"success": True, "indexes": text_search.plan(engines)})
+
+
+@main.route("/api/admin/text-indexes/apply", methods=["POST"])
+def apply_text_indexes():
+    """Creates the missing text indexes; dry_run (default true) only returns the statements."""
+    if not is_admin_request():
+        return jsonify({"success": False, "error": "Admin access required."}), 403
+    from app.db import engines
+    data = request.get_json() or {}
+    dry_run = data.get("dry_run", True) is not False
+    return jsonify({"success": True, "dry_run": dry_run, "results": text_search.apply(engines, dry_run)})
+
+
+@main.route("/api/admin/profiles", methods=["GET"])
+def list_profiles():
+    """Stored request profiles, newest first."""
+    if not is_admin_request():
+        return jsonify({"success": False, "error": "Admin access required."}), 403
+    return jsonify({"success": True, "profiles": profiler.summaries()})
+
+
+@main.route("/api/admin/profiles/<profile_id>", methods=["GET"])
+def get_profile(profile_id):
+    """A stored profile; ?format=collapsed returns flamegraph-ready collapsed stacks."""
+    if not is_admin_request():
+        return jsonify({"success": False, "error": "Admin access required."}), 403
+    profile = profiler.get(profile_id)
+    if profile is None:
+        return jsonify({"success": False, "error": "Profile not found."}), 404
+    if request.args.get("format") == "collapsed":
+        return Response(profile["collapsed"] + "\n", mimetype="text/plain")
+    return jsonify({"success": True, "profile": profile})
+
+
 @main.route("/api/query", methods=["POST"])
 def run_query():
     """Executes pre-generated query for SQL or MongoDB."""
-    print("🚀 /api/query route hit")
+    logger.debug("/api/query route hit")
     data = request.get_json()
+    if wants_job(data):
+        return submit_view_job("query", execute_query, data)
+    return execute_query(data)
+
+
+def execute_query(data):
+    """/api/query for a parsed request body; job workers call it too"""
     db_type = data.get("db_type", "sql").lower()
     
-    start_time = time.time()
 
     if db_type == "mongo":
         # MongoDB logic
@@ -317,12 +428,11 @@ def run_query():
                 result = execute_mongo_query(db_name, collection, filter_query, projection, limit)
             else:
                 result = execute_mongo_query(collection, filter_query, projection, limit)
-            total_time = time.time() - start_time
             return jsonify({
                 "success": True, 
                 "rows": result, 
                 "query_type": "mongo",
-                "performance": {"total_time": round(total_time, 2)}
+                "performance": timing.performance()
             })
         except Exception as e:
             return jsonify({"success": False, "error": f"MongoDB execution error: {str(e)}"}), 500
@@ -331,25 +441,390 @@ def run_query():
         sql = data.get("sql", "")
         try:
             result = execute_safe_sql(sql)
-            total_time = time.time() - start_time
             return jsonify({
                 "success": True, 
                 "rows": result, 
                 "query_type": "sql",
-                "performance": {"total_time": round(total_time, 2)}
+                "performance": timing.performance()
             })
         except Exception as e:
             return jsonify({"success": False, "error": f"SQL execution error: {str(e)}"}), 500
 
+def _stream_blob(blob):
+    """
+    Build a streaming response for a Mongo binary payload, honouring
+    If-None-Match, If-Range and single byte-range requests.
+    """
+    headers = {
+        "ETag": f'"{blob.etag}"',
+        "Accept-Ranges": "bytes",
+        "Cache-Control": f"private, max-age={Config.BINARY_CACHE_MAX_AGE}",
+    }
+    if blob.etag in request.if_none_match:
+        blob.close()
+        return Response(status=304, headers=headers)
+
+    start, end, status = 0, blob.size, 200
+    range_header = request.range
+    if_range = request.headers.get("If-Range")
+    if range_header is not None and (not if_range or request.if_range.etag == blob.etag):
+        bounds = range_header.range_for_length(blob.size)
+        if bounds is None:
+            blob.close()
+            headers["Content-Range"] = f"bytes */{blob.size}"
+            return Response(status=416, headers=headers)
+        start, end = bounds
+        status = 206
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{blob.size}"
+
+    headers["Content-Length"] = str(end - start)
+    return Response(
+        blob.iter_range(start, end, Config.BINARY_STREAM_CHUNK_SIZE),
+        status=status,
+        mimetype=blob.content_type,
+        headers=headers,
+        direct_passthrough=True
+    )
+
+
+@main.route("/api/mongo/binary/<db_name>/<collection>/<doc_id>/<path:field>", methods=["GET"])
+def stream_mongo_binary(db_name, collection, doc_id, field):
+    """Streams a binary field of a single Mongo document (e.g. an inline photo)."""
+    try:
+        blob = open_document_binary(db_name, collection, doc_id, field)
+    except ConnectionError as e:
+        return jsonify({"success": False, "error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"success": False, "error": f"Binary lookup failed: {str(e)}"}), 500
+    if blob is None:
+        return jsonify({"success": False, "error": "Document or binary field not found."}), 404
+    return _stream_blob(blob)
+
+
+@main.route("/api/mongo/gridfs/<db_name>/<file_id>", methods=["GET"])
+def stream_gridfs_file(db_name, file_id):
+    """Streams a GridFS file; pass ?bucket=<name> for non-default buckets."""
+    try:
+        blob = open_gridfs_file(db_name, file_id, request.args.get("bucket", "fs"))
+    except ConnectionError as e:
+        return jsonify({"success": False, "error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"success": False, "error": f"GridFS lookup failed: {str(e)}"}), 500
+    if blob is None:
+        return jsonify({"success": False, "error": "GridFS file not found."}), 404
+    return _stream_blob(blob)
+
+
+@main.route("/api/mongo/thumbnail/<key>", methods=["GET"])
+def get_thumbnail(key):
+    """Serves a cached thumbnail, waiting briefly for an in-flight render."""
+    if not re.fullmatch(r"[0-9a-f]{40}", key):
+        return jsonify({"success": False, "error": "Invalid thumbnail key."}), 400
+    path = thumbnail_cache.lookup(key) or thumbnail_cache.wait(key)
+    if path:
+        # Keys are content-addressed, so the file behind a key never changes
+        response = send_file(path, mimetype="image/jpeg", max_age=31536000, etag=key)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+    source_url = thumbnail_cache.source_url(key)
+    if source_url:
+        return redirect(source_url, code=302)
+    return jsonify({"success": False, "error": "Thumbnail not found."}), 404
+
+
+@main.route("/api/mongo/thumbnails/warm", methods=["POST"])
+def warm_thumbnails():
+    """Renders thumbnails for a whole image collection in the background (admin only)."""
+    if not is_admin_request():
+        return jsonify({"success": False, "error": "Admin access required."}), 403
+    data = request.get_json() or {}
+    db_name = data.get("db_name")
+    collection = data.get("collection")
+    if not db_name or not collection:
+        return jsonify({"success": False, "error": "db_name and collection are required."}), 400
+    limit = data.get("limit", 0)
+    if isinstance(limit, str) and limit.isdigit():
+        limit = int(limit)
+    if isinstance(limit, bool) or not isinstance(limit, int) or limit < 0:
+        return jsonify({"success": False, "error": "limit must be a non-negative integer (0 = no limit)."}), 400
+    if not thumbnail_cache.enabled:
+        return jsonify({"success": False, "error": "Thumbnail generation requires Pillow."}), 501
+    thumbnail_cache.warm_collection(db_name, collection, data.get("field"), limit)
+    return jsonify({"success": True, "status": "scheduled", "db_name": db_name, "collection": collection}), 202
+
+
+# --- Background jobs (`async: true` on exports and queries) ---
+
+def wants_job(data):
+    """`async: true` in the body asks for a job_id instead of waiting for the result"""
+    return isinstance(data, dict) and data.get("async") in (True, 1, "true", "1")
+
+
+def job_accepted(job):
+    """(payload, status) for a submitted job, or the refusal when the queue is full"""
+    if job is None:
+        return {"success": False, "error": "Too many background jobs are queued. Try again later."}, 503
+    return {"success": True, **job.summary()}, 202
+
+
+def submit_view_job(kind, handler, data):
+    """
+    Queue `handler(body)` on a job worker with this request's body (minus
+    `async`); the response it returns becomes the job result. The worker
+    repeats what the request hooks set up: this request's ID on its log
+    lines, a trace continuing this request's, stage timings for
+    `performance`, and the request latency metric under method JOB.
+    """
+    app = current_app._get_current_object()
+    route = request.url_rule.rule
+    request_id = g.get("request_id")
+    trace = g.get("trace")
+    traceparent = f"00-{trace.trace_id}-{trace.span_id}-01" if trace is not None else None
+    body = {key: value for key, value in data.items() if key != "async"}
+
+    def run(job):
+        with app.app_context():
+            structured_logging.start_request(request_id)
+            timing.start_request()
+            job_trace = tracing.start_trace(f"JOB {route}", traceparent, {
+                "http.route": route, "http.request_id": request_id, "job.id": job.id, "job.kind": kind,
+            })
+            started = time.perf_counter()
+            error = None
+            try:
+                try:
+                    response = app.make_response(handler(body))
+                except HTTPException as e:
+                    # abort() answers the job as it would have answered the request
+                    response = e.get_response()
+                if job_trace is not None:
+                    job_trace.set_attribute("http.status_code", response.status_code)
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                tracing.end_trace(job_trace, error)
+                timing.end_request()
+                structured_logging.end_request()
+            metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, route, "JOB", str(response.status_code))
+        job.write_result([response.get_data()], response.mimetype, status_code=response.status_code)
+
+    payload, status = job_accepted(job_queue.submit(kind, run))
+    return jsonify(payload), status
+
+
+def job_not_found():
+    return jsonify({"success": False, "code": "job_not_found", "error": "Job expired or not found."}), 404
+
+
+@main.route("/api/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """Status and progress of a background job."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return job_not_found()
+    return jsonify({"success": True, **job.summary()})
+
+
+@main.route("/api/jobs/<job_id>/cancel", methods=["POST"])
+def cancel_job(job_id):
+    """Cancels a queued job at once and a running one at its next progress check."""
+    job = job_queue.cancel(job_id)
+    if job is None:
+        return job_not_found()
+    return jsonify({"success": True, **job.summary()}), 200 if job.finished else 202
+
+
+@main.route("/api/jobs/<job_id>/result", methods=["GET"])
+def get_job_result(job_id):
+    """The finished job's result: the export file, or the JSON the query endpoint would have returned."""
+    job = job_queue.get(job_id)
+    if job is None or (job.status == SUCCEEDED and not os.path.exists(job.result_path)):
+        return job_not_found()
+    if job.status != SUCCEEDED:
+        return jsonify({"success": False, "error": f"Job is {job.status}.", **job.summary()}), 409
+    response = send_file(job.result_path, mimetype=job.mimetype, as_attachment=job.filename is not None,
+                         download_name=job.filename)
+    response.status_code = job.status_code
+    return response
+
+
+# --- Deferred summaries (summary_status "pending" in a query response) ---
+
+def summary_not_found():
+    return jsonify({"success": False, "code": "summary_not_found", "error": "Summary expired or not found."}), 404
+
+
+@main.route("/api/summary/<summary_id>", methods=["GET"])
+def get_summary(summary_id):
+    """The Gemini summary a query response marked pending; 202 while it is still being written."""
+    fields = read_deferred_summary(summary_id)
+    if fields is None:
+        return summary_not_found()
+    return jsonify({"success": True, **fields}), 202 if fields["summary_status"] == "pending" else 200
+
+
+@main.route("/api/summary/<summary_id>/events", methods=["GET"])
+def summary_events(summary_id):
+    """Server-sent events: a single `summary` event once the summary is ready, or still pending at the timeout."""
+    fields = read_deferred_summary(summary_id)
+    if fields is None:
+        return summary_not_found()
+
+    def events(fields):
+        if fields["summary_status"] == "pending":
+            fields = read_deferred_summary(summary_id, wait=Config.SUMMARY_EVENTS_TIMEOUT)
+        fields = fields or {"summary_id": summary_id, "summary_status": "failed"}
+        yield f"event: summary\ndata: {json.dumps(fields)}\n\n"
+
+    return Response(events(fields), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# --- Analytics (charts and exports over a query result) ---
+
+
+def resolve_analytics_result(data):
+    """
+    The result an analytics request works on: the stored result named by
+    `result_id`, or the `rows` posted in the body (older clients, or a result
+    that expired). Returns (result, error_response).
+    """
+    result_id = data.get("result_id")
+    if result_id:
+        stored = result_store.get(result_id)
+        if stored is not None:
+            return stored, None
+        if not data.get("rows"):
+            return None, (jsonify({
+                "success": False,
+                "code": "result_not_found",
+                "error": "Result expired or not found. Send the rows instead."
+            }), 404)
+    rows = data.get("rows")
+    if not isinstance(rows, list) or not rows or not all(isinstance(row, dict) for row in rows):
+        return None, (jsonify({"success": False, "error": "Provide a result_id or a non-empty rows array."}), 400)
+    columns, column_data = to_columns(rows)
+    return StoredResult("", current_session(), columns, column_data, {}, 0), None
+
+
+@main.route("/api/analytics/chart", methods=["POST"])
+def analytics_chart():
+    data = request.get_json(silent=True) or {}
+    result, error = resolve_analytics_result(data)
+    if error:
+        return error
+    question = data.get("question") or result.meta.get("question", "")
+    chart_type = data.get("chart_type") or "auto"
+    if chart_type != "auto" and chart_type not in CHART_TYPES:
+        return jsonify({"success": False, "error": f"Unsupported chart type '{chart_type}'."}), 400
+    with timing.stage("chart"):
+        frame = chart_frame(result, data.get("pushdown"))
+        if not isinstance(frame, PushdownFrame) and process_pool.worthwhile(result.row_count):
+            chart_type, chart_data = process_pool.build_chart(result, chart_type, question,
+                                                              data.get("width"), data.get("height"))
+        else:
+            if chart_type == "auto":
+                chart_type = frame.detect_chart_type(question)
+            chart_data = frame.build(chart_type, question, data.get("width"), data.get("height"))
+    return jsonify({
+        "success": True,
+        "chart_type": chart_type,
+        "chart_data": chart_data,
+        "suggestions": analytics_handler.get_chart_suggestions(chart_type, []),
+        "aggregated_in": frame.aggregated_in,
+        "row_count": result.row_count,
+        "performance": timing.performance()
+    })
+
+
+def export_format_error(export_format):
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"success": False, "error": f"Unsupported export format '{export_format}'."}), 400
+    if not export_available(export_format):
+        return jsonify({"success": False, "error": "Parquet and Arrow exports require pyarrow."}), 501
+    return None
+
+
+def run_export_job(job, result, export_format, filename):
+    if export_format in OFFLOADED_EXPORT_FORMATS and process_pool.worthwhile(result.row_count):
+        process_pool.write_export(job, result, export_format, filename)
+        return
+    total = max(result.row_count, 1)
+    chunks = stream_export(result, export_format,
+                           on_rows=lambda done: job.update(min(done / total, 0.99), f"{done} rows exported"))
+    job.write_result(chunks, EXPORT_FORMATS[export_format][0], filename)
+
+
+@main.route("/api/analytics/export", methods=["POST"])
+def analytics_export():
+    """
+    Returns the URL the export streams from. Posted rows are put in the
+    result store first, so every export is served by the streaming endpoint.
+    With `async: true` the export is written by a background job instead.
+    """
+    data = request.get_json(silent=True) or {}
+    result, error = resolve_analytics_result(data)
+    if error:
+        return error
+    export_format = (data.get("format") or "csv").lower()
+    error = export_format_error(export_format)
+    if error:
+        return error
+    name = data.get("filename") or result.meta.get("question") or data.get("question") or "data_export"
+    if wants_job(data):
+        payload, status = job_accepted(job_queue.submit(
+            "export", run_export_job, result, export_format, export_filename(name, export_format)
+        ))
+        return jsonify(payload), status
+    result_id = result.id or result_store.put(result.rows(), question=data.get("question") or "")
+    if not result_id:
+        return jsonify({"success": False, "error": "The rows are too large to export; run the query again."}), 413
+    query = urlencode({"format": export_format, "filename": name})
+    return jsonify({
+        "success": True,
+        "download_url": f"/api/analytics/export/{result_id}?{query}",
+        "filename": export_filename(name, export_format)
+    })
+
+
+@main.route("/api/analytics/export/<result_id>", methods=["GET"])
+def analytics_export_stream(result_id):
+    """Streams a stored result as a download, re-reading it from the source database's cursor when possible."""
+    export_format = (request.args.get("format") or "csv").lower()
+    error = export_format_error(export_format)
+    if error:
+        return error
+    result = result_store.get(result_id)
+    if result is None:
+        return jsonify({
+            "success": False,
+            "code": "result_not_found",
+            "error": "Result expired or not found. Run the query again."
+        }), 404
+    filename = export_filename(request.args.get("filename") or result.meta.get("question") or "data_export", export_format)
+    return Response(
+        stream_with_context(stream_export(result, export_format)),
+        mimetype=EXPORT_FORMATS[export_format][0],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
 @main.route("/api/nl-to-mongodb", methods=["POST"])
 def nl_to_mongodb():
     """Handle natural language queries for MongoDB"""
-    start_time = time.time()
+    data = request.get_json(silent=True)
+    if wants_job(data):
+        return submit_view_job("nl-to-mongodb", answer_nl_to_mongodb, data)
+    return answer_nl_to_mongodb(data)
+
+
+def answer_nl_to_mongodb(data):
+    """/api/nl-to-mongodb for a parsed request body; job workers call it too"""
     question = ""
     mongo_error = None
     
     try:
-        data = request.get_json()
         question = data.get("question", "")
         
         # Check for greeting
@@ -359,23 +834,23 @@ def nl_to_mongodb():
         # Check if it's a schema question
         existence = detect_existence_question(question, "mongo")
         if existence is not None:
-            total_time = time.time() - start_time
             return jsonify({
                 "success": True,
                 "answer": existence["answer"],
                 "summary": existence.get("summary"),
                 "data": [],
                 "db_type_used": "mongo",
-                "performance": {"total_time": round(total_time, 2), "cached": "none"}
+                "performance": timing.performance()
             })
 
         # Generate and execute MongoDB query
-        mongo_query_dict = generate_mongo_query_from_nl(question)
-        print(f"🔎 Attempting Mongo. Gemini MongoDB dict: {mongo_query_dict}")
+        with timing.stage("mongo_generate"):
+            mongo_query_dict = generate_mongo_query_from_nl(question)
+        logger.debug("Attempting Mongo", extra={"mongo_query": payload(mongo_query_dict)})
 
         if isinstance(mongo_query_dict, dict) and "error" in mongo_query_dict:
             mongo_error = mongo_query_dict["error"]
-            print(f"❌ MongoDB Generation failed: {mongo_error}")
+            logger.warning("MongoDB generation failed: %s", mongo_error)
             suggestions = generate_query_suggestions(question, "mongo")
             return jsonify({
                 "success": False,
@@ -392,26 +867,27 @@ def nl_to_mongodb():
             limit = mongo_query_dict.get("limit", 50)
             db_name = mongo_query_dict.get("db_name")
             db_name_used = None
+            source_db = None  # stays None for rows gathered across databases, which cannot be re-run as one find
             rows = []
             
             try:
                 if db_name:
                     rows = execute_mongo_query(db_name, collection, filter_query, projection, limit)
-                    db_name_used = db_name
+                    db_name_used = source_db = db_name
                     # If LLM suggested DB contained no rows, probe other DBs for the data
                     if not rows:
                         from app.db_mongo import find_db_for_collection, execute_mongo_query_across_dbs
                         resolved_db = find_db_for_collection(collection, filter_query)
                         if resolved_db and resolved_db != db_name:
                             rows = execute_mongo_query(resolved_db, collection, filter_query, projection, limit)
-                            db_name_used = resolved_db
+                            db_name_used = source_db = resolved_db
                         else:
                             # As a last resort scan all DBs and take the first non-empty result
                             aggregated = execute_mongo_query_across_dbs(collection=collection, filter_query=filter_query, projection=projection, limit=limit)
                             for dbn, res in aggregated.items():
                                 if dbn != db_name and isinstance(res, list) and res:
                                     rows = res
-                                    db_name_used = dbn
+                                    db_name_used, source_db = dbn, None
                                     break
                 else:
                     # Try to find the best DB for this collection+filter
@@ -419,37 +895,38 @@ def nl_to_mongodb():
                     resolved_db = find_db_for_collection(collection, filter_query)
                     if resolved_db:
                         rows = execute_mongo_query(resolved_db, collection, filter_query, projection, limit)
-                        db_name_used = resolved_db
+                        db_name_used = source_db = resolved_db
                     else:
                         # No single DB identified, search across DBs and take first non-empty
                         aggregated = execute_mongo_query_across_dbs(collection=collection, filter_query=filter_query, projection=projection, limit=limit)
                         for dbn, res in aggregated.items():
                             if isinstance(res, list) and res:
                                 rows = res
-                                db_name_used = dbn
+                                db_name_used, source_db = dbn, None
                                 break
 
                 if rows:
-                    print("✅ MongoDB execution successful and data found.")
+                    logger.info("MongoDB execution successful and data found")
                     answer = convert_result_to_natural_language(question, rows)
-                    summary = generate_summary(question, rows)
-                    total_time = time.time() - start_time
+                    summary = summarize(question, rows, data.get("summary"), data.get("defer_summary"))
                     chart_request = detect_chart_intent(question)
                     
                     return jsonify({
                         "success": True,
                         "answer": answer,
-                        "summary": summary,
+                        **summary,
                         "data": rows,
+                        "result_id": result_store.put(rows, question=question, db_type_used="mongo",
+                                                     source=mongo_source(mongo_query_dict, source_db)),
                         "db_type_used": "mongo",
                         "db_name_used": db_name_used,
                         "chart_request": chart_request,
-                        "performance": {"total_time": round(total_time, 2), "cached": "none"}
+                        "performance": timing.performance()
                     })
 
             except Exception as e:
                 mongo_error = str(e)
-                print(f"❌ MongoDB Execution failed: {mongo_error}")
+                logger.warning("MongoDB execution failed: %s", mongo_error)
                 suggestions = generate_query_suggestions(question, "mongo")
             error_msg = f"MongoDB execution failed: {mongo_error}"
             # Add collection info to error message if collection doesn't exist
@@ -461,7 +938,7 @@ def nl_to_mongodb():
                         collections = list(schema[db_name].keys())
                         error_msg += f"\nAvailable collections in {db_name}: {', '.join(collections)}"
                 except Exception as schema_error:
-                    print(f"Error getting collection schema: {schema_error}")
+                    logger.warning("Error getting collection schema: %s", schema_error)
             
             # Construct and return error response
             return jsonify({
@@ -480,7 +957,7 @@ def nl_to_mongodb():
         }), 500
 
     except Exception as e:
-        print(f"CRITICAL UNCAUGHT ERROR in nl_to_mongodb: {e}")
+        logger.exception("Uncaught error in nl_to_mongodb")
         suggestions = generate_query_suggestions(question, "mongo")
         return jsonify({
             "success": False,
@@ -492,13 +969,19 @@ def nl_to_mongodb():
 @main.route("/api/nl-to-sql", methods=["POST"])
 def nl_to_sql():
     """The core route with SQL-first fallback to MongoDB logic."""
-    start_time = time.time()
+    data = request.get_json(silent=True)
+    if wants_job(data):
+        return submit_view_job("nl-to-sql", answer_nl_to_sql, data)
+    return answer_nl_to_sql(data)
+
+
+def answer_nl_to_sql(data):
+    """/api/nl-to-sql for a parsed request body; job workers call it too"""
     question = ""
     sql_error = None
     mongo_error = None
     
     try:
-        data = request.get_json()
         question = data.get("question", "")
         db_type_hint = data.get("db_type", "sql").lower()
         if db_type_hint not in ["sql", "mongo"]:
@@ -516,25 +999,24 @@ def nl_to_sql():
         existence = detect_existence_question(question, "sql")
         if existence is not None:
              # If it was an existence question for SQL, return immediately
-            total_time = time.time() - start_time
             return jsonify({
                 "success": True,
                 "answer": existence["answer"],
                 "summary": existence.get("summary"),
                 "data": [],
                 "db_type_used": "sql",
-                "performance": {"total_time": round(total_time, 2), "cached": "none"}
+                "performance": timing.performance()
             })
 
 
         try:
             # Generate SQL
             sql_dict = generate_sql_from_nl(question)
-            print(f"🔎 Attempting SQL. Gemini SQL dict: {sql_dict}")
+            logger.debug("Attempting SQL", extra={"sql_query": payload(sql_dict)})
 
             if isinstance(sql_dict, dict) and "error" in sql_dict:
                 sql_error = sql_dict["error"]
-                print(f"⚠️ SQL Generation failed: {sql_error}. Proceeding to Mongo fallback.")
+                logger.warning("SQL generation failed: %s. Proceeding to Mongo fallback", sql_error)
             else:
                 # Execute SQL
                 query_results = execute_sql_on_all_databases(sql_dict)
@@ -551,59 +1033,60 @@ def nl_to_sql():
 
                 # Success Check: If SQL executed without error AND returned data, return the result
                 if merged_rows:
-                    print("⚡ SQL execution successful and data found. Returning SQL results.")
+                    logger.info("SQL execution successful and data found; returning SQL results")
                     
                     answer = convert_result_to_natural_language(question, merged_rows)
-                    summary = generate_summary(question, merged_rows)
-                    total_time = time.time() - start_time
+                    summary = summarize(question, merged_rows, data.get("summary"), data.get("defer_summary"))
                     chart_request = detect_chart_intent(question)
                     
                     return jsonify({
                         "success": True,
                         "answer": answer,
-                        "summary": summary,
+                        **summary,
                         "data": merged_rows,
+                        "result_id": result_store.put(merged_rows, question=question, db_type_used="sql",
+                                                     source=sql_source(sql_dict, separate_results)),
                         "db_type_used": "sql",
                         "separate_results": separate_results,
                         "chart_request": chart_request,
-                        "performance": {"total_time": round(total_time, 2), "cached": "none"}
+                        "performance": timing.performance()
                     })
                 # If we reach here, SQL failed to generate a result or returned 0 rows
-                print("⚠️ SQL executed but returned 0 rows. Attempting Mongo fallback.")
+                logger.info("SQL executed but returned 0 rows; attempting Mongo fallback")
 
         except Exception as e:
             # Catch unexpected SQL execution errors (like connectivity)
             sql_error = str(e)
-            print(f"⚠️ SQL Execution failed: {sql_error}. Attempting Mongo fallback.")
+            logger.warning("SQL execution failed: %s. Attempting Mongo fallback", sql_error)
         
 
         # --- 2. Attempt MongoDB Query Generation and Execution (Fallback) ---
         
-        print("🔄 Falling back to MongoDB.")
+        logger.info("Falling back to MongoDB")
         
         # 2a. Check for existence question for Mongo
         existence = detect_existence_question(question, "mongo")
         if existence is not None:
-            total_time = time.time() - start_time
             return jsonify({
                 "success": True,
                 "answer": existence["answer"],
                 "summary": existence.get("summary"),
                 "data": [],
                 "db_type_used": "mongo",
-                "performance": {"total_time": round(total_time, 2), "cached": "none"}
+                "performance": timing.performance()
             })
 
         # 2b. Generate Mongo Query
-        mongo_query_dict = generate_mongo_query_from_nl(question)
-        print(f"🔎 Attempting Mongo. Gemini MongoDB dict: {mongo_query_dict}")
+        with timing.stage("mongo_generate"):
+            mongo_query_dict = generate_mongo_query_from_nl(question)
+        logger.debug("Attempting Mongo", extra={"mongo_query": payload(mongo_query_dict)})
 
         rows = []
         
         # 1. Check for None: If LLM generation failed and returned None.
         if mongo_query_dict is None: 
             mongo_error = "MongoDB query generation failed (LLM returned None)."
-            print(f"❌ MongoDB Generation failed (Returned None).")
+            logger.warning("MongoDB generation failed (returned None)")
             
         # 2. Check for successful dict structure: If it generated a query.
         elif isinstance(mongo_query_dict, dict) and "collection" in mongo_query_dict:
@@ -615,17 +1098,18 @@ def nl_to_sql():
                 limit = mongo_query_dict.get("limit", 50)
                 db_name = mongo_query_dict.get("db_name")
                 db_name_used = None
+                source_db = None  # stays None for rows gathered across databases, which cannot be re-run as one find
                 try:
                     if db_name:
                         rows = execute_mongo_query(db_name, collection, filter_query, projection, limit)
-                        db_name_used = db_name
+                        db_name_used = source_db = db_name
                         # If LLM suggested DB contained no rows, probe other DBs for the data
                         if not rows:
                             from app.db_mongo import find_db_for_collection, execute_mongo_query_across_dbs
                             resolved_db = find_db_for_collection(collection, filter_query)
                             if resolved_db and resolved_db != db_name:
                                 rows = execute_mongo_query(resolved_db, collection, filter_query, projection, limit)
-                                db_name_used = resolved_db
+                                db_name_used = source_db = resolved_db
                             else:
                                 # As a last resort scan all DBs and take the first non-empty result (excluding original db)
                                 aggregated = execute_mongo_query_across_dbs(collection=collection, filter_query=filter_query, projection=projection, limit=limit)
@@ -634,14 +1118,14 @@ def nl_to_sql():
                                         continue
                                     if isinstance(res, list) and res:
                                         rows = res
-                                        db_name_used = dbn
+                                        db_name_used, source_db = dbn, None
                                         break
                 except Exception as e:
                     mongo_error = str(e)
-                    print(f"Error executing MongoDB query: {mongo_error}")
+                    logger.warning("Error executing MongoDB query: %s", mongo_error)
                     rows = []
                 except Exception as e:
-                    print(f"Error probing databases: {e}")
+                    logger.warning("Error probing databases: %s", e)
                     # Continue with empty rows
                 else:
                     # Try to find the best DB for this collection+filter
@@ -649,7 +1133,7 @@ def nl_to_sql():
                     resolved_db = find_db_for_collection(collection, filter_query)
                     if resolved_db:
                         rows = execute_mongo_query(resolved_db, collection, filter_query, projection, limit)
-                        db_name_used = resolved_db
+                        db_name_used = source_db = resolved_db
                     else:
                         # No single DB identified, search across DBs and take first non-empty
                         aggregated = execute_mongo_query_across_dbs(collection=collection, filter_query=filter_query, projection=projection, limit=limit)
@@ -657,42 +1141,43 @@ def nl_to_sql():
                         for dbn, res in aggregated.items():
                             if isinstance(res, list) and res:
                                 rows = res
-                                db_name_used = dbn
+                                db_name_used, source_db = dbn, None
                                 break
                 
                 if rows:
-                    print("✅ MongoDB execution successful and data found. Returning Mongo results.")
+                    logger.info("MongoDB execution successful and data found; returning Mongo results")
                     answer = convert_result_to_natural_language(question, rows)
-                    summary = generate_summary(question, rows)
-                    total_time = time.time() - start_time
+                    summary = summarize(question, rows, data.get("summary"), data.get("defer_summary"))
                     chart_request = detect_chart_intent(question)
                     
                     return jsonify({
                         "success": True,
                         "answer": answer,
-                        "summary": summary,
+                        **summary,
                         "data": rows,
+                        "result_id": result_store.put(rows, question=question, db_type_used="mongo",
+                                                     source=mongo_source(mongo_query_dict, source_db)),
                         "db_type_used": "mongo",
                         "db_name_used": db_name_used,
                         "chart_request": chart_request,
-                        "performance": {"total_time": round(total_time, 2), "cached": "none"}
+                        "performance": timing.performance()
                     })
                 
-                print("❌ MongoDB query executed successfully but returned no data.")
+                logger.info("MongoDB query executed successfully but returned no data")
 
             except Exception as e:
                 mongo_error = str(e)
-                print(f"❌ MongoDB Execution failed: {mongo_error}")
+                logger.warning("MongoDB execution failed: %s", mongo_error)
                 
         # 3. Check for error dict: If it generated a dictionary with an explicit 'error' key.
         else:
             mongo_error = mongo_query_dict.get("error", "MongoDB query generation failed with unexpected dictionary structure.")
-            print(f"❌ MongoDB Generation failed: {mongo_error}")
+            logger.warning("MongoDB generation failed: %s", mongo_error)
 
 
         # --- 3. Final Failure Response (Both failed) ---
         
-        print("🛑 Both SQL and Mongo attempts failed or returned no data.")
+        logger.warning("Both SQL and Mongo attempts failed or returned no data")
         
         # Use the SQL db type for generating final suggestions if SQL was the primary failure path
         suggestions = generate_query_suggestions(question, "sql") 
@@ -717,7 +1202,7 @@ def nl_to_sql():
 
     except Exception as e:
         # Catch critical unhandled errors
-        print(f"CRITICAL UNCAUGHT ERROR in nl_to_sql: {e}")
+        logger.exception("Uncaught error in nl_to_sql")
         suggestions = generate_query_suggestions(question, "sql") 
         return jsonify({
             "success": False, 
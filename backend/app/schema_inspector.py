@@ -1,17 +1,28 @@
 # app/schema_inspector.py
 from sqlalchemy import inspect
 from app.db import engine, engines  # Import the engines dictionary
+from app.utils.cache_handler import cache_handler
+from app.utils import timing
+from app.utils.text_search import is_shadow_table
 
 def get_all_db_schemas(engines):
     """Return schemas for all databases as {db_name: {table: [columns]}}"""
+    cache_key = f"schema:sql:{','.join(sorted(engines))}"
+    cached = cache_handler.get(cache_key)
+    timing.cache_result("sql_schema", cached is not None)
+    if cached is not None:
+        return cached
     all_schemas = {}
     for db_name, engine in engines.items():
         inspector = inspect(engine)
         schema = {}
         for table_name in inspector.get_table_names():
+            if is_shadow_table(table_name):
+                continue
             columns = inspector.get_columns(table_name)
             schema[table_name] = [col['name'] for col in columns]
         all_schemas[db_name] = schema
+    cache_handler.set(cache_key, all_schemas)
     return all_schemas
 
 def get_db_schema():
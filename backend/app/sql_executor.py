@@ -1,8 +1,18 @@
+import logging
 from sqlalchemy import create_engine, text
 from config import Config
+from app.utils.sql_rows import result_to_dicts
+from app.utils.index_advisor import index_advisor
+from app.utils import metrics, timing, tracing
+from app.utils.text_search import text_search
 import re
+import time
+from app.utils.structured_logging import payload
+
+logger = logging.getLogger(__name__)
 
 engine = create_engine(Config.SQLALCHEMY_DATABASE_URI)
+tracing.instrument_engine(engine, str(engine.url.database or "default"))
 
 
 def clean_sql(sql: str) -> str:
@@ -36,12 +46,23 @@ def execute_safe_sql(sql, engine=engine):
         return {"success": False, "error": "Only safe SELECT queries are allowed."}
 
     try:
-        print("📝 Final SQL to execute:", repr(sql))
+        db_name = str(engine.url.database or "default")
+        sql = text_search.rewrite_sql(db_name, engine, sql)
+        logger.debug("Final SQL to execute", extra={"sql": payload(sql)})
 
         stmt = text(sql)  # ✅ Always wrap in text()
+        checkout_started = time.perf_counter()
         with engine.connect() as connection:
-            result = connection.execute(stmt)
-            rows = [dict(row._mapping) for row in result]
+            started = time.perf_counter()
+            metrics.POOL_WAIT_SECONDS.observe(started - checkout_started, db_name)
+            with tracing.span("sql.query", {"db.name": db_name}) as trace_span:
+                result = connection.execute(stmt)
+                rows = result_to_dicts(result)
+                trace_span.set_attribute("db.rows", len(rows))
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            index_advisor.record_sql(db_name, engine, sql, elapsed_ms)
+            timing.record("sql_exec", elapsed_ms)
+            metrics.SQL_SECONDS.observe(elapsed_ms / 1000, db_name)
             return {"success": True, "rows": rows}
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -1,13 +1,29 @@
 """Package marker for backend.app.utils.
 
 This file makes `backend/app/utils` a proper Python package so imports
-like `from app.utils.json_encoder import MongoJSONEncoder` work reliably.
+like `from app.utils.json_provider import FastJSONProvider` work reliably.
 """
 
 __all__ = [
     "analytics_handler",
     "cache_handler",
-    "json_encoder",
+    "chart_engine",
+    "chart_pushdown",
+    "exports",
+    "index_advisor",
+    "job_queue",
+    "json_provider",
     "llm_handler",
+    "metrics",
+    "process_pool",
+    "profiler",
+    "result_store",
+    "result_summary",
+    "sql_rows",
     "sql_validator",
+    "structured_logging",
+    "text_search",
+    "thumbnail_cache",
+    "timing",
+    "tracing",
 ]
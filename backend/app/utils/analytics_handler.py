@@ -1,19 +1,12 @@
-import pandas as pd
-import json
-import csv
-import tempfile
-import os
-from datetime import datetime
 from typing import List, Dict, Any, Optional
 
 class AnalyticsHandler:
-    """Handles analytics operations including chart generation and data export"""
+    """Handles analytics operations including chart generation and suggestions"""
     
     def __init__(self):
         self.supported_chart_types = [
             'bar', 'line', 'pie', 'scatter', 'area', 'doughnut', 'horizontal_bar'
         ]
-        self.export_formats = ['csv', 'excel', 'json']
     
     def detect_optimal_chart_type(self, rows: List[Dict], question: str) -> str:
         """Automatically detect the best chart type based on data and question"""
@@ -330,87 +323,6 @@ class AnalyticsHandler:
         
         return suggestions
     
-    def generate_export_file(self, rows: List[Dict], export_format: str, filename: str) -> Dict[str, Any]:
-        """Generate export file in specified format"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_filename = "".join(c for c in filename if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        safe_filename = safe_filename.replace(' ', '_')
-        
-        if export_format == "csv":
-            return self._generate_csv_export(rows, safe_filename, timestamp)
-        elif export_format == "excel":
-            return self._generate_excel_export(rows, safe_filename, timestamp)
-        elif export_format == "json":
-            return self._generate_json_export(rows, safe_filename, timestamp)
-        else:
-            return self._generate_csv_export(rows, safe_filename, timestamp)  # Default to CSV
-    
-    def _generate_csv_export(self, rows: List[Dict], filename: str, timestamp: str) -> Dict[str, Any]:
-        """Generate CSV export"""
-        if not rows:
-            return {"error": "No data to export"}
-        
-        # Create downloads directory if it doesn't exist
-        downloads_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'downloads')
-        os.makedirs(downloads_dir, exist_ok=True)
-        
-        # Create file in downloads directory
-        file_path = os.path.join(downloads_dir, f"{filename}_{timestamp}.csv")
-        
-        # Write CSV data
-        with open(file_path, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=rows[0].keys())
-            writer.writeheader()
-            writer.writerows(rows)
-        
-        return {
-            "download_url": f"/downloads/{filename}_{timestamp}.csv",
-            "filename": f"{filename}_{timestamp}.csv",
-            "file_path": file_path
-        }
-    
-    def _generate_excel_export(self, rows: List[Dict], filename: str, timestamp: str) -> Dict[str, Any]:
-        """Generate Excel export"""
-        try:
-            df = pd.DataFrame(rows)
-            
-            # Create downloads directory if it doesn't exist
-            downloads_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'downloads')
-            os.makedirs(downloads_dir, exist_ok=True)
-            
-            # Create file in downloads directory
-            file_path = os.path.join(downloads_dir, f"{filename}_{timestamp}.xlsx")
-            
-            with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Data', index=False)
-            
-            return {
-                "download_url": f"/downloads/{filename}_{timestamp}.xlsx",
-                "filename": f"{filename}_{timestamp}.xlsx",
-                "file_path": file_path
-            }
-        except ImportError:
-            # Fallback to CSV if pandas/openpyxl not available
-            return self._generate_csv_export(rows, filename, timestamp)
-    
-    def _generate_json_export(self, rows: List[Dict], filename: str, timestamp: str) -> Dict[str, Any]:
-        """Generate JSON export"""
-        # Create downloads directory if it doesn't exist
-        downloads_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'downloads')
-        os.makedirs(downloads_dir, exist_ok=True)
-        
-        # Create file in downloads directory
-        file_path = os.path.join(downloads_dir, f"{filename}_{timestamp}.json")
-        
-        with open(file_path, 'w', encoding='utf-8') as jsonfile:
-            json.dump(rows, jsonfile, indent=2, default=str)
-        
-        return {
-            "download_url": f"/downloads/{filename}_{timestamp}.json",
-            "filename": f"{filename}_{timestamp}.json",
-            "file_path": file_path
-        }
-    
     def generate_analytics_suggestions(self, schema: Dict[str, Any]) -> List[str]:
         """Generate analytics suggestions based on database schema"""
         suggestions = []
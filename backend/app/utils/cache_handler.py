@@ -3,6 +3,7 @@ import json
 import time
 from typing import Any, Optional
 from config import Config
+from app.utils.metrics import CACHE_REQUESTS, cache_namespace
 
 class CacheHandler:
     def __init__(self):
@@ -26,10 +27,12 @@ class CacheHandler:
         if key in self.cache:
             cached_item = self.cache[key]
             if time.time() - cached_item['timestamp'] < self.cache_timeout:
+                CACHE_REQUESTS.inc(cache_namespace(key_data), "hit")
                 return cached_item['data']
             else:
                 # Remove expired cache
                 del self.cache[key]
+        CACHE_REQUESTS.inc(cache_namespace(key_data), "miss")
         return None
     
     def set(self, key_data: Any, value: Any) -> None:
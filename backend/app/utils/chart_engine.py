@@ -0,0 +1,472 @@
+import datetime
+import re
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+
+NUMERIC = "numeric"
+TEMPORAL = "temporal"
+CATEGORICAL = "categorical"
+
+CHART_TYPES = ("bar", "horizontal_bar", "line", "area", "pie", "doughnut", "scatter", "histogram")
+
+_ROLE_SAMPLE_ROWS = 200
+_MAX_PIXELS = 16384
+_ID_COLUMN = re.compile(r"(^|_)(id|uuid|code|zip|phone)$", re.IGNORECASE)
+_ISO_DATE = re.compile(r"^\d{4}-\d{2}(-\d{2})?([T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?)?$")
+_COLORS = [
+    "#FF6384", "#36A2EB", "#FFCE56", "#4BC0C0", "#9966FF",
+    "#FF9F40", "#FF6384", "#C9CBCF", "#4BC0C0", "#FF6384"
+]
+
+
+def _colors(count: int) -> List[str]:
+    return [_COLORS[i % len(_COLORS)] for i in range(count)]
+
+
+def _sample(values: list) -> list:
+    sample = []
+    for value in values:
+        if value is not None and value == value:  # skips None and NaN
+            sample.append(value)
+            if len(sample) == _ROLE_SAMPLE_ROWS:
+                break
+    return sample
+
+
+def _is_number(value: Any) -> bool:
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, (int, float, Decimal, np.number)):
+        return True
+    try:
+        float(value)
+        return isinstance(value, str)
+    except (TypeError, ValueError):
+        return False
+
+
+def is_identifier(name: str) -> bool:
+    """Column names like user_id or zip, whose numbers label rather than measure"""
+    return bool(_ID_COLUMN.search(name))
+
+
+def infer_role(name: str, values: list) -> str:
+    """numeric, temporal or categorical, from a sample of the column's non-null values"""
+    sample = _sample(values)
+    if not sample:
+        return CATEGORICAL
+    if all(isinstance(value, (datetime.date, np.datetime64)) for value in sample):
+        return TEMPORAL
+    if all(isinstance(value, str) and _ISO_DATE.match(value) for value in sample):
+        return TEMPORAL
+    if all(_is_number(value) for value in sample):
+        # Identifiers are numbers but charting them as magnitudes is meaningless
+        return CATEGORICAL if _ID_COLUMN.search(name) else NUMERIC
+    return CATEGORICAL
+
+
+def _convert(values: list, role: str) -> pd.Series:
+    if role == NUMERIC:
+        try:
+            # One C-level pass; None becomes NaN, Decimal and numeric strings convert too
+            return pd.Series(np.asarray(values, dtype="float64"))
+        except (TypeError, ValueError):
+            return pd.to_numeric(pd.Series(values, dtype="object"), errors="coerce").astype("float64")
+    if role == TEMPORAL:
+        converted = pd.to_datetime(pd.Series(values, dtype="object"), errors="coerce", utc=True)
+        return converted.dt.tz_localize(None)
+    return pd.Series(values, dtype="object")
+
+
+def bin_count(values: int) -> int:
+    """Histogram bins for `values` samples: Sturges' rule, capped so the bars stay readable"""
+    return int(min(Config.CHART_HISTOGRAM_MAX_BINS, max(1, np.ceil(np.log2(values) + 1))))
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of the `threshold` points that Largest-Triangle-Three-Buckets keeps
+    from an x-ordered series: the first and last point, and from each bucket in
+    between the point spanning the largest triangle with the point kept before
+    it and the average of the next bucket. Bucket averages and areas are
+    computed with NumPy; only the walk over buckets is a Python loop.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    # threshold - 2 buckets over the interior points 1 .. n-2
+    edges = np.linspace(1, n - 1, threshold - 1).astype("int64")
+    sizes = np.diff(edges)
+    avg_x = np.add.reduceat(x[:n - 1], edges[:-1]) / sizes
+    avg_y = np.add.reduceat(y[:n - 1], edges[:-1]) / sizes
+    # Third vertex for each bucket: the next bucket's average, the last point for the last bucket
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+    picks = np.empty(threshold, dtype="int64")
+    picks[0], picks[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - next_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        picks[i + 1] = a
+    return picks
+
+
+def grid_sample(x: np.ndarray, y: np.ndarray, columns: int, rows: int, limit: int) -> np.ndarray:
+    """
+    Indices of one point per occupied cell of a `columns` x `rows` grid over
+    the data's extent, in input order; the grid is coarsened until at most
+    `limit` cells are occupied. Clusters collapse while outliers, which sit
+    in cells of their own, survive.
+    """
+    if not len(x):
+        return np.arange(0)
+
+    def cells(values: np.ndarray, count: int) -> np.ndarray:
+        low, high = values.min(), values.max()
+        if high == low:
+            return np.zeros(len(values), dtype="int64")
+        return np.minimum(((values - low) / (high - low) * count).astype("int64"), count - 1)
+
+    while True:
+        occupied, first = np.unique(cells(x, columns) * rows + cells(y, rows), return_index=True)
+        if len(first) <= limit or (columns == 1 and rows == 1):
+            return np.sort(first)
+        shrink = np.sqrt(len(first) / limit)
+        columns, rows = max(1, int(columns / shrink)), max(1, int(rows / shrink))
+
+
+def _labels(values) -> List[str]:
+    """Display labels for group keys; dates without a time part print as dates"""
+    if isinstance(values, pd.DatetimeIndex) or pd.api.types.is_datetime64_any_dtype(values):
+        index = pd.DatetimeIndex(values)
+        fmt = "%Y-%m-%d" if (index == index.normalize()).all() else "%Y-%m-%dT%H:%M:%S"
+        return list(index.strftime(fmt))
+    values = np.asarray(values)
+    if values.dtype.kind == "f":
+        return [f"{value:g}" for value in values.tolist()]
+    return [str(value) for value in values.tolist()]
+
+
+def _pixels(value: Any, default: int) -> int:
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return default
+    return min(value, _MAX_PIXELS) if value > 0 else default
+
+
+class ChartFrame:
+    """
+    A columnar query result with each column's role (numeric, temporal or
+    categorical) inferred once, and vectorized NumPy/pandas builders for the
+    Chart.js configs served by /api/analytics/chart.
+    """
+
+    aggregated_in = "memory"
+
+    def __init__(self, columns: List[str], data: Dict[str, list]):
+        self.columns = list(columns)
+        self.data = data
+        self.roles = {name: infer_role(name, data[name]) for name in self.columns}
+        self.row_count = len(data[self.columns[0]]) if self.columns else 0
+        self._converted: Dict[str, pd.Series] = {}
+        self.width, self.height = Config.CHART_DEFAULT_WIDTH, Config.CHART_DEFAULT_HEIGHT
+        self._groups: Dict[Tuple[str, bool], Tuple[np.ndarray, pd.Index]] = {}
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]]) -> "ChartFrame":
+        from app.utils.result_store import to_columns
+        return cls(*to_columns(rows))
+
+    def column(self, name: str) -> pd.Series:
+        """The column converted for its role; converted on first use, so unused columns cost nothing"""
+        if name not in self._converted:
+            self._converted[name] = _convert(self.data[name], self.roles[name])
+        return self._converted[name]
+
+    def _floats(self, name: str) -> np.ndarray:
+        return self.column(name).to_numpy(dtype="float64", na_value=np.nan)
+
+    def _with_role(self, role: str) -> List[str]:
+        return [name for name in self.columns if self.roles[name] == role]
+
+    def label_column(self, prefer: str = CATEGORICAL) -> Optional[str]:
+        """Column that names the bars/slices/points; the first column as a last resort"""
+        for role in (prefer, CATEGORICAL, TEMPORAL):
+            names = self._with_role(role)
+            if names:
+                # A name column labels better than an id column
+                return next((name for name in names if not _ID_COLUMN.search(name)), names[0])
+        return self.columns[0] if self.columns else None
+
+    def value_column(self, label: Optional[str]) -> Optional[str]:
+        """First numeric column other than the label; None means values are row counts"""
+        return next((name for name in self._with_role(NUMERIC) if name != label), None)
+
+    def _factorize(self, column: str, sort: bool):
+        key = (column, sort)
+        if key not in self._groups:
+            self._groups[key] = pd.factorize(self.column(column), sort=sort)
+        return self._groups[key]
+
+    def group_count(self, column: str) -> int:
+        return len(self._factorize(column, False)[1])
+
+    def _aggregate(self, label: str, value: Optional[str], sort: bool = False):
+        """(group keys, per-group sum of `value` or row count); null labels and values are skipped"""
+        codes, uniques = self._factorize(label, sort)
+        valid = codes >= 0
+        if value is None:
+            totals = np.bincount(codes[valid], minlength=len(uniques)).astype("float64")
+        else:
+            weights = self._floats(value)
+            valid &= ~np.isnan(weights)
+            totals = np.bincount(codes[valid], weights=weights[valid], minlength=len(uniques))
+        return uniques, totals
+
+    @staticmethod
+    def _top(totals: np.ndarray, limit: int) -> np.ndarray:
+        """Indices of the `limit` largest totals, largest first"""
+        if len(totals) > limit:
+            candidates = np.argpartition(-totals, limit - 1)[:limit]
+        else:
+            candidates = np.arange(len(totals))
+        return candidates[np.argsort(-totals[candidates], kind="stable")]
+
+    # --- aggregation (overridden by chart_pushdown.PushdownFrame) --------------
+
+    def top_groups(self, label: str, value: Optional[str], limit: int):
+        """(keys, totals) of the `limit` largest groups, largest first, and the total over all groups"""
+        uniques, totals = self._aggregate(label, value)
+        top = self._top(totals, limit)
+        return uniques[top], totals[top], float(totals.sum())
+
+    def ordered_groups(self, label: str, value: Optional[str]):
+        """(keys, totals) of every group, ordered by key unless the label is categorical"""
+        return self._aggregate(label, value, sort=self.roles[label] != CATEGORICAL)
+
+    def histogram_counts(self, name: str):
+        """(counts, bin edges) of a numeric column, or None when it has no values"""
+        values = self._floats(name)
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return None
+        return np.histogram(values, bins=bin_count(len(values)))
+
+    # --- chart type detection --------------------------------------------
+
+    def detect_chart_type(self, question: str) -> str:
+        """Same keyword cues as AnalyticsHandler.detect_optimal_chart_type, decided on column roles and group counts"""
+        if not self.row_count or not self.columns:
+            return "bar"
+        question_lower = (question or "").lower()
+        numeric = self._with_role(NUMERIC)
+        temporal = self._with_role(TEMPORAL)
+        label = self.label_column()
+        groups = self.group_count(label) if label else 0
+
+        if any(word in question_lower for word in ['trend', 'over time', 'daily', 'monthly', 'yearly', 'date']):
+            return "line"
+        if any(word in question_lower for word in ['compare', 'vs', 'versus', 'difference', 'ranking']):
+            return "bar" if groups <= 10 else "horizontal_bar"
+        if any(word in question_lower for word in ['distribution', 'frequency', 'count', 'how many']):
+            if numeric and self.roles.get(label) == NUMERIC:
+                return "histogram"
+            return "bar" if groups <= 20 else "horizontal_bar"
+        if any(word in question_lower for word in ['correlation', 'relationship', 'scatter']) and len(numeric) >= 2:
+            return "scatter"
+        if any(word in question_lower for word in ['percentage', 'proportion', 'share', 'breakdown']):
+            return "pie" if groups <= 8 else "doughnut"
+
+        if temporal and numeric:
+            return "line"
+        if self.roles.get(label) == NUMERIC:
+            # Only numbers: two or more make a scatter, one a distribution
+            return "scatter" if len(numeric) >= 2 else "histogram"
+        return "bar" if groups <= 15 else "horizontal_bar"
+
+    # --- builders ----------------------------------------------------------
+
+    def build(self, chart_type: str, question: str, width: Optional[int] = None,
+              height: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Chart.js config for `chart_type` (unknown types fall back to bar), or
+        {"error": ...}. `width` and `height` are the canvas size in pixels;
+        line and scatter charts are downsampled to what it can show.
+        """
+        if not self.row_count:
+            return {"error": "No data available"}
+        self.width = _pixels(width, Config.CHART_DEFAULT_WIDTH)
+        self.height = _pixels(height, Config.CHART_DEFAULT_HEIGHT)
+        builder = {
+            "bar": self._bar,
+            "horizontal_bar": self._horizontal_bar,
+            "line": self._line,
+            "area": self._area,
+            "pie": self._pie,
+            "doughnut": self._doughnut,
+            "scatter": self._scatter,
+            "histogram": self._histogram,
+        }.get(chart_type, self._bar)
+        return builder(question or "")
+
+    @staticmethod
+    def _options(title: str, question: str, **extra: Any) -> Dict[str, Any]:
+        options = {
+            "responsive": True,
+            "plugins": {"title": {"display": True, "text": f"{title}: {question[:50]}..."}},
+        }
+        options.update(extra)
+        return options
+
+    def _bar(self, question: str, horizontal: bool = False) -> Dict[str, Any]:
+        label = self.label_column()
+        value = self.value_column(label)
+        keys, totals, _ = self.top_groups(label, value, Config.CHART_MAX_BARS)
+        values = totals.tolist()
+        extra = {"indexAxis": "y"} if horizontal else {}
+        return {
+            "type": "bar",
+            "data": {
+                "labels": _labels(keys),
+                "datasets": [{
+                    "label": value or "count",
+                    "data": values,
+                    "backgroundColor": _colors(len(values)),
+                    "borderColor": _colors(len(values)),
+                    "borderWidth": 1
+                }]
+            },
+            "options": self._options("Horizontal Bar Chart" if horizontal else "Bar Chart", question, **extra)
+        }
+
+    def _horizontal_bar(self, question: str) -> Dict[str, Any]:
+        return self._bar(question, horizontal=True)
+
+    def _series(self):
+        """(x labels, y values) ordered along x; repeated x values are summed, then LTTB-downsampled to the width"""
+        label = self.label_column(prefer=TEMPORAL)
+        value = self.value_column(label)
+        uniques, totals = self.ordered_groups(label, value)
+        points = min(self.width, Config.CHART_MAX_POINTS)
+        if len(totals) > points:
+            if isinstance(uniques, pd.DatetimeIndex):
+                x = uniques.asi8.astype("float64")
+            elif self.roles[label] == CATEGORICAL:
+                x = np.arange(len(totals), dtype="float64")
+            else:
+                x = np.asarray(uniques, dtype="float64")
+            picks = lttb(x, totals, points)
+            uniques, totals = uniques[picks], totals[picks]
+        return label, value, _labels(uniques), totals.tolist()
+
+    def _line(self, question: str, area: bool = False) -> Dict[str, Any]:
+        label, value, labels, values = self._series()
+        dataset = {
+            "label": value or "count",
+            "data": values,
+            "borderColor": "rgb(75, 192, 192)",
+            "backgroundColor": "rgba(75, 192, 192, 0.3)" if area else "rgba(75, 192, 192, 0.2)",
+            "tension": 0.1
+        }
+        if area:
+            dataset["fill"] = True
+        return {
+            "type": "line",
+            "data": {"labels": labels, "datasets": [dataset]},
+            "options": self._options("Area Chart" if area else "Line Chart", question)
+        }
+
+    def _area(self, question: str) -> Dict[str, Any]:
+        return self._line(question, area=True)
+
+    def _pie(self, question: str, chart_type: str = "pie") -> Dict[str, Any]:
+        label = self.label_column()
+        value = self.value_column(label)
+        keys, totals, overall = self.top_groups(label, value, Config.CHART_MAX_SLICES)
+        labels = _labels(keys)
+        values = totals.tolist()
+        rest = overall - float(totals.sum())
+        if rest > 0:
+            labels.append("Other")
+            values.append(rest)
+        return {
+            "type": chart_type,
+            "data": {
+                "labels": labels,
+                "datasets": [{
+                    "data": values,
+                    "backgroundColor": _colors(len(values)),
+                    "borderColor": "#fff",
+                    "borderWidth": 2
+                }]
+            },
+            "options": self._options("Doughnut Chart" if chart_type == "doughnut" else "Pie Chart", question)
+        }
+
+    def _doughnut(self, question: str) -> Dict[str, Any]:
+        return self._pie(question, chart_type="doughnut")
+
+    def _scatter(self, question: str) -> Dict[str, Any]:
+        numeric = self._with_role(NUMERIC)
+        if len(numeric) < 2:
+            return {"error": "Need at least 2 numeric columns for scatter chart"}
+        x_name, y_name = numeric[:2]
+        x, y = self._floats(x_name), self._floats(y_name)
+        keep = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[keep], y[keep]
+        cell = Config.CHART_SCATTER_CELL_PX
+        picks = grid_sample(x, y, max(1, self.width // cell), max(1, self.height // cell), Config.CHART_MAX_POINTS)
+        x, y = x[picks], y[picks]
+        return {
+            "type": "scatter",
+            "data": {
+                "datasets": [{
+                    "label": f"{x_name} vs {y_name}",
+                    "data": [{"x": px, "y": py} for px, py in zip(x.tolist(), y.tolist())],
+                    "backgroundColor": "rgba(75, 192, 192, 0.6)",
+                    "borderColor": "rgb(75, 192, 192)"
+                }]
+            },
+            "options": self._options("Scatter Plot", question, scales={
+                "x": {"title": {"display": True, "text": x_name}},
+                "y": {"title": {"display": True, "text": y_name}}
+            })
+        }
+
+    def _histogram(self, question: str) -> Dict[str, Any]:
+        numeric = self._with_role(NUMERIC)
+        if not numeric:
+            return {"error": "Need a numeric column for histogram"}
+        name = numeric[0]
+        histogram = self.histogram_counts(name)
+        if histogram is None:
+            return {"error": f"No numeric values in '{name}'"}
+        counts, edges = histogram
+        labels = [f"{lo:.4g} – {hi:.4g}" for lo, hi in zip(edges[:-1].tolist(), edges[1:].tolist())]
+        return {
+            "type": "bar",
+            "data": {
+                "labels": labels,
+                "datasets": [{
+                    "label": f"{name} (count)",
+                    "data": counts.tolist(),
+                    "backgroundColor": "rgba(54, 162, 235, 0.6)",
+                    "borderColor": "rgb(54, 162, 235)",
+                    "borderWidth": 1,
+                    "barPercentage": 1.0,
+                    "categoryPercentage": 1.0
+                }]
+            },
+            "options": self._options("Histogram", question, scales={
+                "x": {"title": {"display": True, "text": name}},
+                "y": {"title": {"display": True, "text": "count"}}
+            })
+        }
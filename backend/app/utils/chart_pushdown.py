@@ -0,0 +1,304 @@
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from app.utils.chart_engine import CATEGORICAL, TEMPORAL, ChartFrame, bin_count
+
+logger = logging.getLogger(__name__)
+
+_TRAILING_SEMICOLONS = re.compile(r"[\s;]+$")
+
+
+class NotPushable(Exception):
+    """The aggregation cannot be expressed against this source; aggregate in memory"""
+
+
+def sql_source(sql_dict, separate_results: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Result-store `source` for the SQL that produced a merged result: one query per database that answered"""
+    if isinstance(sql_dict, str):
+        sql_dict = {"db2": sql_dict}
+    if not isinstance(sql_dict, dict):
+        return None
+    queries = {db_name: sql for db_name, sql in sql_dict.items()
+               if isinstance(sql, str) and isinstance(separate_results.get(db_name), list)}
+    return {"kind": "sql", "queries": queries} if queries else None
+
+
+def mongo_source(mongo_query: Dict[str, Any], db_name: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Result-store `source` for a Mongo find on a single database; pass db_name=None for fanned-out rows"""
+    if not db_name or not isinstance(mongo_query, dict) or not mongo_query.get("collection"):
+        return None
+    return {
+        "kind": "mongo",
+        "db_name": db_name,
+        "collection": mongo_query["collection"],
+        "filter": mongo_query.get("filter") or {},
+        "projection": mongo_query.get("projection"),
+        "limit": mongo_query.get("limit", 50),
+    }
+
+
+# --- SQL: the original query becomes a derived table ----------------------------
+
+def _subquery(sql: str) -> str:
+    from app.sql_executor import clean_sql, is_safe_query
+    sql = _TRAILING_SEMICOLONS.sub("", clean_sql(sql))
+    if not is_safe_query(sql):
+        raise NotPushable("source is not a single SELECT")
+    return f"({sql}) AS chart_source"
+
+
+def _literal(value: float) -> str:
+    return repr(float(value))
+
+
+def compile_sql_groups(sql: str, dialect, label: str, value: Optional[str], limit: Optional[int] = None,
+                       order_by_key: bool = False) -> str:
+    """
+    Per-label totals of `value` (or row counts) over the rows of `sql`. With
+    `limit`, only the largest groups come back; every row also carries the
+    total over all groups so the remainder can still be shown.
+    """
+    quote = dialect.identifier_preparer.quote
+    total = f"SUM({quote(value)})" if value else "COUNT(*)"
+    grouped = (
+        f"SELECT {quote(label)} AS chart_key, {total} AS chart_total FROM {_subquery(sql)} "
+        f"WHERE {quote(label)} IS NOT NULL GROUP BY {quote(label)}"
+    )
+    order = "chart_key" if order_by_key else "chart_total DESC"
+    query = (
+        f"SELECT chart_key, chart_total, SUM(chart_total) OVER () AS chart_overall "
+        f"FROM ({grouped}) AS chart_groups ORDER BY {order}"
+    )
+    return f"{query} LIMIT {int(limit)}" if limit else query
+
+
+def compile_sql_range(sql: str, dialect, column: str) -> str:
+    quote = dialect.identifier_preparer.quote
+    return (
+        f"SELECT MIN({quote(column)}) AS chart_lo, MAX({quote(column)}) AS chart_hi, "
+        f"COUNT({quote(column)}) AS chart_n FROM {_subquery(sql)}"
+    )
+
+
+def compile_sql_histogram(sql: str, dialect, column: str, lo: float, hi: float, bins: int) -> str:
+    """Row counts per equal-width bin over [lo, hi]; the last bin is closed, as in np.histogram"""
+    quote = dialect.identifier_preparer.quote
+    width = (hi - lo) / bins
+    offset = f"({quote(column)} - {_literal(lo)}) / {_literal(width)}"
+    # Values are >= lo, so truncation is floor; SQLite has no FLOOR before 3.35
+    bucket = f"CAST({offset} AS INTEGER)" if dialect.name == "sqlite" else f"FLOOR({offset})"
+    return (
+        f"SELECT chart_bucket, COUNT(*) AS chart_count FROM ("
+        f"SELECT CASE WHEN {quote(column)} >= {_literal(hi)} THEN {bins - 1} ELSE {bucket} END AS chart_bucket "
+        f"FROM {_subquery(sql)} WHERE {quote(column)} IS NOT NULL) AS chart_buckets GROUP BY chart_bucket"
+    )
+
+
+# --- Mongo: the original find becomes a pipeline prefix ------------------------
+
+def _field(name: str) -> str:
+    if not name or name.startswith("$") or "." in name:
+        raise NotPushable(f"field '{name}' cannot be referenced in a pipeline")
+    return name
+
+
+def _mongo_prefix(source: Dict[str, Any]) -> List[Dict[str, Any]]:
+    pipeline = []
+    if source.get("filter"):
+        pipeline.append({"$match": source["filter"]})
+    if source.get("limit"):
+        pipeline.append({"$limit": int(source["limit"])})
+    if isinstance(source.get("projection"), dict) and source["projection"]:
+        pipeline.append({"$project": source["projection"]})
+    return pipeline
+
+
+def compile_mongo_groups(source: Dict[str, Any], label: str, value: Optional[str], limit: Optional[int] = None,
+                         order_by_key: bool = False) -> List[Dict[str, Any]]:
+    """$group counterpart of compile_sql_groups: one document with `groups` and `overall`"""
+    label = _field(label)
+    groups = [{"$sort": {"_id": 1} if order_by_key else {"total": -1}}]
+    if limit:
+        groups.append({"$limit": int(limit)})
+    return _mongo_prefix(source) + [
+        {"$match": {label: {"$ne": None}}},
+        {"$group": {"_id": f"${label}", "total": {"$sum": f"${_field(value)}" if value else 1}}},
+        {"$facet": {
+            "groups": groups,
+            "overall": [{"$group": {"_id": None, "total": {"$sum": "$total"}}}],
+        }},
+    ]
+
+
+def compile_mongo_range(source: Dict[str, Any], column: str) -> List[Dict[str, Any]]:
+    column = _field(column)
+    return _mongo_prefix(source) + [
+        {"$match": {column: {"$type": "number"}}},
+        {"$group": {"_id": None, "lo": {"$min": f"${column}"}, "hi": {"$max": f"${column}"}, "n": {"$sum": 1}}},
+    ]
+
+
+def compile_mongo_histogram(source: Dict[str, Any], column: str, lo: float, hi: float, bins: int) -> List[Dict[str, Any]]:
+    column = _field(column)
+    width = (hi - lo) / bins
+    return _mongo_prefix(source) + [
+        {"$match": {column: {"$type": "number"}}},
+        {"$project": {"_id": 0, "bucket": {"$min": [
+            bins - 1, {"$floor": {"$divide": [{"$subtract": [f"${column}", lo]}, width]}}
+        ]}}},
+        {"$group": {"_id": "$bucket", "count": {"$sum": 1}}},
+    ]
+
+
+def _number(value: Any) -> float:
+    if value is None:
+        return 0.0
+    if hasattr(value, "to_decimal"):  # bson Decimal128
+        value = value.to_decimal()
+    return float(value)
+
+
+class PushdownFrame(ChartFrame):
+    """
+    ChartFrame whose grouping, top-N and histogram binning run in the database
+    that produced the result: the stored SQL is wrapped as a derived table, a
+    Mongo find becomes the prefix of an aggregation pipeline. Only the
+    aggregated series comes back. Anything that cannot be pushed down, or
+    fails in the database, is aggregated in memory instead.
+    """
+
+    def __init__(self, columns: List[str], data: Dict[str, list], source: Dict[str, Any]):
+        super().__init__(columns, data)
+        self.source = source
+
+    def _pushed(self, pushed, fallback, *args):
+        try:
+            result = pushed(*args)
+        except NotPushable as e:
+            logger.debug("Chart aggregation not pushed down: %s", e)
+            return fallback(*args)
+        except Exception as e:
+            logger.warning("Chart pushdown failed, aggregating in memory: %s", e)
+            return fallback(*args)
+        self.aggregated_in = "database"
+        return result
+
+    # --- execution ---------------------------------------------------------
+
+    def _run_sql(self, compile_query) -> List[List[Dict[str, Any]]]:
+        from app.db import engines, execute_sql_on_all_databases
+        queries = {}
+        for db_name, sql in self.source["queries"].items():
+            if db_name not in engines:
+                raise NotPushable(f"database {db_name} is not configured")
+            queries[db_name] = compile_query(sql, engines[db_name].dialect)
+        results = []
+        for db_name, rows in execute_sql_on_all_databases(queries).items():
+            if not isinstance(rows, list):
+                raise RuntimeError(f"{db_name}: {rows.get('error')}")
+            results.append(rows)
+        return results
+
+    def _run_mongo(self, pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        from app.db_mongo import aggregate_mongo
+        return aggregate_mongo(self.source["db_name"], self.source["collection"], pipeline)
+
+    def _keys(self, label: str, keys: list) -> pd.Index:
+        if self.roles[label] == TEMPORAL:
+            return pd.DatetimeIndex(pd.to_datetime(pd.Series(keys, dtype="object"), errors="coerce", utc=True)).tz_localize(None)
+        return pd.Index(keys, dtype="object" if self.roles[label] == CATEGORICAL else None)
+
+    def _db_groups(self, label: str, value: Optional[str], limit: Optional[int], order_by_key: bool):
+        """{key: total} and the overall total, merged across the source's databases"""
+        totals: Dict[Any, float] = {}
+        overall = 0.0
+        if self.source.get("kind") == "sql":
+            # Top-N of a merge needs every group of each database
+            limit = limit if len(self.source["queries"]) == 1 else None
+            for rows in self._run_sql(lambda sql, dialect: compile_sql_groups(sql, dialect, label, value, limit, order_by_key)):
+                for row in rows:
+                    totals[row["chart_key"]] = totals.get(row["chart_key"], 0.0) + _number(row["chart_total"])
+                overall += _number(rows[0]["chart_overall"]) if rows else 0.0
+        elif self.source.get("kind") == "mongo":
+            faceted = self._run_mongo(compile_mongo_groups(self.source, label, value, limit, order_by_key))
+            faceted = faceted[0] if faceted else {"groups": [], "overall": []}
+            totals = {row["_id"]: _number(row["total"]) for row in faceted["groups"]}
+            overall = _number(faceted["overall"][0]["total"]) if faceted["overall"] else 0.0
+        else:
+            raise NotPushable(f"unknown source kind {self.source.get('kind')!r}")
+        return totals, overall
+
+    def _db_top_groups(self, label: str, value: Optional[str], limit: int):
+        totals, overall = self._db_groups(label, value, limit, order_by_key=False)
+        keys = list(totals)
+        values = np.array([totals[key] for key in keys], dtype="float64")
+        top = self._top(values, limit)
+        return self._keys(label, [keys[i] for i in top.tolist()]), values[top], overall
+
+    def _db_ordered_groups(self, label: str, value: Optional[str]):
+        ordered = self.roles[label] != CATEGORICAL
+        totals, _ = self._db_groups(label, value, None, order_by_key=ordered)
+        keys = self._keys(label, list(totals))
+        values = np.array(list(totals.values()), dtype="float64")
+        if ordered and len(self.source.get("queries", ())) > 1:
+            order = keys.argsort()
+            keys, values = keys[order], values[order]
+        return keys, values
+
+    def _db_histogram_counts(self, name: str):
+        if self.source.get("kind") == "sql":
+            ranges = [rows[0] for rows in self._run_sql(lambda sql, dialect: compile_sql_range(sql, dialect, name)) if rows]
+            ranges = [{"lo": row["chart_lo"], "hi": row["chart_hi"], "n": row["chart_n"]} for row in ranges]
+        elif self.source.get("kind") == "mongo":
+            ranges = self._run_mongo(compile_mongo_range(self.source, name))
+        else:
+            raise NotPushable(f"unknown source kind {self.source.get('kind')!r}")
+        ranges = [row for row in ranges if row["n"]]
+        if not ranges:
+            return None
+        lo = min(_number(row["lo"]) for row in ranges)
+        hi = max(_number(row["hi"]) for row in ranges)
+        bins = bin_count(sum(int(row["n"]) for row in ranges))
+        if lo == hi:
+            # np.histogram's range for a single distinct value
+            lo, hi = lo - 0.5, hi + 0.5
+        counts = np.zeros(bins, dtype="int64")
+        if self.source["kind"] == "sql":
+            buckets = [(row["chart_bucket"], row["chart_count"]) for rows in self._run_sql(
+                lambda sql, dialect: compile_sql_histogram(sql, dialect, name, lo, hi, bins)) for row in rows]
+        else:
+            buckets = [(row["_id"], row["count"]) for row in self._run_mongo(
+                compile_mongo_histogram(self.source, name, lo, hi, bins))]
+        for bucket, count in buckets:
+            if bucket is not None:
+                counts[min(max(int(_number(bucket)), 0), bins - 1)] += int(count)
+        return counts, np.linspace(lo, hi, bins + 1)
+
+    # --- ChartFrame aggregation hooks --------------------------------------
+
+    def top_groups(self, label: str, value: Optional[str], limit: int):
+        return self._pushed(self._db_top_groups, super().top_groups, label, value, limit)
+
+    def ordered_groups(self, label: str, value: Optional[str]):
+        return self._pushed(self._db_ordered_groups, super().ordered_groups, label, value)
+
+    def histogram_counts(self, name: str):
+        return self._pushed(self._db_histogram_counts, super().histogram_counts, name)
+
+
+def chart_frame(result, pushdown: Optional[bool] = None) -> ChartFrame:
+    """
+    The frame to build a stored result's chart from: pushed down to its source
+    database when the result is large (CHART_PUSHDOWN_MIN_ROWS) or `pushdown`
+    asks for it, in memory otherwise or when the source is unknown.
+    """
+    source = result.meta.get("source")
+    if source and Config.CHART_PUSHDOWN_ENABLED and pushdown is not False:
+        if pushdown or result.row_count >= Config.CHART_PUSHDOWN_MIN_ROWS:
+            return PushdownFrame(result.columns, result.data, source)
+    return ChartFrame(result.columns, result.data)
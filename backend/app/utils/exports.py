@@ -0,0 +1,580 @@
+import csv
+import io
+import itertools
+import logging
+import math
+import queue
+import re
+import threading
+import time as clock
+import zipfile
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from sqlalchemy import text
+
+from config import Config
+from app.utils.json_provider import dumps_bytes, to_jsonable
+from app.utils.sql_rows import column_converters
+from app.utils import tracing
+from app.utils.text_search import text_search
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet/Arrow exports are optional
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+# format -> (mimetype, file extension)
+EXPORT_FORMATS: Dict[str, Tuple[str, str]] = {
+    "csv": ("text/csv", ".csv"),
+    "json": ("application/json", ".json"),
+    "ndjson": ("application/x-ndjson", ".ndjson"),
+    "excel": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ".xlsx"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", ".arrows"),
+}
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+Batch = List[Tuple[Any, ...]]
+
+_UNSAFE_FILENAME = re.compile(r"[^A-Za-z0-9._-]+")
+_TRAILING_SEMICOLONS = re.compile(r"[\s;]+$")
+# Decimal stays exact: CSV writes str(value), Excel its exact text, Arrow/Parquet a decimal128 column
+_PLAIN_TYPES = (str, int, float, bool, Decimal, datetime, date, time)
+# Arrow decimal width for exported columns, so later batches' larger values still fit
+_ARROW_DECIMAL_PRECISION = 38
+
+
+def export_available(export_format: str) -> bool:
+    return export_format in EXPORT_FORMATS and (export_format not in COLUMNAR_FORMATS or pa is not None)
+
+
+def export_filename(name: str, export_format: str) -> str:
+    stem = _UNSAFE_FILENAME.sub("_", name or "").strip("._")[:100] or "data_export"
+    return stem + EXPORT_FORMATS[export_format][1]
+
+
+# --- Row batches: the source query's cursor, or the stored columns --------------
+
+def _stored_batches(result, size: int) -> Iterator[Batch]:
+    columns = [result.data[name] for name in result.columns]
+    for start in range(0, result.row_count, size):
+        yield list(zip(*(values[start:start + size] for values in columns)))
+
+
+def _sql_batches(queries: Dict[str, str], columns: List[str], size: int) -> Iterator[Batch]:
+    from app.db import engines
+    for db_name, sql in queries.items():
+        with engines[db_name].connect() as conn:
+            result = conn.execution_options(stream_results=True).execute(text(sql))
+            keys = list(result.keys())
+            picks = [keys.index(name) if name in keys else None for name in columns]
+            description = getattr(result.cursor, "description", None)
+            converters = None
+            while True:
+                rows = result.fetchmany(size)
+                if not rows:
+                    break
+                if converters is None:
+                    # Same JSON-ready values the query endpoints returned
+                    converters = column_converters(description, rows)
+                batch = []
+                for row in rows:
+                    values = list(row)
+                    for idx, convert in converters:
+                        if values[idx] is not None:
+                            values[idx] = convert(values[idx])
+                    batch.append(tuple(None if idx is None else values[idx] for idx in picks))
+                yield batch
+
+
+def _source_queries(result) -> Optional[Dict[str, str]]:
+    """
+    {db_name: SQL} that re-runs a stored SQL result, checked the way
+    execute_safe_sql checks it, or None when the source cannot be re-run.
+    """
+    source = result.meta.get("source") or {}
+    if source.get("kind") != "sql":
+        return None
+    from app.db import engines
+    from app.sql_executor import clean_sql, is_safe_query
+    queries = {}
+    for db_name, sql in source["queries"].items():
+        sql = _TRAILING_SEMICOLONS.sub("", clean_sql(sql))
+        if db_name not in engines or not is_safe_query(sql):
+            return None
+        queries[db_name] = text_search.rewrite_sql(db_name, engines[db_name], sql)
+    return queries
+
+
+def _source_batches(result, size: int) -> Optional[Iterator[Batch]]:
+    """Batches re-read from the query that produced `result`, or None when it cannot be re-run"""
+    source = result.meta.get("source") or {}
+    if source.get("kind") == "sql":
+        queries = _source_queries(result)
+        return _sql_batches(queries, result.columns, size) if queries else None
+    if source.get("kind") == "mongo":
+        from app.db_mongo import iter_mongo_query
+        docs = iter_mongo_query(source["db_name"], source["collection"], source.get("filter"),
+                                source.get("projection"), source.get("limit", 50), size)
+        return ([tuple(doc.get(name) for name in result.columns) for doc in batch] for batch in docs)
+    return None
+
+
+def open_batches(result, size: Optional[int] = None) -> Iterator[Batch]:
+    """
+    Row tuples of `result` in `result.columns` order, at most `size` per
+    batch. A stored result's query is re-run on a server-side cursor when
+    EXPORT_FROM_SOURCE is set; the first batch is fetched here, so a source
+    that fails falls back to the stored rows before anything is sent.
+    """
+    size = size or Config.EXPORT_BATCH_ROWS
+    if Config.EXPORT_FROM_SOURCE and result.id:
+        batches = _source_batches(result, size)
+        if batches is not None:
+            try:
+                first = next(batches, None)
+            except Exception:
+                logger.warning("Export source query failed; exporting the stored rows", exc_info=True,
+                               extra={"result_id": result.id})
+            else:
+                return itertools.chain([first] if first else [], batches)
+    return _stored_batches(result, size)
+
+
+# --- Encoders: each turns batches into a stream of byte chunks ------------------
+
+class _Sink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        chunk = b"".join(self._chunks)
+        self._chunks.clear()
+        return chunk
+
+
+def _plain(value: Any) -> Any:
+    """Scalars pass through; documents become JSON text and driver types their JSON form"""
+    if value is None or isinstance(value, _PLAIN_TYPES):
+        return value
+    if isinstance(value, (dict, list, tuple)):
+        return dumps_bytes(value).decode("utf-8")
+    try:
+        return to_jsonable(value)
+    except TypeError:
+        return str(value)
+
+
+def _csv_chunks(columns: List[str], batches: Iterator[Batch]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in batches:
+        writer.writerows([_plain(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def _ndjson_chunks(columns: List[str], batches: Iterator[Batch]) -> Iterator[bytes]:
+    for rows in batches:
+        yield b"".join(dumps_bytes(dict(zip(columns, row))) + b"\n" for row in rows)
+
+
+def _json_chunks(columns: List[str], batches: Iterator[Batch]) -> Iterator[bytes]:
+    opening = b"["
+    for rows in batches:
+        if rows:
+            yield opening + b",".join(dumps_bytes(dict(zip(columns, row))) for row in rows)
+            opening = b","
+    yield b"]" if opening == b"," else b"[]"
+
+
+def _arrow_array(values: list, field_type):
+    try:
+        array = pa.array(values, type=field_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        if field_type is not None and pa.types.is_decimal(field_type):
+            # More decimal places than the first batch had: rounded to the column's scale
+            logger.warning("Decimal export column rounded to %d places", field_type.scale)
+            quantum = Decimal(1).scaleb(-field_type.scale)
+            try:
+                return pa.array([value.quantize(quantum) if isinstance(value, Decimal) else value for value in values],
+                                type=field_type)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, ArithmeticError):
+                pass
+        # Mixed value types in one column are carried as text
+        array = pa.array([None if value is None else str(value) for value in values], type=pa.string())
+        return array if field_type is None else array.cast(field_type)
+    if field_type is None and pa.types.is_null(array.type):
+        return array.cast(pa.string())
+    if field_type is None and pa.types.is_decimal128(array.type) and array.type.precision < _ARROW_DECIMAL_PRECISION:
+        return array.cast(pa.decimal128(_ARROW_DECIMAL_PRECISION, array.type.scale))
+    return array
+
+
+def _arrow_table(columns: List[str], rows: Batch, schema):
+    """One batch as a table; later batches are coerced to the schema of the first"""
+    arrays = [
+        _arrow_array([_plain(row[idx]) for row in rows], schema.field(idx).type if schema is not None else None)
+        for idx in range(len(columns))
+    ]
+    if schema is not None:
+        return pa.Table.from_arrays(arrays, schema=schema)
+    return pa.Table.from_arrays(arrays, names=columns)
+
+
+def columns_to_arrow(columns: List[str], data: Dict[str, list]):
+    """
+    A stored result's columns as one Arrow table. Columns that Arrow takes
+    as they are convert without per-value Python work; nested or mixed
+    columns get the same plain values the encoders would write.
+    """
+    arrays = []
+    for name in columns:
+        values = data[name]
+        try:
+            array = pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+            array = None
+        if array is None or pa.types.is_nested(array.type):
+            array = _arrow_array([_plain(value) for value in values], None)
+        elif pa.types.is_null(array.type):
+            array = array.cast(pa.string())
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, names=columns)
+
+
+def _columnar_chunks(columns: List[str], batches: Iterator[Batch], open_writer) -> Iterator[bytes]:
+    sink = _Sink()
+    writer = schema = None
+    for rows in batches:
+        table = _arrow_table(columns, rows, schema)
+        if writer is None:
+            schema = table.schema
+            writer = open_writer(sink, schema)
+        writer.write_table(table)
+        yield sink.drain()
+    if writer is None:
+        writer = open_writer(sink, pa.schema([(name, pa.string()) for name in columns]))
+    writer.close()
+    yield sink.drain()
+
+
+def _parquet_chunks(columns: List[str], batches: Iterator[Batch]) -> Iterator[bytes]:
+    # Every batch is written as its own row group
+    return _columnar_chunks(columns, batches, lambda sink, schema: pq.ParquetWriter(
+        sink, schema, compression=Config.EXPORT_PARQUET_COMPRESSION))
+
+
+def _arrow_chunks(columns: List[str], batches: Iterator[Batch]) -> Iterator[bytes]:
+    return _columnar_chunks(columns, batches, pa.ipc.new_stream)
+
+
+# --- Excel: a single-sheet workbook written straight into a streamed zip --------
+
+_XLSX_MAX_ROWS = 1048576
+_XLSX_MAX_CELL_CHARS = 32767
+_XLSX_EPOCH = datetime(1899, 12, 30)
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+_XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Data" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    # Cell styles: 0 default, 1 bold header, 2 date, 3 date and time, 4 time
+    "xl/styles.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd hh:mm:ss"/></numFmts>'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="5"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+        '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="21" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    ),
+}
+_XLSX_SHEET_OPEN = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_XLSX_SHEET_CLOSE = '</sheetData></worksheet>'
+
+
+def _xlsx_text(value: str, style: str = "") -> str:
+    value = escape(_XML_ILLEGAL.sub("", value[:_XLSX_MAX_CELL_CHARS]))
+    return f'<c t="inlineStr"{style}><is><t xml:space="preserve">{value}</t></is></c>'
+
+
+def _xlsx_cell(value: Any) -> str:
+    value = _plain(value)
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f"<c><v>{value!r}</v></c>" if math.isfinite(value) else "<c/>"
+    if isinstance(value, Decimal):
+        return f"<c><v>{value}</v></c>" if value.is_finite() else "<c/>"
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        delta = value - _XLSX_EPOCH
+        return f'<c s="3"><v>{delta.days + (delta.seconds + delta.microseconds / 1e6) / 86400!r}</v></c>'
+    if isinstance(value, date):
+        return f'<c s="2"><v>{(value - _XLSX_EPOCH.date()).days}</v></c>'
+    if isinstance(value, time):
+        seconds = value.hour * 3600 + value.minute * 60 + value.second + value.microsecond / 1e6
+        return f'<c s="4"><v>{seconds / 86400!r}</v></c>'
+    return _xlsx_text(str(value))
+
+
+def _xlsx_chunks(columns: List[str], batches: Iterator[Batch]) -> Iterator[bytes]:
+    """
+    Rows are written as inline strings and numbers as they arrive, so nothing
+    but the current batch is held and no temporary file is needed.
+    """
+    sink = _Sink()
+    archive = zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED)
+    for name, content in _XLSX_PARTS.items():
+        archive.writestr(name, content)
+    with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+        header = "".join(_xlsx_text(str(name), ' s="1"') for name in columns)
+        sheet.write(f"{_XLSX_SHEET_OPEN}<row>{header}</row>".encode("utf-8"))
+        room = _XLSX_MAX_ROWS - 1
+        for rows in batches:
+            if len(rows) > room:
+                logger.warning("Excel export truncated at the sheet row limit", extra={"rows_limit": _XLSX_MAX_ROWS})
+                rows = rows[:room]
+            room -= len(rows)
+            sheet.write("".join(f"<row>{''.join(_xlsx_cell(value) for value in row)}</row>" for row in rows).encode("utf-8"))
+            yield sink.drain()
+            if not room:
+                break
+        sheet.write(_XLSX_SHEET_CLOSE.encode("utf-8"))
+    archive.close()
+    yield sink.drain()
+
+
+# --- Postgres: COPY ... TO STDOUT straight into the response ------------------
+
+_COPY_CHUNK_BYTES = 64 * 1024
+_COPY_QUEUE_CHUNKS = 16
+_COPY_DONE = object()
+
+
+class _CopyCancelled(Exception):
+    pass
+
+
+class _QueueSink:
+    """File-like target for copy_expert that hands ~64 KiB chunks to the response through a bounded queue"""
+
+    def __init__(self, chunks: "queue.Queue", cancelled: threading.Event):
+        self._chunks = chunks
+        self._cancelled = cancelled
+        self._buffer = bytearray()
+
+    def write(self, data) -> int:
+        self._buffer += data.encode("utf-8") if isinstance(data, str) else data
+        if len(self._buffer) >= _COPY_CHUNK_BYTES:
+            self.flush()
+        return len(data)
+
+    def flush(self) -> None:
+        if self._buffer:
+            self.put(bytes(self._buffer))
+            self._buffer.clear()
+
+    def put(self, item: Any) -> None:
+        while True:
+            if self._cancelled.is_set():
+                raise _CopyCancelled()
+            try:
+                self._chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+
+def _copy_chunks(engine, sql: str) -> Iterator[bytes]:
+    """
+    CSV bytes of `sql` encoded by the server itself. psycopg2's copy_expert
+    only writes into a file, so it runs on a worker thread; the bounded queue
+    keeps it from getting ahead of the client.
+    """
+    chunks: "queue.Queue" = queue.Queue(maxsize=_COPY_QUEUE_CHUNKS)
+    cancelled = threading.Event()
+    sink = _QueueSink(chunks, cancelled)
+    raw = engine.raw_connection()
+
+    def copy():
+        try:
+            with tracing.span("sql.copy", {"db.system": "postgresql"}):
+                cursor = raw.cursor()
+                try:
+                    cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER true)", sink)
+                finally:
+                    cursor.close()
+            sink.flush()
+            sink.put(_COPY_DONE)
+        except _CopyCancelled:
+            pass
+        except Exception as exc:
+            try:
+                sink.put(exc)
+            except _CopyCancelled:
+                pass
+
+    worker = threading.Thread(target=tracing.wrap(copy), name="export-copy", daemon=True)
+    worker.start()
+    finished = False
+    try:
+        while True:
+            item = chunks.get()
+            if item is _COPY_DONE:
+                finished = True
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        cancelled.set()
+        if not finished:
+            # The client went away (or the COPY failed): stop the server side too
+            try:
+                raw.connection.cancel()
+            except Exception:
+                logger.debug("Could not cancel the COPY", exc_info=True)
+        worker.join()
+        if finished:
+            raw.close()
+        else:
+            raw.invalidate()
+
+
+def _copy_export(result, export_format: str) -> Optional[Iterator[bytes]]:
+    """
+    The COPY fast path for a CSV export of a single Postgres query, primed
+    with its first chunk; None when it does not apply or fails to start.
+    """
+    if export_format != "csv" or not (Config.EXPORT_FROM_SOURCE and Config.EXPORT_PG_COPY and result.id):
+        return None
+    queries = _source_queries(result)
+    if not queries or len(queries) != 1:
+        return None
+    from app.db import engines
+    (db_name, sql), = queries.items()
+    engine = engines[db_name]
+    if engine.dialect.name != "postgresql" or engine.dialect.driver != "psycopg2":
+        return None
+    chunks = _copy_chunks(engine, sql)
+    try:
+        first = next(chunks)
+    except Exception:
+        logger.warning("COPY export failed; falling back to the cursor", exc_info=True,
+                       extra={"result_id": result.id, "db": db_name})
+        return None
+    return itertools.chain([first], chunks)
+
+
+_ENCODERS = {
+    "csv": _csv_chunks,
+    "json": _json_chunks,
+    "ndjson": _ndjson_chunks,
+    "excel": _xlsx_chunks,
+    "parquet": _parquet_chunks,
+    "arrow": _arrow_chunks,
+}
+
+
+def _logged(chunks: Iterator[bytes], result_id: str, export_format: str) -> Iterator[bytes]:
+    started = clock.perf_counter()
+    sent = 0
+    try:
+        for chunk in chunks:
+            if chunk:
+                sent += len(chunk)
+                yield chunk
+    except Exception:
+        # Headers are gone already; failing the response lets the client see a broken download
+        logger.exception("Export stream failed", extra={"result_id": result_id, "format": export_format, "bytes": sent})
+        raise
+    logger.info("Export streamed", extra={"result_id": result_id, "format": export_format, "bytes": sent,
+                                          "elapsed_ms": round((clock.perf_counter() - started) * 1000, 2)})
+
+
+def _counted(batches: Iterator[Batch], on_rows: Callable[[int], None]) -> Iterator[Batch]:
+    done = 0
+    for rows in batches:
+        yield rows
+        done += len(rows)
+        on_rows(done)
+
+
+def stream_export(result, export_format: str, on_rows: Optional[Callable[[int], None]] = None) -> Iterator[bytes]:
+    """
+    Byte chunks of `result` encoded as `export_format`; memory use is bounded
+    by one batch. `on_rows` is told the running row count after each batch
+    (not on the COPY path, which never sees rows).
+    """
+    chunks = _copy_export(result, export_format)
+    if chunks is None:
+        batches = open_batches(result)
+        chunks = _ENCODERS[export_format](result.columns, batches if on_rows is None else _counted(batches, on_rows))
+    return _logged(chunks, result.id, export_format)
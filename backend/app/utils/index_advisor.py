@@ -0,0 +1,304 @@
+import logging
+import hashlib
+import queue
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import inspect, text
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_RANGE_OPERATORS = {"$gt", "$gte", "$lt", "$lte", "$ne", "$nin", "$regex", "$exists"}
+_SQL_KEYWORDS = {
+    "and", "or", "not", "null", "is", "in", "like", "ilike", "between", "true", "false",
+    "select", "from", "where", "on", "as", "case", "when", "then", "else", "end", "exists"
+}
+_TABLE_REF = re.compile(r'\b(?:from|join)\s+("?[\w.]+"?)(?:\s+(?:as\s+)?(?!on\b|where\b|join\b|inner\b|left\b|right\b|group\b|order\b|limit\b)(\w+))?', re.I)
+_PREDICATE = re.compile(r'(?:(\w+)\.)?"?(\w+)"?\s*(?:=|<>|!=|<=|>=|<|>|\bnot\s+like\b|\blike\b|\bilike\b|\bnot\s+in\b|\bin\b|\bbetween\b|\bis\b)', re.I)
+_QUALIFIED_COLUMN = re.compile(r'(\w+)\."?(\w+)"?')
+_WHERE_CLAUSE = re.compile(r'\bwhere\b(.*?)(?:\bgroup\s+by\b|\border\s+by\b|\blimit\b|\bhaving\b|\boffset\b|$)', re.I | re.S)
+_ON_CLAUSE = re.compile(r'\bon\b(.*?)(?:\bjoin\b|\bwhere\b|\bleft\b|\binner\b|\bright\b|\bgroup\s+by\b|\border\s+by\b|\blimit\b|$)', re.I | re.S)
+
+
+def _prefix_regex(condition: Dict[str, Any]) -> bool:
+    pattern = condition["$regex"]
+    ignore_case = "i" in condition.get("$options", "") or bool(getattr(pattern, "flags", 0) & re.I)
+    pattern = getattr(pattern, "pattern", pattern)
+    return isinstance(pattern, str) and pattern.startswith("^") and not ignore_case
+
+
+def mongo_filter_fields(filter_query: Any) -> Tuple[str, ...]:
+    """
+    Return the fields a Mongo filter constrains, equality fields first and
+    range fields last (the usual equality-sort-range ordering for compound indexes).
+    """
+    equality, ranges = [], []
+
+    def walk(node):
+        if not isinstance(node, dict):
+            return
+        for key, value in node.items():
+            if key in ("$and", "$or", "$nor") and isinstance(value, list):
+                for clause in value:
+                    walk(clause)
+            elif key.startswith("$"):
+                continue  # $text, $where, $expr are not served by a plain index
+            elif isinstance(value, dict) and "$regex" in value and not _prefix_regex(value):
+                continue  # only a case-sensitive ^prefix regex can seek an index
+            elif isinstance(value, dict) and any(op in _RANGE_OPERATORS for op in value):
+                ranges.append(key)
+            else:
+                equality.append(key)
+
+    walk(filter_query)
+    return tuple(dict.fromkeys(equality + ranges))
+
+
+def sql_table_aliases(sql: str) -> Tuple[Dict[str, str], List[str]]:
+    """Map lower-cased table names and aliases to table names; also return the tables in order"""
+    aliases = {}
+    tables = []
+    for table, alias in _TABLE_REF.findall(sql):
+        table = table.strip('"').split('.')[-1]
+        tables.append(table)
+        aliases[table.lower()] = table
+        if alias and alias.lower() not in _SQL_KEYWORDS:
+            aliases[alias.lower()] = table
+    return aliases, tables
+
+
+def sql_predicate_columns(sql: str) -> Dict[str, Tuple[str, ...]]:
+    """
+    Parse WHERE and JOIN ... ON predicates of a SELECT into {table: (columns...)}.
+    Regex based: good enough for the single-statement SELECTs the LLM emits.
+    """
+    aliases, tables = sql_table_aliases(sql)
+    clauses = [(clause, _PREDICATE) for clause in _WHERE_CLAUSE.findall(sql)]
+    # Both sides of a join condition are lookup columns
+    clauses += [(clause, _QUALIFIED_COLUMN) for clause in _ON_CLAUSE.findall(sql)]
+    columns: Dict[str, List[str]] = {}
+    for clause, pattern in clauses:
+        # Drop string literals so quoted values are not mistaken for columns
+        clause = re.sub(r"'(?:[^']|'')*'", "''", clause)
+        for qualifier, column in pattern.findall(clause):
+            if column.lower() in _SQL_KEYWORDS or column.isdigit():
+                continue
+            if qualifier:
+                table = aliases.get(qualifier.lower())
+            elif len(set(tables)) == 1:
+                table = tables[0]
+            else:
+                table = None
+            if table:
+                columns.setdefault(table, [])
+                if column not in columns[table]:
+                    columns[table].append(column)
+    return {table: tuple(cols) for table, cols in columns.items()}
+
+
+def _plan_has_stage(plan: Any, stage: str) -> bool:
+    """Search an explain() plan tree for a stage such as COLLSCAN"""
+    if isinstance(plan, dict):
+        if plan.get("stage") == stage:
+            return True
+        return any(_plan_has_stage(value, stage) for value in plan.values())
+    if isinstance(plan, list):
+        return any(_plan_has_stage(item, stage) for item in plan)
+    return False
+
+
+def _pg_seq_scans(plan: Any) -> set:
+    """Collect relation names scanned sequentially in a Postgres JSON plan"""
+    found = set()
+    if isinstance(plan, dict):
+        if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name"):
+            found.add(plan["Relation Name"])
+        for value in plan.values():
+            found |= _pg_seq_scans(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            found |= _pg_seq_scans(item)
+    return found
+
+
+class IndexAdvisor:
+    """
+    Records executed Mongo filters and SQL predicates with their latency and,
+    on a background thread, checks explain plans for full scans. Scanned
+    shapes are ranked by the time spent in them to recommend indexes.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue(maxsize=Config.INDEX_ADVISOR_QUEUE_SIZE)
+        self._shapes: Dict[str, Dict[str, Any]] = {}
+        self._engines: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+    def reset_after_fork(self) -> None:
+        """Observations queued in the parent are dropped; the worker restarts on demand"""
+        self._queue = queue.Queue(maxsize=Config.INDEX_ADVISOR_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._worker = None
+
+    # --- Hot path: enqueue only ---
+
+    def record_mongo(self, db_name: str, collection: str, filter_query: Any, elapsed_ms: float) -> None:
+        if Config.INDEX_ADVISOR_ENABLED and filter_query:
+            self._enqueue(("mongo", db_name, collection, filter_query, elapsed_ms))
+
+    def record_sql(self, db_name: str, engine: Any, sql: str, elapsed_ms: float) -> None:
+        if Config.INDEX_ADVISOR_ENABLED and sql:
+            with self._lock:
+                self._engines[db_name] = engine
+            self._enqueue(("sql", db_name, None, sql, elapsed_ms))
+
+    def _enqueue(self, item: Tuple) -> None:
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            pass  # never block a request for advice
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name="index-advisor", daemon=True)
+                    self._worker.start()
+
+    def _engine(self, db_name: str) -> Optional[Any]:
+        # Request threads record engines while the advisor thread reads them
+        with self._lock:
+            return self._engines.get(db_name)
+
+    # --- Background aggregation and analysis ---
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                self._observe(*item)
+            except Exception as e:
+                logger.warning("Index advisor failed to analyze query: %s", e)
+
+    def _observe(self, backend: str, db_name: str, collection: Optional[str], query: Any, elapsed_ms: float) -> None:
+        if backend == "mongo":
+            targets = [(collection, mongo_filter_fields(query))]
+        else:
+            targets = list(sql_predicate_columns(query).items())
+        for target, fields in targets:
+            if not fields:
+                continue
+            key = hashlib.md5(f"{backend}:{db_name}:{target}:{','.join(fields)}".encode()).hexdigest()[:12]
+            with self._lock:
+                shape = self._shapes.get(key)
+                if shape is None:
+                    shape = self._shapes[key] = {
+                        "id": key, "backend": backend, "db_name": db_name, "target": target,
+                        "fields": list(fields), "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                        "sample": query, "scan": None, "indexed": False
+                    }
+                shape["count"] += 1
+                shape["total_ms"] += elapsed_ms
+                shape["max_ms"] = max(shape["max_ms"], elapsed_ms)
+            if shape["scan"] is None:
+                shape["scan"] = self._explain_scan(shape)
+
+    def _explain_scan(self, shape: Dict[str, Any]) -> bool:
+        """Return True when the plan for a sample query scans the whole collection/table"""
+        try:
+            if shape["backend"] == "mongo":
+                from app.db_mongo import _require_client
+                db = _require_client(shape["db_name"])[shape["db_name"]]
+                plan = db.command("explain", {"find": shape["target"], "filter": shape["sample"]}, verbosity="queryPlanner")
+                return _plan_has_stage(plan.get("queryPlanner", {}).get("winningPlan"), "COLLSCAN")
+            engine = self._engine(shape["db_name"])
+            with engine.connect() as conn:
+                if engine.dialect.name == "postgresql":
+                    plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {shape['sample']}")).scalar()
+                    return shape["target"] in _pg_seq_scans(plan)
+                if engine.dialect.name == "sqlite":
+                    details = [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {shape['sample']}"))]
+                    return any(
+                        re.match(rf"SCAN (?:TABLE )?{re.escape(shape['target'])}\b", detail) and "INDEX" not in detail
+                        for detail in details
+                    )
+        except Exception as e:
+            logger.warning("Index advisor could not explain %s.%s: %s", shape["db_name"], shape["target"], e)
+        return False
+
+    # --- Recommendations ---
+
+    def _index_statement(self, shape: Dict[str, Any]) -> str:
+        fields = shape["fields"]
+        if shape["backend"] == "mongo":
+            keys = ", ".join(f'"{field}": 1' for field in fields)
+            return f'db.{shape["target"]}.createIndex({{{keys}}})'
+        name = f"ix_advisor_{shape['target']}_{'_'.join(fields)}"[:63]
+        columns = ", ".join(f'"{field}"' for field in fields)
+        engine = self._engine(shape["db_name"])
+        concurrently = " CONCURRENTLY" if engine is not None and engine.dialect.name == "postgresql" else ""
+        return f'CREATE INDEX{concurrently} IF NOT EXISTS "{name}" ON "{shape["target"]}" ({columns})'
+
+    def recommendations(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Rank scanned shapes by the latency an index would mostly remove"""
+        with self._lock:
+            shapes = [dict(shape) for shape in self._shapes.values() if shape["scan"] and not shape["indexed"]]
+        ranked = []
+        for shape in shapes:
+            ranked.append({
+                "id": shape["id"],
+                "backend": shape["backend"],
+                "db_name": shape["db_name"],
+                "target": shape["target"],
+                "fields": shape["fields"],
+                "executions": shape["count"],
+                "avg_ms": round(shape["total_ms"] / shape["count"], 2),
+                "max_ms": round(shape["max_ms"], 2),
+                # Time observed in full scans; an index turns most of it into seeks
+                "estimated_benefit_ms": round(shape["total_ms"] * Config.INDEX_ADVISOR_SCAN_SAVING, 2),
+                "statement": self._index_statement(shape)
+            })
+        ranked.sort(key=lambda item: item["estimated_benefit_ms"], reverse=True)
+        return ranked[:limit]
+
+    def apply(self, ids: List[str], dry_run: bool = True) -> List[Dict[str, Any]]:
+        """Create the recommended indexes (or just report them when dry_run)"""
+        results = []
+        for rec in self.recommendations(limit=len(self._shapes)):
+            if rec["id"] not in ids:
+                continue
+            entry = {"id": rec["id"], "statement": rec["statement"], "applied": False}
+            if not dry_run:
+                try:
+                    self._create_index(rec)
+                    entry["applied"] = True
+                    with self._lock:
+                        self._shapes[rec["id"]]["indexed"] = True
+                except Exception as e:
+                    entry["error"] = str(e)
+            results.append(entry)
+        return results
+
+    def _create_index(self, rec: Dict[str, Any]) -> None:
+        if rec["backend"] == "mongo":
+            from app.db_mongo import _require_client
+            db = _require_client(rec["db_name"])[rec["db_name"]]
+            db[rec["target"]].create_index([(field, 1) for field in rec["fields"]])
+            return
+        engine = self._engine(rec["db_name"])
+        if engine is None:
+            raise ValueError(f"No engine recorded for {rec['db_name']}")
+        columns = {col["name"] for col in inspect(engine).get_columns(rec["target"])}
+        missing = [field for field in rec["fields"] if field not in columns]
+        if missing:
+            raise ValueError(f"Unknown columns on {rec['target']}: {', '.join(missing)}")
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(rec["statement"]))
+
+
+# Global advisor instance
+index_advisor = IndexAdvisor()
@@ -0,0 +1,356 @@
+import contextvars
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from config import Config
+from app.utils.json_provider import dumps_bytes
+from app.utils.result_store import current_session, set_session
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+_JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+_JOB_FILES = (".json", ".out", ".part", ".cancel")
+
+
+def _path(job_id: str, suffix: str) -> str:
+    return os.path.join(Config.JOB_DIR, job_id + suffix)
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once it has been cancelled"""
+
+
+class Job:
+    """One piece of background work, mirrored to JOB_DIR so every worker process can report on it"""
+
+    _FIELDS = ("kind", "session", "status", "progress", "message", "error", "created_at", "started_at",
+               "finished_at", "mimetype", "filename", "status_code")
+
+    def __init__(self, kind: str, session: str, job_id: Optional[str] = None):
+        self.id = job_id or uuid.uuid4().hex
+        self.kind = kind
+        self.session = session
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = ""
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.mimetype: Optional[str] = None
+        self.filename: Optional[str] = None
+        self.status_code = 200
+        self.owned = True  # False for a job another worker process runs
+        self.future = None
+        self._cancel = threading.Event()
+        self._saved_at = 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    @property
+    def result_path(self) -> str:
+        return _path(self.id, ".out")
+
+    @property
+    def cancel_path(self) -> str:
+        return _path(self.id, ".cancel")
+
+    def cancel_requested(self) -> bool:
+        # Another worker process asks by leaving a marker file
+        if not self._cancel.is_set() and os.path.exists(self.cancel_path):
+            self._cancel.set()
+        return self._cancel.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancel_requested():
+            raise JobCancelled()
+
+    def update(self, progress: Optional[float] = None, message: Optional[str] = None) -> None:
+        """Record progress (0..1); persisted at most every JOB_PROGRESS_INTERVAL seconds"""
+        if progress is not None:
+            self.progress = min(max(float(progress), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+        if time.time() - self._saved_at >= Config.JOB_PROGRESS_INTERVAL:
+            self.save()
+
+    def write_result(self, chunks: Iterable[bytes], mimetype: str, filename: Optional[str] = None,
+                     status_code: int = 200) -> None:
+        """
+        Write the result chunk by chunk, checking for cancellation in between;
+        the file only appears under its final name once complete.
+        """
+        def write(partial: str) -> None:
+            try:
+                with open(partial, "wb") as fh:
+                    for chunk in chunks:
+                        fh.write(chunk)
+                        self.raise_if_cancelled()
+            finally:
+                close = getattr(chunks, "close", None)
+                if close is not None:
+                    close()
+
+        self.write_result_file(write, mimetype, filename, status_code)
+
+    def write_result_file(self, write: Callable[[str], None], mimetype: str, filename: Optional[str] = None,
+                          status_code: int = 200) -> None:
+        """Like write_result, for a result that `write(path)` puts in the file itself (e.g. from another process)"""
+        partial = _path(self.id, ".part")
+        try:
+            write(partial)
+            os.replace(partial, self.result_path)
+        except BaseException:
+            _remove_quietly(partial)
+            raise
+        self.mimetype = mimetype
+        self.filename = filename
+        self.status_code = status_code
+
+    def summary(self) -> Dict[str, Any]:
+        summary = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": round(self.progress, 4),
+            "message": self.message,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "status_url": f"/api/jobs/{self.id}",
+        }
+        if self.status == SUCCEEDED:
+            summary["result_url"] = f"/api/jobs/{self.id}/result"
+        return summary
+
+    def save(self) -> None:
+        record = {name: getattr(self, name) for name in self._FIELDS}
+        path = _path(self.id, ".json")
+        try:
+            with open(path + ".tmp", "wb") as fh:
+                fh.write(dumps_bytes(record))
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            logger.warning("Could not save job %s: %s", self.id, e)
+        self._saved_at = time.time()
+
+    @classmethod
+    def load(cls, job_id: str) -> Optional["Job"]:
+        try:
+            with open(_path(job_id, ".json"), "rb") as fh:
+                record = json.loads(fh.read())
+        except (OSError, ValueError):
+            return None
+        job = cls(record["kind"], record["session"], job_id)
+        for name in cls._FIELDS:
+            setattr(job, name, record.get(name, getattr(job, name)))
+        job.owned = False
+        return job
+
+
+class JobQueue:
+    """
+    Worker pool for exports and queries that should not hold a request
+    open. A job runs in the process that accepted it; its state and result
+    live in JOB_DIR, so with several worker processes any of them can report
+    progress, cancel it or serve the result. Finished jobs are kept for
+    JOB_RETENTION seconds, and at most JOB_SESSION_MAX_JOBS per session.
+
+    Cancellation is cooperative: a queued job never starts, a running one
+    stops at its next update or result chunk.
+
+    Kinds listed in JOB_KIND_WORKERS (e.g. summaries, which mostly wait on
+    Gemini) get a pool of their own, so they never queue behind exports.
+    """
+
+    def __init__(self):
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._start_executors()
+        self._last_sweep = 0.0
+
+    def _start_executors(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=Config.JOB_WORKERS, thread_name_prefix="job")
+        self._kind_executors = {
+            kind: ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"job-{kind}")
+            for kind, workers in Config.JOB_KIND_WORKERS.items()
+        }
+
+    def reset_after_fork(self) -> None:
+        """Worker threads do not survive fork(); start fresh pools in the child"""
+        self._start_executors()
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def shutdown(self) -> None:
+        for executor in (self._executor, *self._kind_executors.values()):
+            executor.shutdown()
+
+    def submit(self, kind: str, fn: Callable[..., None], *args: Any) -> Optional[Job]:
+        """Queue fn(job, *args) for the current session; None when JOB_MAX_QUEUED jobs are already waiting"""
+        self._sweep()
+        job = Job(kind, current_session())
+        with self._lock:
+            if sum(1 for queued in self._jobs.values() if queued.status == QUEUED) >= Config.JOB_MAX_QUEUED:
+                return None
+            evicted = self._enforce_session_quota(job.session)
+            self._jobs[job.id] = job
+        self._discard_files(evicted)
+        os.makedirs(Config.JOB_DIR, exist_ok=True)
+        job.save()
+        # A fresh context per job: pool threads are reused, request context variables must not leak
+        executor = self._kind_executors.get(kind, self._executor)
+        job.future = executor.submit(contextvars.Context().run, self._run, job, fn, args)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """The job, whichever worker process runs it, or None when unknown or expired"""
+        if not _JOB_ID.match(job_id or ""):
+            return None
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            job = Job.load(job_id)
+        if job is None or self._expired(job):
+            return None
+        return job
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        """
+        The job once it has finished, or as it stands after `timeout` seconds.
+        A job this process runs is awaited on its future; one run by another
+        worker process can only be re-read from JOB_DIR, every JOB_WAIT_INTERVAL.
+        """
+        deadline = time.time() + timeout
+        job = self.get(job_id)
+        while job is not None and not job.finished:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            if job.owned and job.future is not None:
+                wait_futures([job.future], timeout=remaining)
+            else:
+                time.sleep(min(Config.JOB_WAIT_INTERVAL, remaining))
+            job = self.get(job_id)
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+        if not job.owned:
+            open(job.cancel_path, "wb").close()
+            return job
+        job._cancel.set()
+        if job.future is not None and job.future.cancel():
+            self._finish(job, CANCELLED)
+        return job
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {status: 0 for status in (QUEUED, RUNNING) + FINISHED}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
+
+    # --- internals -----------------------------------------------------
+
+    def _run(self, job: Job, fn: Callable[..., None], args: tuple) -> None:
+        if job.cancel_requested():
+            self._finish(job, CANCELLED)
+            return
+        set_session(job.session)
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.save()
+        try:
+            fn(job, *args)
+            job.raise_if_cancelled()
+        except JobCancelled:
+            self._finish(job, CANCELLED)
+        except Exception as e:
+            logger.exception("Job %s failed", job.id, extra={"kind": job.kind})
+            job.error = str(e)
+            self._finish(job, FAILED)
+        else:
+            job.progress = 1.0
+            self._finish(job, SUCCEEDED)
+        logger.info("Job finished", extra={"job_id": job.id, "kind": job.kind, "status": job.status,
+                                           "elapsed_ms": round((job.finished_at - job.started_at) * 1000, 2)})
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.status = status
+        job.finished_at = time.time()
+        if status != SUCCEEDED:
+            _remove_quietly(job.result_path)
+        _remove_quietly(job.cancel_path)
+        job.save()
+
+    def _expired(self, job: Job) -> bool:
+        return job.finished and time.time() - (job.finished_at or job.created_at) > Config.JOB_RETENTION
+
+    def _enforce_session_quota(self, session: str) -> List[Job]:
+        # Caller holds the lock; unfinished jobs count but are never evicted
+        owned = [job for job in self._jobs.values() if job.session == session]
+        finished = sorted((job for job in owned if job.finished), key=lambda job: job.finished_at)
+        evicted = []
+        while finished and len(owned) - len(evicted) >= Config.JOB_SESSION_MAX_JOBS:
+            oldest = finished.pop(0)
+            self._jobs.pop(oldest.id, None)
+            evicted.append(oldest)
+        return evicted
+
+    def _discard_files(self, jobs: List[Job]) -> None:
+        for job in jobs:
+            for suffix in _JOB_FILES:
+                _remove_quietly(_path(job.id, suffix))
+
+    def _sweep(self) -> None:
+        """Drop expired jobs and their results; at most every JOB_SWEEP_INTERVAL seconds"""
+        now = time.time()
+        if now - self._last_sweep < Config.JOB_SWEEP_INTERVAL:
+            return
+        self._last_sweep = now
+        with self._lock:
+            expired = [job for job in self._jobs.values() if self._expired(job)]
+            for job in expired:
+                self._jobs.pop(job.id, None)
+            active = {job_id for job_id, job in self._jobs.items() if not job.finished}
+        self._discard_files(expired)
+        # Files left behind by other workers or earlier processes
+        try:
+            for name in os.listdir(Config.JOB_DIR):
+                path = os.path.join(Config.JOB_DIR, name)
+                if name[:32] not in active and now - os.path.getmtime(path) > Config.JOB_RETENTION:
+                    os.remove(path)
+        except OSError:
+            pass
+
+
+# Global job queue instance
+job_queue = JobQueue()
@@ -0,0 +1,152 @@
+import base64
+import json
+import struct
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+from bson import ObjectId, decode as bson_decode
+from bson.binary import Binary
+from bson.decimal128 import Decimal128
+from bson.raw_bson import RawBSONDocument
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+
+from config import Config
+from app.utils import timing
+
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib encoder when orjson is not installed
+    orjson = None
+
+ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+if orjson is not None:
+    # orjson sets up its numpy support lazily on the first non-native value;
+    # racing that from several threads aborts the process, so do it at import
+    orjson.dumps(object(), default=str, option=ORJSON_OPTIONS)
+
+
+def _decimal128_parts(value: Decimal128):
+    """(negative, coefficient, exponent) from the IEEE 754-2008 BID bits; None for the special forms"""
+    low, high = struct.unpack('<QQ', value.bid)
+    if (high >> 61) & 3 == 3:
+        # NaN/Infinity and the large-coefficient form
+        return None
+    return bool(high >> 63), ((high & 0x1FFFFFFFFFFFF) << 64) | low, ((high >> 49) & 0x3FFF) - 6176
+
+
+def _decimal128_to_float(value: Decimal128) -> float:
+    """
+    Convert a Decimal128 straight from its BID bits.
+    ``Decimal128.to_decimal()`` is pure Python and several times slower.
+    """
+    parts = _decimal128_parts(value)
+    if parts is None:
+        return float(value.to_decimal())
+    negative, coefficient, exponent = parts
+    try:
+        result = float(coefficient * 10 ** exponent) if exponent >= 0 else coefficient / 10 ** -exponent
+    except OverflowError:
+        result = float('inf')
+    return -result if negative else result
+
+
+def _decimal128_to_str(value: Decimal128) -> str:
+    """The exact decimal string of a Decimal128, the same text as ``str(value.to_decimal())``"""
+    parts = _decimal128_parts(value)
+    if parts is None:
+        return str(value.to_decimal())
+    negative, coefficient, exponent = parts
+    return str(Decimal(f"{'-' if negative else ''}{coefficient}E{exponent}"))
+
+
+def decimal_to_json(value: Decimal) -> Any:
+    """Decimals go out as exact strings; JSON_DECIMAL_AS_FLOAT opts into (rounded) numbers"""
+    return float(value) if Config.JSON_DECIMAL_AS_FLOAT else str(value)
+
+
+def decimal128_to_json(value: Decimal128) -> Any:
+    return _decimal128_to_float(value) if Config.JSON_DECIMAL_AS_FLOAT else _decimal128_to_str(value)
+
+
+# Exact-type fast path, checked before the isinstance chain
+_CONVERTERS = {
+    ObjectId: str,
+    Decimal128: decimal128_to_json,
+    Decimal: decimal_to_json,
+    UUID: str,
+    memoryview: lambda value: base64.b64encode(value).decode('ascii'),
+    timedelta: lambda value: value.total_seconds(),
+}
+
+
+def to_jsonable(obj: Any) -> Any:
+    """
+    Fallback conversion for types the encoder does not know natively.
+    Called once per unknown value, never for plain dicts/lists/str/numbers.
+    """
+    converter = _CONVERTERS.get(type(obj))
+    if converter is not None:
+        return converter(obj)
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, RawBSONDocument):
+        # Decoded by the C extension only when it is actually serialized
+        return bson_decode(obj.raw)
+    if isinstance(obj, Decimal128):
+        return decimal128_to_json(obj)
+    if isinstance(obj, (Binary, bytes, memoryview)):
+        return base64.b64encode(obj).decode('ascii')
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return decimal_to_json(obj)
+    if isinstance(obj, UUID):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj: Any, indent: bool = False) -> bytes:
+    """Serialize straight to UTF-8 bytes in one pass (orjson when available)"""
+    if orjson is not None:
+        options = ORJSON_OPTIONS | orjson.OPT_INDENT_2 if indent else ORJSON_OPTIONS
+        return orjson.dumps(obj, default=to_jsonable, option=options)
+    if indent:
+        return json.dumps(obj, default=to_jsonable, indent=2).encode('utf-8')
+    return json.dumps(obj, default=to_jsonable, separators=(",", ":")).encode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that serializes Mongo/BSON and SQL result rows in a
+    single pass with orjson. ObjectId, Decimal128, Binary, raw BSON documents,
+    Decimal, UUID and bytea values are handled by ``to_jsonable`` so query code
+    no longer has to pre-walk rows. Decimal and Decimal128 values are written
+    as exact strings unless JSON_DECIMAL_AS_FLOAT is set.
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is not None and not kwargs:
+            return dumps_bytes(obj).decode('utf-8')
+        kwargs.setdefault("default", to_jsonable)
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        # Hand the encoded bytes to the response without a str round-trip;
+        # arguments as documented for jsonify(): one value, several (a list) or keywords (a dict)
+        if args and kwargs:
+            raise TypeError("app.json.response() takes either args or kwargs, not both")
+        obj = (args[0] if len(args) == 1 else list(args)) if args else (kwargs or None)
+        indent = (self.compact is None and current_app.debug) or self.compact is False
+        with timing.stage("serialize"):
+            body = dumps_bytes(obj, indent) + b"\n"
+        return current_app.response_class(body, mimetype=self.mimetype)
@@ -1,9 +1,20 @@
+import logging
 import google.generativeai as genai
+import asyncio
+import json
 import os
 from dotenv import load_dotenv
 from app.utils.cache_handler import cache_handler
+from app.utils import metrics, timing, tracing
+from app.utils.job_queue import job_queue
+from app.utils.json_provider import dumps_bytes
+from app.utils.result_store import to_columns
+from app.utils.result_summary import local_summary, summary_mode
 from config import Config
 import time
+from app.utils.structured_logging import payload
+
+logger = logging.getLogger(__name__)
 
 load_dotenv()
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
@@ -25,52 +36,181 @@ Only use tables and columns available in the schema.
     return sql
 
 
-def generate_summary(question, rows):
+def _summary_cache_key(question, rows):
+    return f"summary:{question.lower().strip()}:{hash(str(rows[:3]))}"
+
+
+def _summary_prompt(question, rows, statistics=None):
+    # Simplified prompt for faster generation
+    sample_data = rows[:3]  # Reduced from 5 to 3 for speed
+    # The sample alone hides the rest of the result; the local statistics cover all of it
+    statistics = f"\nStatistics: {statistics}" if statistics else ""
+    return f"""
+Question: "{question}"
+Data: {sample_data}{statistics}
+Write a brief summary in 1-2 lines:"""
+
+
+def _summary_generation_config():
+    return genai.types.GenerationConfig(
+        temperature=Config.TEMPERATURE,
+        max_output_tokens=200,  # Shorter for speed
+        top_p=0.8,
+        top_k=20
+    )
+
+
+def _clean_summary(summary):
+    # Clean up any markdown formatting
+    if summary.startswith("```"):
+        summary = summary.split("```")[1] if len(summary.split("```")) > 1 else summary
+    if summary.startswith("sql"):
+        summary = summary[3:].strip()
+    return summary
+
+
+def _fallback_summary(rows):
+    # Return a simple fallback summary
+    if len(rows) == 1:
+        return f"Found 1 result for your query."
+    else:
+        return f"Found {len(rows)} results for your query."
+
+
+def _local_summary(question, rows, mode):
+    """(local summary, whether Gemini should be asked) for the request's `summary` mode"""
+    mode = summary_mode(mode)
+    with timing.stage("summary"):
+        local = local_summary(question, *to_columns(rows))
+    return local, mode == "llm" or (mode == "auto" and local.confidence < Config.SUMMARY_MIN_CONFIDENCE)
+
+
+def _summary_fields(summary, source, status="ready"):
+    return {"summary": summary, "summary_source": source, "summary_status": status}
+
+
+def _wants_deferred(defer):
+    if defer is None:
+        return Config.SUMMARY_DEFERRED
+    return defer in (True, 1, "true", "1")
+
+
+def _run_summary_job(job, question, rows, statistics):
+    summary = generate_summary(question, rows, statistics)
+    fields = _summary_fields(summary, "local" if summary == statistics else "llm")
+    job.write_result([dumps_bytes(fields)], "application/json")
+
+
+def _deferred_summary(question, rows, local):
+    """
+    Summary fields that leave Gemini off the critical path: a cached summary
+    as is, otherwise the local one marked pending while a background job
+    asks Gemini. None when the job queue is full.
+    """
+    cache_key = _summary_cache_key(question, rows)
+    cached_summary = cache_handler.get(cache_key)
+    timing.cache_result("summary", bool(cached_summary))
+    if cached_summary:
+        return _summary_fields(cached_summary, "llm")
+    job = job_queue.submit("summary", _run_summary_job, question, rows, local.text)
+    if job is None:
+        return None
+    return {
+        **_summary_fields(local.text, "local", "pending"),
+        "summary_id": job.id,
+        "summary_url": f"/api/summary/{job.id}",
+        "summary_events_url": f"/api/summary/{job.id}/events",
+    }
+
+
+def read_deferred_summary(summary_id, wait=0):
+    """
+    Summary fields of a deferred summary, pending until its job is done; None
+    when unknown or expired. `wait` seconds are spent waiting for the job first.
+    """
+    job = job_queue.wait(summary_id, wait) if wait else job_queue.get(summary_id)
+    if job is None or job.kind != "summary":
+        return None
+    if not job.finished:
+        return {"summary_id": job.id, "summary_status": "pending"}
+    try:
+        with open(job.result_path, "rb") as fh:
+            fields = json.loads(fh.read())
+    except (OSError, ValueError):
+        # Failed or cancelled: the pending response already carried the local summary
+        return {"summary_id": job.id, "summary_status": "failed"}
+    return {"summary_id": job.id, **fields}
+
+
+def summarize(question, rows, mode=None, defer=None):
+    """
+    Summary fields for a query response. The local statistical summary is
+    free; Gemini is asked when the request's `summary` mode is "llm", or
+    "auto" and the local summary is low-confidence. Unless `defer` is false
+    (default SUMMARY_DEFERRED), the response does not wait for Gemini: it
+    carries the local summary with summary_status "pending" and the URLs
+    the Gemini summary will be served from.
+    """
+    if not rows:
+        return _summary_fields(None, "local")
+    local, wants_llm = _local_summary(question, rows, mode)
+    if not wants_llm:
+        return _summary_fields(local.text, "local")
+    if _wants_deferred(defer):
+        fields = _deferred_summary(question, rows, local)
+        if fields is not None:
+            return fields
+    return _summary_fields(generate_summary(question, rows, local.text), "llm")
+
+
+async def summarize_async(question, rows, mode=None, defer=None):
+    """Same as summarize, awaiting Gemini on the event loop when it is not deferred; the pandas statistics run in a thread"""
+    if not rows:
+        return _summary_fields(None, "local")
+    local, wants_llm = await asyncio.to_thread(_local_summary, question, rows, mode)
+    if not wants_llm:
+        return _summary_fields(local.text, "local")
+    if _wants_deferred(defer):
+        fields = _deferred_summary(question, rows, local)
+        if fields is not None:
+            return fields
+    return _summary_fields(await generate_summary_async(question, rows, local.text), "llm")
+
+
+def generate_summary(question, rows, statistics=None):
     if not rows:
         return None
 
     # Check cache first for performance
-    cache_key = f"summary:{question.lower().strip()}:{hash(str(rows[:3]))}"
+    cache_key = _summary_cache_key(question, rows)
     cached_summary = cache_handler.get(cache_key)
+    timing.cache_result("summary", bool(cached_summary))
     if cached_summary:
-        print(f"🚀 Cache hit for summary generation: {question[:50]}...")
+        logger.debug("Cache hit for summary generation", extra={"question": payload(question)})
         return cached_summary
 
     try:
         start_time = time.time()
         
-        # Simplified prompt for faster generation
-        sample_data = rows[:3]  # Reduced from 5 to 3 for speed
-        prompt = f"""
-Question: "{question}"
-Data: {sample_data}
-Write a brief summary in 1-2 lines:"""
-
         # Use faster model and optimized settings
         model = genai.GenerativeModel(Config.GEMINI_MODEL)
         
-        generation_config = genai.types.GenerationConfig(
-            temperature=Config.TEMPERATURE,
-            max_output_tokens=200,  # Shorter for speed
-            top_p=0.8,
-            top_k=20
-        )
+        llm_started = time.perf_counter()
+        response = None
+        try:
+            with timing.stage("summary") as trace_span:
+                response = model.generate_content(
+                    _summary_prompt(question, rows, statistics),
+                    generation_config=_summary_generation_config()
+                )
+                trace_span.set_attributes({"llm.model": Config.GEMINI_MODEL, "db.rows": len(rows), **tracing.llm_attributes(response)})
+        finally:
+            metrics.observe_llm("summary", time.perf_counter() - llm_started, response)
         
-        response = model.generate_content(
-            prompt,
-            generation_config=generation_config
-        )
-        
-        summary = response.text.strip()
+        summary = _clean_summary(response.text.strip())
         generation_time = time.time() - start_time
         
-        print(f"⚡ Summary generated in {generation_time:.2f}s: {question[:50]}...")
-        
-        # Clean up any markdown formatting
-        if summary.startswith("```"):
-            summary = summary.split("```")[1] if len(summary.split("```")) > 1 else summary
-        if summary.startswith("sql"):
-            summary = summary[3:].strip()
+        logger.info("Summary generated in %.2fs", generation_time, extra={"question": payload(question)})
         
         # Cache the result
         cache_handler.set(cache_key, summary)
@@ -78,12 +218,43 @@ Write a brief summary in 1-2 lines:"""
         return summary
     
     except Exception as e:
-        print(f"❌ Summary generation failed: {str(e)}")
-        # Return a simple fallback summary
-        if len(rows) == 1:
-            return f"Found 1 result for your query."
-        else:
-            return f"Found {len(rows)} results for your query."
+        logger.error("Summary generation failed: %s", e)
+        return statistics or _fallback_summary(rows)
+
+
+async def generate_summary_async(question, rows, statistics=None):
+    """Same as generate_summary, awaiting Gemini on the event loop instead of a thread"""
+    if not rows:
+        return None
+
+    cache_key = _summary_cache_key(question, rows)
+    cached_summary = cache_handler.get(cache_key)
+    timing.cache_result("summary", bool(cached_summary))
+    if cached_summary:
+        logger.debug("Cache hit for summary generation", extra={"question": payload(question)})
+        return cached_summary
+
+    try:
+        start_time = time.time()
+        model = genai.GenerativeModel(Config.GEMINI_MODEL)
+        llm_started = time.perf_counter()
+        response = None
+        try:
+            with timing.stage("summary") as trace_span:
+                response = await asyncio.wait_for(
+                    model.generate_content_async(_summary_prompt(question, rows, statistics), generation_config=_summary_generation_config()),
+                    timeout=Config.LLM_TIMEOUT
+                )
+                trace_span.set_attributes({"llm.model": Config.GEMINI_MODEL, "db.rows": len(rows), **tracing.llm_attributes(response)})
+        finally:
+            metrics.observe_llm("summary", time.perf_counter() - llm_started, response)
+        summary = _clean_summary(response.text.strip())
+        logger.info("Summary generated in %.2fs", time.time() - start_time, extra={"question": payload(question)})
+        cache_handler.set(cache_key, summary)
+        return summary
+    except Exception as e:
+        logger.error("Summary generation failed: %s", str(e) or type(e).__name__)
+        return statistics or _fallback_summary(rows)
 
 
 def convert_result_to_natural_language(question, rows):
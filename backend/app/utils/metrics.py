@@ -0,0 +1,299 @@
+import atexit
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Default latency buckets in seconds (LLM calls routinely take several seconds)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 32768)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    """
+    Base for sharded metrics. Every thread writes only to its own shard, so the
+    hot path takes no lock; shards are summed when /metrics is scraped and the
+    shards of finished threads are folded into a retired total.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, Dict[tuple, list]]] = []
+        self._retired: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def _shard(self) -> Dict[tuple, list]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _collect(self) -> Dict[tuple, list]:
+        with self._lock:
+            live = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                else:
+                    self._merge(self._retired, shard)
+            self._shards = live
+            totals = {labels: list(cell) for labels, cell in self._retired.items()}
+            for _, shard in live:
+                self._merge(totals, shard)
+        return totals
+
+    def _merge(self, into: Dict[tuple, list], shard: Dict[tuple, list]) -> None:
+        for labels, cell in list(shard.items()):
+            target = into.get(labels)
+            if target is None:
+                into[labels] = list(cell)
+            else:
+                for idx, value in enumerate(cell):
+                    target[idx] += value
+
+    def expose(self, totals: Optional[Dict[tuple, list]] = None) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labels, cell in sorted((self._collect() if totals is None else totals).items()):
+            lines.extend(self._expose_cell(labels, cell))
+        return lines
+
+    def _expose_cell(self, labels: tuple, cell: list) -> List[str]:
+        return [f"{self.name}{_label_str(self.labelnames, labels)} {_format_number(cell[0])}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        shard = self._shard()
+        cell = shard.get(labels)
+        if cell is None:
+            shard[labels] = [amount]
+        else:
+            cell[0] += amount
+
+
+class Gauge(Counter):
+    """Up/down gauge; increments and decrements may land in different shards, the sum is exact"""
+
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels: str) -> None:
+        shard = self._shard()
+        cell = shard.get(labels)
+        if cell is None:
+            # Per-bucket counts (+Inf last), then sum and count
+            cell = shard[labels] = [0] * (len(self.buckets) + 3)
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-2] += value
+        cell[-1] += 1
+
+    def _expose_cell(self, labels: tuple, cell: list) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), cell[:-2]):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else _format_number(bound)
+            le_label = f'le="{le}"'
+            lines.append(f"{self.name}_bucket{_label_str(self.labelnames, labels, le_label)} {cumulative}")
+        label_str = _label_str(self.labelnames, labels)
+        lines.append(f"{self.name}_sum{label_str} {_format_number(cell[-2])}")
+        lines.append(f"{self.name}_count{label_str} {cell[-1]}")
+        return lines
+
+
+_RETIRED_FILE = "retired.json"
+
+
+def _read_snapshot(path: str) -> Dict[str, list]:
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_snapshot(path: str, snapshot: Dict[str, list]) -> None:
+    with open(path + ".tmp", "w") as fh:
+        json.dump(snapshot, fh)
+    os.replace(path + ".tmp", path)
+
+
+class MetricsRegistry:
+    """
+    Metrics of this process. With several worker processes (gunicorn), each
+    worker calls enable_multiprocess(METRICS_MULTIPROC_DIR): it writes a
+    snapshot of its series to <dir>/<pid>.json every METRICS_FLUSH_INTERVAL
+    seconds and on every scrape, and /metrics on any worker serves the sum
+    over all snapshots, like prometheus_client's multiprocess mode. Other
+    workers' series are therefore up to one flush interval old. When a worker
+    exits, the master folds its counters and histograms into retired.json
+    (mark_process_dead) and drops its gauges.
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._directory: Optional[str] = None
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def enable_multiprocess(self, directory: str, flush_interval: float) -> None:
+        """Share this process's series through `directory` (call in each worker after fork)"""
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+
+        def flush_periodically():
+            while True:
+                time.sleep(flush_interval)
+                self.flush()
+
+        threading.Thread(target=flush_periodically, name="metrics-flush", daemon=True).start()
+        atexit.register(self.flush)
+
+    def snapshot(self) -> Dict[str, list]:
+        """{metric name: [[labels, cell], ...]}, JSON-serializable"""
+        return {metric.name: [[list(labels), cell] for labels, cell in metric._collect().items()]
+                for metric in self._metrics}
+
+    def flush(self) -> None:
+        if self._directory is None:
+            return
+        try:
+            _write_snapshot(os.path.join(self._directory, f"{os.getpid()}.json"), self.snapshot())
+        except OSError as e:
+            logger.warning("Could not write metrics snapshot: %s", e)
+
+    def expose(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        if self._directory is None:
+            lines = []
+            for metric in self._metrics:
+                lines.extend(metric.expose())
+            return "\n".join(lines) + "\n"
+        self.flush()
+        totals: Dict[str, Dict[tuple, list]] = {metric.name: {} for metric in self._metrics}
+        merged = {metric.name: metric for metric in self._metrics}
+        for name in sorted(os.listdir(self._directory)):
+            if not name.endswith(".json"):
+                continue
+            for metric_name, cells in _read_snapshot(os.path.join(self._directory, name)).items():
+                metric = merged.get(metric_name)
+                if metric is not None:
+                    metric._merge(totals[metric_name], {tuple(labels): cell for labels, cell in cells})
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.expose(totals[metric.name]))
+        return "\n".join(lines) + "\n"
+
+    def mark_process_dead(self, directory: str, pid: int) -> None:
+        """
+        Fold an exited worker's counters and histograms into retired.json and
+        drop its gauges (e.g. requests in flight). Run by the gunicorn master,
+        the only writer of retired.json.
+        """
+        path = os.path.join(directory, f"{pid}.json")
+        snapshot = _read_snapshot(path)
+        if snapshot:
+            retired_path = os.path.join(directory, _RETIRED_FILE)
+            retired = {name: {tuple(labels): cell for labels, cell in cells}
+                       for name, cells in _read_snapshot(retired_path).items()}
+            for metric in self._metrics:
+                if metric.kind == "gauge" or metric.name not in snapshot:
+                    continue
+                metric._merge(retired.setdefault(metric.name, {}),
+                              {tuple(labels): cell for labels, cell in snapshot[metric.name]})
+            _write_snapshot(retired_path, {name: [[list(labels), cell] for labels, cell in cells.items()]
+                                           for name, cells in retired.items()})
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def clear_multiprocess_dir(directory: str) -> None:
+    """Remove snapshots left by a previous server run (gunicorn on_starting)"""
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.endswith((".json", ".tmp")):
+            os.remove(os.path.join(directory, name))
+
+
+registry = MetricsRegistry()
+
+REQUEST_SECONDS = registry.register(Histogram(
+    "chatbot_request_duration_seconds", "HTTP request latency by route.", ("route", "method", "status")))
+REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "chatbot_requests_in_flight", "Requests currently being served.", ("route",)))
+STAGE_SECONDS = registry.register(Histogram(
+    "chatbot_stage_duration_seconds", "Pipeline stage latency (see performance.stages).", ("stage",)))
+LLM_SECONDS = registry.register(Histogram(
+    "chatbot_llm_call_duration_seconds", "Gemini call latency.", ("call", "outcome")))
+LLM_TOKENS = registry.register(Histogram(
+    "chatbot_llm_tokens", "Tokens per Gemini call.", ("call", "kind"), buckets=TOKEN_BUCKETS))
+SQL_SECONDS = registry.register(Histogram(
+    "chatbot_sql_execute_duration_seconds", "SQL statement execution latency by engine.", ("engine",)))
+POOL_WAIT_SECONDS = registry.register(Histogram(
+    "chatbot_sql_pool_checkout_seconds", "Time to check a connection out of the engine pool.", ("engine",)))
+MONGO_SECONDS = registry.register(Histogram(
+    "chatbot_mongo_command_duration_seconds", "MongoDB command latency.", ("command", "outcome")))
+CACHE_REQUESTS = registry.register(Counter(
+    "chatbot_cache_requests_total", "Cache lookups by namespace; hit ratio = hit / (hit + miss).", ("namespace", "result")))
+
+
+def observe_llm(call: str, seconds: float, response: Optional[object] = None) -> None:
+    """Record a Gemini call; token counts come from the response's usage metadata"""
+    LLM_SECONDS.observe(seconds, call, "ok" if response is not None else "error")
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    for kind, attr in (("prompt", "prompt_token_count"), ("completion", "candidates_token_count")):
+        count = getattr(usage, attr, None)
+        if count:
+            LLM_TOKENS.observe(count, call, kind)
+
+
+def cache_namespace(key_data: object) -> str:
+    """`summary:...` -> `summary`; keys without a prefix share `other`"""
+    if isinstance(key_data, str) and ":" in key_data:
+        return key_data.split(":", 1)[0]
+    return "other"
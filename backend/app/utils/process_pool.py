@@ -0,0 +1,183 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import Config
+from app.utils import timing
+from app.utils.exports import EXPORT_FORMATS, columns_to_arrow, pa
+
+logger = logging.getLogger(__name__)
+
+# Formats whose encoders do per-cell Python work; JSON/NDJSON are a single
+# C-level dumps per batch, and would lose nested documents to the Arrow trip
+OFFLOADED_EXPORT_FORMATS = ("csv", "excel", "parquet", "arrow")
+
+# (shared memory block name, stream size in bytes)
+SharedHandle = Tuple[str, int]
+
+
+class SharedColumns:
+    """
+    A result's columns written once as an Arrow IPC stream into a shared
+    memory block. A worker process maps the block by name instead of
+    receiving pickled row dicts; the block is unlinked on exit.
+    """
+
+    def __init__(self, columns: List[str], data: Dict[str, list]):
+        table = columns_to_arrow(columns, data)
+        sizer = pa.MockOutputStream()
+        with pa.ipc.new_stream(sizer, table.schema) as writer:
+            writer.write_table(table)
+        size = sizer.size()
+        self._block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        target = pa.py_buffer(self._block.buf)
+        with pa.ipc.new_stream(pa.FixedSizeBufferWriter(target), table.schema) as writer:
+            writer.write_table(table)
+        # Arrow's view must go before the block can be closed
+        del target
+        self.handle: SharedHandle = (self._block.name, size)
+
+    def close(self) -> None:
+        self._block.close()
+        self._block.unlink()
+
+    def __enter__(self) -> "SharedColumns":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def load_columns(handle: SharedHandle) -> Tuple[List[str], Dict[str, list]]:
+    """The (columns, data) a SharedColumns block holds, copied out so the block can be released"""
+    name, size = handle
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        table = pa.ipc.open_stream(pa.py_buffer(block.buf)[:size]).read_all()
+        columns = table.column_names
+        data = {name: column.to_pylist() for name, column in zip(columns, table.columns)}
+        del table
+        return columns, data
+    finally:
+        block.close()
+
+
+# --- Work run in the pool's processes (top-level, so it can be pickled) ---------
+
+def _build_chart(handle: SharedHandle, chart_type: str, question: str,
+                 width: Optional[int], height: Optional[int]) -> Tuple[str, Dict[str, Any]]:
+    from app.utils.chart_engine import ChartFrame
+    frame = ChartFrame(*load_columns(handle))
+    if chart_type == "auto":
+        chart_type = frame.detect_chart_type(question)
+    return chart_type, frame.build(chart_type, question, width, height)
+
+
+def _write_export(handle: SharedHandle, export_format: str, path: str, cancel_path: str) -> bool:
+    """Encode the shared columns into `path`; False when `cancel_path` appeared before it was done"""
+    from app.utils.exports import stream_export
+    from app.utils.result_store import StoredResult
+    columns, data = load_columns(handle)
+    # No result_id and no source: the worker encodes exactly the rows it was given, it never re-runs the query
+    chunks = stream_export(StoredResult("", "", columns, data, {}, 0), export_format)
+    try:
+        with open(path, "wb") as fh:
+            for chunk in chunks:
+                fh.write(chunk)
+                if os.path.exists(cancel_path):
+                    return False
+    finally:
+        chunks.close()
+    return True
+
+
+class ProcessPool:
+    """
+    Worker processes for CPU-bound stages (chart builds over large in-memory
+    results, export encoding), so they scale across cores instead of
+    holding the request threads' GIL. The pool starts on first use with the
+    spawn method, since the server process runs threads that fork() would
+    copy mid-flight. Results below PROCESS_POOL_MIN_ROWS stay in-process,
+    where the transfer would cost more than it saves; a pool that breaks
+    is replaced and the work runs in-process.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def reset_after_fork(self) -> None:
+        """The parent's pool processes belong to the parent; start a new pool on demand"""
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return pa is not None and Config.PROCESS_POOL_WORKERS > 0
+
+    def worthwhile(self, row_count: int) -> bool:
+        return self.enabled and row_count >= Config.PROCESS_POOL_MIN_ROWS
+
+    def build_chart(self, result, chart_type: str, question: str,
+                    width: Optional[int], height: Optional[int]) -> Tuple[str, Dict[str, Any]]:
+        """(chart_type, chart_data) for an in-memory result, built in a worker process"""
+        with timing.stage("share"):
+            shared = SharedColumns(result.columns, result.data)
+        with shared:
+            args = (shared.handle, chart_type, question, width, height)
+            return self._run(_build_chart, args, lambda future: future.result())
+
+    def write_export(self, job, result, export_format: str, filename: Optional[str] = None) -> None:
+        """
+        Write the stored `result` as the job's export file from a worker
+        process. The worker encodes the columns it maps from shared memory;
+        unlike stream_export it does not re-run the result's source query.
+        """
+        def write(path: str) -> None:
+            with SharedColumns(result.columns, result.data) as shared:
+                args = (shared.handle, export_format, path, job.cancel_path)
+                if not self._run(_write_export, args, lambda future: self._wait_for_job(job, future)):
+                    job.raise_if_cancelled()
+
+        job.update(message="encoding in a worker process")
+        job.write_result_file(write, EXPORT_FORMATS[export_format][0], filename)
+
+    # --- internals -----------------------------------------------------
+
+    def _executor_or_start(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=Config.PROCESS_POOL_WORKERS,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _run(self, fn: Callable[..., Any], args: tuple, wait: Callable[[Any], Any]) -> Any:
+        executor = self._executor_or_start()
+        try:
+            return wait(executor.submit(fn, *args))
+        except BrokenProcessPool:
+            logger.warning("Process pool broke; running %s in-process", fn.__name__)
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False)
+            return fn(*args)
+
+    @staticmethod
+    def _wait_for_job(job, future) -> Any:
+        # The worker watches the job's cancel marker; an owner's cancel only sets an Event, so mirror it
+        while True:
+            try:
+                return future.result(timeout=0.5)
+            except FutureTimeout:
+                if job.cancel_requested() and not os.path.exists(job.cancel_path):
+                    open(job.cancel_path, "wb").close()
+
+
+# Global process pool instance
+process_pool = ProcessPool()
@@ -0,0 +1,177 @@
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+
+from config import Config
+
+
+def _frame_label(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class _StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval into collapsed-stack counts"""
+
+    def __init__(self, target_ident: int, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.target_ident = target_ident
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.target_ident)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> Counter:
+        self._stopped.set()
+        self.join()
+        return self.stacks
+
+
+class ProfileSession:
+    """
+    One profiled request: a stack sampler on the request thread plus
+    tracemalloc for allocations and peak memory. Only one session runs at a
+    time because tracemalloc is process-wide. The sampled thread is the one
+    that called begin(); under ASGI that is the event loop, which other
+    requests share and whose offloaded work runs elsewhere.
+    """
+
+    def __init__(self, store: "Profiler", method: str, path: str, trigger: str):
+        self._store = store
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self._own_tracing = not tracemalloc.is_tracing()
+        if self._own_tracing:
+            tracemalloc.start(Config.PROFILE_TRACEMALLOC_FRAMES)
+            self._baseline = None
+        else:
+            self._baseline = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        self._sampler = _StackSampler(threading.get_ident(), Config.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+        self._sampler.start()
+
+    def finish(self, extra: Optional[dict] = None) -> str:
+        """Stop sampling, store the profile and return its id"""
+        duration_ms = (time.perf_counter() - self._started) * 1000
+        stacks = self._sampler.stop()
+        try:
+            peak = tracemalloc.get_traced_memory()[1]
+            snapshot = tracemalloc.take_snapshot()
+            if self._baseline is not None:
+                stats = [s for s in snapshot.compare_to(self._baseline, "lineno") if s.size_diff > 0]
+                allocations = [
+                    {"location": str(stat.traceback), "size_bytes": stat.size_diff, "count": stat.count_diff}
+                    for stat in stats[:Config.PROFILE_TOP_N]
+                ]
+            else:
+                allocations = [
+                    {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+                    for stat in snapshot.statistics("lineno")[:Config.PROFILE_TOP_N]
+                ]
+        finally:
+            if self._own_tracing:
+                tracemalloc.stop()
+            self._store._release()
+
+        self._store._save({
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "trigger": self.trigger,
+            "started_at": self.started_at,
+            "duration_ms": round(duration_ms, 1),
+            "sample_interval_ms": Config.PROFILE_SAMPLE_INTERVAL_MS,
+            "samples": sum(stacks.values()),
+            "collapsed": "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()),
+            "top_functions": _self_time(stacks)[:Config.PROFILE_TOP_N],
+            "memory": {"peak_bytes": peak, "top_allocations": allocations},
+            **(extra or {}),
+        })
+        return self.id
+
+
+def _self_time(stacks: Counter) -> List[dict]:
+    """Samples per leaf frame, i.e. where the request thread was actually running"""
+    leaves: Counter = Counter()
+    for stack, count in stacks.items():
+        leaves[stack.rsplit(";", 1)[-1]] += count
+    total = sum(leaves.values()) or 1
+    return [
+        {"function": name, "samples": count, "share": round(count / total, 3)}
+        for name, count in leaves.most_common()
+    ]
+
+
+class Profiler:
+    """
+    Opt-in per-request CPU and memory profiling. A request is profiled when an
+    admin sends `X-Profile: 1` or, on the NL query routes, when it falls in the
+    PROFILE_SAMPLE_RATE fraction. Results are kept in a bounded in-memory store
+    and served by the /api/admin/profiles endpoints.
+    """
+
+    def __init__(self):
+        self._profiles: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._active = threading.Lock()
+
+    def trigger_for(self, path: str, requested: bool) -> Optional[str]:
+        if requested:
+            return "header"
+        if Config.PROFILE_SAMPLE_RATE > 0 and path in Config.PROFILE_SAMPLED_PATHS and random.random() < Config.PROFILE_SAMPLE_RATE:
+            return "sampled"
+        return None
+
+    def begin(self, method: str, path: str, trigger: str) -> Optional[ProfileSession]:
+        """Start profiling the calling thread, or None while another profile is running"""
+        if not self._active.acquire(blocking=False):
+            return None
+        try:
+            return ProfileSession(self, method, path, trigger)
+        except Exception:
+            self._active.release()
+            raise
+
+    def _release(self) -> None:
+        self._active.release()
+
+    def _save(self, profile: dict) -> None:
+        with self._lock:
+            self._profiles[profile["id"]] = profile
+            while len(self._profiles) > Config.PROFILE_MAX_STORED:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def summaries(self) -> List[Dict]:
+        keys = ("id", "method", "path", "trigger", "started_at", "duration_ms", "samples")
+        with self._lock:
+            profiles = list(self._profiles.values())
+        return [
+            {**{key: profile[key] for key in keys}, "peak_bytes": profile["memory"]["peak_bytes"]}
+            for profile in reversed(profiles)
+        ]
+
+
+# Global profiler instance
+profiler = Profiler()
@@ -0,0 +1,401 @@
+import contextvars
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from app.utils.json_provider import dumps_bytes
+
+try:
+    import pyarrow as pa
+except ImportError:  # without pyarrow results stay in this process's memory
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+_RESULT_ID = re.compile(r"^[0-9a-f]{32}$")
+_SIZE_SAMPLE_ROWS = 50
+# Schema metadata keys of a result file
+_META_KEY = b"result_meta"
+_JSON_COLUMNS_KEY = b"json_columns"
+
+_session: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("result_session", default=None)
+
+
+def set_session(session_id: Optional[str]) -> None:
+    """Bind the caller's session (X-Session-Id, else the client address) for quota accounting"""
+    _session.set((session_id or "anonymous")[:128])
+
+
+def current_session() -> str:
+    return _session.get() or "anonymous"
+
+
+def to_columns(rows: List[Dict[str, Any]]):
+    """Row dicts -> (column names in first-seen order, {column: values}); missing keys become None"""
+    columns: Dict[str, None] = {}
+    for row in rows:
+        for key in row:
+            if key not in columns:
+                columns[key] = None
+    names = list(columns)
+    return names, {name: [row.get(name) for row in rows] for name in names}
+
+
+def _estimate_bytes(rows: List[Dict[str, Any]]) -> int:
+    # Encoded size of a sample, scaled; close enough for budgeting without encoding everything
+    sample = rows[:_SIZE_SAMPLE_ROWS]
+    return int(len(dumps_bytes(sample)) * len(rows) / len(sample)) if sample else 0
+
+
+def _column_array(values: list):
+    """(Arrow array, stored as JSON text) for one column"""
+    try:
+        array = pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+        array = None
+    if array is not None and not pa.types.is_nested(array.type):
+        return array, False
+    # Documents and mixed-type columns keep their structure as per-value JSON
+    return pa.array([None if value is None else dumps_bytes(value).decode("utf-8") for value in values],
+                    type=pa.string()), True
+
+
+def _encode_columns(columns: List[str], data: Dict[str, list], header: Dict[str, Any]):
+    """
+    A result's columns as an Arrow table. Scalar columns keep their types
+    (Decimal, date, datetime, bytes...) through the file; nested or mixed
+    columns are JSON text, listed in the schema metadata with `header`.
+    """
+    arrays, json_columns = [], []
+    for name in columns:
+        array, as_json = _column_array(data[name])
+        arrays.append(array)
+        if as_json:
+            json_columns.append(name)
+    metadata = {_META_KEY: dumps_bytes(header), _JSON_COLUMNS_KEY: dumps_bytes(json_columns)}
+    return pa.Table.from_arrays(arrays, schema=pa.schema(
+        [pa.field(name, array.type) for name, array in zip(columns, arrays)], metadata=metadata))
+
+
+def _read_file(path: str):
+    """(columns, data, header) of a result file written by ResultStore._write"""
+    with pa.OSFile(path, "rb") as source:
+        table = pa.ipc.open_file(source).read_all()
+    metadata = table.schema.metadata or {}
+    json_columns = set(json.loads(metadata.get(_JSON_COLUMNS_KEY, b"[]")))
+    columns = table.column_names
+    data = {}
+    for name, column in zip(columns, table.columns):
+        values = column.to_pylist()
+        if name in json_columns:
+            values = [None if value is None else json.loads(value) for value in values]
+        data[name] = values
+    return columns, data, json.loads(metadata.get(_META_KEY, b"{}"))
+
+
+class StoredResult:
+    """A query result held column by column, with the metadata of the query that produced it"""
+
+    __slots__ = ("id", "session", "columns", "data", "row_count", "meta", "created_at", "size_bytes", "path", "spilling")
+
+    def __init__(self, result_id: str, session: str, columns: List[str], data: Dict[str, list], meta: Dict[str, Any], size_bytes: int):
+        self.id = result_id
+        self.session = session
+        self.columns = columns
+        self.data: Optional[Dict[str, list]] = data
+        self.row_count = len(data[columns[0]]) if columns else 0
+        self.meta = meta
+        self.created_at = time.time()
+        self.size_bytes = size_bytes
+        self.path: Optional[str] = None
+        self.spilling = False
+
+    def snapshot(self) -> "StoredResult":
+        """Copy that keeps its column data even if the stored entry is spilled meanwhile"""
+        copy = StoredResult(self.id, self.session, self.columns, self.data, self.meta, self.size_bytes)
+        copy.created_at = self.created_at
+        return copy
+
+    def rows(self) -> List[Dict[str, Any]]:
+        columns = [self.data[name] for name in self.columns]
+        return [dict(zip(self.columns, values)) for values in zip(*columns)]
+
+    def summary(self) -> Dict[str, Any]:
+        return {"result_id": self.id, "columns": self.columns, "row_count": self.row_count, **self.meta}
+
+
+class ResultStore:
+    """
+    Bounded server-side store for query results, so charts and exports can
+    refer to a result by `result_id` instead of posting its rows back.
+
+    Results live in memory up to RESULT_STORE_MEMORY_BYTES; least recently
+    used ones beyond that are spilled to RESULT_STORE_DIR as Arrow IPC files
+    and loaded back on access. With RESULT_STORE_SHARED every result is also
+    written there when it is stored, so any worker process can serve a
+    result_id another one handed out (spilling then only drops the memory
+    copy). The files keep each column's type, so a result read back from
+    disk holds the same Decimals and dates it was stored with; without
+    pyarrow results are kept in memory only. Results expire after
+    RESULT_STORE_TTL seconds and each session keeps at most
+    RESULT_STORE_SESSION_MAX_RESULTS / RESULT_STORE_SESSION_MAX_BYTES,
+    oldest first out.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, StoredResult]" = OrderedDict()  # least recently used first
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._last_sweep = 0.0
+
+    def put(self, rows: List[Dict[str, Any]], **meta: Any) -> Optional[str]:
+        """Store `rows` for the current session; returns the result_id, or None if it cannot be kept"""
+        if not Config.RESULT_STORE_ENABLED or not rows:
+            return None
+        size_bytes = _estimate_bytes(rows)
+        if size_bytes > Config.RESULT_STORE_SESSION_MAX_BYTES:
+            return None
+        columns, data = to_columns(rows)
+        entry = StoredResult(uuid.uuid4().hex, current_session(), columns, data, meta, size_bytes)
+        evicted = []
+        with self._lock:
+            evicted.extend(self._enforce_session_quota(entry.session, size_bytes))
+            self._entries[entry.id] = entry
+            self._memory_bytes += size_bytes
+        self._discard_files(evicted)
+        if Config.RESULT_STORE_SHARED:
+            self._share(entry, data)
+        self._sweep()
+        self._spill_over_budget()
+        return entry.id
+
+    def get(self, result_id: str) -> Optional[StoredResult]:
+        """The stored result with its column data loaded, or None when unknown or expired"""
+        if not _RESULT_ID.match(result_id or ""):
+            return None
+        with self._lock:
+            entry = self._entries.get(result_id)
+            expired = entry is not None and self._expired(entry)
+            if expired:
+                self._remove(entry)
+            elif entry is not None:
+                self._entries.move_to_end(result_id)
+        if expired:
+            self._discard_files([entry])
+            return None
+        if entry is None:
+            # Another worker may have spilled it to the shared directory
+            return self._load_foreign(result_id)
+        with self._load_lock:
+            if entry.data is None and not self._load(entry):
+                return None
+            result = entry.snapshot()
+        # Loading brought it back into memory; colder results may spill instead
+        self._spill_over_budget()
+        return result
+
+    def delete(self, result_id: str) -> None:
+        with self._lock:
+            entry = self._entries.get(result_id)
+            if entry is not None:
+                self._remove(entry)
+        if entry is not None:
+            self._discard_files([entry])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            spilled = sum(1 for entry in self._entries.values() if entry.data is None)
+            return {
+                "results": len(self._entries),
+                "spilled": spilled,
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+            }
+
+    # --- internals -----------------------------------------------------
+
+    def _path(self, result_id: str) -> str:
+        return os.path.join(Config.RESULT_STORE_DIR, f"{result_id}.arrow")
+
+    def _expired(self, entry: StoredResult) -> bool:
+        return time.time() - entry.created_at > Config.RESULT_STORE_TTL
+
+    def _remove(self, entry: StoredResult) -> None:
+        # Caller holds the lock; files are deleted by _discard_files outside it
+        self._entries.pop(entry.id, None)
+        if entry.data is not None:
+            self._memory_bytes -= entry.size_bytes
+        if entry.path is not None:
+            self._disk_bytes -= entry.size_bytes
+
+    def _discard_files(self, entries: List[StoredResult]) -> None:
+        for entry in entries:
+            if entry.path is not None:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+    def _enforce_session_quota(self, session: str, incoming_bytes: int) -> List[StoredResult]:
+        owned = [entry for entry in self._entries.values() if entry.session == session]
+        owned.sort(key=lambda entry: entry.created_at)
+        used = sum(entry.size_bytes for entry in owned) + incoming_bytes
+        evicted = []
+        while owned and (len(owned) >= Config.RESULT_STORE_SESSION_MAX_RESULTS or used > Config.RESULT_STORE_SESSION_MAX_BYTES):
+            oldest = owned.pop(0)
+            used -= oldest.size_bytes
+            self._remove(oldest)
+            evicted.append(oldest)
+        return evicted
+
+    def _sweep(self) -> None:
+        """Drop expired results; at most every RESULT_STORE_SWEEP_INTERVAL seconds"""
+        now = time.time()
+        if now - self._last_sweep < Config.RESULT_STORE_SWEEP_INTERVAL:
+            return
+        self._last_sweep = now
+        with self._lock:
+            expired = [entry for entry in self._entries.values() if self._expired(entry)]
+            for entry in expired:
+                self._remove(entry)
+        self._discard_files(expired)
+        # Files left behind by other workers or earlier processes
+        try:
+            for name in os.listdir(Config.RESULT_STORE_DIR):
+                path = os.path.join(Config.RESULT_STORE_DIR, name)
+                if name.endswith((".arrow", ".tmp")) and now - os.path.getmtime(path) > Config.RESULT_STORE_TTL:
+                    os.remove(path)
+        except OSError:
+            pass
+
+    def _write(self, entry: StoredResult, data: Dict[str, list]) -> str:
+        if pa is None:
+            raise OSError("pyarrow is not installed")
+        table = _encode_columns(entry.columns, data, {"meta": entry.meta, "session": entry.session,
+                                                      "created_at": entry.created_at})
+        os.makedirs(Config.RESULT_STORE_DIR, exist_ok=True)
+        path = self._path(entry.id)
+        with pa.OSFile(path + ".tmp", "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        # Other workers may read it at any moment; they must never see a partial file
+        os.replace(path + ".tmp", path)
+        return path
+
+    def _share(self, entry: StoredResult, data: Dict[str, list]) -> None:
+        try:
+            path = self._write(entry, data)
+        except OSError as e:
+            # Disk unavailable: this worker still serves it from memory
+            logger.warning("Could not share result %s: %s", entry.id, e)
+            return
+        with self._lock:
+            stale = entry.id not in self._entries
+            if not stale:
+                entry.path = path
+                self._disk_bytes += entry.size_bytes
+        if stale:
+            entry.path = path
+            self._discard_files([entry])
+
+    def _spill_over_budget(self) -> None:
+        while True:
+            with self._lock:
+                if self._memory_bytes <= Config.RESULT_STORE_MEMORY_BYTES:
+                    break
+                victim = next((e for e in self._entries.values() if e.data is not None and not e.spilling), None)
+                if victim is None:
+                    break
+                if victim.path is not None:
+                    # Already on disk (shared): only the memory copy goes
+                    victim.data = None
+                    self._memory_bytes -= victim.size_bytes
+                    continue
+                victim.spilling = True
+                data = victim.data
+            try:
+                path = self._write(victim, data)
+            except OSError as e:
+                # Disk unavailable: keep serving from memory, drop the oldest instead
+                logger.warning("Could not spill result %s: %s", victim.id, e)
+                with self._lock:
+                    victim.spilling = False
+                    self._remove(victim)
+                continue
+            with self._lock:
+                victim.spilling = False
+                if victim.id not in self._entries:
+                    stale = victim
+                else:
+                    stale = None
+                    victim.path = path
+                    victim.data = None
+                    self._memory_bytes -= victim.size_bytes
+                    self._disk_bytes += victim.size_bytes
+            if stale is not None:
+                stale.path = path
+                self._discard_files([stale])
+        self._trim_disk()
+
+    def _trim_disk(self) -> None:
+        with self._lock:
+            dropped = []
+            for entry in list(self._entries.values()):
+                if self._disk_bytes <= Config.RESULT_STORE_DISK_BYTES:
+                    break
+                if entry.data is None and entry.path is not None:
+                    self._remove(entry)
+                    dropped.append(entry)
+        self._discard_files(dropped)
+
+    def _load(self, entry: StoredResult) -> bool:
+        try:
+            data = _read_file(entry.path)[1]
+        except (OSError, ValueError, pa.ArrowException) as e:
+            logger.warning("Could not load spilled result %s: %s", entry.id, e)
+            with self._lock:
+                self._remove(entry)
+            return False
+        with self._lock:
+            entry.data = data
+            if entry.id in self._entries:
+                self._memory_bytes += entry.size_bytes
+            if Config.RESULT_STORE_SHARED:
+                # Other workers keep reading the file
+                return True
+            path, entry.path = entry.path, None
+            if entry.id in self._entries:
+                self._disk_bytes -= entry.size_bytes
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return True
+
+    def _load_foreign(self, result_id: str) -> Optional[StoredResult]:
+        if pa is None:
+            return None
+        path = self._path(result_id)
+        try:
+            if time.time() - os.path.getmtime(path) > Config.RESULT_STORE_TTL:
+                return None
+            columns, data, header = _read_file(path)
+            size_bytes = os.path.getsize(path)
+        except (OSError, ValueError, pa.ArrowException):
+            return None
+        entry = StoredResult(result_id, header.get("session", "anonymous"), columns, data,
+                             header.get("meta", {}), size_bytes)
+        entry.created_at = header.get("created_at", entry.created_at)
+        return entry
+
+
+# Global result store instance
+result_store = ResultStore()
@@ -0,0 +1,148 @@
+import re
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from app.utils.chart_engine import CATEGORICAL, NUMERIC, TEMPORAL, ChartFrame, is_identifier
+
+# Per-request `summary` values: the local statistics only, always Gemini, or
+# Gemini only when the local summary has little to say
+SUMMARY_MODES = ("local", "llm", "auto")
+
+_ROLE_ORDER = {NUMERIC: 0, TEMPORAL: 1, CATEGORICAL: 2}
+_TOP_CATEGORIES = 3
+_MAX_VALUE_CHARS = 40
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+class LocalSummary(NamedTuple):
+    text: str
+    confidence: float  # 0..1; below SUMMARY_MIN_CONFIDENCE `auto` asks Gemini instead
+    stats: Dict[str, Dict[str, Any]]
+
+
+def summary_mode(value: Any) -> str:
+    mode = str(value or "").lower()
+    return mode if mode in SUMMARY_MODES else Config.SUMMARY_MODE
+
+
+def _number(value: float) -> str:
+    if value != 0 and not 1e-3 <= abs(value) < 1e15:
+        return f"{value:.3g}"
+    if float(value).is_integer():
+        return f"{int(value):,}"
+    return f"{value:,.2f}"
+
+
+def _text(value: Any) -> str:
+    text = str(value)
+    return text if len(text) <= _MAX_VALUE_CHARS else text[:_MAX_VALUE_CHARS - 1] + "…"
+
+
+def _when(value: pd.Timestamp) -> str:
+    return value.strftime("%Y-%m-%d" if value == value.normalize() else "%Y-%m-%d %H:%M")
+
+
+def describe_column(frame: ChartFrame, name: str) -> Dict[str, Any]:
+    """Count, distinct and missing values plus role-specific statistics, computed over the whole column"""
+    role = frame.roles[name]
+    series = frame.column(name)
+    stats: Dict[str, Any] = {"role": role}
+    if role == NUMERIC:
+        values = series.to_numpy(dtype="float64", na_value=np.nan)
+        values = values[np.isfinite(values)]
+        stats.update(count=len(values), distinct=len(np.unique(values)))
+        if len(values):
+            q1, q3 = np.percentile(values, [25, 75])
+            fence = 1.5 * (q3 - q1)
+            stats.update(min=float(values.min()), max=float(values.max()), mean=float(values.mean()),
+                         outliers=int(np.count_nonzero((values < q1 - fence) | (values > q3 + fence))))
+    elif role == TEMPORAL:
+        values = series.dropna()
+        stats.update(count=len(values), distinct=int(values.nunique()))
+        if len(values):
+            stats.update(min=values.min(), max=values.max())
+    else:
+        values = series.dropna()
+        try:
+            counts = values.value_counts()
+        except TypeError:  # nested documents are unhashable
+            counts = values.astype(str).value_counts()
+        stats.update(count=len(values), distinct=len(counts),
+                     top=[(_text(key), int(count)) for key, count in counts.head(_TOP_CATEGORIES).items()])
+    stats["missing"] = frame.row_count - stats["count"]
+    return stats
+
+
+def _describe(name: str, stats: Dict[str, Any]) -> Optional[str]:
+    if not stats["count"]:
+        return None
+    missing = f", {stats['missing']:,} missing" if stats["missing"] else ""
+    if stats["role"] == NUMERIC:
+        if stats["min"] == stats["max"]:
+            return f"{name} is {_number(stats['min'])} throughout{missing}"
+        outliers = stats["outliers"]
+        outliers = f", {outliers:,} outlier{'s' if outliers != 1 else ''}" if outliers else ""
+        return (f"{name} ranges {_number(stats['min'])} to {_number(stats['max'])} "
+                f"(mean {_number(stats['mean'])}{outliers}{missing})")
+    if stats["role"] == TEMPORAL:
+        if stats["min"] == stats["max"]:
+            return f"{name} is {_when(stats['min'])}"
+        days = (stats["max"] - stats["min"]).days
+        span = f"{days / 365.25:.1f} years" if days >= 730 else f"{days:,} days"
+        return f"{name} spans {_when(stats['min'])} to {_when(stats['max'])} ({span}{missing})"
+    top = stats["top"]
+    if stats["distinct"] == stats["count"]:
+        examples = ", ".join(key for key, _ in top)
+        if stats["distinct"] <= len(top):
+            return f"{name}: {examples}"
+        return f"{name} has {stats['distinct']:,} distinct values, e.g. {examples}"
+    if stats["distinct"] == 1:
+        return f"{name} is {top[0][0]} throughout{missing}"
+    mostly = " and ".join(f"{key} ({count:,})" for key, count in top[:2])
+    return f"{name} has {stats['distinct']:,} distinct values, mostly {mostly}"
+
+
+def _ordered(frame: ChartFrame, question: str) -> List[str]:
+    """Columns the question names first, then numbers, dates and categories; identifiers last"""
+    words = set(_WORD.findall(question.lower()))
+
+    def key(item):
+        position, name = item
+        mentioned = bool(words & set(_WORD.findall(name.lower())))
+        return (not mentioned, is_identifier(name), _ROLE_ORDER[frame.roles[name]], position)
+
+    return [name for _, name in sorted(enumerate(frame.columns), key=key)]
+
+
+def local_summary(question: str, columns: List[str], data: Dict[str, list]) -> LocalSummary:
+    """
+    A templated summary from vectorized column statistics over the full
+    result, with a confidence: results with numbers, dates or repeated
+    categories have something to say, a list of distinct names does not.
+    """
+    frame = ChartFrame(columns, data)
+    rows = frame.row_count
+    if not rows:
+        return LocalSummary("No rows.", 1.0, {})
+    if rows == 1:
+        values = ", ".join(f"{name} {_text(data[name][0])}" for name in columns[:Config.SUMMARY_MAX_COLUMNS * 2]
+                           if data[name][0] is not None)
+        return LocalSummary(f"1 row: {values}." if values else "1 row.", 0.9, {})
+
+    stats = {name: describe_column(frame, name) for name in columns}
+    parts = []
+    for name in _ordered(frame, question or ""):
+        part = _describe(name, stats[name])
+        if part:
+            parts.append(part)
+        if len(parts) == Config.SUMMARY_MAX_COLUMNS:
+            break
+    text = f"{rows:,} rows: " + "; ".join(parts) + "." if parts else f"{rows:,} rows."
+    informative = any(
+        column["count"] and (column["role"] != CATEGORICAL or column["distinct"] < column["count"])
+        for name, column in stats.items() if not is_identifier(name)
+    )
+    return LocalSummary(text, 0.9 if informative else 0.4, stats)
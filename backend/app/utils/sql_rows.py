@@ -0,0 +1,94 @@
+import base64
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from app.utils.json_provider import orjson
+
+
+def _b64(value) -> str:
+    return base64.b64encode(value).decode('ascii')
+
+
+# Python value type -> JSON-ready conversion. Types orjson encodes natively
+# (dates, times, UUIDs) are only converted when falling back to the stdlib.
+# Decimals stay exact: charts and summaries compute on them and the JSON
+# provider writes them out (see decimal_to_json).
+_VALUE_CONVERTERS: Dict[type, Callable[[Any], Any]] = {
+    memoryview: _b64,
+    bytes: _b64,
+    timedelta: lambda value: value.total_seconds(),
+}
+if orjson is None:
+    _VALUE_CONVERTERS.update({
+        datetime: lambda value: value.isoformat(),
+        date: lambda value: value.isoformat(),
+        time: lambda value: value.isoformat(),
+        UUID: str,
+    })
+
+# PostgreSQL type OIDs reported in cursor.description -> Python value type
+_PG_TYPE_CODES = {
+    1700: Decimal,     # numeric
+    17: memoryview,    # bytea
+    2950: UUID,        # uuid
+    1082: date,        # date
+    1083: time,        # time
+    1114: datetime,    # timestamp
+    1184: datetime,    # timestamptz
+    1186: timedelta,   # interval
+}
+
+
+def _guarded(expected: type, convert: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    # Sniffed column types are not guaranteed (SQLite is dynamically typed)
+    return lambda value: convert(value) if type(value) is expected else value
+
+
+def column_converters(description: Optional[Sequence], rows: Sequence[Sequence]) -> List[Tuple[int, Callable[[Any], Any]]]:
+    """
+    Work out once per result which columns need converting before JSON
+    encoding. Uses the DBAPI type codes when the driver reports them and
+    otherwise sniffs the first non-null value of each column.
+    """
+    width = len(rows[0]) if rows else 0
+    converters = []
+    for idx in range(width):
+        type_code = description[idx][1] if description and idx < len(description) else None
+        value_type = _PG_TYPE_CODES.get(type_code) if isinstance(type_code, int) else None
+        if value_type is not None:
+            convert = _VALUE_CONVERTERS.get(value_type)
+            if convert is not None:
+                converters.append((idx, convert))
+            continue
+        sample = next((row[idx] for row in rows if row[idx] is not None), None)
+        convert = _VALUE_CONVERTERS.get(type(sample))
+        if convert is not None:
+            converters.append((idx, _guarded(type(sample), convert)))
+    return converters
+
+
+def result_to_dicts(result) -> List[Dict[str, Any]]:
+    """
+    Materialize a SQLAlchemy result as JSON-ready dicts, applying the
+    per-column converters instead of type-checking every cell.
+    """
+    keys = list(result.keys())
+    cursor = getattr(result, 'cursor', None)
+    description = getattr(cursor, 'description', None)
+    rows = result.fetchall()
+    if not rows:
+        return []
+    converters = column_converters(description, rows)
+    if not converters:
+        return [dict(zip(keys, row)) for row in rows]
+    converted = []
+    for row in rows:
+        values = list(row)
+        for idx, convert in converters:
+            value = values[idx]
+            if value is not None:
+                values[idx] = convert(value)
+        converted.append(dict(zip(keys, values)))
+    return converted
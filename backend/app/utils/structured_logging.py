@@ -0,0 +1,177 @@
+import atexit
+import contextvars
+import copy
+import hashlib
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import sys
+import uuid
+from typing import Any, Dict, Optional
+
+from config import Config
+
+_REQUEST_ID_UNSAFE = re.compile(r"[^\w.:-]")
+
+_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def start_request(request_id: Optional[str] = None) -> str:
+    """Bind a request ID (the caller's X-Request-ID, or a new one) to every log line of this request"""
+    request_id = _REQUEST_ID_UNSAFE.sub("", request_id or "")[:64] or uuid.uuid4().hex[:16]
+    _request_id.set(request_id)
+    return request_id
+
+
+def end_request() -> None:
+    _request_id.set(None)
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def payload(value: Any, limit: Optional[int] = None) -> Any:
+    """
+    Log-safe form of a SQL dict, filter or result: small values pass through,
+    large ones become a length, a hash and a short preview.
+    """
+    limit = limit or Config.LOG_PAYLOAD_LIMIT
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    text = value if isinstance(value, str) else repr(value)
+    if len(text) <= limit:
+        return value if isinstance(value, str) else text
+    return {
+        "len": len(text),
+        "sha1": hashlib.sha1(text.encode("utf-8", "replace")).hexdigest()[:12],
+        "preview": text[:min(limit, 100)],
+    }
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request_id and any extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and key != "request_id":
+                entry[key] = value
+        if record.exc_info and "exc" not in entry:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _RequestContextFilter(logging.Filter):
+    """Stamps the request ID on the record in the emitting thread, before it is queued"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+
+class _DebugSampler(logging.Filter):
+    """Keeps only a share of DEBUG records so high-volume debug events stay cheap"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or self.rate >= 1 or random.random() < self.rate
+
+
+def _parse_levels(spec: str) -> Dict[str, str]:
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        if level:
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never waits on a full queue and keeps tracebacks as their own field"""
+
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _NonBlockingQueueHandler.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve args and tracebacks in the emitting thread; the objects may change after we return
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        record.exc_text = None
+        return record
+
+
+def configure_logging() -> None:
+    """
+    Route all logging through a bounded queue: request threads only enqueue,
+    and a single listener thread formats and writes JSON lines to stdout.
+    When the queue is full, records are dropped rather than blocking a request.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    root = logging.getLogger()
+    root.setLevel(Config.LOG_LEVEL.upper())
+    for name, level in _parse_levels(Config.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JSONFormatter())
+    log_queue: queue.Queue = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
+    handler = _NonBlockingQueueHandler(log_queue)
+    handler.addFilter(_RequestContextFilter())
+    handler.addFilter(_DebugSampler(Config.LOG_DEBUG_SAMPLE_RATE))
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def reset_after_fork() -> None:
+    """The listener thread does not survive fork; a worker starts its own"""
+    global _listener
+    if _listener is None:
+        return
+    _listener = None
+    configure_logging()
+
+
+atexit.register(stop_logging)
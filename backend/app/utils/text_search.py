@@ -0,0 +1,379 @@
+import logging
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import TEXT
+from sqlalchemy import inspect, text
+from sqlalchemy.types import String
+from config import Config
+from app.utils.index_advisor import sql_table_aliases
+
+logger = logging.getLogger(__name__)
+
+# Prefix of SQLite FTS5 shadow tables; hidden from schema listings
+FTS_TABLE_PREFIX = "_fts_"
+
+# `col LIKE '%term%'`, `t.col ILIKE '%term%'` or `LOWER(col) LIKE '%term%'`
+_LIKE_PREDICATE = re.compile(
+    r'(?P<lower>\blower\s*\(\s*)?(?:(?P<qual>\w+)\.)?"?(?P<col>\w+)"?(?(lower)\s*\))'
+    r"\s+(?P<op>i?like)\s+'%(?P<term>[^'%_\\]+)%'",
+    re.I
+)
+# The FTS5 trigram tokenizer needs at least three characters to use the index
+_MIN_TRIGRAM_TERM = 3
+# Mongo text indexes built here tokenize on word boundaries only: no stemming, no stop words
+_MONGO_TEXT_LANGUAGE = "none"
+
+
+def _text_fields() -> Tuple[str, ...]:
+    return tuple(field.strip() for field in Config.TEXT_SEARCH_FIELDS.split(",") if field.strip())
+
+
+def _trigram_index_name(table: str, column: str) -> str:
+    return f"ix_trgm_{table}_{column}"[:63]
+
+
+def _fts_statements(table: str, columns: List[str]) -> List[str]:
+    """An external-content FTS5 trigram table over `columns`, kept in sync by triggers, then filled"""
+    fts = f"{FTS_TABLE_PREFIX}{table}"
+    cols = ", ".join(f'"{column}"' for column in columns)
+    new_cols = ", ".join(f'new."{column}"' for column in columns)
+    old_cols = ", ".join(f'old."{column}"' for column in columns)
+    return [
+        # The index references the user table's rows by rowid
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS "{fts}" USING fts5({cols}, content="{table}", '
+        f"content_rowid='rowid', tokenize='trigram')",
+        f'CREATE TRIGGER IF NOT EXISTS "{fts}_ai" AFTER INSERT ON "{table}" BEGIN '
+        f'INSERT INTO "{fts}"(rowid, {cols}) VALUES (new.rowid, {new_cols}); END',
+        f'CREATE TRIGGER IF NOT EXISTS "{fts}_ad" AFTER DELETE ON "{table}" BEGIN '
+        f'INSERT INTO "{fts}"("{fts}", rowid, {cols}) VALUES (\'delete\', old.rowid, {old_cols}); END',
+        f'CREATE TRIGGER IF NOT EXISTS "{fts}_au" AFTER UPDATE ON "{table}" BEGIN '
+        f'INSERT INTO "{fts}"("{fts}", rowid, {cols}) VALUES (\'delete\', old.rowid, {old_cols}); '
+        f'INSERT INTO "{fts}"(rowid, {cols}) VALUES (new.rowid, {new_cols}); END',
+        f'INSERT INTO "{fts}"("{fts}") VALUES (\'rebuild\')',
+    ]
+
+
+def _mongo_text_index_fields(collection: Any) -> Tuple[set, bool]:
+    """(fields covered by the collection's text index, whether it has one); a collection has at most one"""
+    for info in collection.index_information().values():
+        if any(kind == TEXT for _, kind in info["key"]):
+            return set(info.get("weights", {})), True
+    return set(), False
+
+
+def _mongo_copies(collection: str) -> List[Tuple[str, str, Any]]:
+    """(db_name, server key, client) of every connected server database holding `collection`"""
+    from app.db_mongo import _mongo_clients, get_catalog
+    return [
+        (db_name, key, _mongo_clients[key])
+        for db_name, servers in get_catalog().items()
+        for key, collections in servers.items()
+        if collection in collections and key in _mongo_clients
+    ]
+
+
+def is_shadow_table(table_name: str) -> bool:
+    """True for the FTS5 tables this module maintains next to user tables"""
+    return table_name.startswith(FTS_TABLE_PREFIX)
+
+
+class TextSearch:
+    """
+    Routes partial-name lookups on name-like fields (Config.TEXT_SEARCH_FIELDS)
+    through text indexes:
+      - MongoDB: a case-insensitive regex anchored at the start of a word, so
+        "nano" finds "Nanotech" and "Tata Nano". No B-tree index can serve
+        that regex, so on its own it scans the collection. Where every copy
+        of the collection has a text index on the field, a `$text` phrase
+        search narrows the scan to the documents holding the whole word
+        first ("nano" then finds "Tata Nano" but no longer "Nanotech")
+      - PostgreSQL: pg_trgm GIN indexes, which serve LIKE/ILIKE '%x%' directly
+      - SQLite: FTS5 trigram shadow tables; LIKE '%x%' is rewritten to a rowid lookup
+    The server never creates these indexes on its own: plan()/apply() list and
+    build them as an explicit admin step (tools/text_indexes.py). At runtime
+    the indexes already present are looked up on a background thread, once
+    per engine and every MONGO_CATALOG_TTL per Mongo collection; until that
+    is done, or where none exist, queries run unchanged.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="text-index")
+        self._sql_targets: Dict[str, Dict[Tuple[str, str], str]] = {}
+        # collection -> (fields with a text index on every copy, checked at)
+        self._mongo_targets: Dict[str, Tuple[frozenset, float]] = {}
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def reset_after_fork(self) -> None:
+        """Fresh lookup thread in the child; lookups unfinished in the parent are rescheduled"""
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="text-index")
+        self._lock = threading.Lock()
+        self._pending = set()
+
+    # --- MongoDB ---
+
+    def mongo_filter(self, db_name: str, collection: str, field: str, value: Any) -> Dict[str, Any]:
+        """
+        Filter for a name-like lookup: `value` matched case-insensitively at the
+        start of any word of `field`, through the text index when the
+        collection has one covering `field`. Other fields and values keep the
+        equality filter.
+        """
+        if not Config.TEXT_SEARCH_ENABLED or not isinstance(value, str) or field not in _text_fields():
+            return {field: value}
+        term = value.strip()
+        if not term:
+            return {field: value}
+        lookup = {field: {"$regex": r"(?:^|\W)" + re.escape(term), "$options": "i"}}
+        if field not in self._mongo_text_fields(collection):
+            return lookup
+        # The filter is reused on the collection's other databases, hence an index on every copy;
+        # the regex keeps the match to `field` and to the term's own words
+        return {"$text": {"$search": '"' + term.replace('"', " ") + '"'}, **lookup}
+
+    def _mongo_text_fields(self, collection: str) -> frozenset:
+        """Fields with a text index on every copy of `collection`; rechecked in the background every MONGO_CATALOG_TTL"""
+        fields, checked_at = self._mongo_targets.get(collection, (frozenset(), None))
+        if checked_at is None or time.time() - checked_at > Config.MONGO_CATALOG_TTL:
+            key = ("mongo", collection)
+            with self._lock:
+                if key in self._pending:
+                    return fields
+                self._pending.add(key)
+            self._executor.submit(self._discover_mongo, collection)
+        return fields
+
+    def _discover_mongo(self, collection: str) -> None:
+        try:
+            covered = None
+            for db_name, _key, client in _mongo_copies(collection):
+                fields = _mongo_text_index_fields(client[db_name][collection])[0]
+                covered = fields if covered is None else covered & fields
+            fields = frozenset(covered or ())
+        except Exception as e:
+            logger.warning("Mongo text index lookup failed for %s: %s", collection, e)
+            fields = frozenset()
+        self._mongo_targets[collection] = (fields, time.time())
+        with self._lock:
+            self._pending.discard(("mongo", collection))
+
+    def _mongo_plan(self) -> List[Dict[str, Any]]:
+        from app.db_mongo import get_mongo_collections_schema
+        configured = _text_fields()
+        text_fields = {}
+        for collections in get_mongo_collections_schema().values():
+            for collection, schema in collections.items():
+                fields = [field for field in configured if schema.get("fields", {}).get(field) == "str"]
+                if fields:
+                    text_fields.setdefault(collection, set()).update(fields)
+        plan = []
+        for collection, fields in text_fields.items():
+            for db_name, key, client in _mongo_copies(collection):
+                indexed, has_index = _mongo_text_index_fields(client[db_name][collection])
+                missing = [field for field in configured if field in fields and field not in indexed]
+                if not missing:
+                    continue
+                # One text index per collection: an existing one that misses fields must be replaced by hand
+                keys = ", ".join(f'"{field}": "text"' for field in (sorted(indexed) if has_index else []) + missing)
+                plan.append({
+                    "backend": "mongo",
+                    "db_name": db_name,
+                    "server": key,
+                    "target": collection,
+                    "fields": missing,
+                    "replaces_text_index": has_index,
+                    "statements": [f'db.{collection}.createIndex({{{keys}}}, {{"default_language": "{_MONGO_TEXT_LANGUAGE}"}})'],
+                })
+        return plan
+
+    def _apply_mongo(self, entry: Dict[str, Any]) -> None:
+        from app.db_mongo import _mongo_clients
+        if entry["replaces_text_index"]:
+            raise ValueError("the collection already has a text index; drop it and re-run to index all fields together")
+        collection = _mongo_clients[entry["server"]][entry["db_name"]][entry["target"]]
+        collection.create_index([(field, TEXT) for field in entry["fields"]], default_language=_MONGO_TEXT_LANGUAGE)
+        # Looked up again on the next lookup
+        self._mongo_targets.pop(entry["target"], None)
+
+    # --- SQL ---
+
+    def discover_engine(self, db_name: str, engine: Any) -> None:
+        """Look up the engine's existing text indexes in the background (read-only, idempotent)"""
+        if not Config.TEXT_SEARCH_ENABLED or db_name in self._sql_targets:
+            return
+        with self._lock:
+            if db_name in self._pending:
+                return
+            self._pending.add(db_name)
+        self._executor.submit(self._discover, db_name, engine)
+
+    def rewrite_sql(self, db_name: str, engine: Any, sql: Any) -> Any:
+        """
+        Route `LIKE '%term%'` predicates on indexed columns through the text
+        index. Returns the SQL unchanged when nothing applies.
+        """
+        if not Config.TEXT_SEARCH_ENABLED or not isinstance(sql, str) or "like" not in sql.lower():
+            return sql
+        targets = self._sql_targets.get(db_name)
+        if targets is None:
+            self.discover_engine(db_name, engine)
+            return sql
+        if not targets:
+            return sql
+        aliases, tables = sql_table_aliases(sql)
+        dialect = engine.dialect.name
+
+        def replace(match):
+            qualifier = match.group("qual")
+            if qualifier:
+                table = aliases.get(qualifier.lower())
+            else:
+                table = tables[0] if len(set(tables)) == 1 else None
+            column, term = match.group("col"), match.group("term")
+            target = targets.get((table, column)) if table else None
+            if target is None:
+                return match.group(0)
+            prefix = f"{qualifier}." if qualifier else ""
+            if dialect == "postgresql":
+                # LOWER() hides the column from the trigram index; ILIKE does not
+                if match.group("lower"):
+                    return f"{prefix}\"{column}\" ILIKE '%{term}%'"
+                return match.group(0)
+            if dialect == "sqlite" and len(term) >= _MIN_TRIGRAM_TERM and match.group("op").lower() == "like":
+                return f"{prefix}rowid IN (SELECT rowid FROM \"{target}\" WHERE \"{column}\" LIKE '%{term}%')"
+            return match.group(0)
+
+        return _LIKE_PREDICATE.sub(replace, sql)
+
+    def _text_columns(self, engine: Any) -> Dict[str, list]:
+        configured = set(_text_fields())
+        inspector = inspect(engine)
+        columns = {}
+        for table in inspector.get_table_names():
+            if is_shadow_table(table):
+                continue
+            names = [
+                col["name"] for col in inspector.get_columns(table)
+                if col["name"] in configured and isinstance(col["type"], String)
+            ]
+            if names:
+                columns[table] = names
+        return columns
+
+    def _discover(self, db_name: str, engine: Any) -> None:
+        try:
+            targets = self._existing_targets(engine)
+        except Exception as e:
+            logger.warning("Text index lookup failed for %s: %s", db_name, e)
+            # Recorded as none, so the lookup is not retried on every query
+            targets = {}
+        self._sql_targets[db_name] = targets
+        with self._lock:
+            self._pending.discard(db_name)
+        if targets:
+            logger.info("Text indexes found for %s: %s", db_name, sorted(f"{t}.{c}" for t, c in targets))
+
+    def _existing_targets(self, engine: Any) -> Dict[Tuple[str, str], str]:
+        dialect = engine.dialect.name
+        if dialect == "postgresql":
+            with engine.connect() as conn:
+                present = {row[0] for row in conn.execute(text("SELECT indexname FROM pg_indexes"))}
+            return {
+                (table, column): _trigram_index_name(table, column)
+                for table, columns in self._text_columns(engine).items() for column in columns
+                if _trigram_index_name(table, column) in present
+            }
+        if dialect == "sqlite" and sqlite3.sqlite_version_info >= (3, 34, 0):
+            with engine.connect() as conn:
+                present = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))}
+            return {
+                (table, column): f"{FTS_TABLE_PREFIX}{table}"
+                for table, columns in self._text_columns(engine).items() for column in columns
+                if f"{FTS_TABLE_PREFIX}{table}" in present
+            }
+        return {}
+
+    def _sql_plan(self, db_name: str, engine: Any) -> List[Dict[str, Any]]:
+        dialect = engine.dialect.name
+        if dialect not in ("postgresql", "sqlite"):
+            return []
+        if dialect == "sqlite" and sqlite3.sqlite_version_info < (3, 34, 0):
+            return []
+        existing = self._existing_targets(engine)
+        plan = []
+        for table, columns in self._text_columns(engine).items():
+            missing = [column for column in columns if (table, column) not in existing]
+            if not missing:
+                continue
+            if dialect == "postgresql":
+                statements = ["CREATE EXTENSION IF NOT EXISTS pg_trgm"] + [
+                    f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{_trigram_index_name(table, column)}" '
+                    f'ON "{table}" USING gin ("{column}" gin_trgm_ops)'
+                    for column in missing
+                ]
+            else:
+                # One FTS5 table covers every text column of the table
+                missing = columns
+                statements = _fts_statements(table, columns)
+            plan.append({"backend": "sql", "db_name": db_name, "target": table,
+                         "fields": missing, "statements": statements})
+        return plan
+
+    def _apply_sql(self, entry: Dict[str, Any], engine: Any) -> None:
+        if engine.dialect.name == "postgresql":
+            # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                for statement in entry["statements"]:
+                    conn.execute(text(statement))
+            return
+        with engine.begin() as conn:
+            for statement in entry["statements"]:
+                conn.execute(text(statement))
+
+    # --- Explicit index builds ---
+
+    def plan(self, engines: Dict[str, Any], include_mongo: bool = True) -> List[Dict[str, Any]]:
+        """The text indexes missing on the configured databases, with the statements that would create them"""
+        plan = []
+        for db_name, engine in engines.items():
+            try:
+                plan.extend(self._sql_plan(db_name, engine))
+            except Exception as e:
+                logger.warning("Could not plan text indexes for %s: %s", db_name, e)
+        if include_mongo:
+            try:
+                plan.extend(self._mongo_plan())
+            except Exception as e:
+                logger.warning("Could not plan Mongo text indexes: %s", e)
+        return plan
+
+    def apply(self, engines: Dict[str, Any], dry_run: bool = True, include_mongo: bool = True) -> List[Dict[str, Any]]:
+        """Create the planned text indexes (or just report them when dry_run)"""
+        results = []
+        for entry in self.plan(engines, include_mongo):
+            entry = dict(entry, applied=False)
+            if not dry_run:
+                try:
+                    if entry["backend"] == "mongo":
+                        self._apply_mongo(entry)
+                    else:
+                        self._apply_sql(entry, engines[entry["db_name"]])
+                        # Looked up again on the next query
+                        self._sql_targets.pop(entry["db_name"], None)
+                    entry["applied"] = True
+                except Exception as e:
+                    entry["error"] = str(e)
+            results.append(entry)
+        return results
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Block until queued index lookups finish (used by tests and warm-up)"""
+        self._executor.submit(lambda: None).result(timeout=timeout)
+
+
+# Global text search instance
+text_search = TextSearch()
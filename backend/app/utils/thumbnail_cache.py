@@ -0,0 +1,147 @@
+import logging
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it rows keep the plain binary reference
+    Image = None
+
+
+class ThumbnailCache:
+    """
+    Content-addressed on-disk cache of downscaled image variants.
+
+    Keys are derived from the document ``_id`` plus a hash of the image bytes,
+    so a changed image gets a new key and cached files never go stale. Thumbnails
+    are rendered in a background worker pool on first access.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_size: Optional[int] = None, workers: Optional[int] = None):
+        self.cache_dir = cache_dir or Config.THUMBNAIL_CACHE_DIR
+        self.max_size = max_size or Config.THUMBNAIL_MAX_SIZE
+        self.workers = workers or Config.THUMBNAIL_WORKERS
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="thumbnail")
+        self._pending = {}
+        self._sources = {}
+        self._lock = threading.Lock()
+
+    def reset_after_fork(self) -> None:
+        """Worker threads do not survive fork(); start a fresh pool in the child"""
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="thumbnail")
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return Image is not None
+
+    def make_key(self, doc_id: Any, payload) -> str:
+        """Build the cache key from the document id and a hash of the image bytes"""
+        content_hash = hashlib.blake2b(payload, digest_size=16).hexdigest()
+        return hashlib.sha256(f"{doc_id}:{content_hash}:{self.max_size}".encode()).hexdigest()[:40]
+
+    def path_for(self, key: str) -> str:
+        # Shard by the first two hex chars to keep directories small
+        return os.path.join(self.cache_dir, key[:2], f"{key}.jpg")
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Return the thumbnail path if it has already been rendered"""
+        path = self.path_for(key)
+        return path if os.path.exists(path) else None
+
+    def source_url(self, key: str) -> Optional[str]:
+        """Return the streaming URL of the original image a key was built from"""
+        with self._lock:
+            return self._sources.get(key)
+
+    def _remember_source(self, key: str, source_url: str) -> None:
+        with self._lock:
+            self._sources[key] = source_url
+            # Bound the mapping; evict the oldest entries first
+            while len(self._sources) > 10000:
+                self._sources.pop(next(iter(self._sources)))
+
+    def schedule(self, key: str, payload, source_url: Optional[str] = None):
+        """Queue rendering of a thumbnail unless it exists or is already queued"""
+        if source_url:
+            self._remember_source(key, source_url)
+        if not self.enabled or self.lookup(key):
+            return None
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._executor.submit(self._render, key, bytes(payload))
+                self._pending[key] = future
+                future.add_done_callback(lambda _f, k=key: self._pending.pop(k, None))
+        return future
+
+    def wait(self, key: str, timeout: Optional[float] = None) -> Optional[str]:
+        """Wait for an in-flight render and return its path (or None)"""
+        future = self._pending.get(key)
+        if future is not None:
+            try:
+                future.result(timeout=timeout or Config.THUMBNAIL_WAIT_TIMEOUT)
+            except Exception:
+                return None
+        return self.lookup(key)
+
+    def thumbnail_ref(self, doc_id: Any, payload, source_url: Optional[str] = None) -> Optional[Dict[str, str]]:
+        """
+        Schedule a thumbnail for an image payload and return the reference to
+        place in a result row, or None when thumbnails are unavailable.
+        """
+        if not self.enabled:
+            return None
+        key = self.make_key(doc_id, payload)
+        self.schedule(key, payload, source_url)
+        return {"$thumbnail": f"/api/mongo/thumbnail/{key}"}
+
+    def warm_collection(self, db_name: str, collection: str, field: Optional[str] = None, limit: int = 0):
+        """
+        Render thumbnails for every image document of a collection in the
+        background. Documents are streamed from the cursor one at a time.
+        """
+        return self._executor.submit(self._warm_collection, db_name, collection, field, limit)
+
+    def _warm_collection(self, db_name: str, collection: str, field: Optional[str], limit: int) -> int:
+        from app.db_mongo import iter_image_payloads
+        rendered = 0
+        for doc_id, field_name, payload, source_url in iter_image_payloads(db_name, collection, field, limit):
+            key = self.make_key(doc_id, payload)
+            self._remember_source(key, source_url)
+            if not self.lookup(key):
+                self._render(key, payload)
+                rendered += 1
+        logger.info("Warmed %d thumbnails for %s.%s", rendered, db_name, collection)
+        return rendered
+
+    def _render(self, key: str, payload: bytes) -> Optional[str]:
+        path = self.path_for(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with Image.open(io.BytesIO(payload)) as img:
+                img.draft("RGB", (self.max_size, self.max_size))  # cheap JPEG downscale on decode
+                img.thumbnail((self.max_size, self.max_size))
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                img.convert("RGB").save(tmp_path, "JPEG", quality=Config.THUMBNAIL_QUALITY, optimize=True)
+            os.replace(tmp_path, path)  # atomic publish so readers never see partial files
+            return path
+        except Exception as e:
+            logger.warning("Thumbnail generation failed for %s: %s", key, e)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return None
+
+
+# Global thumbnail cache instance
+thumbnail_cache = ThumbnailCache()
@@ -0,0 +1,128 @@
+import contextvars
+import functools
+import inspect
+import re
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from app.utils import tracing
+from app.utils.metrics import STAGE_SECONDS
+
+
+class RequestTiming:
+    """
+    Per-request latency breakdown. Pipeline stages record into the timing of
+    the current request (held in a context variable, so it follows asyncio
+    tasks and asyncio.to_thread calls); outside a request recording is a no-op.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}  # stage -> accumulated ms
+        self.counts: Dict[str, int] = {}
+        self.cache: Dict[str, bool] = {}  # cache layer -> hit
+
+    def add(self, stage: str, elapsed_ms: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + elapsed_ms
+        self.counts[stage] = self.counts.get(stage, 0) + 1
+        STAGE_SECONDS.observe(elapsed_ms / 1000, stage)
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def performance(self) -> dict:
+        """The `performance` block of API responses"""
+        total_ms = self.total_ms()
+        hits = [layer for layer, hit in self.cache.items() if hit]
+        return {
+            "total_time": round(total_ms / 1000, 3),
+            "total_ms": round(total_ms, 1),
+            "stages": {stage: round(ms, 1) for stage, ms in self.stages.items()},
+            "cache": dict(self.cache),
+            "cached": ",".join(hits) if hits else "none",
+        }
+
+    def server_timing(self) -> str:
+        """Server-Timing header value (shown per request in browser devtools)"""
+        parts = [f"{_metric_name(stage)};dur={ms:.1f}" for stage, ms in self.stages.items()]
+        parts.extend(f"cache_{_metric_name(layer)};desc={'hit' if hit else 'miss'}" for layer, hit in self.cache.items())
+        parts.append(f"total;dur={self.total_ms():.1f}")
+        return ", ".join(parts)
+
+
+def _metric_name(name: str) -> str:
+    # Server-Timing metric names are HTTP tokens
+    return re.sub(r"[^A-Za-z0-9_\-]", "_", name)
+
+
+_current: contextvars.ContextVar[Optional[RequestTiming]] = contextvars.ContextVar("request_timing", default=None)
+
+
+def start_request() -> RequestTiming:
+    request_timing = RequestTiming()
+    _current.set(request_timing)
+    return request_timing
+
+
+def current() -> Optional[RequestTiming]:
+    return _current.get()
+
+
+def end_request() -> None:
+    _current.set(None)
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Time a block as pipeline stage `name`; repeated stages accumulate. The
+    block is also a trace span, which is yielded so callers can attach
+    attributes (a no-op span when the request is not traced).
+    """
+    with tracing.span(name) as trace_span:
+        request_timing = _current.get()
+        if request_timing is None:
+            yield trace_span
+            return
+        started = time.perf_counter()
+        try:
+            yield trace_span
+        finally:
+            request_timing.add(name, (time.perf_counter() - started) * 1000)
+
+
+def timed(name: str):
+    """Decorator form of `stage` for sync and async functions"""
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with stage(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def record(name: str, elapsed_ms: float) -> None:
+    request_timing = _current.get()
+    if request_timing is not None:
+        request_timing.add(name, elapsed_ms)
+
+
+def cache_result(layer: str, hit: bool) -> None:
+    """Flag whether cache `layer` served this request (any hit wins)"""
+    request_timing = _current.get()
+    if request_timing is not None:
+        request_timing.cache[layer] = request_timing.cache.get(layer, False) or hit
+
+
+def performance() -> dict:
+    request_timing = _current.get()
+    return request_timing.performance() if request_timing is not None else {}
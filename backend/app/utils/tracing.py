@@ -0,0 +1,333 @@
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# W3C Trace Context: version-traceid-parentid-flags
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+
+class _Trace:
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List["Span"] = []
+
+
+class Span:
+    """
+    One timed operation of a sampled request. Finished spans are collected on
+    their trace and exported together when the root span ends.
+    """
+
+    __slots__ = ("_trace", "name", "span_id", "parent_id", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace: _Trace, name: str, parent_id: Optional[str], kind: int = SPAN_KIND_INTERNAL,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self._trace = trace
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = dict(attributes) if attributes else {}
+        self.error: Optional[str] = None
+
+    @property
+    def trace_id(self) -> str:
+        return self._trace.trace_id
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    def end(self) -> None:
+        if self.end_ns:
+            return
+        self.end_ns = time.time_ns()
+        if len(self._trace.spans) < Config.TRACE_MAX_SPANS:
+            self._trace.spans.append(self)
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 0},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """Stands in for a span when the request is not sampled, so call sites need no checks"""
+
+    trace_id = None
+    span_id = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+def _should_sample(traceparent: Optional[str]):
+    """(trace_id, parent_span_id) for a sampled request, or None"""
+    match = _TRACEPARENT.match((traceparent or "").strip().lower())
+    if match:
+        # Follow the caller's decision so distributed traces stay complete
+        trace_id, parent_id, flags = match.groups()
+        return (trace_id, parent_id) if int(flags, 16) & 1 else None
+    if Config.TRACE_SAMPLE_RATE > 0 and random.random() < Config.TRACE_SAMPLE_RATE:
+        return os.urandom(16).hex(), None
+    return None
+
+
+def start_trace(name: str, traceparent: Optional[str] = None, attributes: Optional[Dict[str, Any]] = None) -> Optional[Span]:
+    """
+    Open the root (server) span of a request, or return None when the request
+    is not sampled; every span opened in this context is then a no-op.
+    """
+    sampled = _should_sample(traceparent)
+    if sampled is None:
+        _current_span.set(None)
+        return None
+    trace_id, parent_id = sampled
+    root = Span(_Trace(trace_id), name, parent_id, SPAN_KIND_SERVER, attributes)
+    _current_span.set(root)
+    return root
+
+
+def end_trace(root: Optional[Span], exc: Optional[BaseException] = None) -> None:
+    """End the root span and hand the whole trace to the exporter"""
+    _current_span.set(None)
+    if root is None:
+        return
+    if exc is not None:
+        root.record_exception(exc)
+    root.end()
+    exporter.submit(root._trace)
+
+
+def current_span():
+    return _current_span.get() or NOOP_SPAN
+
+
+@contextmanager
+def span(name: str, attributes: Optional[Dict[str, Any]] = None, kind: int = SPAN_KIND_INTERNAL):
+    """Child span of the current one for the duration of the block"""
+    parent = _current_span.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+    child = Span(parent._trace, name, parent.span_id, kind, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.record_exception(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        child.end()
+
+
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None, kind: int = SPAN_KIND_CLIENT):
+    """
+    Child span that does not become current, for driver callbacks that open and
+    close it from separate hooks (SQLAlchemy events, pymongo monitoring).
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(parent._trace, name, parent.span_id, kind, attributes)
+
+
+def wrap(fn):
+    """Run ``fn`` under the current span when it is handed to a worker thread pool"""
+    parent = _current_span.get()
+    if parent is None:
+        return fn
+
+    def run(*args, **kwargs):
+        token = _current_span.set(parent)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current_span.reset(token)
+    return run
+
+
+def llm_attributes(response: Optional[object]) -> Dict[str, Any]:
+    """Token counts from a Gemini response's usage metadata"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return {}
+    return {
+        "llm.prompt_tokens": getattr(usage, "prompt_token_count", None),
+        "llm.completion_tokens": getattr(usage, "candidates_token_count", None),
+        "llm.total_tokens": getattr(usage, "total_token_count", None),
+    }
+
+
+def instrument_engine(engine, db_name: str) -> None:
+    """Open a client span around every cursor execute on ``engine`` (sync, or an async engine's sync_engine)"""
+    from sqlalchemy import event
+
+    system = engine.dialect.name
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._trace_span = start_span("sql.execute", {
+                "db.system": system,
+                "db.name": db_name,
+                "db.statement": statement[:Config.TRACE_STATEMENT_LIMIT],
+            })
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        trace_span = getattr(context, "_trace_span", None)
+        if trace_span is not None:
+            rowcount = getattr(cursor, "rowcount", -1)
+            if isinstance(rowcount, int) and rowcount >= 0:
+                trace_span.set_attribute("db.rowcount", rowcount)
+            trace_span.end()
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        trace_span = getattr(exception_context.execution_context, "_trace_span", None)
+        if trace_span is not None:
+            trace_span.record_exception(exception_context.original_exception)
+            trace_span.end()
+
+
+class TraceExporter:
+    """
+    Writes finished traces as OTLP/JSON export requests, one per line, to
+    TRACE_EXPORT_FILE and/or POSTs them to an OTLP/HTTP collector. Exporting
+    runs on a background thread; when the queue is full traces are dropped.
+    """
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue(maxsize=Config.TRACE_EXPORT_QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def submit(self, trace: _Trace) -> None:
+        if not Config.TRACE_EXPORT_FILE and not Config.TRACE_OTLP_ENDPOINT:
+            return
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < Config.TRACE_EXPORT_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.export(batch)
+            except Exception as e:
+                logger.warning("Trace export failed: %s", e)
+
+    def export(self, traces: List[_Trace]) -> None:
+        body = json.dumps(to_otlp(traces), separators=(",", ":"))
+        if Config.TRACE_EXPORT_FILE:
+            os.makedirs(os.path.dirname(Config.TRACE_EXPORT_FILE) or ".", exist_ok=True)
+            with open(Config.TRACE_EXPORT_FILE, "a", encoding="utf-8") as fh:
+                fh.write(body + "\n")
+        if Config.TRACE_OTLP_ENDPOINT:
+            request = urllib.request.Request(
+                Config.TRACE_OTLP_ENDPOINT, data=body.encode("utf-8"),
+                headers={"Content-Type": "application/json"}, method="POST",
+            )
+            urllib.request.urlopen(request, timeout=5).close()
+
+    def reset_after_fork(self) -> None:
+        """The exporter thread does not survive fork; the worker starts its own on first use"""
+        self._queue = queue.Queue(maxsize=Config.TRACE_EXPORT_QUEUE_SIZE)
+        self._thread = None
+        self._lock = threading.Lock()
+
+
+def to_otlp(traces: List[_Trace]) -> dict:
+    """OTLP/JSON ExportTraceServiceRequest for a batch of traces"""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": Config.TRACE_SERVICE_NAME}}]},
+            "scopeSpans": [{
+                "scope": {"name": "app.utils.tracing"},
+                "spans": [trace_span.to_otlp() for trace in traces for trace_span in trace.spans],
+            }],
+        }]
+    }
+
+
+# Global exporter instance
+exporter = TraceExporter()
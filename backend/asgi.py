@@ -0,0 +1,19 @@
+"""
+ASGI entry point: the NL query routes run on the asyncio pipeline, every
+other route is served by the Flask app.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5001 --workers 4
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi:app
+
+Run from the backend/ directory. The WSGI entry point (wsgi.py) is unchanged.
+"""
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app import create_asgi_app
+
+app = create_asgi_app()
@@ -12,7 +12,7 @@ class Config:
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
-    MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/yourdb")
+    MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/yourdb")  # local fallback only used when no MONGODB_URI* is set
 
 
     # Performance optimizations
@@ -25,12 +25,124 @@ class Config:
     MAX_TOKENS = 1000  # Limit response length for speed
     TEMPERATURE = 0.1  # Lower temperature for more focused responses
     
+    # Query result summaries: "local" statistics, "llm" (Gemini) or "auto"; a request's `summary` field overrides
+    SUMMARY_MODE = os.getenv("SUMMARY_MODE", "auto")
+    SUMMARY_MIN_CONFIDENCE = float(os.getenv("SUMMARY_MIN_CONFIDENCE", 0.5))  # `auto` asks Gemini below this
+    SUMMARY_MAX_COLUMNS = 4  # columns described in a local summary
+    SUMMARY_DEFERRED = os.getenv("SUMMARY_DEFERRED", "true").lower() == "true"  # Gemini summaries follow via /api/summary/<id>
+    SUMMARY_EVENTS_TIMEOUT = 60  # seconds an SSE summary stream waits for the job to finish
+
     # Database optimization
     DB_POOL_SIZE = 10
     DB_MAX_OVERFLOW = 20
     DB_POOL_TIMEOUT = 30
     
+    # MongoDB connection bootstrap
+    MONGO_PROBE_TIMEOUT_MS = int(os.getenv("MONGO_PROBE_TIMEOUT_MS", 5000))
+    MONGO_RECONNECT_BACKOFF_INITIAL = 1  # seconds
+    MONGO_RECONNECT_BACKOFF_MAX = 60  # seconds
+    MONGO_CATALOG_TTL = int(os.getenv("MONGO_CATALOG_TTL", 60))  # seconds a db/collection catalog is reused
+    MONGO_FANOUT_WORKERS = int(os.getenv("MONGO_FANOUT_WORKERS", 16))
+
+    # Binary/image streaming
+    BINARY_STREAM_CHUNK_SIZE = 256 * 1024  # bytes per yielded chunk
+    BINARY_CACHE_MAX_AGE = int(os.getenv("BINARY_CACHE_MAX_AGE", 3600))  # seconds
+
+    # Thumbnail cache for image collections
+    THUMBNAIL_CACHE_DIR = os.getenv("THUMBNAIL_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), 'thumbnail_cache'))
+    THUMBNAIL_MAX_SIZE = int(os.getenv("THUMBNAIL_MAX_SIZE", 256))  # longest edge in pixels
+    THUMBNAIL_QUALITY = 80
+    THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", 4))
+    THUMBNAIL_WAIT_TIMEOUT = 5  # seconds a request waits for an in-flight render
+
+    # Index advisor (observes executed queries, recommends indexes)
+    INDEX_ADVISOR_ENABLED = os.getenv("INDEX_ADVISOR_ENABLED", "true").lower() == "true"
+    INDEX_ADVISOR_QUEUE_SIZE = 10000
+    INDEX_ADVISOR_SCAN_SAVING = 0.9  # share of full-scan latency an index is assumed to remove
+
+    # Partial-name lookups (Mongo word-prefix regex, Postgres pg_trgm, SQLite FTS5).
+    # Indexes are only created through /api/admin/text-indexes/apply (tools/text_indexes.py)
+    TEXT_SEARCH_ENABLED = os.getenv("TEXT_SEARCH_ENABLED", "true").lower() == "true"
+    TEXT_SEARCH_FIELDS = os.getenv("TEXT_SEARCH_FIELDS", "name,title,model,author")  # columns/fields to index
+
+    # Server-side result store (charts/exports refer to results by result_id)
+    RESULT_STORE_ENABLED = os.getenv("RESULT_STORE_ENABLED", "true").lower() == "true"
+    RESULT_STORE_SHARED = os.getenv("RESULT_STORE_SHARED", "true").lower() == "true"  # write every result to RESULT_STORE_DIR for the other worker processes
+    RESULT_STORE_DIR = os.getenv("RESULT_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), 'result_store'))
+    RESULT_STORE_MEMORY_BYTES = int(os.getenv("RESULT_STORE_MEMORY_BYTES", 256 * 1024 * 1024))  # beyond this, LRU results spill to disk
+    RESULT_STORE_DISK_BYTES = int(os.getenv("RESULT_STORE_DISK_BYTES", 2 * 1024 * 1024 * 1024))
+    RESULT_STORE_TTL = int(os.getenv("RESULT_STORE_TTL", 1800))  # seconds
+    RESULT_STORE_SESSION_MAX_RESULTS = 20
+    RESULT_STORE_SESSION_MAX_BYTES = int(os.getenv("RESULT_STORE_SESSION_MAX_BYTES", 64 * 1024 * 1024))
+    RESULT_STORE_SWEEP_INTERVAL = 30  # seconds between expiry sweeps
+
+    # Chart engine behind /api/analytics/chart
+    CHART_MAX_BARS = 20  # largest groups shown on bar charts
+    CHART_MAX_SLICES = 8  # pie/doughnut slices; the rest are summed into "Other"
+    CHART_MAX_POINTS = 4000  # line/area/scatter points, whatever the canvas size
+    CHART_DEFAULT_WIDTH = 800  # canvas pixels assumed when the request gives no width/height
+    CHART_DEFAULT_HEIGHT = 400
+    CHART_SCATTER_CELL_PX = 4  # scatter points keep one per grid cell of this many pixels
+    CHART_HISTOGRAM_MAX_BINS = 50
+    CHART_PUSHDOWN_ENABLED = os.getenv("CHART_PUSHDOWN_ENABLED", "true").lower() == "true"
+    CHART_PUSHDOWN_MIN_ROWS = int(os.getenv("CHART_PUSHDOWN_MIN_ROWS", 10000))  # smaller results aggregate in memory
+
+    # Streaming exports (/api/analytics/export/<result_id>)
+    EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", 5000))  # rows fetched from the cursor and encoded per chunk
+    EXPORT_FROM_SOURCE = os.getenv("EXPORT_FROM_SOURCE", "true").lower() == "true"  # re-run the result's query rather than read the stored rows
+    EXPORT_PARQUET_COMPRESSION = os.getenv("EXPORT_PARQUET_COMPRESSION", "zstd")
+    EXPORT_PG_COPY = os.getenv("EXPORT_PG_COPY", "true").lower() == "true"  # CSV of a Postgres query via COPY ... TO STDOUT
+
+    # Background jobs (`async: true` on exports and queries)
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+    JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", 50))  # further submissions are refused with 503
+    JOB_DIR = os.getenv("JOB_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), 'jobs'))  # shared by worker processes
+    JOB_RETENTION = int(os.getenv("JOB_RETENTION", 3600))  # seconds a finished job and its result are kept
+    JOB_SESSION_MAX_JOBS = 20
+    JOB_PROGRESS_INTERVAL = 1.0  # seconds between persisted progress updates
+    JOB_SWEEP_INTERVAL = 30
+    JOB_KIND_WORKERS = {"summary": int(os.getenv("SUMMARY_WORKERS", 4))}  # job kinds with a pool apart from JOB_WORKERS
+    JOB_WAIT_INTERVAL = 1.0  # seconds between re-reads when waiting on another worker process's job
+
+    # Process pool for CPU-bound stages (chart builds, export encoding); needs pyarrow
+    PROCESS_POOL_WORKERS = int(os.getenv("PROCESS_POOL_WORKERS", max(1, (os.cpu_count() or 2) // 2)))  # 0 keeps everything in-process
+    PROCESS_POOL_MIN_ROWS = int(os.getenv("PROCESS_POOL_MIN_ROWS", 200000))  # smaller results are not worth the transfer
+
+    # Structured logging (JSON lines on stdout, written by a background listener thread)
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVELS = os.getenv("LOG_LEVELS", "")  # per-module overrides, e.g. "app.db_mongo=DEBUG,app.routes=WARNING"
+    LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", 0.1))  # share of DEBUG records kept
+    LOG_PAYLOAD_LIMIT = 500  # characters of SQL/filters/results logged before hashing
+    LOG_QUEUE_SIZE = 10000  # records buffered before new ones are dropped
+
+    # Distributed tracing (OTLP/JSON spans; an incoming sampled `traceparent` is always followed)
+    TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 0.05))  # share of requests traced; 0 = off
+    TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), 'traces', 'traces.jsonl'))
+    TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT")  # e.g. http://localhost:4318/v1/traces
+    TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "ai-sql-chatbot-backend")
+    TRACE_MAX_SPANS = 500  # per trace; further spans are dropped
+    TRACE_STATEMENT_LIMIT = 1000  # characters of SQL kept on db.statement
+    TRACE_EXPORT_QUEUE_SIZE = 1000
+    TRACE_EXPORT_BATCH = 50  # traces per export request
+
+    # Decimal/Decimal128 values are sent as exact strings; true sends (rounded) JSON numbers instead
+    JSON_DECIMAL_AS_FLOAT = os.getenv("JSON_DECIMAL_AS_FLOAT", "false").lower() == "true"
+
+    # Prometheus metrics on /metrics
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR")  # set (gunicorn.conf.py does): /metrics sums every worker
+    METRICS_FLUSH_INTERVAL = 5  # seconds between a worker's snapshots into METRICS_MULTIPROC_DIR
+
+    # On-demand profiling (X-Profile: 1 from an admin, or a sampled share of NL queries)
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))  # 0 = header-triggered only
+    PROFILE_SAMPLED_PATHS = ("/api/nl-to-sql", "/api/nl-to-mongodb")
+    PROFILE_SAMPLE_INTERVAL_MS = 5
+    PROFILE_TRACEMALLOC_FRAMES = 1
+    PROFILE_TOP_N = 20  # allocations / functions listed per profile
+    PROFILE_MAX_STORED = 50
+
     # Security settings
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")  # required as X-Admin-Token for /api/admin/* and X-Profile; unset = admin endpoints disabled
     LOG_QUERY_TYPE = True  # Log query type for monitoring
     LOG_TABLE_NAMES = True  # Log accessed tables for security
     EXPOSE_SQL = False  # Never expose generated SQL to frontend
@@ -0,0 +1,63 @@
+"""
+Gunicorn settings for the production server (replaces `python run.py`).
+
+    cd backend && gunicorn -c gunicorn.conf.py wsgi:app
+
+The app is loaded once in the master (preload_app), schema catalogs are
+warmed there, and each forked worker re-creates its DB pools, Mongo clients
+and background threads. Every setting can be overridden via environment.
+"""
+import multiprocessing
+import os
+import tempfile
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '5001')}"
+
+# Workers share their /metrics series through this directory, so a scrape of
+# any worker reports the whole server (see app/utils/metrics.py). Set before
+# the app (and its Config) is loaded.
+os.environ.setdefault("METRICS_MULTIPROC_DIR",
+                      os.path.join(tempfile.gettempdir(), f"chatbot-metrics-{os.getenv('PORT', '5001')}"))
+
+# Requests mostly wait on Gemini and the databases, so threaded workers.
+# For asgi:app use GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker (threads is then ignored)
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))  # seconds
+
+# Recycle workers periodically to bound memory growth; jitter avoids restarting all at once
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 100))
+
+# Must exceed Config.LLM_TIMEOUT so slow generations are not killed mid-request
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 60))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+
+preload_app = True
+accesslog = os.getenv("GUNICORN_ACCESS_LOG")  # e.g. "-" for stdout; off by default
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def on_starting(server):
+    # Series of a previous run would otherwise be added to this one's
+    from app.utils.metrics import clear_multiprocess_dir
+    clear_multiprocess_dir(os.environ["METRICS_MULTIPROC_DIR"])
+
+
+def when_ready(server):
+    # Runs in the master after the app is loaded and before workers are forked
+    from app import warm_up
+    warm_up()
+
+
+def post_fork(server, worker):
+    from app import reinit_after_fork
+    reinit_after_fork()
+
+
+def child_exit(server, worker):
+    # Keep the exited worker's counters and histograms, drop its gauges
+    from app.utils.metrics import registry
+    registry.mark_process_dead(os.environ["METRICS_MULTIPROC_DIR"], worker.pid)
@@ -27,9 +27,11 @@ if __name__ == "__main__":
     print(f"   - Cache timeout: {Config.CACHE_TIMEOUT}s")
     print(f"   - Using model: {Config.GEMINI_MODEL}")
     
+    print("   - Development server; use `gunicorn -c gunicorn.conf.py wsgi:app` in production")
+
     app.run(
-        debug=True, 
-        port=5001,
+        debug=os.getenv("FLASK_DEBUG", "false").lower() == "true",  # reloader + debugger only when asked for
+        port=int(os.getenv("PORT", 5001)),
         threaded=True,  # Enable threading for better performance
         host='0.0.0.0'  # Allow external connections
     )
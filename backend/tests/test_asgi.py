@@ -0,0 +1,68 @@
+import asyncio
+import json
+import os
+import sys
+import unittest
+
+# Add the backend directory to the sys.path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("DATABASE_URL_1", "sqlite://")
+
+from flask import Flask
+
+from app.asgi import AsyncRouter
+
+
+async def _echo(data):
+    return {"success": True, "echo": data}, 200
+
+
+async def _broken(data):
+    raise RuntimeError("database went away")
+
+
+def _call(router, path, body=b"{}", headers=()):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": path, "headers": list(headers), "client": ("127.0.0.1", 5000)}
+    asyncio.run(router(scope, receive, send))
+    start, body_message = messages
+    return start["status"], dict(start["headers"]), json.loads(body_message["body"])
+
+
+class TestAsyncRouter(unittest.TestCase):
+
+    def setUp(self):
+        self.router = AsyncRouter(Flask(__name__), {("POST", "/api/echo"): _echo, ("POST", "/api/broken"): _broken})
+
+    def test_async_route_answered_on_the_loop(self):
+        """
+        Test Case UT-ASGI-001: Async Route Response Headers
+        """
+        status, headers, payload = _call(self.router, "/api/echo", b'{"q": 1}', [(b"x-request-id", b"req-1")])
+        self.assertEqual((status, payload), (200, {"success": True, "echo": {"q": 1}}))
+        self.assertEqual(headers[b"access-control-allow-origin"], b"*")
+        self.assertEqual(headers[b"x-request-id"], b"req-1")
+
+    def test_handler_error_answered_with_json_500(self):
+        """
+        Test Case UT-ASGI-002: Raising Handler Still Gets a Response
+        """
+        with self.assertLogs("app.asgi", "ERROR"):
+            status, headers, payload = _call(self.router, "/api/broken", headers=[(b"x-request-id", b"req-2")])
+        self.assertEqual(status, 500)
+        self.assertEqual(payload, {"success": False, "error": "Internal server error.",
+                                   "type": "server_error", "request_id": "req-2"})
+        self.assertEqual(headers[b"access-control-allow-origin"], b"*")
+        self.assertEqual(headers[b"x-request-id"], b"req-2")
+        self.assertEqual(headers[b"content-type"], b"application/json")
+
+
+if __name__ == '__main__':
+    unittest.main()
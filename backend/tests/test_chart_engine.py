@@ -0,0 +1,143 @@
+import datetime
+import os
+import sys
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
+
+# Add the backend directory to the sys.path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from config import Config
+from app.utils.chart_engine import CATEGORICAL, NUMERIC, TEMPORAL, ChartFrame, grid_sample, lttb
+
+
+class TestChartEngine(unittest.TestCase):
+
+    def _orders(self):
+        return ChartFrame.from_rows([
+            {"order_id": 1, "genre": "fantasy", "ordered_on": datetime.date(2024, 1, 2), "price": Decimal("10.50")},
+            {"order_id": 2, "genre": "crime", "ordered_on": datetime.date(2024, 1, 1), "price": 4},
+            {"order_id": 3, "genre": "fantasy", "ordered_on": datetime.date(2024, 1, 2), "price": None},
+            {"order_id": 4, "genre": None, "ordered_on": datetime.date(2024, 1, 3), "price": 1.5},
+            {"order_id": 5, "genre": "poetry", "ordered_on": datetime.date(2024, 1, 3), "price": 2},
+        ])
+
+    def test_column_roles(self):
+        """
+        Test Case UT-CHART-001: Column Role Inference
+        """
+        frame = self._orders()
+        self.assertEqual(frame.roles, {"order_id": CATEGORICAL, "genre": CATEGORICAL,
+                                       "ordered_on": TEMPORAL, "price": NUMERIC})
+        strings = ChartFrame.from_rows([{"day": "2024-03-01T10:00:00", "amount": "2.5", "name": "x"}])
+        self.assertEqual(strings.roles, {"day": TEMPORAL, "amount": NUMERIC, "name": CATEGORICAL})
+
+    def test_bar_groups_and_sorts(self):
+        """
+        Test Case UT-CHART-002: Grouped Bar Chart
+        """
+        chart = self._orders().build("bar", "revenue by genre")
+        self.assertEqual(chart["type"], "bar")
+        self.assertEqual(chart["data"]["labels"], ["fantasy", "crime", "poetry"])
+        self.assertEqual(chart["data"]["datasets"][0]["data"], [10.5, 4.0, 2.0])
+        self.assertEqual(chart["data"]["datasets"][0]["label"], "price")
+
+        with patch.object(Config, "CHART_MAX_BARS", 1):
+            horizontal = self._orders().build("horizontal_bar", "revenue by genre")
+        self.assertEqual(horizontal["data"]["labels"], ["fantasy"])
+        self.assertEqual(horizontal["options"]["indexAxis"], "y")
+
+    def test_line_is_ordered_by_time(self):
+        """
+        Test Case UT-CHART-003: Time Series Ordering
+        """
+        chart = self._orders().build("line", "revenue over time")
+        self.assertEqual(chart["data"]["labels"], ["2024-01-01", "2024-01-02", "2024-01-03"])
+        self.assertEqual(chart["data"]["datasets"][0]["data"], [4.0, 10.5, 3.5])
+
+    def test_pie_keeps_top_slices_and_other(self):
+        """
+        Test Case UT-CHART-004: Pie Top Slices
+        """
+        with patch.object(Config, "CHART_MAX_SLICES", 2):
+            chart = self._orders().build("pie", "share by genre")
+        self.assertEqual(chart["data"]["labels"], ["fantasy", "crime", "Other"])
+        self.assertEqual(chart["data"]["datasets"][0]["data"], [10.5, 4.0, 2.0])
+
+    def test_histogram_bins_numeric_values(self):
+        """
+        Test Case UT-CHART-005: Histogram Binning
+        """
+        frame = ChartFrame(["price"], {"price": [1, 2, 2, 3, 3, 3, None, 10]})
+        self.assertEqual(frame.detect_chart_type("price distribution"), "histogram")
+        chart = frame.build("histogram", "price distribution")
+        self.assertEqual(sum(chart["data"]["datasets"][0]["data"]), 7)
+        self.assertEqual(chart["data"]["labels"][0].split(" – ")[0], "1")
+
+    def test_scatter_and_missing_columns(self):
+        """
+        Test Case UT-CHART-006: Scatter Needs Two Numeric Columns
+        """
+        frame = ChartFrame(["x", "y"], {"x": [1, 2, None], "y": [3.5, 4.5, 5.5]})
+        chart = frame.build("scatter", "relationship")
+        self.assertEqual(chart["data"]["datasets"][0]["data"], [{"x": 1.0, "y": 3.5}, {"x": 2.0, "y": 4.5}])
+        self.assertIn("error", self._orders().build("scatter", "relationship"))
+        self.assertEqual(ChartFrame([], {}).build("bar", "")["error"], "No data available")
+
+    def test_detect_chart_type(self):
+        """
+        Test Case UT-CHART-007: Chart Type Detection
+        """
+        frame = self._orders()
+        self.assertEqual(frame.detect_chart_type("monthly revenue trend"), "line")
+        self.assertEqual(frame.detect_chart_type("share of revenue per genre"), "pie")
+        self.assertEqual(frame.detect_chart_type("compare genres"), "bar")
+        self.assertEqual(ChartFrame(["genre"], {"genre": ["a", "b"]}).detect_chart_type("genres"), "bar")
+
+    def test_lttb_keeps_shape(self):
+        """
+        Test Case UT-CHART-008: Largest-Triangle-Three-Buckets
+        """
+        x = np.arange(10000, dtype="float64")
+        y = np.sin(x / 500)
+        y[7000] = 40.0
+        picks = lttb(x, y, 100)
+        self.assertEqual(len(picks), 100)
+        self.assertEqual((picks[0], picks[-1]), (0, 9999))
+        self.assertIn(7000, picks)
+        self.assertTrue(np.all(np.diff(picks) > 0))
+        self.assertEqual(len(lttb(x[:50], y[:50], 100)), 50)
+
+    def test_line_is_downsampled_to_the_width(self):
+        """
+        Test Case UT-CHART-009: Pixel-width Point Budget
+        """
+        days = [datetime.date(2020, 1, 1) + datetime.timedelta(days=i) for i in range(3000)]
+        frame = ChartFrame(["day", "sales"], {"day": days, "sales": [float(i % 97) for i in range(3000)]})
+        chart = frame.build("area", "sales over time", width=250)
+        self.assertEqual(len(chart["data"]["labels"]), 250)
+        self.assertEqual(chart["data"]["labels"][0], "2020-01-01")
+        self.assertEqual(chart["data"]["labels"][-1], str(days[-1]))
+        self.assertEqual(len(frame.build("line", "sales", width=0)["data"]["labels"]), Config.CHART_DEFAULT_WIDTH)
+
+    def test_scatter_grid_keeps_outliers(self):
+        """
+        Test Case UT-CHART-010: Scatter Grid Binning
+        """
+        rng = np.random.default_rng(0)
+        x, y = rng.normal(size=50000), rng.normal(size=50000)
+        x[123], y[123] = 100.0, 100.0
+        picks = grid_sample(x, y, 50, 25, 300)
+        self.assertLessEqual(len(picks), 300)
+        self.assertIn(123, picks)
+        frame = ChartFrame(["x", "y"], {"x": x.tolist(), "y": y.tolist()})
+        points = frame.build("scatter", "relationship", width=200, height=100)["data"]["datasets"][0]["data"]
+        self.assertLessEqual(len(points), (200 // Config.CHART_SCATTER_CELL_PX) * (100 // Config.CHART_SCATTER_CELL_PX))
+        self.assertIn({"x": 100.0, "y": 100.0}, points)
+
+
+if __name__ == '__main__':
+    unittest.main()
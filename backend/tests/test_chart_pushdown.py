@@ -0,0 +1,105 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add the backend directory to the sys.path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("DATABASE_URL_1", "sqlite://")
+
+from sqlalchemy import create_engine, text
+
+import app.db as db
+from config import Config
+from app.utils.chart_engine import ChartFrame
+from app.utils.chart_pushdown import PushdownFrame, chart_frame, compile_mongo_groups, mongo_source, sql_source
+from app.utils.result_store import StoredResult, to_columns
+
+MAJORS = ["cs", "math", "bio", "cs", None, "cs", "art"]
+
+
+class TestChartPushdown(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.engine = create_engine(f"sqlite:///{os.path.join(tmp.name, 'school.db')}")
+        self.addCleanup(self.engine.dispose)
+        self.rows = [
+            {"major": MAJORS[i % len(MAJORS)], "credits": (i % 6) if i % 5 else None, "enrolled": f"2024-02-{1 + i % 9:02d}"}
+            for i in range(700)
+        ]
+        with self.engine.begin() as conn:
+            conn.execute(text("CREATE TABLE students (major TEXT, credits INTEGER, enrolled TEXT)"))
+            conn.execute(text("INSERT INTO students VALUES (:major, :credits, :enrolled)"), self.rows)
+        # The index advisor would EXPLAIN on a background thread while the database is removed
+        for patcher in (patch.dict(db.engines, {"db_school": self.engine}), patch.object(db.index_advisor, "record_sql")):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.columns, self.data = to_columns(self.rows)
+        self.source = sql_source({"db_school": "SELECT major, credits, enrolled FROM students;"}, {"db_school": []})
+
+    def _both(self, chart_type, source=None):
+        pushed = PushdownFrame(self.columns, self.data, source or self.source)
+        return pushed, pushed.build(chart_type, "students"), ChartFrame(self.columns, self.data).build(chart_type, "students")
+
+    def test_groups_are_computed_by_the_database(self):
+        """
+        Test Case UT-PUSH-001: GROUP BY Pushdown Matches In-memory
+        """
+        with patch.object(Config, "CHART_MAX_SLICES", 2):
+            pushed, chart, expected = self._both("pie")
+        self.assertEqual(pushed.aggregated_in, "database")
+        self.assertEqual(chart["data"], expected["data"])
+        self.assertEqual(chart["data"]["labels"][-1], "Other")
+
+    def test_ordered_series_and_histogram(self):
+        """
+        Test Case UT-PUSH-002: Time Series and Binning Pushdown
+        """
+        for chart_type in ("line", "histogram"):
+            pushed, chart, expected = self._both(chart_type)
+            self.assertEqual(pushed.aggregated_in, "database")
+            self.assertEqual(chart["data"], expected["data"])
+
+    def test_failures_fall_back_to_memory(self):
+        """
+        Test Case UT-PUSH-003: In-memory Fallback
+        """
+        broken = {"kind": "sql", "queries": {"db_school": "SELECT major, credits, enrolled FROM missing_table"}}
+        pushed, chart, expected = self._both("bar", broken)
+        self.assertEqual(pushed.aggregated_in, "memory")
+        self.assertEqual(chart["data"], expected["data"])
+        unsafe = {"kind": "sql", "queries": {"db_school": "DELETE FROM students"}}
+        pushed, _, _ = self._both("bar", unsafe)
+        self.assertEqual(pushed.aggregated_in, "memory")
+
+    def test_pushdown_is_chosen_for_large_results(self):
+        """
+        Test Case UT-PUSH-004: Pushdown Threshold
+        """
+        result = StoredResult("a" * 32, "s", self.columns, self.data, {"source": self.source}, 0)
+        with patch.object(Config, "CHART_PUSHDOWN_MIN_ROWS", 500):
+            self.assertIsInstance(chart_frame(result), PushdownFrame)
+            self.assertNotIsInstance(chart_frame(result, pushdown=False), PushdownFrame)
+        with patch.object(Config, "CHART_PUSHDOWN_MIN_ROWS", 5000):
+            self.assertNotIsInstance(chart_frame(result), PushdownFrame)
+            self.assertIsInstance(chart_frame(result, pushdown=True), PushdownFrame)
+        posted = StoredResult("", "s", self.columns, self.data, {}, 0)
+        self.assertNotIsInstance(chart_frame(posted, pushdown=True), PushdownFrame)
+
+    def test_mongo_find_becomes_pipeline_prefix(self):
+        """
+        Test Case UT-PUSH-005: $group Pipeline
+        """
+        source = mongo_source({"collection": "students", "filter": {"year": 2}, "limit": 100}, "school")
+        pipeline = compile_mongo_groups(source, "major", "credits", limit=8)
+        self.assertEqual(pipeline[:2], [{"$match": {"year": 2}}, {"$limit": 100}])
+        self.assertEqual(pipeline[3]["$group"], {"_id": "$major", "total": {"$sum": "$credits"}})
+        self.assertEqual(pipeline[4]["$facet"]["groups"], [{"$sort": {"total": -1}}, {"$limit": 8}])
+        self.assertIsNone(mongo_source({"collection": "students"}, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import tempfile
+
+# Add the backend directory to the sys.path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("DATABASE_URL_1", "sqlite://")
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+from app import db_async
+
+
+class TestDbAsync(unittest.TestCase):
+
+    def test_async_driver_mapping(self):
+        """
+        Test Case UT-ASYNC-001: Async Driver Selection
+        """
+        self.assertEqual(db_async._async_url(make_url("postgresql://u:p@host/db")).drivername, "postgresql+asyncpg")
+        self.assertEqual(db_async._async_url(make_url("postgresql+psycopg2://u:p@host/db")).drivername, "postgresql+asyncpg")
+        self.assertEqual(db_async._async_url(make_url("sqlite:///x.db")).drivername, "sqlite+aiosqlite")
+        self.assertIsNone(db_async._async_url(make_url("mssql+pyodbc://host/db")))
+
+    def test_databases_queried_concurrently(self):
+        """
+        Test Case UT-ASYNC-002: Async Multi-Database Execution
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            engines = {}
+            for name in ("db1", "db2"):
+                engines[name] = create_engine(f"sqlite:///{os.path.join(tmp, name + '.db')}")
+                with engines[name].begin() as conn:
+                    conn.execute(text("CREATE TABLE books (title TEXT, price REAL)"))
+                    conn.execute(text(f"INSERT INTO books VALUES ('{name} book', 9.5)"))
+            sql_dict = {"db1": "SELECT title, price FROM books", "db2": "SELECT missing FROM books", "db9": "SELECT 1"}
+            with patch.dict(db_async.engines, engines, clear=True), patch.dict(db_async._async_engines, clear=True):
+                results = asyncio.run(self._run(sql_dict))
+            self.assertEqual(results["db1"], [{"title": "db1 book", "price": 9.5}])
+            self.assertIn("error", results["db2"])
+            self.assertNotIn("db9", results)
+
+    @staticmethod
+    async def _run(sql_dict):
+        try:
+            return await db_async.execute_sql_on_all_databases_async(sql_dict)
+        finally:
+            await db_async.dispose_async_engines()
+
+
+if __name__ == '__main__':
+    unittest.main()
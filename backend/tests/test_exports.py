@@ -0,0 +1,237 @@
+import csv
+import datetime
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add the backend directory to the sys.path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("DATABASE_URL_1", "sqlite://")
+
+from openpyxl import load_workbook
+from sqlalchemy import create_engine, text
+
+import app.db as db
+from config import Config
+from app.utils.chart_pushdown import sql_source
+from app.utils.exports import export_filename, open_batches, pa, stream_export
+from app.utils.result_store import StoredResult, to_columns
+from app.utils.text_search import text_search
+
+
+class _FakeCopyConnection:
+    """psycopg2-style raw connection whose COPY writes `lines` CSV rows"""
+
+    def __init__(self, lines, fail=False):
+        self.lines, self.fail = lines, fail
+        self.sql, self.written, self.state = None, 0, "open"
+        self.stop = threading.Event()
+        self.connection = SimpleNamespace(cancel=self.stop.set)
+
+    def cursor(self):
+        return SimpleNamespace(copy_expert=self._copy, close=lambda: None)
+
+    def _copy(self, sql, file):
+        self.sql = sql
+        if self.fail:
+            raise RuntimeError("permission denied")
+        file.write("name,qty\n")
+        for n in range(self.lines):
+            if self.stop.is_set():
+                raise RuntimeError("canceling statement due to user request")
+            file.write(f"i{n},{n}\n")
+            self.written += 1
+
+    def close(self):
+        self.state = "closed"
+
+    def invalidate(self):
+        self.state = "invalidated"
+
+
+def _result(rows, result_id="", meta=None):
+    columns, data = to_columns(rows)
+    return StoredResult(result_id, "s", columns, data, meta or {}, 0)
+
+
+class TestExports(unittest.TestCase):
+
+    def setUp(self):
+        self.rows = [
+            {"title": "Dune", "price": Decimal("9.50"), "published": datetime.date(1965, 8, 1), "tags": ["sf"]},
+            {"title": "Emma, a novel", "price": 4, "published": None, "tags": {"genre": "romance"}},
+            {"title": "Ubik", "price": None, "published": datetime.date(1969, 1, 1), "tags": None},
+        ]
+        patcher = patch.object(Config, "EXPORT_BATCH_ROWS", 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _export(self, export_format, result=None):
+        return b"".join(stream_export(result or _result(self.rows), export_format))
+
+    def test_text_formats(self):
+        """
+        Test Case UT-EXPORT-001: CSV, JSON and NDJSON Streams
+        """
+        lines = list(csv.reader(io.StringIO(self._export("csv").decode("utf-8"))))
+        self.assertEqual(lines[0], ["title", "price", "published", "tags"])
+        # Decimals are written exactly, as the JSON responses and the Postgres COPY path write them
+        self.assertEqual(lines[1], ["Dune", "9.50", "1965-08-01", '["sf"]'])
+        self.assertEqual(lines[2], ["Emma, a novel", "4", "", '{"genre":"romance"}'])
+        self.assertEqual(len(lines), 4)
+
+        records = json.loads(self._export("json"))
+        self.assertEqual([record["title"] for record in records], ["Dune", "Emma, a novel", "Ubik"])
+        self.assertEqual(json.loads(self._export("json", StoredResult("", "s", [], {}, {}, 0))), [])
+        lines = self._export("ndjson").splitlines()
+        self.assertEqual(json.loads(lines[1])["tags"], {"genre": "romance"})
+        self.assertEqual(len(lines), 3)
+
+    def test_excel_workbook(self):
+        """
+        Test Case UT-EXPORT-002: Streamed Excel Workbook
+        """
+        rows = self.rows + [{"title": "bad\x01char", "price": float("nan"), "published": datetime.datetime(2024, 5, 1, 12, 30)}]
+        sheet = load_workbook(io.BytesIO(self._export("excel", _result(rows)))).active
+        values = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(values[0], ("title", "price", "published", "tags"))
+        self.assertEqual(values[1], ("Dune", 9.5, datetime.datetime(1965, 8, 1), '["sf"]'))
+        self.assertEqual(values[3], ("Ubik", None, datetime.datetime(1969, 1, 1), None))
+        self.assertEqual(values[4], ("badchar", None, datetime.datetime(2024, 5, 1, 12, 30), None))
+
+    @unittest.skipIf(pa is None, "pyarrow is not installed")
+    def test_columnar_formats(self):
+        """
+        Test Case UT-EXPORT-003: Parquet and Arrow IPC Batches
+        """
+        import pyarrow.parquet as pq
+        rows = [{"id": i, "label": None if i < 2 else f"n{i}", "mixed": i if i % 2 else "odd"} for i in range(5)]
+        table = pq.read_table(io.BytesIO(self._export("parquet", _result(rows))))
+        self.assertEqual(table.column("id").to_pylist(), list(range(5)))
+        self.assertEqual(table.column("label").to_pylist(), [None, None, "n2", "n3", "n4"])
+        self.assertEqual(table.column("mixed").to_pylist(), ["odd", "1", "odd", "3", "odd"])
+        self.assertEqual(pq.ParquetFile(io.BytesIO(self._export("parquet", _result(rows)))).num_row_groups, 3)
+
+        stream = pa.ipc.open_stream(self._export("arrow", _result(rows)))
+        self.assertEqual(stream.read_all().column("id").to_pylist(), list(range(5)))
+        prices = [{"price": value and Decimal(value)} for value in ("1.10", "2.5", "123456.78", None)]
+        for export_format in ("parquet", "arrow"):
+            data = self._export(export_format, _result(prices))
+            table = pq.read_table(io.BytesIO(data)) if export_format == "parquet" else pa.ipc.open_stream(data).read_all()
+            self.assertEqual(table.schema.field("price").type, pa.decimal128(38, 2))
+            self.assertEqual([str(value) for value in table.column("price").to_pylist()[:3]], ["1.10", "2.50", "123456.78"])
+        empty = StoredResult("", "s", [], {}, {}, 0)
+        self.assertEqual(pq.read_table(io.BytesIO(self._export("parquet", empty))).num_rows, 0)
+
+    def test_source_is_rerun_on_a_cursor(self):
+        """
+        Test Case UT-EXPORT-004: Export Re-runs the Source Query
+        """
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        engine = create_engine(f"sqlite:///{os.path.join(tmp.name, 'shop.db')}")
+        self.addCleanup(engine.dispose)
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE items (name TEXT, qty INTEGER)"))
+            conn.execute(text("INSERT INTO items VALUES (:name, :qty)"), [{"name": f"i{n}", "qty": n} for n in range(7)])
+        patcher = patch.dict(db.engines, {"db_shop": engine})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # Only the first row was kept; the export reads all seven from the database
+        stored = [{"name": "i0", "qty": 0}]
+        source = sql_source({"db_shop": "SELECT name, qty FROM items ORDER BY qty"}, {"db_shop": []})
+        batches = list(open_batches(_result(stored, "a" * 32, {"source": source})))
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 2, 1])
+        self.assertEqual(batches[-1], [("i6", 6)])
+
+        for query in ("SELECT name, qty FROM missing", "DELETE FROM items"):
+            broken = sql_source({"db_shop": query}, {"db_shop": []})
+            self.assertEqual(list(open_batches(_result(stored, "b" * 32, {"source": broken}))), [[("i0", 0)]])
+        with patch.object(Config, "EXPORT_FROM_SOURCE", False):
+            self.assertEqual(len(list(open_batches(_result(stored, "a" * 32, {"source": source})))), 1)
+
+    def test_postgres_copy_fast_path(self):
+        """
+        Test Case UT-EXPORT-006: COPY TO STDOUT for Postgres CSV Exports
+        """
+        raw = _FakeCopyConnection(3)
+        engine = SimpleNamespace(dialect=SimpleNamespace(name="postgresql", driver="psycopg2"), raw_connection=lambda: raw)
+        for patcher in (patch.dict(db.engines, {"db_pg": engine}),
+                        patch.object(text_search, "rewrite_sql", side_effect=lambda db_name, engine, sql: sql)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        stored = [{"name": "stored", "qty": 0}]
+
+        def export(sql, export_format="csv"):
+            meta = {"source": sql_source({"db_pg": sql}, {"db_pg": []})}
+            return stream_export(_result(stored, "c" * 32, meta), export_format)
+
+        self.assertEqual(b"".join(export("SELECT name, qty FROM items;")), b"name,qty\ni0,0\ni1,1\ni2,2\n")
+        self.assertEqual(raw.sql, "COPY (SELECT name, qty FROM items) TO STDOUT WITH (FORMAT csv, HEADER true)")
+        self.assertEqual(raw.state, "closed")
+
+        # Unsafe SQL never reaches the database; a failing COPY falls back before anything is sent
+        raw.sql = None
+        self.assertEqual(b"".join(export("DELETE FROM items")), b"name,qty\r\nstored,0\r\n")
+        self.assertIsNone(raw.sql)
+        raw.fail = True
+        self.assertEqual(b"".join(export("SELECT name, qty FROM items")), b"name,qty\r\nstored,0\r\n")
+        self.assertEqual(raw.state, "invalidated")
+
+        # A client that goes away cancels the COPY instead of letting it run to the end
+        raw = _FakeCopyConnection(10 ** 7)
+        chunks = export("SELECT name, qty FROM items")
+        self.assertTrue(next(chunks).startswith(b"name,qty\n"))
+        chunks.close()
+        self.assertTrue(raw.stop.is_set())
+        self.assertEqual(raw.state, "invalidated")
+        self.assertLess(raw.written, 10 ** 7)
+
+    def test_fanned_out_mongo_rows_are_not_rerun(self):
+        """
+        Test Case UT-EXPORT-007: Cross-Database Mongo Results Export Their Stored Rows
+        """
+        from app import create_app, routes
+        from app.utils.result_store import result_store
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        fanned_out = {"shop": [{"name": "Tata Nano", "_db": "shop", "_collection": "cars", "_server": "db2:27017"}]}
+        query = {"db_name": "cardb", "collection": "cars", "filter": {"name": "Tata Nano"}, "limit": 50}
+        for patcher in (patch.object(Config, "RESULT_STORE_DIR", tmp.name),
+                        patch.object(routes, "generate_mongo_query_from_nl", return_value=query),
+                        patch.object(routes, "detect_existence_question", return_value=None),
+                        patch.object(routes, "convert_result_to_natural_language", return_value="One car."),
+                        patch.object(routes, "execute_mongo_query", return_value=[]),
+                        patch("app.db_mongo.find_db_for_collection", return_value=None),
+                        patch("app.db_mongo.execute_mongo_query_across_dbs", return_value=fanned_out)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        rerun_patcher = patch("app.db_mongo.iter_mongo_query")
+        rerun = rerun_patcher.start()
+        self.addCleanup(rerun_patcher.stop)
+        response = create_app().test_client().post("/api/nl-to-mongodb", json={"question": "find the tata nano"})
+        self.assertEqual(response.json["db_name_used"], "shop")
+        stored = result_store.get(response.json["result_id"])
+        self.assertIsNone(stored.meta["source"])
+        lines = list(csv.reader(io.StringIO(b"".join(stream_export(stored, "csv")).decode("utf-8"))))
+        self.assertEqual(lines, [["name", "_db", "_collection", "_server"], ["Tata Nano", "shop", "cars", "db2:27017"]])
+        rerun.assert_not_called()
+
+    def test_filenames(self):
+        """
+        Test Case UT-EXPORT-005: Download File Names
+        """
+        self.assertEqual(export_filename("Top 10 books / 2024?", "excel"), "Top_10_books_2024.xlsx")
+        self.assertEqual(export_filename("../", "csv"), "data_export.csv")
+
+
+if __name__ == '__main__':
+    unittest.main()
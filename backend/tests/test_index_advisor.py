@@ -0,0 +1,80 @@
+import unittest
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+
+# Add the backend directory to the sys.path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, text
+
+from config import Config
+from app.utils.index_advisor import IndexAdvisor, mongo_filter_fields, sql_predicate_columns
+
+
+class TestIndexAdvisor(unittest.TestCase):
+
+    def test_mongo_filter_fields_equality_before_range(self):
+        """
+        Test Case UT-IA-001: Mongo Filter Field Extraction
+        """
+        fields = mongo_filter_fields({"year": {"$gte": 2015}, "$or": [{"name": "swift"}, {"model": "nano"}]})
+        self.assertEqual(fields, ("name", "model", "year"))
+        # Regexes no index can seek are left out; a case-sensitive ^prefix is kept as a range
+        self.assertEqual(mongo_filter_fields({"name": {"$regex": r"(?:^|\W)nano", "$options": "i"},
+                                              "model": {"$regex": "^Nan"}, "year": 2015}), ("year", "model"))
+
+    def test_sql_predicate_columns_resolves_aliases(self):
+        """
+        Test Case UT-IA-002: SQL Predicate Column Extraction
+        """
+        sql = ("SELECT b.title FROM books b JOIN authors a ON b.author_id = a.id "
+               "WHERE a.name = 'x = y' AND b.year > 1940 ORDER BY b.year")
+        self.assertEqual(sql_predicate_columns(sql), {"books": ("year", "author_id"), "authors": ("name", "id")})
+
+    def test_sqlite_full_scan_recommended_and_applied(self):
+        """
+        Test Case UT-IA-003: Recommend and Apply SQLite Index
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'advisor.db')}")
+            with engine.begin() as conn:
+                conn.execute(text("CREATE TABLE students (name TEXT, age INTEGER)"))
+            advisor = IndexAdvisor()
+            advisor._engines["db1"] = engine
+            for _ in range(3):
+                advisor._observe("sql", "db1", None, "SELECT name FROM students WHERE age >= 20", 10.0)
+
+            recs = advisor.recommendations()
+            self.assertEqual(len(recs), 1)
+            self.assertEqual(recs[0]["fields"], ["age"])
+            self.assertEqual(recs[0]["estimated_benefit_ms"], 27.0)
+
+            dry = advisor.apply([recs[0]["id"]])
+            self.assertFalse(dry[0]["applied"])
+            applied = advisor.apply([recs[0]["id"]], dry_run=False)
+            self.assertTrue(applied[0]["applied"])
+            self.assertEqual(advisor.recommendations(), [])
+            engine.dispose()
+
+    def test_admin_endpoints_need_the_configured_token(self):
+        """
+        Test Case UT-IA-004: Admin Access Requires ADMIN_TOKEN
+        """
+        os.environ.setdefault("DATABASE_URL_1", "sqlite://")
+        from app import create_app
+        client = create_app().test_client()
+        local = {"REMOTE_ADDR": "127.0.0.1"}
+        with patch.object(Config, "ADMIN_TOKEN", None):
+            # No token configured: denied even to local callers
+            self.assertEqual(client.get("/api/admin/index-advice", environ_base=local).status_code, 403)
+            self.assertEqual(client.get("/api/admin/profiles", headers={"X-Admin-Token": ""}).status_code, 403)
+        with patch.object(Config, "ADMIN_TOKEN", "s3cret"):
+            self.assertEqual(client.get("/api/admin/index-advice", environ_base=local).status_code, 403)
+            self.assertEqual(client.get("/api/admin/index-advice", headers={"X-Admin-Token": "s3cre"}).status_code, 403)
+            self.assertEqual(client.get("/api/admin/index-advice", headers={"X-Admin-Token": "s3cret"}).status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
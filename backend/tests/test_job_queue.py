@@ -0,0 +1,199 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+# Add the backend directory to the sys.path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("DATABASE_URL_1", "sqlite://")
+
+from config import Config
+from app.utils.job_queue import CANCELLED, FAILED, QUEUED, SUCCEEDED, JobQueue
+
+
+def _wait(queue, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job is not None and job.finished:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+class TestJobQueue(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        for name, value in (("JOB_DIR", tmp.name), ("JOB_WORKERS", 1), ("JOB_PROGRESS_INTERVAL", 0.0)):
+            patcher = patch.object(Config, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.queue = JobQueue()
+        self.addCleanup(self.queue.shutdown)
+
+    def test_progress_and_result(self):
+        """
+        Test Case UT-JOB-001: Job Runs to a Stored Result
+        """
+        def export(job, parts):
+            for n in range(parts):
+                job.update((n + 1) / parts, f"part {n + 1}")
+            job.write_result((f"line {n}\n".encode() for n in range(parts)), "text/csv", "lines.csv")
+
+        job = self.queue.submit("export", export, 3)
+        done = _wait(self.queue, job.id)
+        self.assertEqual(done.status, SUCCEEDED)
+        self.assertEqual(done.summary()["result_url"], f"/api/jobs/{job.id}/result")
+        self.assertEqual((done.progress, done.message, done.filename), (1.0, "part 3", "lines.csv"))
+        with open(done.result_path, "rb") as fh:
+            self.assertEqual(fh.read(), b"line 0\nline 1\nline 2\n")
+
+        failed = _wait(self.queue, self.queue.submit("query", lambda job: 1 / 0).id)
+        self.assertEqual((failed.status, failed.error), (FAILED, "division by zero"))
+        self.assertIsNone(self.queue.get("not-a-job-id"))
+
+    def test_cancel_queued_and_running(self):
+        """
+        Test Case UT-JOB-002: Cancellation
+        """
+        started = threading.Event()
+
+        def slow(job):
+            started.set()
+
+            def chunks():
+                while True:
+                    yield b"x" * 1024
+                    time.sleep(0.01)
+            job.write_result(chunks(), "application/octet-stream")
+
+        running = self.queue.submit("export", slow)
+        queued = self.queue.submit("export", slow)
+        self.assertTrue(started.wait(5))
+        self.assertEqual(self.queue.cancel(queued.id).status, CANCELLED)
+        self.assertEqual(self.queue.cancel(running.id).status, running.status)
+        self.assertEqual(_wait(self.queue, running.id).status, CANCELLED)
+        # The status is visible before the final save has replaced its .tmp file
+        running.future.result(5)
+        self.assertEqual(sorted(os.listdir(self.dir)), sorted([f"{running.id}.json", f"{queued.id}.json"]))
+
+    def test_other_workers_see_and_cancel_jobs(self):
+        """
+        Test Case UT-JOB-003: Job State Shared Through JOB_DIR
+        """
+        release = threading.Event()
+
+        def wait_for_cancel(job):
+            while not release.wait(0.01):
+                job.raise_if_cancelled()
+
+        job = self.queue.submit("query", wait_for_cancel)
+        other = JobQueue()
+        self.addCleanup(other.shutdown)
+        seen = other.get(job.id)
+        self.assertFalse(seen.owned)
+        self.assertIn(seen.status, (QUEUED, "running"))
+        other.cancel(job.id)
+        self.assertEqual(_wait(other, job.id).status, CANCELLED)
+        release.set()
+
+    def test_retention(self):
+        """
+        Test Case UT-JOB-004: Finished Jobs Expire
+        """
+        job = _wait(self.queue, self.queue.submit("export", lambda job: job.write_result([b"x"], "text/plain")).id)
+        with patch.object(Config, "JOB_SESSION_MAX_JOBS", 1):
+            newer = self.queue.submit("export", lambda job: None)
+            _wait(self.queue, newer.id)
+        # Over the session quota, the oldest finished job and its files go first
+        self.assertIsNone(self.queue.get(job.id))
+        self.assertFalse(os.path.exists(job.result_path))
+        with patch.object(Config, "JOB_RETENTION", -1):
+            self.assertIsNone(self.queue.get(newer.id))
+            self.queue._last_sweep = 0
+            self.queue._sweep()
+        self.assertEqual(os.listdir(self.dir), [])
+
+    def test_summaries_have_their_own_pool(self):
+        """
+        Test Case UT-JOB-006: Summary Jobs Never Queue Behind Exports
+        """
+        release = threading.Event()
+        export = self.queue.submit("export", lambda job: release.wait(5))
+        self.addCleanup(release.set)
+        summary = self.queue.submit("summary", lambda job: job.write_result([b"{}"], "application/json"))
+        # Waiting on a job this process runs blocks on its future, not on JOB_DIR re-reads
+        with patch.object(Config, "JOB_WAIT_INTERVAL", 60):
+            started = time.time()
+            self.assertEqual(self.queue.wait(summary.id, 5).status, SUCCEEDED)
+            self.assertLess(time.time() - started, 5)
+            self.assertFalse(self.queue.wait(export.id, 0.05).finished)
+        release.set()
+        self.assertEqual(self.queue.wait(export.id, 5).status, SUCCEEDED)
+
+
+class TestJobRoutes(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = patch.object(Config, "JOB_DIR", tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        from app import create_app
+        from app.utils.job_queue import job_queue
+        self.queue = job_queue
+        self.client = create_app().test_client()
+
+    def test_async_export_and_query(self):
+        """
+        Test Case UT-JOB-005: async=true Returns a Job
+        """
+        rows = [{"title": f"book {n}", "price": n} for n in range(25)]
+        accepted = self.client.post("/api/analytics/export", json={"rows": rows, "format": "csv", "async": True})
+        self.assertEqual(accepted.status_code, 202)
+        job_id = accepted.json["job_id"]
+        _wait(self.queue, job_id)
+        status = self.client.get(f"/api/jobs/{job_id}").json
+        self.assertEqual((status["status"], status["progress"]), (SUCCEEDED, 1.0))
+        download = self.client.get(status["result_url"])
+        self.assertIn("attachment", download.headers["Content-Disposition"])
+        self.assertEqual(download.data.decode().splitlines()[-1], "book 24,24")
+        self.assertEqual(self.client.post(f"/api/jobs/{job_id}/cancel").json["status"], SUCCEEDED)
+
+        with patch("app.routes.execute_safe_sql", return_value=[{"one": 1}]):
+            accepted = self.client.post("/api/query", json={"sql": "SELECT 1 AS one", "async": "true"})
+            _wait(self.queue, accepted.json["job_id"])
+        result = self.client.get(f"/api/jobs/{accepted.json['job_id']}/result")
+        self.assertEqual((result.status_code, result.json["rows"]), (200, [{"one": 1}]))
+        self.assertEqual(self.client.get("/api/jobs/" + "0" * 32).status_code, 404)
+
+    def test_query_job_keeps_request_setup(self):
+        """
+        Test Case UT-JOB-007: Query Jobs Run With the Request's ID and HTTP Errors
+        """
+        from flask import abort
+        from app.utils import structured_logging
+        seen = []
+
+        def forbidden(data):
+            seen.append((data, structured_logging.current_request_id()))
+            abort(403)
+
+        with patch("app.routes.execute_query", side_effect=forbidden):
+            accepted = self.client.post("/api/query", json={"sql": "SELECT 1", "async": True},
+                                        headers={"X-Request-ID": "req-7"})
+            job = _wait(self.queue, accepted.json["job_id"])
+        self.assertEqual(seen, [({"sql": "SELECT 1"}, "req-7")])
+        self.assertEqual((job.status, job.status_code), (SUCCEEDED, 403))
+        self.assertEqual(self.client.get(f"/api/jobs/{job.id}/result").status_code, 403)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import os
+import sys
+import json
+import datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+# Add the backend directory to the sys.path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import bson
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from bson.raw_bson import RawBSONDocument
+
+from config import Config
+from app.utils.json_provider import dumps_bytes, _decimal128_to_float, _decimal128_to_str
+
+
+class TestJsonProvider(unittest.TestCase):
+
+    def test_bson_types_serialized_in_one_pass(self):
+        """
+        Test Case UT-JS-001: BSON Type Serialization
+        """
+        oid = ObjectId()
+        row = {
+            "_id": oid,
+            "price": Decimal128("12.50"),
+            "created_at": datetime.datetime(2025, 1, 2, 3, 4, 5),
+            "nested": RawBSONDocument(bson.encode({"n": 1})),
+        }
+        decoded = json.loads(dumps_bytes({"data": [row]}))
+        self.assertEqual(decoded["data"][0]["_id"], str(oid))
+        self.assertEqual(decoded["data"][0]["price"], "12.50")
+        self.assertTrue(decoded["data"][0]["created_at"].startswith("2025-01-02T03:04:05"))
+        self.assertEqual(decoded["data"][0]["nested"], {"n": 1})
+
+    def test_decimal128_fast_path_matches_decimal(self):
+        """
+        Test Case UT-JS-002: Decimal128 Conversion Accuracy
+        """
+        for value in ["0", "-0.000001", "3.1415926535897932384626", "1E+10",
+                      "123456789012345678901234567890123", "-1E+400", "1E-6176"]:
+            d = Decimal128(value)
+            self.assertEqual(_decimal128_to_float(d), float(d.to_decimal()), value)
+            self.assertEqual(_decimal128_to_str(d), str(d.to_decimal()), value)
+        self.assertEqual(_decimal128_to_str(Decimal128("NaN")), "NaN")
+
+    def test_decimals_exact_unless_float_requested(self):
+        """
+        Test Case UT-JS-003: Decimal Precision
+        """
+        row = {"amount": Decimal("12345678901234567890.123456789"), "rate": Decimal128("0.10000000000000000000001")}
+        self.assertEqual(json.loads(dumps_bytes(row)),
+                         {"amount": "12345678901234567890.123456789", "rate": "0.10000000000000000000001"})
+        with patch.object(Config, "JSON_DECIMAL_AS_FLOAT", True):
+            self.assertEqual(json.loads(dumps_bytes(row)), {"amount": 1.2345678901234567e19, "rate": 0.1})
+
+    def test_jsonify_arguments(self):
+        """
+        Test Case UT-JS-004: jsonify() Through the Provider
+        """
+        from flask import Flask, jsonify
+        from app.utils.json_provider import FastJSONProvider
+        app = Flask(__name__)
+        app.json = FastJSONProvider(app)
+        with app.app_context():
+            self.assertEqual(jsonify({"price": Decimal("1.10")}).get_data(), b'{"price":"1.10"}\n')
+            self.assertEqual(jsonify(1, 2).json, [1, 2])
+            self.assertEqual(jsonify(a=1).json, {"a": 1})
+            self.assertEqual(jsonify().get_data(), b"null\n")
+            with self.assertRaises(TypeError):
+                jsonify(1, a=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
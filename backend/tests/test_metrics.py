@@ -0,0 +1,99 @@
+import atexit
+import json
+import tempfile
+import threading
+import unittest
+import os
+import sys
+
+# Add the backend directory to the sys.path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils.metrics import Counter, Gauge, Histogram, MetricsRegistry, cache_namespace
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_histogram_exposition_sums_thread_shards(self):
+        """
+        Test Case UT-MET-001: Histogram Aggregated Across Threads
+        """
+        registry = MetricsRegistry()
+        latency = registry.register(Histogram("demo_seconds", "Demo latency.", ("engine",), buckets=(0.1, 1.0)))
+
+        def work():
+            for value in (0.05, 0.5, 2.0):
+                latency.observe(value, "db1")
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        latency.observe(0.1, "db1")
+
+        text = registry.expose()
+        self.assertIn("# TYPE demo_seconds histogram", text)
+        self.assertIn('demo_seconds_bucket{engine="db1",le="0.1"} 5', text)
+        self.assertIn('demo_seconds_bucket{engine="db1",le="1"} 9', text)
+        self.assertIn('demo_seconds_bucket{engine="db1",le="+Inf"} 13', text)
+        self.assertIn('demo_seconds_count{engine="db1"} 13', text)
+        # Finished threads are folded in once and still counted on the next scrape
+        self.assertEqual(text, registry.expose())
+
+    def test_counter_and_gauge(self):
+        """
+        Test Case UT-MET-002: Counters, Gauges and Cache Namespaces
+        """
+        registry = MetricsRegistry()
+        hits = registry.register(Counter("demo_total", "Demo counter.", ("namespace", "result")))
+        in_flight = registry.register(Gauge("demo_in_flight", "Demo gauge.", ("route",)))
+        hits.inc(cache_namespace("summary:question:123"), "hit")
+        hits.inc(cache_namespace("summary:other"), "hit")
+        hits.inc(cache_namespace({"not": "a string"}), "miss")
+        in_flight.inc("/api/nl-to-sql")
+        in_flight.inc("/api/nl-to-sql")
+        in_flight.dec("/api/nl-to-sql")
+        text = registry.expose()
+        self.assertIn('demo_total{namespace="summary",result="hit"} 2', text)
+        self.assertIn('demo_total{namespace="other",result="miss"} 1', text)
+        self.assertIn('demo_in_flight{route="/api/nl-to-sql"} 1', text)
+
+    def test_series_summed_across_worker_processes(self):
+        """
+        Test Case UT-MET-003: Multiprocess Directory Aggregation
+        """
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        registry = MetricsRegistry()
+        requests = registry.register(Counter("demo_total", "Demo counter.", ("route",)))
+        in_flight = registry.register(Gauge("demo_in_flight", "Demo gauge.", ("route",)))
+        latency = registry.register(Histogram("demo_seconds", "Demo latency.", (), buckets=(1.0,)))
+        registry.enable_multiprocess(tmp.name, flush_interval=3600)
+        self.addCleanup(atexit.unregister, registry.flush)
+        requests.inc("/a")
+        latency.observe(0.5)
+        # Another worker's snapshot, as its flush would have written it
+        other = {"demo_total": [[["/a"], [2]], [["/b"], [1]]], "demo_in_flight": [[["/a"], [3]]],
+                 "demo_seconds": [[[], [0, 1, 2.0, 1]]]}
+        with open(os.path.join(tmp.name, "999999.json"), "w") as fh:
+            json.dump(other, fh)
+
+        text = registry.expose()
+        self.assertIn('demo_total{route="/a"} 3', text)
+        self.assertIn('demo_total{route="/b"} 1', text)
+        self.assertIn('demo_in_flight{route="/a"} 3', text)
+        self.assertIn("demo_seconds_count 2", text)
+        self.assertIn('demo_seconds_bucket{le="1"} 1', text)
+
+        # An exited worker keeps its counts but no longer reports requests in flight
+        registry.mark_process_dead(tmp.name, 999999)
+        self.assertEqual(sorted(os.listdir(tmp.name)), sorted([f"{os.getpid()}.json", "retired.json"]))
+        text = registry.expose()
+        self.assertIn('demo_total{route="/a"} 3', text)
+        self.assertNotIn('demo_in_flight{route="/a"} 3', text)
+        self.assertIn("demo_seconds_count 2", text)
+
+
+if __name__ == '__main__':
+    unittest.main()
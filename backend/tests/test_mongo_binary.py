@@ -0,0 +1,62 @@
+import unittest
+import os
+import sys
+
+# Add the backend directory to the sys.path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import bson
+from bson.binary import Binary
+
+from app.db_mongo import _locate_binary, InlineBinary
+
+PNG_BYTES = b'\x89PNG\r\n\x1a\n' + bytes(range(256)) * 40
+
+
+class TestMongoBinary(unittest.TestCase):
+
+    def test_locate_top_level_binary(self):
+        """
+        Test Case UT-MB-001: Locate Inline Binary Field
+        """
+        raw = bson.encode({"data": Binary(PNG_BYTES)})
+        offset, length = _locate_binary(raw, "data")
+        self.assertEqual(raw[offset:offset + length], PNG_BYTES)
+
+    def test_locate_nested_and_missing_binary(self):
+        """
+        Test Case UT-MB-002: Locate Nested Binary Field
+        """
+        raw = bson.encode({"image": {"data": Binary(PNG_BYTES)}})
+        offset, length = _locate_binary(raw, "image.data")
+        self.assertEqual(length, len(PNG_BYTES))
+        self.assertIsNone(_locate_binary(raw, "image.thumb"))
+        self.assertIsNone(_locate_binary(bson.encode({"data": "not binary"}), "data"))
+
+    def test_inline_binary_range_iteration(self):
+        """
+        Test Case UT-MB-003: Ranged Streaming of Inline Binary
+        """
+        raw = bson.encode({"data": Binary(PNG_BYTES)})
+        blob = InlineBinary(raw, *_locate_binary(raw, "data"), "doc1", "data")
+        self.assertEqual(blob.content_type, "image/png")
+        self.assertEqual(blob.size, len(PNG_BYTES))
+        chunks = list(blob.iter_range(100, 5000, 1024))
+        self.assertEqual(b"".join(chunks), PNG_BYTES[100:5000])
+        self.assertTrue(all(len(chunk) <= 1024 for chunk in chunks))
+
+    def test_inline_binary_etag(self):
+        """
+        Test Case UT-MB-004: Inline Binary ETag
+        """
+        raw = bson.encode({"data": Binary(PNG_BYTES)})
+        location = _locate_binary(raw, "data")
+        etag = InlineBinary(raw, *location, "doc1", "data").etag
+        self.assertEqual(InlineBinary(raw, *location, "doc1", "data").etag, etag)
+        self.assertNotEqual(InlineBinary(raw, *location, "doc2", "data").etag, etag)
+        edited = bson.encode({"data": Binary(PNG_BYTES[:-1] + b"\x00")})
+        self.assertNotEqual(InlineBinary(edited, *_locate_binary(edited, "data"), "doc1", "data").etag, etag)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,222 @@
+import os
+import sys
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add the backend directory to the sys.path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import db_mongo
+
+
+def _reset_state():
+    """Forget every client and bootstrap attempt, after any running attempt has finished"""
+    if db_mongo._bootstrap_thread is not None:
+        db_mongo._bootstrap_thread.join(timeout=15)
+    db_mongo._mongo_client = None
+    db_mongo._last_mongo_uri = None
+    db_mongo._mongo_clients.clear()
+    db_mongo._server_uris.clear()
+    db_mongo._catalog.update(built_at=0.0, databases={})
+    db_mongo._bootstrap_thread = None
+    db_mongo._first_attempt_done = threading.Event()
+    db_mongo._fallback_retry_at = 0.0
+
+
+def _fake_client():
+    client = MagicMock(name="MongoClient")
+    client.close = MagicMock()
+    return client
+
+
+class _FakeCursor(list):
+
+    def limit(self, n):
+        return _FakeCursor(self[:n])
+
+
+class _FakeServer:
+    """A MongoClient stand-in serving {db_name: {collection: [documents]}}"""
+
+    def __init__(self, databases):
+        self.databases = databases
+        self.listings = 0
+        self.closed = False
+
+    def list_database_names(self):
+        self.listings += 1
+        return ["admin"] + list(self.databases)
+
+    def close(self):
+        self.closed = True
+
+    def __getitem__(self, db_name):
+        server = self
+
+        class _Db:
+            name = db_name
+
+            def list_collection_names(self):
+                return list(server.databases.get(db_name, {}))
+
+            def __getitem__(self, coll):
+                collection = MagicMock(name=coll)
+                collection.find.side_effect = lambda flt, projection: _FakeCursor(
+                    dict(doc) for doc in server.databases[db_name][coll]
+                    if all(doc.get(k) == v for k, v in (flt or {}).items())
+                )
+                return collection
+
+        return _Db()
+
+
+def _without_configured_uris():
+    return {key: value for key, value in os.environ.items() if not key.startswith("MONGODB_URI")}
+
+
+class TestMongoBootstrap(unittest.TestCase):
+
+    def setUp(self):
+        _reset_state()
+        self.addCleanup(_reset_state)
+
+    def test_local_fallback_only_when_nothing_is_configured(self):
+        """
+        Test Case UT-MF-001: Local Fallback Probed Once, Never Federated
+        """
+        probed = []
+
+        def unreachable(uri):
+            probed.append(uri)
+            raise ConnectionError("refused")
+
+        with patch.dict(os.environ, _without_configured_uris(), clear=True), \
+                patch.object(db_mongo, "_probe_uri", side_effect=unreachable):
+            self.assertEqual(db_mongo._candidate_uris(), [])
+            db_mongo.start_mongo_bootstrap()
+            db_mongo._bootstrap_thread.join(timeout=5)
+            self.assertFalse(db_mongo._bootstrap_thread.is_alive())
+            self.assertEqual(probed, [db_mongo._fallback_uri()])
+            self.assertEqual(db_mongo.last_mongo_uri_tried(), db_mongo._fallback_uri())
+            # Not retried in the background, nor on demand until the backoff has passed
+            db_mongo._initialize_mongo_client()
+            self.assertEqual(len(probed), 1)
+
+        with patch.dict(os.environ, dict(_without_configured_uris(), MONGODB_URI_1="mongodb://db1:27017/"), clear=True):
+            self.assertEqual(db_mongo._candidate_uris(), ["mongodb://db1:27017/"])
+
+    def test_servers_probed_in_parallel(self):
+        """
+        Test Case UT-MF-002: First Healthy Server Usable Before Slow Probes Finish
+        """
+        fast, release = _fake_client(), threading.Event()
+
+        def probe(uri):
+            if "slow" in uri:
+                release.wait(5)
+                raise ConnectionError("timed out")
+            return fast
+
+        with patch.object(db_mongo, "_probe_uri", side_effect=probe):
+            pending = {"slow:27017": "mongodb://slow:27017/", "fast:27017": "mongodb://fast:27017/"}
+            connecting = threading.Thread(target=db_mongo._connect_pending, args=(pending,))
+            connecting.start()
+            self.assertTrue(db_mongo._first_attempt_done.wait(5))
+            self.assertIs(db_mongo._mongo_client, fast)
+            self.assertTrue(connecting.is_alive())
+            release.set()
+            connecting.join(5)
+        self.assertEqual(list(db_mongo._mongo_clients), ["fast:27017"])
+
+    def test_unreachable_servers_retried_with_backoff(self):
+        """
+        Test Case UT-MF-003: Exponential Reconnect Backoff
+        """
+        attempts = []
+
+        def probe(uri):
+            attempts.append(uri)
+            if len(attempts) < 4:
+                raise ConnectionError("refused")
+            return _fake_client()
+
+        env = dict(_without_configured_uris(), MONGODB_URI_1="mongodb://db1:27017/")
+        with patch.dict(os.environ, env, clear=True), patch.object(db_mongo, "_probe_uri", side_effect=probe), \
+                patch.object(db_mongo.Config, "MONGO_RECONNECT_BACKOFF_MAX", 4), \
+                patch.object(db_mongo.time, "sleep") as sleep:
+            db_mongo._bootstrap_loop()
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [1, 2, 4])
+        self.assertEqual(attempts, ["mongodb://db1:27017/"] * 4)
+        self.assertEqual(list(db_mongo._mongo_clients), ["db1:27017"])
+
+    def test_probe_pings_and_closes_failed_clients(self):
+        """
+        Test Case UT-MF-004: Probe Client Lifecycle
+        """
+        client = _fake_client()
+        with patch.object(db_mongo.pymongo, "MongoClient", return_value=client) as factory:
+            self.assertIs(db_mongo._probe_uri("mongodb://db1:27017/"), client)
+            self.assertEqual(factory.call_args.kwargs["serverSelectionTimeoutMS"], db_mongo.Config.MONGO_PROBE_TIMEOUT_MS)
+            client.admin.command.assert_called_once_with("ping")
+            client.close.assert_not_called()
+            client.admin.command.side_effect = ConnectionError("refused")
+            with self.assertRaises(ConnectionError):
+                db_mongo._probe_uri("mongodb://db1:27017/")
+            client.close.assert_called_once_with()
+
+
+class TestMongoFederation(unittest.TestCase):
+
+    def setUp(self):
+        _reset_state()
+        self.addCleanup(_reset_state)
+        self.first = _FakeServer({"cardb": {"cars": [{"name": "Tata Nano"}]}, "shop": {"orders": [{"n": 1}]}})
+        self.second = _FakeServer({"cardb": {"cars": [{"name": "Maruti Alto"}, {"name": "Tata Nano"}]}})
+        db_mongo._register_client("db1:27017", "mongodb://db1:27017/", self.first)
+        db_mongo._register_client("db2:27017", "mongodb://db2:27017/", self.second)
+        db_mongo._first_attempt_done.set()
+
+    def test_client_registry(self):
+        """
+        Test Case UT-MF-005: One Client per Server
+        """
+        self.assertEqual(db_mongo._server_key("mongodb://user:pw@DB2:27017,db1:27017/cardb?replicaSet=rs"),
+                         "db1:27017,db2:27017")
+        duplicate = _FakeServer({})
+        db_mongo._register_client("db1:27017", "mongodb://db1:27017/other", duplicate)
+        self.assertTrue(duplicate.closed)
+        self.assertIs(db_mongo._mongo_clients["db1:27017"], self.first)
+        # The first server registered stays the primary client
+        self.assertIs(db_mongo._mongo_client, self.first)
+        self.assertEqual(db_mongo.connected_mongo_servers(), ["mongodb://db1:27017/", "mongodb://db2:27017/"])
+
+    def test_catalog_cached_for_ttl(self):
+        """
+        Test Case UT-MF-006: Catalog Spans Servers and Is Reused Within the TTL
+        """
+        catalog = db_mongo.get_catalog()
+        self.assertEqual(catalog, {"cardb": {"db1:27017": ["cars"], "db2:27017": ["cars"]},
+                                   "shop": {"db1:27017": ["orders"]}})
+        self.assertIs(db_mongo._client_for_db("shop"), self.first)
+        db_mongo.get_catalog()
+        self.assertEqual((self.first.listings, self.second.listings), (1, 1))
+        db_mongo.get_catalog(refresh=True)
+        self.assertEqual((self.first.listings, self.second.listings), (2, 2))
+        with patch.object(db_mongo.time, "time", return_value=db_mongo._catalog["built_at"] + db_mongo.Config.MONGO_CATALOG_TTL + 1):
+            db_mongo.get_catalog()
+        self.assertEqual(self.first.listings, 3)
+
+    def test_query_fans_out_across_servers(self):
+        """
+        Test Case UT-MF-007: Same-Named Databases Merged Across Servers
+        """
+        with patch.object(db_mongo.index_advisor, "record_mongo"):
+            results = db_mongo.execute_mongo_query_across_dbs("cars", {"name": "Tata Nano"})
+            self.assertEqual(sorted(doc["_server"] for doc in results["cardb"]), ["db1:27017", "db2:27017"])
+            self.assertEqual(results["shop"], [])
+            self.assertEqual(db_mongo.find_db_for_collection("orders"), "shop")
+
+
+if __name__ == '__main__':
+    unittest.main()
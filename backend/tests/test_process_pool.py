@@ -0,0 +1,140 @@
+import csv
+import datetime
+import os
+import sys
+import tempfile
+import time
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
+
+# Add the backend directory to the sys.path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("DATABASE_URL_1", "sqlite://")
+
+from sqlalchemy import create_engine, text
+
+from config import Config
+from app.utils.chart_pushdown import sql_source
+from app.utils.chart_engine import ChartFrame
+from app.utils.exports import pa
+from app.utils.job_queue import CANCELLED, SUCCEEDED, JobQueue
+from app.utils.process_pool import ProcessPool, SharedColumns, load_columns
+from app.utils.result_store import StoredResult, to_columns
+
+
+def _wait(queue, job_id, timeout=60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job is not None and job.finished:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+@unittest.skipIf(pa is None, "pyarrow is not installed")
+class TestProcessPool(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = ProcessPool()
+        cls.patchers = [patch.object(Config, "PROCESS_POOL_WORKERS", 1), patch.object(Config, "PROCESS_POOL_MIN_ROWS", 1)]
+        for patcher in cls.patchers:
+            patcher.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.pool._executor is not None:
+            cls.pool._executor.shutdown()
+        for patcher in cls.patchers:
+            patcher.stop()
+
+    def setUp(self):
+        rows = [{"region": ["north", "south"][n % 2], "sales": Decimal(n) / 2, "day": datetime.date(2024, 1, 1 + n % 28),
+                 "doc": {"n": n} if n % 3 else None} for n in range(500)]
+        columns, data = to_columns(rows)
+        self.result = StoredResult("", "s", columns, data, {}, 0)
+
+    def test_shared_columns_round_trip(self):
+        """
+        Test Case UT-POOL-001: Columns Through Shared Memory
+        """
+        with SharedColumns(self.result.columns, self.result.data) as shared:
+            columns, data = load_columns(shared.handle)
+        self.assertEqual(columns, self.result.columns)
+        self.assertEqual(data["region"], self.result.data["region"])
+        self.assertEqual(data["sales"][3], Decimal("1.5"))
+        self.assertEqual(data["day"][0], datetime.date(2024, 1, 1))
+        # Nested documents travel as the JSON text exports write for them
+        self.assertEqual(data["doc"][:3], [None, '{"n":1}', '{"n":2}'])
+        name = shared.handle[0]
+        with self.assertRaises(FileNotFoundError):
+            from multiprocessing import shared_memory
+            shared_memory.SharedMemory(name=name)
+
+    def test_chart_built_in_worker(self):
+        """
+        Test Case UT-POOL-002: Chart Build Offloaded
+        """
+        chart_type, chart = self.pool.build_chart(self.result, "bar", "sales by region", None, None)
+        local = ChartFrame(self.result.columns, self.result.data).build("bar", "sales by region", None, None)
+        self.assertEqual(chart_type, "bar")
+        self.assertEqual(chart, local)
+        self.assertEqual(self.pool.build_chart(self.result, "auto", "sales by region", None, None)[0],
+                         ChartFrame(self.result.columns, self.result.data).detect_chart_type("sales by region"))
+
+    def test_export_job_written_by_worker(self):
+        """
+        Test Case UT-POOL-003: Export Job Encoded in a Worker Process
+        """
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        with patch.object(Config, "JOB_DIR", tmp.name):
+            queue = JobQueue()
+            self.addCleanup(queue.shutdown)
+            job = _wait(queue, queue.submit("export", self.pool.write_export, self.result, "csv", "sales.csv").id)
+            self.assertEqual((job.status, job.filename, job.mimetype), (SUCCEEDED, "sales.csv", "text/csv"))
+            with open(job.result_path, newline="") as fh:
+                lines = list(csv.reader(fh))
+            self.assertEqual(lines[0], ["region", "sales", "day", "doc"])
+            self.assertEqual(lines[2], ["south", "0.5", "2024-01-02", '{"n":1}'])
+            self.assertEqual(len(lines), 501)
+
+            big = StoredResult("", "s", ["n"], {"n": list(range(10 ** 6))}, {}, 0)
+            job = queue.submit("export", self.pool.write_export, big, "excel")
+            time.sleep(0.5)
+            queue.cancel(job.id)
+            self.assertEqual(_wait(queue, job.id).status, CANCELLED)
+            self.assertEqual([name for name in os.listdir(tmp.name) if name.startswith(job.id)], [f"{job.id}.json"])
+
+    def test_export_job_encodes_the_stored_rows(self):
+        """
+        Test Case UT-POOL-004: Offloaded Export Never Re-runs the Source
+        """
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        # A database the worker process could reach, holding fewer rows than were stored
+        url = f"sqlite:///{os.path.join(tmp.name, 'shop.db')}"
+        engine = create_engine(url)
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE items (name TEXT, qty INTEGER)"))
+            conn.execute(text("INSERT INTO items VALUES ('live', 1)"))
+        engine.dispose()
+        stored = [{"name": f"i{n}", "qty": n} for n in range(200)]
+        meta = {"source": sql_source({"db5": "SELECT name, qty FROM items"}, {"db5": []})}
+        result = StoredResult("a" * 32, "s", *to_columns(stored), meta, 0)
+
+        pool = ProcessPool()
+        with patch.dict(os.environ, {"DATABASE_URL_5": url}), patch.object(Config, "JOB_DIR", tmp.name):
+            queue = JobQueue()
+            self.addCleanup(queue.shutdown)
+            job = _wait(queue, queue.submit("export", pool.write_export, result, "csv").id)
+            with open(job.result_path, newline="") as fh:
+                lines = list(csv.reader(fh))
+        self.addCleanup(pool._executor.shutdown)
+        self.assertEqual((len(lines), lines[1]), (201, ["i0", "0"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import os
+import sys
+
+# Add the backend directory to the sys.path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils.profiler import Profiler
+
+
+def _busy_pipeline():
+    chunks = []
+    for i in range(200000):
+        chunks.append(str(i) * 3)
+    return len("".join(chunks))
+
+
+class TestProfiler(unittest.TestCase):
+
+    def test_profile_captures_stacks_and_memory(self):
+        """
+        Test Case UT-PROF-001: Header-Triggered Request Profile
+        """
+        profiler = Profiler()
+        self.assertEqual(profiler.trigger_for("/api/schema", requested=True), "header")
+        self.assertIsNone(profiler.trigger_for("/api/schema", requested=False))
+
+        session = profiler.begin("POST", "/api/nl-to-sql", "header")
+        # tracemalloc is process-wide, so a second concurrent profile is refused
+        self.assertIsNone(profiler.begin("POST", "/api/nl-to-sql", "header"))
+        _busy_pipeline()
+        profile_id = session.finish({"performance": {"total_ms": 1.0}})
+
+        profile = profiler.get(profile_id)
+        self.assertGreater(profile["samples"], 0)
+        self.assertIn("test_profiler.py:_busy_pipeline", profile["collapsed"])
+        self.assertGreater(profile["memory"]["peak_bytes"], 0)
+        self.assertTrue(profile["memory"]["top_allocations"])
+        self.assertEqual(profile["performance"], {"total_ms": 1.0})
+        self.assertEqual(profiler.summaries()[0]["id"], profile_id)
+        # The slot is free again once the profile is stored
+        profiler.begin("GET", "/test", "header").finish()
+
+
+if __name__ == '__main__':
+    unittest.main()
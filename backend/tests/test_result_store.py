@@ -0,0 +1,169 @@
+import datetime
+import os
+import sys
+import tempfile
+import time
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
+
+# Add the backend directory to the sys.path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from app.utils import result_store as result_store_module
+from app.utils.result_store import ResultStore, pa
+
+
+class TestResultStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        for name, value in {
+            "RESULT_STORE_ENABLED": True,
+            "RESULT_STORE_DIR": self.tmp.name,
+            "RESULT_STORE_MEMORY_BYTES": 10 * 1024 * 1024,
+            "RESULT_STORE_DISK_BYTES": 10 * 1024 * 1024,
+            "RESULT_STORE_TTL": 60,
+            "RESULT_STORE_SESSION_MAX_RESULTS": 20,
+            "RESULT_STORE_SESSION_MAX_BYTES": 1024 * 1024,
+        }.items():
+            patcher = patch.object(Config, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        result_store_module.set_session("session-a")
+        self.store = ResultStore()
+
+    def _rows(self, count=10):
+        return [{"id": i, "name": f"book {i}", "price": i * 1.5} for i in range(count)]
+
+    def test_round_trip_is_columnar(self):
+        """
+        Test Case UT-RS-001: Stored Result Round Trip
+        """
+        rows = self._rows() + [{"id": 99, "author": "x"}]
+        result_id = self.store.put(rows, question="all books")
+        stored = self.store.get(result_id)
+        self.assertEqual(stored.columns, ["id", "name", "price", "author"])
+        self.assertEqual(stored.data["id"][:3], [0, 1, 2])
+        self.assertEqual(stored.row_count, 11)
+        self.assertEqual(stored.meta, {"question": "all books"})
+        self.assertEqual(stored.rows()[-1], {"id": 99, "name": None, "price": None, "author": "x"})
+
+    def test_unknown_or_malformed_ids(self):
+        """
+        Test Case UT-RS-002: Unknown Result IDs
+        """
+        self.assertIsNone(self.store.get("0" * 32))
+        self.assertIsNone(self.store.get("../../etc/passwd"))
+        self.assertIsNone(self.store.put([]))
+
+    @unittest.skipIf(pa is None, "pyarrow is not installed")
+    def test_spills_to_disk_and_loads_back(self):
+        """
+        Test Case UT-RS-003: Spill to Disk Over the Memory Budget
+        """
+        with patch.object(Config, "RESULT_STORE_MEMORY_BYTES", 1):
+            first = self.store.put(self._rows(200))
+            second = self.store.put(self._rows(5))
+            stats = self.store.stats()
+            self.assertEqual(stats["spilled"], 2)
+            self.assertEqual(stats["memory_bytes"], 0)
+            self.assertTrue(os.path.exists(os.path.join(self.tmp.name, f"{first}.arrow")))
+            stored = self.store.get(first)
+        self.assertEqual(stored.row_count, 200)
+        self.assertEqual(stored.rows()[199]["name"], "book 199")
+        self.assertIsNotNone(self.store.get(second))
+
+    def test_results_expire(self):
+        """
+        Test Case UT-RS-004: TTL Expiry
+        """
+        result_id = self.store.put(self._rows())
+        with patch.object(Config, "RESULT_STORE_TTL", 0):
+            time.sleep(0.01)
+            self.assertIsNone(self.store.get(result_id))
+        self.assertEqual(self.store.stats()["results"], 0)
+
+    def test_session_quota_evicts_oldest(self):
+        """
+        Test Case UT-RS-005: Per-session Quota
+        """
+        with patch.object(Config, "RESULT_STORE_SESSION_MAX_RESULTS", 2):
+            first = self.store.put(self._rows())
+            second = self.store.put(self._rows())
+            result_store_module.set_session("session-b")
+            other = self.store.put(self._rows())
+            result_store_module.set_session("session-a")
+            third = self.store.put(self._rows())
+        self.assertIsNone(self.store.get(first))
+        for result_id in (second, third, other):
+            self.assertIsNotNone(self.store.get(result_id))
+
+    def test_oversized_results_are_not_stored(self):
+        """
+        Test Case UT-RS-006: Results Larger than the Session Quota
+        """
+        with patch.object(Config, "RESULT_STORE_SESSION_MAX_BYTES", 100):
+            self.assertIsNone(self.store.put(self._rows(50)))
+
+    @unittest.skipIf(pa is None, "pyarrow is not installed")
+    def test_spilled_result_is_visible_to_other_workers(self):
+        """
+        Test Case UT-RS-007: Shared Spill Directory
+        """
+        with patch.object(Config, "RESULT_STORE_MEMORY_BYTES", 1):
+            result_id = self.store.put(self._rows())
+        other_worker = ResultStore()
+        stored = other_worker.get(result_id)
+        self.assertEqual(stored.row_count, 10)
+        self.assertEqual(stored.session, "session-a")
+
+    @unittest.skipIf(pa is None, "pyarrow is not installed")
+    def test_every_result_is_visible_to_other_workers(self):
+        """
+        Test Case UT-RS-008: Results Written Through to the Shared Directory
+        """
+        result_id = self.store.put(self._rows())
+        self.assertEqual(ResultStore().get(result_id).row_count, 10)
+        # Spilling a shared result keeps the file; loading it back does too
+        with patch.object(Config, "RESULT_STORE_MEMORY_BYTES", 1):
+            self.store.put(self._rows())
+        self.assertEqual(self.store.stats()["memory_bytes"], 0)
+        self.assertEqual(self.store.get(result_id).row_count, 10)
+        self.assertEqual(ResultStore().get(result_id).row_count, 10)
+        self.store.delete(result_id)
+        self.assertIsNone(ResultStore().get(result_id))
+
+        with patch.object(Config, "RESULT_STORE_SHARED", False):
+            private = self.store.put(self._rows())
+        self.assertIsNone(ResultStore().get(private))
+        self.assertIsNotNone(self.store.get(private))
+
+    @unittest.skipIf(pa is None, "pyarrow is not installed")
+    def test_types_survive_other_workers_and_spills(self):
+        """
+        Test Case UT-RS-009: Column Types Kept Through the Shared Files
+        """
+        rows = [
+            {"price": Decimal("1.10"), "day": datetime.date(2024, 1, 2), "at": datetime.datetime(2024, 1, 2, 3, 4, 5),
+             "blob": b"\x00\x01", "doc": {"tags": ["a"], "n": 1}, "mixed": 1, "empty": None},
+            {"price": Decimal("2.25"), "day": datetime.date(2024, 1, 3), "at": None,
+             "blob": None, "doc": None, "mixed": "one", "empty": None},
+        ]
+        result_id = self.store.put(rows, question="prices")
+        foreign = ResultStore().get(result_id)
+        self.assertEqual(foreign.rows(), rows)
+        self.assertIsInstance(foreign.data["price"][0], Decimal)
+        self.assertEqual(str(foreign.data["price"][0]), "1.10")
+        self.assertEqual(foreign.meta, {"question": "prices"})
+
+        with patch.object(Config, "RESULT_STORE_SHARED", False), patch.object(Config, "RESULT_STORE_MEMORY_BYTES", 1):
+            spilled = self.store.put(rows)
+            self.assertEqual(self.store.stats()["memory_bytes"], 0)
+            self.assertEqual(self.store.get(spilled).rows(), rows)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import asyncio
+import datetime
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
+
+# Add the backend directory to the sys.path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("DATABASE_URL_1", "sqlite://")
+
+from config import Config
+from app.utils import llm_handler
+from app.utils.result_store import to_columns
+from app.utils.result_summary import local_summary, summary_mode
+
+
+def _summary(question, rows):
+    return local_summary(question, *to_columns(rows))
+
+
+class TestLocalSummary(unittest.TestCase):
+
+    def test_statistics_over_the_full_result(self):
+        """
+        Test Case UT-SUMMARY-001: Column Statistics
+        """
+        rows = [{"book_id": n, "genre": "fiction" if n % 4 else "poetry", "price": Decimal(n % 10),
+                 "published": datetime.date(2000 + n % 20, 1, 1), "note": None}
+                for n in range(1000)]
+        rows.append({"book_id": 1000, "genre": None, "price": Decimal(500), "published": datetime.date(2024, 6, 1), "note": None})
+        summary = _summary("which genre has the most books", rows)
+        self.assertGreaterEqual(summary.confidence, Config.SUMMARY_MIN_CONFIDENCE)
+        self.assertEqual(summary.stats["price"]["outliers"], 1)
+        self.assertEqual(summary.stats["genre"]["top"], [("fiction", 750), ("poetry", 250)])
+        self.assertEqual(summary.text, (
+            "1,001 rows: genre has 2 distinct values, mostly fiction (750) and poetry (250); "
+            "price ranges 0 to 500 (mean 5.00, 1 outlier); published spans 2000-01-01 to 2024-06-01 (24.4 years); "
+            "book_id has 1,001 distinct values, e.g. 0, 1, 2."
+        ))
+
+    def test_confidence_and_small_results(self):
+        """
+        Test Case UT-SUMMARY-002: Low-Confidence Lists and Single Rows
+        """
+        names = _summary("list the authors", [{"name": f"author {n}"} for n in range(20)])
+        self.assertLess(names.confidence, Config.SUMMARY_MIN_CONFIDENCE)
+        self.assertEqual(_summary("", [{"title": "Dune", "price": 9.5, "isbn": None}]).text, "1 row: title Dune, price 9.5.")
+        docs = _summary("", [{"tags": ["a"], "n": 1}, {"tags": ["a"], "n": 1}])
+        self.assertEqual(docs.text, "2 rows: n is 1 throughout; tags is ['a'] throughout.")
+
+    def test_modes(self):
+        """
+        Test Case UT-SUMMARY-003: Per-Request Summary Mode
+        """
+        rows = [{"genre": "fiction", "sales": n} for n in range(5)]
+        names = [{"name": f"author {n}"} for n in range(5)]
+        self.assertEqual(summary_mode("LLM"), "llm")
+        self.assertEqual(summary_mode("bogus"), Config.SUMMARY_MODE)
+
+        def source(*args):
+            return llm_handler.summarize(*args, defer=False)["summary_source"]
+
+        with patch.object(llm_handler, "generate_summary", return_value="From Gemini.") as gemini:
+            self.assertEqual(source("sales", rows, "auto"), "local")
+            self.assertEqual(source("authors", names, "local"), "local")
+            gemini.assert_not_called()
+            self.assertEqual(source("authors", names, "auto"), "llm")
+            self.assertEqual(llm_handler.summarize("sales", rows, "llm", False)["summary"], "From Gemini.")
+            # Gemini sees the local statistics along with the sample rows
+            self.assertIn("sales ranges 0 to 4", gemini.call_args.args[2])
+        self.assertEqual(llm_handler.summarize("sales", [], "llm")["summary"], None)
+
+    def test_async_statistics_off_the_event_loop(self):
+        """
+        Test Case UT-SUMMARY-005: Async Summary Keeps pandas Off the Loop Thread
+        """
+        threads = []
+        real = llm_handler._local_summary
+
+        def local(*args):
+            threads.append(threading.get_ident())
+            return real(*args)
+
+        rows = [{"genre": "fiction", "sales": n} for n in range(5)]
+        with patch.object(llm_handler, "_local_summary", side_effect=local):
+            fields = asyncio.run(llm_handler.summarize_async("sales", rows, "local"))
+        self.assertEqual(fields["summary_source"], "local")
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], threading.get_ident())
+
+
+class TestDeferredSummary(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        for patcher in (patch.object(Config, "JOB_DIR", tmp.name), patch.object(Config, "SUMMARY_DEFERRED", True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        from app import create_app
+        self.client = create_app().test_client()
+
+    def test_summary_follows_the_data(self):
+        """
+        Test Case UT-SUMMARY-004: Deferred Gemini Summary
+        """
+        rows = [{"name": f"author {n}"} for n in range(5)]
+        release = threading.Event()
+
+        def gemini(question, rows, statistics):
+            release.wait(5)
+            llm_handler.cache_handler.set(llm_handler._summary_cache_key(question, rows), "Five authors.")
+            return "Five authors."
+
+        with patch.object(llm_handler, "generate_summary", side_effect=gemini):
+            fields = llm_handler.summarize("list authors", rows, "llm")
+            self.assertEqual((fields["summary_status"], fields["summary_source"]), ("pending", "local"))
+            self.assertEqual(fields["summary"], "5 rows: name has 5 distinct values, e.g. author 0, author 1, author 2.")
+            pending = self.client.get(fields["summary_url"])
+            self.assertEqual((pending.status_code, pending.json["summary_status"]), (202, "pending"))
+            release.set()
+            events = self.client.get(fields["summary_events_url"])
+            self.assertEqual(events.mimetype, "text/event-stream")
+            event, data = events.get_data(as_text=True).strip().split("\n")
+            self.assertEqual(event, "event: summary")
+            self.assertEqual(json.loads(data[len("data: "):])["summary"], "Five authors.")
+            ready = self.client.get(fields["summary_url"]).json
+            self.assertEqual((ready["summary_status"], ready["summary_source"]), ("ready", "llm"))
+
+            # Once cached under summary:, the same result is summarized at once
+            self.assertEqual(llm_handler.summarize("list authors", rows, "llm")["summary_status"], "ready")
+        self.assertEqual(self.client.get("/api/summary/" + "0" * 32).status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import os
+import sys
+from decimal import Decimal
+
+# Add the backend directory to the sys.path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, text
+
+from app.sql_executor import execute_safe_sql
+from app.utils.sql_rows import column_converters
+
+
+class TestSqlExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        with self.engine.begin() as conn:
+            conn.execute(text("CREATE TABLE departments (name TEXT, budget REAL, logo BLOB)"))
+            conn.execute(text("INSERT INTO departments VALUES ('Physics', 1200.5, x'0102'), ('Maths', NULL, NULL)"))
+
+    def test_safe_select_returns_json_ready_rows(self):
+        """
+        Test Case UT-SQL-001: Safe SELECT Execution
+        """
+        result = execute_safe_sql("```sql\nSELECT name, budget, logo FROM departments ORDER BY name\n```", engine=self.engine)
+        self.assertTrue(result["success"])
+        self.assertEqual(result["rows"][0], {"name": "Maths", "budget": None, "logo": None})
+        self.assertEqual(result["rows"][1], {"name": "Physics", "budget": 1200.5, "logo": "AQI="})
+
+    def test_unsafe_query_rejected(self):
+        """
+        Test Case UT-SQL-002: Unsafe Query Rejection
+        """
+        result = execute_safe_sql("DELETE FROM departments", engine=self.engine)
+        self.assertFalse(result["success"])
+
+    def test_converters_from_postgres_type_codes(self):
+        """
+        Test Case UT-SQL-003: Column Converters from Cursor Description
+        """
+        description = [("name", 25), ("budget", 1700)]
+        converters = dict(column_converters([*description, ("logo", 17)], [("Physics", Decimal("10.50"), b"\x01\x02")]))
+        # numeric stays an exact Decimal (the JSON provider writes it as a string); bytea becomes base64
+        self.assertEqual(sorted(converters), [2])
+        self.assertEqual(converters[2](b"\x01\x02"), "AQI=")
+
+
+if __name__ == '__main__':
+    unittest.main()
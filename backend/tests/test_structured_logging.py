@@ -0,0 +1,104 @@
+import json
+import logging
+import queue
+import unittest
+import os
+import sys
+
+# Add the backend directory to the sys.path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils import structured_logging
+from app.utils.structured_logging import JSONFormatter, payload
+
+
+class TestStructuredLogging(unittest.TestCase):
+
+    def tearDown(self):
+        structured_logging.end_request()
+
+    def _queued_record(self, logger, level, msg, *args, **kwargs):
+        log_queue = queue.Queue(maxsize=10)
+        handler = structured_logging._NonBlockingQueueHandler(log_queue)
+        handler.addFilter(structured_logging._RequestContextFilter())
+        logger.addHandler(handler)
+        try:
+            logger.log(level, msg, *args, **kwargs)
+        finally:
+            logger.removeHandler(handler)
+        return log_queue.get_nowait()
+
+    def test_json_line_carries_request_id_and_extra_fields(self):
+        """
+        Test Case UT-LOG-001: JSON Line with Request ID and Extra Fields
+        """
+        logger = logging.getLogger("test.structured.json")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        request_id = structured_logging.start_request("abc-123")
+        record = self._queued_record(logger, logging.INFO, "SQL generated in %.2fs", 1.5, extra={"db": "books"})
+        entry = json.loads(JSONFormatter().format(record))
+        self.assertEqual(request_id, "abc-123")
+        self.assertEqual(entry["request_id"], "abc-123")
+        self.assertEqual(entry["msg"], "SQL generated in 1.50s")
+        self.assertEqual(entry["level"], "INFO")
+        self.assertEqual(entry["db"], "books")
+
+    def test_exception_is_a_separate_field(self):
+        """
+        Test Case UT-LOG-002: Traceback Kept Out of the Message
+        """
+        logger = logging.getLogger("test.structured.exc")
+        logger.propagate = False
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = self._queued_record(logger, logging.ERROR, "Uncaught error", exc_info=True)
+        entry = json.loads(JSONFormatter().format(record))
+        self.assertEqual(entry["msg"], "Uncaught error")
+        self.assertIn("ValueError: boom", entry["exc"])
+
+    def test_unsafe_or_missing_request_id_is_replaced(self):
+        """
+        Test Case UT-LOG-003: Request ID Sanitizing
+        """
+        self.assertEqual(structured_logging.start_request("a b\r\nc"), "abc")
+        generated = structured_logging.start_request(None)
+        self.assertEqual(len(generated), 16)
+        self.assertEqual(structured_logging.current_request_id(), generated)
+
+    def test_large_payloads_are_hashed(self):
+        """
+        Test Case UT-LOG-004: Large Payload Truncation
+        """
+        self.assertEqual(payload({"a": 1}), "{'a': 1}")
+        self.assertEqual(payload(42), 42)
+        summary = payload("x" * 1000, limit=10)
+        self.assertEqual(summary["len"], 1000)
+        self.assertEqual(summary["preview"], "x" * 10)
+        self.assertEqual(len(summary["sha1"]), 12)
+
+    def test_debug_sampling_keeps_other_levels(self):
+        """
+        Test Case UT-LOG-005: Debug Sampling
+        """
+        sampler = structured_logging._DebugSampler(0.0)
+        debug = logging.LogRecord("x", logging.DEBUG, "", 0, "m", (), None)
+        warning = logging.LogRecord("x", logging.WARNING, "", 0, "m", (), None)
+        self.assertFalse(sampler.filter(debug))
+        self.assertTrue(sampler.filter(warning))
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        """
+        Test Case UT-LOG-006: Non-blocking Enqueue
+        """
+        handler = structured_logging._NonBlockingQueueHandler(queue.Queue(maxsize=1))
+        before = structured_logging._NonBlockingQueueHandler.dropped
+        record = logging.LogRecord("x", logging.INFO, "", 0, "m", (), None)
+        handler.enqueue(record)
+        handler.enqueue(record)
+        self.assertEqual(structured_logging._NonBlockingQueueHandler.dropped, before + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import os
+import re
+import sys
+import tempfile
+from unittest.mock import MagicMock, patch
+
+# Add the backend directory to the sys.path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, text
+
+from app.utils import text_search as text_search_module
+from app.utils.text_search import TextSearch, is_shadow_table
+
+
+def _collection(text_fields=None):
+    collection = MagicMock(name="collection")
+    indexes = {"_id_": {"key": [("_id", 1)]}}
+    if text_fields:
+        indexes["name_text"] = {"key": [("_fts", "text"), ("_ftsx", 1)], "weights": {field: 1 for field in text_fields}}
+    collection.index_information.return_value = indexes
+    return collection
+
+
+class TestTextSearch(unittest.TestCase):
+
+    def test_sqlite_like_routed_through_fts(self):
+        """
+        Test Case UT-TS-001: SQLite LIKE Rewritten to FTS5 Lookup
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'search.db')}")
+            with engine.begin() as conn:
+                conn.execute(text("CREATE TABLE authors (id INTEGER PRIMARY KEY, name TEXT)"))
+                conn.execute(text("INSERT INTO authors (name) VALUES ('George Orwell'), ('Aldous Huxley')"))
+            search = TextSearch()
+            sql = "SELECT name FROM authors WHERE name LIKE '%orwell%'"
+            # Queries never create indexes: with none present they run unchanged
+            self.assertEqual(search.rewrite_sql("db1", engine, sql), sql)
+            search.wait(timeout=10)
+            self.assertEqual(search.rewrite_sql("db1", engine, sql), sql)
+            with engine.connect() as conn:
+                tables = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master"))}
+            self.assertFalse(any(is_shadow_table(name) for name in tables))
+
+            # The explicit step: a dry run only reports the statements
+            planned = search.apply({"db1": engine}, dry_run=True, include_mongo=False)
+            self.assertEqual([(entry["target"], entry["fields"], entry["applied"]) for entry in planned],
+                             [("authors", ["name"], False)])
+            self.assertIn('CREATE VIRTUAL TABLE IF NOT EXISTS "_fts_authors"', planned[0]["statements"][0])
+            applied = search.apply({"db1": engine}, dry_run=False, include_mongo=False)
+            self.assertTrue(applied[0]["applied"])
+            self.assertEqual(search.plan({"db1": engine}, include_mongo=False), [])
+
+            self.assertEqual(search.rewrite_sql("db1", engine, sql), sql)
+            search.wait(timeout=10)
+            rewritten = search.rewrite_sql("db1", engine, sql)
+            self.assertIn('"_fts_authors"', rewritten)
+            with engine.begin() as conn:
+                conn.execute(text("INSERT INTO authors (name) VALUES ('Sonia Orwell')"))
+            with engine.connect() as conn:
+                rows = sorted(row[0] for row in conn.execute(text(rewritten)))
+            self.assertEqual(rows, ["George Orwell", "Sonia Orwell"])
+            self.assertTrue(is_shadow_table("_fts_authors_data"))
+            engine.dispose()
+
+    def test_mongo_filter_matches_word_prefixes(self):
+        """
+        Test Case UT-TS-002: Mongo Partial-Name Lookup
+        """
+        search = TextSearch()
+        lookup = search.mongo_filter("cardb", "cars", "name", "nano")
+        self.assertEqual(lookup, {"name": {"$regex": r"(?:^|\W)nano", "$options": "i"}})
+        # The pattern is plain enough to behave the same under Python's re and MongoDB's PCRE
+        pattern = re.compile(lookup["name"]["$regex"], re.I)
+        names = ["Nanotech", "Tata Nano", "Tata Nano XM", "Hyundai i20", "Ananova"]
+        self.assertEqual([name for name in names if pattern.search(name)], ["Nanotech", "Tata Nano", "Tata Nano XM"])
+        # Regex metacharacters in the value are matched literally
+        self.assertEqual(search.mongo_filter("cardb", "cars", "model", "i20 (2019)"),
+                         {"model": {"$regex": r"(?:^|\W)i20\ \(2019\)", "$options": "i"}})
+        # Non-text fields and values keep the equality filter
+        self.assertEqual(search.mongo_filter("cardb", "cars", "filename", "a.jpg"), {"filename": "a.jpg"})
+        self.assertEqual(search.mongo_filter("cardb", "cars", "name", 5), {"name": 5})
+
+    def test_mongo_lookup_uses_text_index_on_every_copy(self):
+        """
+        Test Case UT-TS-003: Mongo Text Index Narrows the Lookup
+        """
+        copies = {"db1:27017": _collection(["name"]), "db2:27017": _collection()}
+        clients = {key: {"cardb": {"cars": collection}} for key, collection in copies.items()}
+        regex = {"name": {"$regex": r"(?:^|\W)nano", "$options": "i"}}
+        search = TextSearch()
+        with patch.object(text_search_module, "_mongo_copies",
+                          side_effect=lambda coll: [("cardb", key, clients[key]) for key in copies]), \
+                patch("app.db_mongo.get_mongo_collections_schema",
+                      return_value={"cardb": {"cars": {"fields": {"name": "str", "year": "int"}}}}), \
+                patch.dict("app.db_mongo._mongo_clients", clients, clear=True):
+            self.assertEqual(search.mongo_filter("cardb", "cars", "name", "nano"), regex)
+            search.wait(timeout=10)
+            # One copy lacks the index, so the filter stays portable across databases
+            self.assertEqual(search.mongo_filter("cardb", "cars", "name", "nano"), regex)
+
+            planned = search.plan({}, include_mongo=True)
+            self.assertEqual([(entry["server"], entry["fields"]) for entry in planned], [("db2:27017", ["name"])])
+            self.assertEqual(planned[0]["statements"],
+                             ['db.cars.createIndex({"name": "text"}, {"default_language": "none"})'])
+            self.assertTrue(search.apply({}, dry_run=False)[0]["applied"])
+            copies["db2:27017"].create_index.assert_called_once_with([("name", "text")], default_language="none")
+            copies["db2:27017"].index_information.return_value = copies["db1:27017"].index_information.return_value
+
+            search.mongo_filter("cardb", "cars", "name", "nano")
+            search.wait(timeout=10)
+            self.assertEqual(search.mongo_filter("cardb", "cars", "name", 'tata "nano'),
+                             {"$text": {"$search": '"tata  nano"'},
+                              "name": {"$regex": '(?:^|\\W)tata\\ "nano', "$options": "i"}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import io
+import os
+import sys
+import shutil
+import tempfile
+from unittest.mock import patch
+
+# Add the backend directory to the sys.path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ.setdefault("DATABASE_URL_1", "sqlite://")
+
+from config import Config
+from app.utils import thumbnail_cache as thumbnail_module
+from app.utils.thumbnail_cache import ThumbnailCache
+
+
+@unittest.skipIf(thumbnail_module.Image is None, "Pillow is not installed")
+class TestThumbnailCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = ThumbnailCache(cache_dir=self.cache_dir, max_size=64, workers=1)
+        buf = io.BytesIO()
+        thumbnail_module.Image.new("RGB", (640, 480), (10, 120, 200)).save(buf, "JPEG")
+        self.payload = buf.getvalue()
+
+    def test_thumbnail_rendered_and_content_addressed(self):
+        """
+        Test Case UT-TC-001: Thumbnail Generation and Cache Key
+        """
+        ref = self.cache.thumbnail_ref("doc1", self.payload, "/api/mongo/binary/db/photos/doc1/data")
+        key = ref["$thumbnail"].rsplit("/", 1)[1]
+        path = self.cache.wait(key, timeout=10)
+        self.assertIsNotNone(path)
+        with thumbnail_module.Image.open(path) as img:
+            self.assertLessEqual(max(img.size), 64)
+        # Same id and bytes map to the same key; different bytes do not
+        self.assertEqual(key, self.cache.make_key("doc1", self.payload))
+        self.assertNotEqual(key, self.cache.make_key("doc1", self.payload + b"\x00"))
+
+    def test_failed_render_leaves_no_temp_file(self):
+        """
+        Test Case UT-TC-002: Failed Save Cleans Up
+        """
+        key = self.cache.make_key("doc1", self.payload)
+
+        def partial_save(image, path, *args, **kwargs):
+            with open(path, "wb") as fh:
+                fh.write(b"\xff\xd8")
+            raise OSError("disk full")
+
+        with patch.object(thumbnail_module.Image.Image, "save", partial_save):
+            self.assertIsNone(self.cache._render(key, self.payload))
+        self.assertEqual(os.listdir(os.path.dirname(self.cache.path_for(key))), [])
+        self.assertIsNone(self.cache._render(key, b"not an image"))
+        # A forked worker restarts its pool with the configured size
+        self.cache.reset_after_fork()
+        self.assertEqual(self.cache.workers, 1)
+
+    def test_warm_endpoint_is_admin_only_and_validates_limit(self):
+        """
+        Test Case UT-TC-003: Warm Thumbnails Request Checks
+        """
+        from app import create_app
+        client = create_app().test_client()
+        body = {"db_name": "photos", "collection": "images"}
+        admin = {"X-Admin-Token": "s3cret"}
+        with patch.object(Config, "ADMIN_TOKEN", "s3cret"), \
+                patch("app.routes.thumbnail_cache.warm_collection") as warm:
+            self.assertEqual(client.post("/api/mongo/thumbnails/warm", json=body).status_code, 403)
+            for limit in ("ten", -1, 2.5, True, None):
+                response = client.post("/api/mongo/thumbnails/warm", json=dict(body, limit=limit), headers=admin)
+                self.assertEqual(response.status_code, 400, limit)
+            warm.assert_not_called()
+            response = client.post("/api/mongo/thumbnails/warm", json=dict(body, limit="25"), headers=admin)
+            self.assertEqual(response.status_code, 202)
+            warm.assert_called_once_with("photos", "images", None, 25)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import asyncio
+import unittest
+import os
+import sys
+import time
+
+# Add the backend directory to the sys.path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils import timing
+
+
+class TestTiming(unittest.TestCase):
+
+    def tearDown(self):
+        timing.end_request()
+
+    def test_stages_and_cache_flags_in_performance(self):
+        """
+        Test Case UT-TIME-001: Stage Breakdown and Cache Flags
+        """
+        timing.start_request()
+        with timing.stage("llm_sql"):
+            time.sleep(0.01)
+        timing.record("sql_exec_db1", 2.0)
+        timing.record("sql_exec_db1", 3.0)
+        timing.cache_result("sql_generation", False)
+        timing.cache_result("summary", True)
+        performance = timing.performance()
+        self.assertGreaterEqual(performance["stages"]["llm_sql"], 10)
+        self.assertEqual(performance["stages"]["sql_exec_db1"], 5.0)
+        self.assertEqual(performance["cache"], {"sql_generation": False, "summary": True})
+        self.assertEqual(performance["cached"], "summary")
+        header = timing.current().server_timing()
+        self.assertIn("sql_exec_db1;dur=5.0", header)
+        self.assertIn("cache_summary;desc=hit", header)
+        self.assertTrue(header.split(", ")[-1].startswith("total;dur="))
+
+    def test_recording_outside_request_is_noop(self):
+        """
+        Test Case UT-TIME-002: No Active Request
+        """
+        with timing.stage("schema"):
+            pass
+        timing.cache_result("summary", True)
+        self.assertEqual(timing.performance(), {})
+
+    def test_context_follows_to_thread(self):
+        """
+        Test Case UT-TIME-003: Timing Follows asyncio.to_thread
+        """
+        @timing.timed("mongo_generate")
+        def blocking():
+            return 42
+
+        async def handler():
+            timing.start_request()
+            await asyncio.to_thread(blocking)
+            return timing.performance()
+
+        self.assertIn("mongo_generate", asyncio.run(handler())["stages"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add the backend directory to the sys.path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from app.utils import timing, tracing
+
+SAMPLED_PARENT = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        self.exported = []
+        patcher = patch.object(tracing.exporter, "submit", side_effect=self.exported.append)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        timing.end_request()
+        tracing.end_trace(None)
+
+    def test_unsampled_request_records_nothing(self):
+        """
+        Test Case UT-TRACE-001: Unsampled Requests Are No-ops
+        """
+        with patch.object(Config, "TRACE_SAMPLE_RATE", 0):
+            root = tracing.start_trace("POST /api/nl-to-sql")
+        self.assertIsNone(root)
+        with tracing.span("schema") as span:
+            span.set_attribute("db.rows", 3)
+        self.assertIs(span, tracing.NOOP_SPAN)
+        tracing.end_trace(root)
+        self.assertEqual(self.exported, [])
+
+    def test_incoming_traceparent_is_followed(self):
+        """
+        Test Case UT-TRACE-002: Distributed Trace Continuation
+        """
+        with patch.object(Config, "TRACE_SAMPLE_RATE", 0):
+            root = tracing.start_trace("POST /api/nl-to-sql", SAMPLED_PARENT)
+            unsampled = tracing.start_trace("POST /api/nl-to-sql", SAMPLED_PARENT[:-2] + "00")
+        self.assertIsNone(unsampled)
+        self.assertEqual(root.trace_id, "0af7651916cd43dd8448eb211c80319c")
+        self.assertEqual(root.parent_id, "b7ad6b7169203331")
+
+    def test_stages_become_child_spans_with_attributes(self):
+        """
+        Test Case UT-TRACE-003: Stage Spans and Attributes
+        """
+        timing.start_request()
+        root = tracing.start_trace("POST /api/nl-to-sql", SAMPLED_PARENT)
+        with timing.stage("llm_sql") as span:
+            span.set_attributes({"llm.prompt_tokens": 120, "llm.completion_tokens": None})
+            with tracing.span("sql.query", {"db.name": "db1"}) as query_span:
+                query_span.set_attribute("db.rows", 5)
+        tracing.end_trace(root)
+
+        self.assertEqual(len(self.exported), 1)
+        spans = {span.name: span for span in self.exported[0].spans}
+        self.assertEqual(set(spans), {"POST /api/nl-to-sql", "llm_sql", "sql.query"})
+        self.assertEqual(spans["llm_sql"].parent_id, root.span_id)
+        self.assertEqual(spans["sql.query"].parent_id, spans["llm_sql"].span_id)
+        self.assertEqual(spans["llm_sql"].attributes, {"llm.prompt_tokens": 120})
+        self.assertIn("llm_sql", timing.performance()["stages"])
+
+    def test_errors_mark_span_status(self):
+        """
+        Test Case UT-TRACE-004: Failed Span Status
+        """
+        root = tracing.start_trace("POST /api/nl-to-sql", SAMPLED_PARENT)
+        with self.assertRaises(ValueError):
+            with tracing.span("summary"):
+                raise ValueError("boom")
+        tracing.end_trace(root)
+        summary = next(span for span in self.exported[0].spans if span.name == "summary")
+        self.assertEqual(summary.to_otlp()["status"], {"code": 2, "message": "ValueError: boom"})
+
+    def test_export_writes_otlp_json_lines(self):
+        """
+        Test Case UT-TRACE-005: OTLP/JSON File Export
+        """
+        root = tracing.start_trace("GET /api/schema", SAMPLED_PARENT, {"http.route": "/api/schema"})
+        tracing.end_trace(root)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "traces.jsonl")
+            with patch.object(Config, "TRACE_EXPORT_FILE", path), patch.object(Config, "TRACE_OTLP_ENDPOINT", None):
+                tracing.TraceExporter().export(self.exported)
+            with open(path) as fh:
+                request = json.loads(fh.readline())
+        span = request["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+        self.assertEqual(span["traceId"], root.trace_id)
+        self.assertEqual(span["kind"], tracing.SPAN_KIND_SERVER)
+        self.assertEqual(span["attributes"], [{"key": "http.route", "value": {"stringValue": "/api/schema"}}])
+
+    def test_sqlalchemy_events_open_execute_spans(self):
+        """
+        Test Case UT-TRACE-006: SQLAlchemy Cursor Spans
+        """
+        from sqlalchemy import create_engine, text
+        engine = create_engine("sqlite://")
+        tracing.instrument_engine(engine, "db_test")
+        root = tracing.start_trace("POST /api/nl-to-sql", SAMPLED_PARENT)
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1")).fetchall()
+        tracing.end_trace(root)
+        execute = next(span for span in self.exported[0].spans if span.name == "sql.execute")
+        self.assertEqual(execute.attributes["db.name"], "db_test")
+        self.assertEqual(execute.attributes["db.system"], "sqlite")
+        self.assertEqual(execute.attributes["db.statement"], "SELECT 1")
+        self.assertEqual(execute.parent_id, root.span_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Benchmark /api/analytics/chart builders on a synthetic orders result.
+
+  - handler: AnalyticsHandler's per-row Python builders, on row dicts
+  - engine: ChartFrame's vectorized builders, on the stored columnar result
+    (role inference and column conversion included in every run)
+
+The handler builders only look at the first 20/50/100 rows for bar, line and
+scatter charts; pie (and the engine everywhere) aggregates the whole result.
+The handler has no histogram builder.
+
+Usage: python tools/bench_chart_engine.py [num_rows] [repeats]
+"""
+import os
+import sys
+import time
+import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from app.utils.analytics_handler import AnalyticsHandler
+from app.utils.chart_engine import ChartFrame
+
+CHART_TYPES = ["bar", "line", "pie", "scatter", "histogram"]
+
+
+def make_columns(n):
+    rng = np.random.default_rng(0)
+    genres = np.array([f"genre-{i}" for i in range(300)], dtype=object)
+    start = datetime.date(2020, 1, 1)
+    columns = ["genre", "order_date", "price", "quantity"]
+    data = {
+        "genre": genres[rng.integers(0, len(genres), n)].tolist(),
+        "order_date": [start + datetime.timedelta(days=int(d)) for d in rng.integers(0, 1500, n)],
+        "price": rng.gamma(2.0, 10.0, n).round(2).tolist(),
+        "quantity": rng.integers(1, 10, n).tolist(),
+    }
+    return columns, data
+
+
+def timed(fn, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    columns, data = make_columns(n)
+    rows = [dict(zip(columns, values)) for values in zip(*(data[name] for name in columns))]
+    handler = AnalyticsHandler()
+    print(f"Building charts over {n} rows (best of {repeats})")
+    print(f"  {'chart':<10} {'handler':>12} {'engine':>12}")
+    for chart_type in CHART_TYPES:
+        engine = timed(lambda: ChartFrame(columns, data).build(chart_type, "orders"), repeats)
+        if chart_type == "histogram":
+            print(f"  {chart_type:<10} {'n/a':>12} {engine * 1000:9.1f} ms")
+            continue
+        # The handler reads columns[0] as labels and columns[1] as values
+        ordered = ["genre", "price", "quantity"] if chart_type != "line" else ["order_date", "price"]
+        handler_rows = [{name: row[name] for name in ordered} for row in rows]
+        baseline = timed(lambda: handler.generate_chart_data(handler_rows, chart_type, "orders"), repeats)
+        print(f"  {chart_type:<10} {baseline * 1000:9.1f} ms {engine * 1000:9.1f} ms  ({baseline / engine:4.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
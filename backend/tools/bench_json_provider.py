@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Benchmark Mongo and SQL result serialization.
+
+Mongo, on synthetic 10k-document results:
+  - legacy: walk rows in Python to stringify `_id`, then stdlib json + the old MongoJSONEncoder
+  - provider: FastJSONProvider's one-pass encoder on native BSON types
+  - raw: RawBSONDocument rows decoded lazily during the same pass
+
+SQL, on synthetic rows with Decimal/date/UUID/bytea columns:
+  - stdlib: json.dumps with a per-cell isinstance `default`
+  - converters: per-column converters from cursor.description + orjson
+
+Usage: python tools/bench_json_provider.py [num_docs] [repeats]
+"""
+import os
+import sys
+import json
+import time
+import datetime
+import uuid
+from decimal import Decimal
+from json import JSONEncoder
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import bson
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from bson.raw_bson import RawBSONDocument
+
+from app.utils.json_provider import dumps_bytes, orjson
+from app.utils.sql_rows import result_to_dicts
+
+
+class MongoJSONEncoder(JSONEncoder):
+    """The encoder the app used before FastJSONProvider"""
+    def default(self, obj):
+        if isinstance(obj, ObjectId):
+            return str(obj)
+        if isinstance(obj, datetime.datetime):
+            return obj.isoformat()
+        return JSONEncoder.default(self, obj)
+
+
+def stdlib_default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime.date, datetime.datetime)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, memoryview):
+        return obj.hex()
+    raise TypeError(type(obj).__name__)
+
+
+# (name, psycopg2 type OID) for the synthetic SQL result
+SQL_DESCRIPTION = [("id", 23), ("name", 25), ("budget", 1700), ("founded", 1082), ("ref", 2950), ("blob", 17)]
+
+
+def make_sql_rows(n):
+    start = datetime.date(2000, 1, 1)
+    return [
+        (i, f"dept-{i}", Decimal(f"{i * 10}.25"), start + datetime.timedelta(days=i % 9000),
+         uuid.uuid4(), memoryview(b"\x00\x01" * 8))
+        for i in range(n)
+    ]
+
+
+def sql_stdlib(rows):
+    keys = [name for name, _ in SQL_DESCRIPTION]
+    return json.dumps([dict(zip(keys, row)) for row in rows], default=stdlib_default).encode('utf-8')
+
+
+class _Result:
+    """Just enough of a SQLAlchemy CursorResult for result_to_dicts"""
+    def __init__(self, rows):
+        self._rows = rows
+        self.cursor = type("Cursor", (), {"description": SQL_DESCRIPTION})()
+
+    def keys(self):
+        return [name for name, _ in SQL_DESCRIPTION]
+
+    def fetchall(self):
+        return self._rows
+
+
+def sql_converters(rows):
+    return dumps_bytes(result_to_dicts(_Result(rows)))
+
+
+def make_docs(n):
+    now = datetime.datetime(2025, 1, 1)
+    return [
+        {
+            "_id": ObjectId(),
+            "name": f"car-{i}",
+            "model": "nano" if i % 3 else "swift",
+            "price": Decimal128(f"{i}.50"),
+            "year": 2000 + i % 25,
+            "created_at": now + datetime.timedelta(minutes=i),
+            "tags": ["a", "b", str(i % 7)],
+            "owner": {"name": f"owner-{i}", "city": "Pune"},
+        }
+        for i in range(n)
+    ]
+
+
+def legacy(docs):
+    out = []
+    for doc in docs:
+        doc = dict(doc)
+        if isinstance(doc.get('_id'), ObjectId):
+            doc['_id'] = str(doc['_id'])
+        doc['price'] = str(doc['price'])  # MongoJSONEncoder cannot handle Decimal128
+        out.append(doc)
+    return json.dumps({"data": out}, cls=MongoJSONEncoder).encode('utf-8')
+
+
+def provider(docs):
+    return dumps_bytes({"data": docs})
+
+
+def timed(fn, arg, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    docs = make_docs(n)
+    raw_docs = [RawBSONDocument(bson.encode(doc)) for doc in docs]
+    print(f"Serializing {n} documents (best of {repeats}, orjson={'yes' if orjson else 'no'})")
+    baseline = timed(legacy, docs, repeats)
+    results = [
+        ("legacy walk + stdlib", baseline),
+        ("FastJSONProvider", timed(provider, docs, repeats)),
+        ("FastJSONProvider (RawBSON)", timed(provider, raw_docs, repeats)),
+    ]
+    for label, seconds in results:
+        print(f"  {label:<28} {seconds * 1000:8.1f} ms  ({baseline / seconds:4.1f}x)")
+
+    rows = make_sql_rows(n)
+    print(f"Serializing {n} SQL rows (Decimal/date/UUID/bytea columns)")
+    baseline = timed(sql_stdlib, rows, repeats)
+    for label, seconds in [("stdlib per-cell default", baseline), ("column converters + orjson", timed(sql_converters, rows, repeats))]:
+        print(f"  {label:<28} {seconds * 1000:8.1f} ms  ({baseline / seconds:4.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
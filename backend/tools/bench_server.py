@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Benchmark requests/sec of the Werkzeug dev server against gunicorn.
+
+Starts each server on its own port, drives it with concurrent keep-alive
+clients for a fixed duration and prints throughput and latency percentiles:
+  - dev: `python run.py` with FLASK_DEBUG=true (the old debug/reloader setup)
+  - gunicorn: `gunicorn -c gunicorn.conf.py wsgi:app`
+
+Usage: python tools/bench_server.py [--path /test] [--concurrency 32] [--duration 10]
+"""
+import argparse
+import http.client
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def start_server(mode, port, workers):
+    env = dict(os.environ, PORT=str(port))
+    if mode == "dev":
+        env["FLASK_DEBUG"] = "true"
+        cmd = [sys.executable, "run.py"]
+    else:
+        env["GUNICORN_WORKERS"] = str(workers)
+        cmd = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"]
+    # New session so the reloader child / gunicorn workers are stopped with the parent
+    return subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env, start_new_session=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def stop_server(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=30)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(proc.pid, signal.SIGKILL)
+
+
+def wait_ready(port, path, timeout=90):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", path)
+            if conn.getresponse().status < 500:
+                return True
+        except OSError:
+            time.sleep(0.5)
+    return False
+
+
+def drive(port, path, concurrency, duration):
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client():
+        local, failed = [], 0
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                conn.request("GET", path)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 500:
+                    failed += 1
+                local.append(time.perf_counter() - started)
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+
+    return {"rps": len(latencies) / duration, "p50": pct(0.50), "p99": pct(0.99), "errors": errors[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default="/test", help="GET endpoint to benchmark")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per server")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="gunicorn workers")
+    parser.add_argument("--modes", default="dev,gunicorn")
+    args = parser.parse_args()
+
+    print(f"GET {args.path}, {args.concurrency} keep-alive clients, {args.duration:.0f}s per server")
+    results = {}
+    for offset, mode in enumerate(args.modes.split(",")):
+        port = 5101 + offset
+        proc = start_server(mode, port, args.workers)
+        try:
+            if not wait_ready(port, args.path):
+                print(f"  {mode:<10} did not become ready on port {port}")
+                continue
+            drive(port, args.path, args.concurrency, 1.0)  # warm-up
+            results[mode] = drive(port, args.path, args.concurrency, args.duration)
+        finally:
+            stop_server(proc)
+        r = results[mode]
+        print(f"  {mode:<10} {r['rps']:9.1f} req/s  p50 {r['p50']:7.1f} ms  p99 {r['p99']:7.1f} ms  errors {r['errors']}")
+    if "dev" in results and "gunicorn" in results and results["dev"]["rps"]:
+        print(f"  gunicorn/dev throughput: {results['gunicorn']['rps'] / results['dev']['rps']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""List or apply index recommendations from a running backend.
+
+  python tools/index_advisor.py                  # show ranked recommendations
+  python tools/index_advisor.py --apply ID ...   # dry run: print the statements
+  python tools/index_advisor.py --apply ID ... --execute   # create the indexes
+
+Set ADMIN_TOKEN in the environment when the backend requires it.
+"""
+import argparse
+import json
+import os
+import urllib.request
+
+BASE = os.getenv('BACKEND_URL', 'http://localhost:5001')
+
+
+def call(path, payload=None):
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    req = urllib.request.Request(BASE + path, data=data, headers={'Content-Type': 'application/json'})
+    if os.getenv('ADMIN_TOKEN'):
+        req.add_header('X-Admin-Token', os.getenv('ADMIN_TOKEN'))
+    with urllib.request.urlopen(req, timeout=60) as resp:
+        return json.loads(resp.read().decode('utf-8'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--apply', nargs='+', metavar='ID', help='recommendation ids to apply')
+    parser.add_argument('--execute', action='store_true', help='actually create the indexes (default is a dry run)')
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    if not args.apply:
+        recs = call(f'/api/admin/index-advice?limit={args.limit}')['recommendations']
+        if not recs:
+            print('No full-scan query shapes observed yet.')
+        for rec in recs:
+            print(f"{rec['id']}  {rec['backend']:<5} {rec['db_name']}.{rec['target']}({', '.join(rec['fields'])})"
+                  f"  runs={rec['executions']} avg={rec['avg_ms']}ms benefit~{rec['estimated_benefit_ms']}ms")
+            print(f"    {rec['statement']}")
+        return
+
+    result = call('/api/admin/index-advice/apply', {'ids': args.apply, 'dry_run': not args.execute})
+    for entry in result['results']:
+        status = 'applied' if entry['applied'] else ('error: ' + entry['error'] if 'error' in entry else 'dry run')
+        print(f"{entry['id']}  {status}\n    {entry['statement']}")
+
+
+if __name__ == '__main__':
+    main()
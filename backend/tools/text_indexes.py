@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""List or create the text indexes used for partial-name lookups on a running backend.
+
+  python tools/text_indexes.py             # dry run: print the missing indexes and their statements
+  python tools/text_indexes.py --execute   # create them (pg_trgm GIN, SQLite FTS5, Mongo text indexes)
+
+The backend never creates these on its own. Set ADMIN_TOKEN in the environment
+when the backend requires it.
+"""
+import argparse
+import json
+import os
+import urllib.request
+
+BASE = os.getenv('BACKEND_URL', 'http://localhost:5001')
+
+
+def call(path, payload=None):
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    req = urllib.request.Request(BASE + path, data=data, headers={'Content-Type': 'application/json'})
+    if os.getenv('ADMIN_TOKEN'):
+        req.add_header('X-Admin-Token', os.getenv('ADMIN_TOKEN'))
+    with urllib.request.urlopen(req, timeout=600) as resp:
+        return json.loads(resp.read().decode('utf-8'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--execute', action='store_true', help='actually create the indexes (default is a dry run)')
+    args = parser.parse_args()
+
+    result = call('/api/admin/text-indexes/apply', {'dry_run': not args.execute})
+    if not result['results']:
+        print('All text indexes are in place.')
+    for entry in result['results']:
+        status = 'applied' if entry['applied'] else ('error: ' + entry['error'] if 'error' in entry else 'dry run')
+        print(f"{entry['backend']:<5} {entry['db_name']}.{entry['target']}({', '.join(entry['fields'])})  {status}")
+        for statement in entry['statements']:
+            print(f"    {statement}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
 import React, { useState, useEffect, useRef } from 'react';
 import Chart from 'chart.js/auto';
 import './AnalyticsChart.css';
+import { SESSION_ID } from '../session';
 
 const API_BASE = (() => {
   const fromEnv = (process.env.REACT_APP_API_URL || '').replace(/\/+$/, '');
@@ -9,7 +10,22 @@ const API_BASE = (() => {
   return isLocalhost ? 'http://localhost:5001' : '';
 })();
 
-const AnalyticsChart = ({ data, question, sql, onClose, initialChartType = 'auto' }) => {
+// Refer to the server-side result by id; post the rows only if it has expired
+const postAnalytics = async (path, body, data, resultId) => {
+  const send = (payload) => fetch(`${API_BASE}${path}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', 'X-Session-Id': SESSION_ID },
+    body: JSON.stringify(payload),
+  });
+  if (resultId) {
+    const response = await send({ ...body, result_id: resultId });
+    if (response.status !== 404) return response.json();
+  }
+  const response = await send({ ...body, rows: data });
+  return response.json();
+};
+
+const AnalyticsChart = ({ data, resultId, question, sql, onClose, initialChartType = 'auto' }) => {
   const [chartType, setChartType] = useState(initialChartType || 'auto');
   const [chartInstance, setChartInstance] = useState(null);
   const [isLoading, setIsLoading] = useState(false);
@@ -18,6 +34,7 @@ const AnalyticsChart = ({ data, question, sql, onClose, initialChartType = 'auto
   const [chartData, setChartData] = useState(null);
   const [suggestions, setSuggestions] = useState([]);
   const chartRef = useRef(null);
+  const containerRef = useRef(null);
 
   useEffect(() => {
     if (data && data.length > 0) {
@@ -27,7 +44,7 @@ const AnalyticsChart = ({ data, question, sql, onClose, initialChartType = 'auto
       const cleanQuestion = question.replace(/[^a-zA-Z0-9\s]/g, '').substring(0, 30);
       setExportFilename(cleanQuestion || 'data_export');
     }
-  }, [data, chartType]);
+  }, [data, resultId, chartType]);
 
   useEffect(() => {
     if (initialChartType && initialChartType !== chartType) {
@@ -45,12 +62,11 @@ const AnalyticsChart = ({ data, question, sql, onClose, initialChartType = 'auto
     if (!data || data.length === 0) return;
     setIsLoading(true);
     try {
-      const response = await fetch(`${API_BASE}/api/analytics/chart`, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ question, chart_type: chartType, rows: data }),
-      });
-      const result = await response.json();
+      // The server downsamples long series to what the canvas can show
+      const size = containerRef.current
+        ? { width: containerRef.current.clientWidth, height: containerRef.current.clientHeight }
+        : {};
+      const result = await postAnalytics('/api/analytics/chart', { question, chart_type: chartType, ...size }, data, resultId);
       if (result.success) {
         setChartData(result.chart_data);
         setSuggestions(result.suggestions || []);
@@ -74,12 +90,7 @@ const AnalyticsChart = ({ data, question, sql, onClose, initialChartType = 'auto
     if (!data || data.length === 0) return;
     setIsLoading(true);
     try {
-      const response = await fetch(`${API_BASE}/api/analytics/export`, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ rows: data, format: exportFormat, filename: exportFilename }),
-      });
-      const result = await response.json();
+      const result = await postAnalytics('/api/analytics/export', { format: exportFormat, filename: exportFilename }, data, resultId);
       if (result.success) {
         const link = document.createElement('a');
         link.href = `${API_BASE}${result.download_url}`;
@@ -98,7 +109,7 @@ const AnalyticsChart = ({ data, question, sql, onClose, initialChartType = 'auto
   return (
     <div className="analytics-inline">
       <div className="analytics-inline-content">
-        <div className="chart-container">
+        <div className="chart-container" ref={containerRef}>
           {isLoading ? (
             <div className="chart-loading">
               <div className="loading-spinner"></div>
@@ -129,6 +140,9 @@ const AnalyticsChart = ({ data, question, sql, onClose, initialChartType = 'auto
               <option value="csv">📄 CSV</option>
               <option value="excel">📊 Excel</option>
               <option value="json">🔧 JSON</option>
+              <option value="ndjson">🧾 NDJSON</option>
+              <option value="parquet">🧱 Parquet</option>
+              <option value="arrow">🏹 Arrow</option>
             </select>
           </div>
           <div className="control-group">
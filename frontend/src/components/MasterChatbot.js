@@ -1,6 +1,7 @@
 import { useEffect, useRef, useState } from 'react';
 import '../App.css';
 import AnalyticsChart from './AnalyticsChart';
+import { SESSION_ID } from '../session';
 
 function MasterChatbot() {
   const [messages, setMessages] = useState([]);
@@ -9,6 +10,7 @@ function MasterChatbot() {
   const [isGenerating, setIsGenerating] = useState(false);
   const [showAnalytics, setShowAnalytics] = useState(false);
   const [currentAnalyticsData, setCurrentAnalyticsData] = useState(null);
+  const [currentResultId, setCurrentResultId] = useState(null);
   const [currentQuestion, setCurrentQuestion] = useState('');
   const [currentSql, setCurrentSql] = useState('');
   const [currentChartType, setCurrentChartType] = useState('auto');
@@ -31,6 +33,10 @@ function MasterChatbot() {
       return value.toLocaleDateString();
     }
     if (typeof value === 'string') {
+      // Exact decimals arrive as strings (e.g. "12.50"); Date() would parse some of them
+      if (/^-?\d+(\.\d+)?([eE][+-]?\d+)?$/.test(value)) {
+        return value;
+      }
       const date = new Date(value);
       if (!isNaN(date.getTime())) {
         return date.toLocaleDateString();
@@ -123,6 +129,7 @@ function MasterChatbot() {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          'X-Session-Id': SESSION_ID,
         },
         body: JSON.stringify({ question: inputValue }),
         signal: abortControllerRef.current.signal
@@ -143,9 +150,24 @@ function MasterChatbot() {
           timestamp: new Date().toLocaleTimeString()
         };
         setMessages(prev => [...prev, botMessage]);
+        if (data.summary_status === 'pending' && data.summary_events_url) {
+          // The data arrives first; the Gemini summary replaces the local one when it is ready
+          const summaryEvents = new EventSource(`${API_BASE}${data.summary_events_url}`);
+          summaryEvents.addEventListener('summary', (event) => {
+            summaryEvents.close();
+            const update = JSON.parse(event.data);
+            if (update.summary) {
+              setMessages(prev => prev.map(message => (
+                message.id === botMessage.id ? { ...message, summary: update.summary } : message
+              )));
+            }
+          });
+          summaryEvents.onerror = () => summaryEvents.close();
+        }
         if (data.data && data.data.length > 0) {
           const requestedChartType = data.chart_request?.requested ? (data.chart_request.type || 'auto') : null;
           setCurrentAnalyticsData(data.data);
+          setCurrentResultId(data.result_id || null);
           setCurrentQuestion(inputValue);
           setCurrentSql('');
           if (requestedChartType) {
@@ -361,6 +383,7 @@ function MasterChatbot() {
             <div style={{ padding: '16px' }}>
               <AnalyticsChart
                 data={currentAnalyticsData}
+                resultId={currentResultId}
                 question={currentQuestion}
                 sql={currentSql}
                 initialChartType={currentChartType}
@@ -0,0 +1,20 @@
+// Per-tab id sent as X-Session-Id so the backend can apply its per-session result quota
+const KEY = 'chatbotSessionId';
+
+const newId = () => (
+  typeof window !== 'undefined' && window.crypto && window.crypto.randomUUID
+    ? window.crypto.randomUUID()
+    : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`
+);
+
+export const SESSION_ID = (() => {
+  try {
+    const existing = window.sessionStorage.getItem(KEY);
+    if (existing) return existing;
+    const id = newId();
+    window.sessionStorage.setItem(KEY, id);
+    return id;
+  } catch (e) {
+    return newId();
+  }
+})();